@@ -53,34 +53,33 @@ class Processor(object):
 
     def process(self):
         page_num = 1
+        cursor = ""
 
         if self.args.page_limit:
             self.num_pages = int(self.args.page_limit)
 
-        while True:
+        while cursor is not None:
             if self.num_pages and page_num > self.num_pages:
                 break
 
-            if not self.num_pages or page_num <= self.num_pages:
-                status = self.process_for_page(page_num)
-                print("Done page [{}/{}]".format(page_num, self.num_pages))
-
-                if not status:
-                    break
-            else:
-                break
+            cursor = self.process_for_page(cursor)
+            print("Done page [{}/{}]".format(page_num, self.num_pages))
 
             page_num += 1
 
         self.exporter.close()
 
-    def process_for_page(self, page_num):
+    def process_for_page(self, cursor):
+        """
+        Pages are read using cursor, each page is fetched in the same time.
+        @return cursor of next page, or None
+        """
         address = self.args.host
         workspace = self.args.workspace
         search_term = self.args.search
         key = self.args.key
 
-        full_address = f"https://{address}/apps/{workspace}/entries-json/?tags=1&search={search_term}&page={page_num}&key={key}"
+        full_address = f"https://{address}/apps/{workspace}/entries-json/?tags=1&search={search_term}&cursor={cursor}&key={key}"
         print(f"Fetching {full_address}")
         u = Url(full_address)
         u.options.ssl_verify = False
@@ -89,17 +88,14 @@ class Processor(object):
         if response.is_valid():
             json = self.response_to_json(response)
             if not self.are_entries(json):
-                return False
-
-            if self.num_pages == None:
-                self.num_pages = int(json["num_pages"])
+                return
 
             self.process_json_entries(json["entries"])
 
-            return True
+            return json.get("next")
         else:
             print(response)
-            return False
+            return
 
     def process_json_entries(self, entries):
         for entry in entries:
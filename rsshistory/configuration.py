@@ -28,10 +28,31 @@ class Configuration(object):
         self.enable_logging()
 
         self.context = {}
+        self._config_entry = None
+        self._config_version = None
         self.config_entry = ConfigurationEntry.get()
         self.get_context()
         self.nlps = {}
 
+    @property
+    def config_entry(self):
+        """
+        Configuration keeps its own copy of cached configuration.
+        The copy is read again, when configuration version changes
+        """
+        version = ConfigurationEntry.cache.get_version()
+        if self._config_entry is None or version != self._config_version:
+            self._config_entry = ConfigurationEntry.get()
+            self._config_version = self._config_entry.config_version
+
+        return self._config_entry
+
+    @config_entry.setter
+    def config_entry(self, config_entry):
+        ConfigurationEntry.cache.set_config_entry(config_entry)
+        self._config_entry = config_entry
+        self._config_version = config_entry.config_version
+
     def get_version():
         version = "0.0.0"
         path = Path("pyproject.toml")
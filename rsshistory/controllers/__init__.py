@@ -29,8 +29,9 @@ from .entriesutils import (
 )
 from .entrywrapper import EntryWrapper
 from .entrycleanup import EntriesCleanupAndUpdate, EntriesCleanup
-from .entryupdater import EntryUpdater, EntriesUpdater
-from .entrydatabuilder import EntryDataBuilder
+from .entryupdater import EntryUpdater, EntriesUpdater, EntriesRatingUpdater
+from .entrydatabuilder import EntryDataBuilder, EntryDataBatchBuilder
+from .searchindex import EntriesSearchIndex
 
 from .modelfiles import (
     ModelFilesBuilder,
@@ -38,6 +39,7 @@ from .modelfiles import (
 from .system import (
     SystemOperationController,
 )
+from .statistics import TableStatistics, SystemIndicators
 
 from .searchengines import SearchEngines, SearchEngineGoogle, SearchEngineGoogleCache
 
@@ -3,7 +3,7 @@ import os
 import json
 import traceback
 
-from django.db import models
+from django.db import models, connection, transaction
 from django.urls import reverse
 from django.db.models import Q
 from django.conf import settings
@@ -47,11 +47,15 @@ class BackgroundJobController(BackgroundJob):
         (BackgroundJob.JOB_CLEANUP, BackgroundJob.JOB_CLEANUP),
         (BackgroundJob.JOB_TRUNCATE_TABLE, BackgroundJob.JOB_TRUNCATE_TABLE),
         (BackgroundJob.JOB_MOVE_TO_ARCHIVE, BackgroundJob.JOB_MOVE_TO_ARCHIVE),
+        # new links should not wait for the whole library to be updated
+        (BackgroundJob.JOB_LINK_ADD, BackgroundJob.JOB_LINK_ADD,),
         (BackgroundJob.JOB_LINK_RESET_LOCAL_DATA, BackgroundJob.JOB_LINK_RESET_LOCAL_DATA),           # update data, recalculate
+        (BackgroundJob.JOB_PROCESS_VISITS, BackgroundJob.JOB_PROCESS_VISITS),
+        (BackgroundJob.JOB_ENTRIES_RESET_LOCAL_DATA, BackgroundJob.JOB_ENTRIES_RESET_LOCAL_DATA),
         (BackgroundJob.JOB_LINK_DOWNLOAD_SOCIAL, BackgroundJob.JOB_LINK_DOWNLOAD_SOCIAL),
+        (BackgroundJob.JOB_LINK_ADD_KEYWORDS, BackgroundJob.JOB_LINK_ADD_KEYWORDS),
         (BackgroundJob.JOB_LINK_UPDATE_DATA, BackgroundJob.JOB_LINK_UPDATE_DATA),
         (BackgroundJob.JOB_LINK_RESET_DATA, BackgroundJob.JOB_LINK_RESET_DATA,),
-        (BackgroundJob.JOB_LINK_ADD, BackgroundJob.JOB_LINK_ADD,),
         (BackgroundJob.JOB_LINK_SAVE, BackgroundJob.JOB_LINK_SAVE,),
         (BackgroundJob.JOB_LINK_SCAN, BackgroundJob.JOB_LINK_SCAN,),
         (BackgroundJob.JOB_SOURCE_ADD, BackgroundJob.JOB_SOURCE_ADD,),
@@ -64,6 +68,11 @@ class BackgroundJobController(BackgroundJob):
     ]
     # fmt: on
 
+    # how long claimed job is reserved for a task
+    LEASE_TIME_S = 60 * 30
+    # how many jobs processor claims at once
+    CLAIM_BATCH_SIZE = 10
+
     class Meta:
         proxy = True
 
@@ -151,6 +160,117 @@ class BackgroundJobController(BackgroundJob):
         processor = GenericJobsProcessor()
         processor.run_one_job(job)
 
+    def get_lease_expiry():
+        return DateUtils.get_datetime_now_utc() + timedelta(
+            seconds=BackgroundJobController.LEASE_TIME_S
+        )
+
+    def is_update_returning_supported():
+        if connection.vendor == "postgresql":
+            return True
+        if connection.vendor == "sqlite":
+            return connection.Database.sqlite_version_info >= (3, 35, 0)
+        return False
+
+    def claim_jobs(conditions, task=None, limit=1):
+        """
+        Reserves up to 'limit' jobs matching conditions for the task.
+
+        Jobs are picked in priority order, and reserved with one statement:
+         - postgres: UPDATE ... WHERE id IN (SELECT ... FOR UPDATE SKIP LOCKED) RETURNING
+         - sqlite: UPDATE ... WHERE id IN (SELECT ...) RETURNING, writes are serialized by sqlite
+
+        @returns list of claimed jobs
+        """
+        if limit < 1:
+            return []
+
+        lease_expires = BackgroundJobController.get_lease_expiry()
+
+        with transaction.atomic():
+            candidates = BackgroundJob.objects.filter(conditions).order_by(
+                *BackgroundJob.QUEUE_ORDERING
+            )
+            if connection.features.has_select_for_update_skip_locked:
+                candidates = candidates.select_for_update(skip_locked=True)
+            candidates = candidates.values("id")[:limit]
+
+            if BackgroundJobController.is_update_returning_supported():
+                ids = BackgroundJobController.claim_jobs_returning(
+                    candidates, task, lease_expires
+                )
+            else:
+                ids = [row["id"] for row in candidates]
+                BackgroundJob.objects.filter(Q(id__in=ids) & conditions).update(
+                    task=task, lease_expires=lease_expires
+                )
+                ids = BackgroundJob.objects.filter(
+                    id__in=ids, lease_expires=lease_expires
+                ).values_list("id", flat=True)
+
+            if len(ids) == 0:
+                return []
+
+            return list(BackgroundJobController.objects.filter(id__in=ids))
+
+    def claim_jobs_returning(candidates, task, lease_expires):
+        quote = connection.ops.quote_name
+
+        table = quote(BackgroundJob._meta.db_table)
+        candidates_sql, candidates_params = candidates.query.sql_with_params()
+
+        sql = "UPDATE {} SET {} = %s, {} = %s WHERE {} IN ({}) RETURNING {}".format(
+            table,
+            quote("task"),
+            quote("lease_expires"),
+            quote("id"),
+            candidates_sql,
+            quote("id"),
+        )
+        params = [
+            task,
+            connection.ops.adapt_datetimefield_value(lease_expires),
+        ]
+        params.extend(candidates_params)
+
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return [row[0] for row in cursor.fetchall()]
+
+    def renew_lease(self, task=None):
+        """
+        Extends lease of a claimed job.
+        @returns False if job was removed, disabled, or taken over in the meantime
+        """
+        conditions = Q(id=self.id, enabled=True)
+        if task:
+            conditions &= Q(task=task)
+        else:
+            conditions &= Q(task__isnull=True)
+
+        lease_expires = BackgroundJobController.get_lease_expiry()
+
+        updated = BackgroundJob.objects.filter(conditions).update(
+            lease_expires=lease_expires
+        )
+        if updated == 0:
+            return False
+
+        self.lease_expires = lease_expires
+        return True
+
+    def release_jobs(jobs, task=None):
+        """
+        Removes reservation of jobs held by the task, other tasks can take them
+        """
+        ids = [job.id for job in jobs if job.id is not None]
+        if len(ids) == 0:
+            return 0
+
+        return BackgroundJob.objects.filter(id__in=ids, task=task).update(
+            task=None, lease_expires=None
+        )
+
     def truncate_invalid_jobs():
         job_choices = BackgroundJobController.JOB_CHOICES
         valid_jobs_choices = []
@@ -463,19 +583,83 @@ class BackgroundJobController(BackgroundJob):
             ),
         )
 
-    def link_download_social_data(entry):
-        from ..configuration import Configuration
+    def link_download_social_data(entry, force=False):
+        """
+        Social data of entries are fetched in batches, see LinkDownloadSocialData.
+        @returns job, or None if entry already has a job
+        """
+        jobs = BackgroundJobController.link_download_social_data_entries(
+            [entry], force=force
+        )
+        if len(jobs) > 0:
+            return jobs[0]
 
-        return BackgroundJob.objects.create(
-            job=BackgroundJob.JOB_LINK_DOWNLOAD_SOCIAL,
-            task=None,
-            subject=entry.id,
-            args="",
-            priority=BackgroundJobController.get_job_priority(
-                BackgroundJob.JOB_LINK_DOWNLOAD_SOCIAL
-            ),
+    def link_download_social_data_entries(entries, force=False):
+        """
+        Adds social data jobs for many entries, with one query for existing jobs.
+        Existing jobs are forced, if force is requested
+        """
+        args = ""
+        if force:
+            args = json.dumps({"force": True})
+
+            subjects = [str(entry.id) for entry in entries]
+            BackgroundJob.objects.filter(
+                job=BackgroundJob.JOB_LINK_DOWNLOAD_SOCIAL, subject__in=subjects
+            ).exclude(args=args).update(args=args)
+
+        return BackgroundJobController.create_entries_jobs(
+            BackgroundJob.JOB_LINK_DOWNLOAD_SOCIAL, entries, args=args
         )
 
+    def link_add_keywords(entry):
+        """
+        Keywords of entries are added in batches, see LinkAddKeywordsJobHandler.
+        @returns job, or None if entry already has a job
+        """
+        jobs = BackgroundJobController.link_add_keywords_entries([entry])
+        if len(jobs) > 0:
+            return jobs[0]
+
+    def link_add_keywords_entries(entries):
+        return BackgroundJobController.create_entries_jobs(
+            BackgroundJob.JOB_LINK_ADD_KEYWORDS, entries
+        )
+
+    def create_entries_jobs(job_name, entries, args=""):
+        """
+        Adds one job for each entry, entry ID is the subject.
+        Existing jobs are found with one query, new jobs are inserted in bulk.
+        """
+        subjects = []
+        for entry in entries:
+            subject = str(entry.id)
+            if subject not in subjects:
+                subjects.append(subject)
+
+        existing = set(
+            BackgroundJob.objects.filter(
+                job=job_name, subject__in=subjects
+            ).values_list("subject", flat=True)
+        )
+
+        priority = BackgroundJobController.get_job_priority(job_name)
+
+        jobs = []
+        for subject in subjects:
+            if subject not in existing:
+                jobs.append(
+                    BackgroundJobController(
+                        job=job_name,
+                        task=None,
+                        subject=subject,
+                        args=args,
+                        priority=priority,
+                    )
+                )
+
+        return BackgroundJobController.objects.bulk_create(jobs)
+
     def link_download(link_url, user=None):
         return BackgroundJobController.create_single_job(
             BackgroundJob.JOB_LINK_DOWNLOAD,
@@ -523,6 +707,14 @@ class BackgroundJobController(BackgroundJob):
             entry.link,
         )
 
+    def entries_reset_local_data():
+        """
+        Recalculates page rating of all entries
+        """
+        return BackgroundJobController.create_single_job(
+            BackgroundJob.JOB_ENTRIES_RESET_LOCAL_DATA
+        )
+
     def entry_reset_data(entry, force=False, browser=None):
         """
         Do not update, if it was updated recently
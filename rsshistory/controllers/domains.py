@@ -1,5 +1,7 @@
 from datetime import datetime, date, timedelta
 import os
+import functools
+import threading
 import traceback
 
 from django.db import models
@@ -25,6 +27,11 @@ from ..apps import LinkDatabase
 class DomainsController(Domains):
     """ """
 
+    QUERY_CHUNK_SIZE = 500
+
+    extractor = None
+    extractor_lock = threading.Lock()
+
     class Meta:
         proxy = True
 
@@ -53,27 +60,107 @@ class DomainsController(Domains):
         Public API
         @return domain object
         """
+        return DomainsController.add_many([url]).get(url)
+
+    def add_many(urls):
+        """
+        Public API. Domains of many URLs are resolved with one query,
+        missing domains are inserted in bulk.
+
+        @return map of URL to domain object
+        """
         conf = Configuration.get_object().config_entry
         if not conf.enable_domain_support:
-            return
+            return {}
         if not conf.accept_domain_links:
-            return
+            return {}
+
+        url_domains = {}
+        for url in urls:
+            domain_text = DomainsController.get_domain_only(url)
+            if (
+                not domain_text
+                or domain_text == ""
+                or domain_text == "https://"
+                or domain_text == "http://"
+                or domain_text == "https"
+                or domain_text == "http"
+            ):
+                AppLogging.error(
+                    "Not a domain text:{}, url:{}".format(domain_text, url)
+                )
+                continue
 
-        protocol = UrlLocation(url).get_scheme()
-
-        domain_text = DomainsController.get_domain_only(url)
-        if (
-            not domain_text
-            or domain_text == ""
-            or domain_text == "https://"
-            or domain_text == "http://"
-            or domain_text == "https"
-            or domain_text == "http"
-        ):
-            AppLogging.error("Not a domain text:{}, url:{}".format(domain_text, url))
-            return
+            url_domains[url] = domain_text
+
+        domains = DomainsController.get_or_create_objects(set(url_domains.values()))
+
+        result = {}
+        for url, domain_text in url_domains.items():
+            if domain_text in domains:
+                result[url] = domains[domain_text]
+
+        return result
+
+    def get_or_create_objects(domain_texts):
+        """
+        @return map of domain text to domain object
+        """
+        result = DomainsController.get_objects(domain_texts)
+
+        new_domains = []
+        for domain_text in sorted(domain_texts):
+            if domain_text not in result:
+                domain = DomainsController.build_object(domain_text)
+                if domain:
+                    new_domains.append(domain)
+
+        if len(new_domains) == 0:
+            return result
+
+        # other thread might have added some of them meanwhile
+        DomainsController.objects.bulk_create(new_domains, ignore_conflicts=True)
+        DomainsController.add_complementary_data(new_domains)
+
+        result.update(
+            DomainsController.get_objects(
+                [domain.domain for domain in new_domains]
+            )
+        )
+
+        return result
+
+    def get_objects(domain_texts):
+        """
+        @return map of domain text to existing domain object
+        """
+        domain_texts = list(domain_texts)
+        result = {}
+
+        for index in range(0, len(domain_texts), DomainsController.QUERY_CHUNK_SIZE):
+            chunk = domain_texts[index : index + DomainsController.QUERY_CHUNK_SIZE]
+            for domain in DomainsController.objects.filter(domain__in=chunk):
+                result[domain.domain] = domain
+
+        return result
 
-        return DomainsController.create_object(domain_text, protocol)
+    def add_complementary_data(domains):
+        suffixes = {domain.suffix for domain in domains if domain.suffix}
+        tlds = {domain.tld for domain in domains if domain.tld}
+        mains = {domain.main for domain in domains if domain.main}
+
+        DomainsSuffixes.objects.bulk_create(
+            [DomainsSuffixes(suffix=suffix) for suffix in suffixes],
+            ignore_conflicts=True,
+        )
+        DomainsTlds.objects.bulk_create(
+            [DomainsTlds(tld=tld) for tld in tlds],
+            ignore_conflicts=True,
+        )
+        DomainsMains.objects.bulk_create(
+            [DomainsMains(main=main) for main in mains],
+            ignore_conflicts=True,
+        )
 
     def cleanup(cfg=None):
         conf = Configuration.get_object().config_entry
@@ -165,45 +252,70 @@ class DomainsController(Domains):
             return True
 
     def create_object(domain_only_text, protocol):
-        old_entries = Domains.objects.filter(domain=domain_only_text)
-        if old_entries.exists():
-            ob = old_entries[0]
-        else:
-            import tldextract
-
-            extract = tldextract.TLDExtract()
-            domain_data = extract(domain_only_text)
-
-            tld = os.path.splitext(domain_only_text)[1][1:]
-
-            max_domain_len = Domains._meta.get_field("domain").max_length
-            max_main_len = Domains._meta.get_field("main").max_length
-            max_subdomain_len = Domains._meta.get_field("subdomain").max_length
-            max_suffix_len = Domains._meta.get_field("suffix").max_length
-            max_tld_len = Domains._meta.get_field("tld").max_length
-
-            if domain_only_text and len(domain_only_text) > max_domain_len:
-                AppLogging.error(f"Domain too long: {domain_only_text} max:{max_domain_len}")
-            if domain_data.domain and len(domain_data.domain) > max_main_len:
-                AppLogging.error(f"Domain too long: {domain_data.domain} max:{max_main_len}")
-            if domain_data.subdomain and len(domain_data.subdomain) > max_subdomain_len:
-                AppLogging.error(f"SubDomain too long {domain_data.subdomain} max:{max_subdomain_len}")
-            if domain_data.suffix and len(domain_data.suffix) > max_suffix_len:
-                AppLogging.error(f"Suffix too long: {domain_data.suffix} max:{max_suffix_len}")
-            if tld and len(tld) > max_tld_len:
-                AppLogging.error(f"TLD too long {tld} max:{max_tld_len}")
-
-            ob = DomainsController.objects.create(
-                domain=domain_only_text,
-                main=domain_data.domain,
-                subdomain=domain_data.subdomain,
-                suffix=domain_data.suffix,
-                tld=tld,
-            )
+        domains = DomainsController.get_or_create_objects([domain_only_text])
+        return domains.get(domain_only_text)
+
+    def build_object(domain_only_text):
+        """
+        @return new, not saved domain object, or None if it cannot be stored
+        """
+        main, subdomain, suffix, tld = DomainsController.get_domain_parts(
+            domain_only_text
+        )
+
+        max_domain_len = Domains._meta.get_field("domain").max_length
+        max_main_len = Domains._meta.get_field("main").max_length
+        max_subdomain_len = Domains._meta.get_field("subdomain").max_length
+        max_suffix_len = Domains._meta.get_field("suffix").max_length
+        max_tld_len = Domains._meta.get_field("tld").max_length
+
+        errors = []
+        if domain_only_text and len(domain_only_text) > max_domain_len:
+            errors.append(f"Domain too long: {domain_only_text} max:{max_domain_len}")
+        if main and len(main) > max_main_len:
+            errors.append(f"Domain too long: {main} max:{max_main_len}")
+        if subdomain and len(subdomain) > max_subdomain_len:
+            errors.append(f"SubDomain too long {subdomain} max:{max_subdomain_len}")
+        if suffix and len(suffix) > max_suffix_len:
+            errors.append(f"Suffix too long: {suffix} max:{max_suffix_len}")
+        if tld and len(tld) > max_tld_len:
+            errors.append(f"TLD too long {tld} max:{max_tld_len}")
+
+        if errors:
+            for error in errors:
+                AppLogging.error(error)
+            return
+
+        return DomainsController(
+            domain=domain_only_text,
+            main=main,
+            subdomain=subdomain,
+            suffix=suffix,
+            tld=tld,
+        )
+
+    def get_extractor():
+        """
+        Suffix list is loaded when extractor is created, so one is shared by process
+        """
+        with DomainsController.extractor_lock:
+            if DomainsController.extractor is None:
+                import tldextract
+
+                DomainsController.extractor = tldextract.TLDExtract()
+
+            return DomainsController.extractor
 
-        ob.update_complementary_data(True)
+    @functools.lru_cache(maxsize=10000)
+    def get_domain_parts(domain_only_text):
+        """
+        @return main, subdomain, suffix, and tld of domain
+        """
+        domain_data = DomainsController.get_extractor()(domain_only_text)
+
+        tld = os.path.splitext(domain_only_text)[1][1:]
 
-        return ob
+        return domain_data.domain, domain_data.subdomain, domain_data.suffix, tld
 
     def get_domain_only(input_url):
         p = UrlLocation(input_url)
@@ -243,17 +355,16 @@ class DomainsController(Domains):
         )
 
     def update_domain(self):
-        import tldextract
-
         changed = False
 
         if self.suffix is None or self.suffix == "":
-            extract = tldextract.TLDExtract()
-            domain_data = extract(self.domain)
+            main, subdomain, suffix, tld = DomainsController.get_domain_parts(
+                self.domain
+            )
 
-            self.main = domain_data.domain
-            self.subdomain = domain_data.subdomain
-            self.suffix = domain_data.suffix
+            self.main = main
+            self.subdomain = subdomain
+            self.suffix = suffix
             changed = True
 
         if self.tld is None or self.tld == "":
@@ -284,31 +395,35 @@ class DomainsController(Domains):
         if not Configuration.get_object().config_entry.accept_domain_links:
             return
 
-        entries = LinkDataController.objects.filter(domain__isnull=True)
-        for entry in entries:
-            p = UrlLocation(entry.link)
-            domain_url = p.get_domain().url
-            domain_only = p.get_domain_only()
+        last_id = 0
 
-            LinkDatabase.info(
-                "Entry:{} domain:{} {}".format(entry.link, domain_url, domain_only)
+        while True:
+            entries = list(
+                LinkDataController.objects.filter(domain__isnull=True, id__gt=last_id)
+                .order_by("id")
+                .only("id", "link")[: DomainsController.QUERY_CHUNK_SIZE]
             )
-
-            domains = DomainsController.objects.filter(domain=domain_only)
-            if not domains.exists():
-                LinkDatabase.info(
-                    "Create missing domains entry:{} - missing domain".format(
-                        entry.link
-                    )
-                )
-                domain = DomainsController.add(domain_url)
-                entry.domain = domain
-                entry.save()
-            else:
-                LinkDatabase.info(
-                    "Create missing domains entry:{} - missing domain link".format(
-                        entry.link
+            if len(entries) == 0:
+                break
+
+            last_id = entries[-1].id
+
+            domains = DomainsController.add_many([entry.link for entry in entries])
+
+            # entries are updated with one query for each domain
+            domain_entries = {}
+            for entry in entries:
+                domain = domains.get(entry.link)
+                if domain:
+                    domain_entries.setdefault(domain, []).append(entry.id)
+                else:
+                    LinkDatabase.info(
+                        "Create missing domains entry:{} - missing domain".format(
+                            entry.link
+                        )
                     )
+
+            for domain, entry_ids in domain_entries.items():
+                LinkDataController.objects.filter(id__in=entry_ids).update(
+                    domain=domain
                 )
-                entry.domain = domains[0]
-                entry.save()
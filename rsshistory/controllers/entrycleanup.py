@@ -1,8 +1,8 @@
 from datetime import timedelta
 import time
 
-from django.db import models
-from django.db.models import Q, F
+from django.db import models, connection, transaction
+from django.db.models import Q, F, Count
 
 from utils.dateutils import DateUtils
 
@@ -17,6 +17,8 @@ from webtoolkit import (
 from ..models import (
     AppLogging,
     EntryRules,
+    BaseLinkDataController,
+    batch_remove,
 )
 from ..configuration import Configuration
 from ..apps import LinkDatabase
@@ -27,6 +29,15 @@ from .sources import SourceDataController
 
 
 class EntriesCleanup(object):
+    """
+    Removes, and archives entries in batches.
+
+    Cleanup is limited by time. Entries are selected by conditions, therefore
+    the next cleanup job continues where the previous one stopped.
+    """
+
+    BATCH_SIZE = 1000
+
     def __init__(self, archive_cleanup=False, start_processing_time=None, limit_s=0):
         self.archive_cleanup = archive_cleanup
 
@@ -42,15 +53,15 @@ class EntriesCleanup(object):
 
     def cleanup(self, cfg=None):
         """
-        We do not exit prematurely.
+        Reason for time limit: if user has 200'000 links it make take a long time.
+        We do not want to clog queues. Cleanup job is created again, if
+        time has been exceeded.
 
-        Reason: if user has 200'000 links it make take a long time.
-        During cleanup new links may become outdated.
-        Cleanup may never end if we enter here for a few seconds only.
-        Provide more queues, if you want such jobs to not clog queues.
-
-        @return True if successful
+        @return True if successful, False if not everything has been processed
         """
+        if cfg and cfg.get("limit_s"):
+            self.limit_s = cfg["limit_s"]
+
         AppLogging.debug("Cleanup - remove")
 
         if not self.cleanup_remove_entries():
@@ -60,6 +71,11 @@ class EntriesCleanup(object):
             return False
 
         if not self.archive_cleanup:
+            config = Configuration.get_object().config_entry
+            if config.merge_duplicate_links:
+                if not self.move_duplicate_links():
+                    return False
+
             if not self.move_old_links_to_archive():
                 return False
         else:
@@ -69,23 +85,18 @@ class EntriesCleanup(object):
         return True
 
     def cleanup_entries__invalid_rules(self):
-        BATCH_SIZE = 1000
-
         rules = EntryRules.objects.filter(block=True, enabled=True)
         for rule in rules:
             urls = rule.get_rule_urls()
 
             for url in urls:
                 if url != "":
-                    entries = LinkDataController.objects.filter(link__icontains=url)
-                    entries.delete()
-                    # while entries.exists():
-                    #    entries[:BATCH_SIZE].delete()
+                    entries = self.filter_objects(Q(link__icontains=url))
+                    if not self.remove_entries(entries):
+                        return False
 
                     domains = DomainsController.objects.filter(domain__icontains=url)
                     domains.delete()
-                    # while domains.exists():
-                    #    domains[:BATCH_SIZE].delete()
 
         return True
 
@@ -136,70 +147,71 @@ class EntriesCleanup(object):
         return True
 
     def cleanup_remove_entries_old_entries(self, limit_s=0):
-        BATCH_SIZE = 1000
-
-        sources = SourceDataController.objects.all()
+        sources = SourceDataController.objects.filter(remove_after_days__gt=0)
         for source in sources:
             AppLogging.debug("Removing for source:{}".format(source.title))
             entries = self.get_source_old_entries_to_remove(source)
 
-            if entries:
-                for entry in entries:
-                    AppLogging.debug("Removing source entry:{}".format(entry.link))
-                # while entries.exists():
-                #    entries[:BATCH_SIZE].delete()
+            self.log_source_entries(entries)
 
         AppLogging.debug("Removing general entries")
 
         entries = self.get_general_old_entries_to_remove()
-        if entries:
-            for entry in entries:
-                if entry.is_removable():
-                    # AppLogging.debug("Removing general entry:{}".format(entry.link))
-                    entry.delete()
-
-        AppLogging.debug("Removing stale entries")
+        if not self.remove_entries(entries):
+            return False
 
         return True
 
     def cleanup_remove_entries_stale_entries(self, limit_s=0):
-        BATCH_SIZE = 1000
-        sources = SourceDataController.objects.all()
+        sources = SourceDataController.objects.filter(remove_after_days__gt=0)
         for source in sources:
             AppLogging.debug("Removing for source:{}".format(source.title))
             entries = self.get_source_stale_entries_to_remove(source)
 
-            if entries:
-                for entry in entries:
-                    AppLogging.debug("Removing source entry:{}".format(entry.link))
-                # while entries.exists():
-                #    entries[:BATCH_SIZE].delete()
+            self.log_source_entries(entries)
 
-        AppLogging.debug("Removing general entries")
+        AppLogging.debug("Removing stale entries")
 
         entries = self.get_general_stale_entries_to_remove()
-        if entries:
-            for entry in entries:
-                if entry.is_removable():
-                    # AppLogging.debug("Removing general entry:{}".format(entry.link))
-                    entry.delete()
-
-        AppLogging.debug("Removing stale entries")
+        if not self.remove_entries(entries):
+            return False
 
         return True
 
     def clean_archive(self):
-        BATCH_SIZE = 1000
-
         config = Configuration.get_object().config_entry
         if config.days_to_move_to_archive == 0:
             entries = ArchiveLinkDataController.objects.all()
-            entries.delete()
-            # while entries.exists():
-            #    entries[:BATCH_SIZE].delete()
+            if not self.remove_entries(entries):
+                return False
 
         return True
 
+    def log_source_entries(self, entries):
+        """
+        Entries of sources are only reported, they are not removed
+        """
+        if entries is None:
+            return
+
+        links = entries.values_list("link", flat=True)
+        for link in links.iterator(chunk_size=self.BATCH_SIZE):
+            AppLogging.debug("Removing source entry:{}".format(link))
+
+    def remove_entries(self, entries):
+        """
+        @return False if time has been exceeded
+        """
+        if entries is None:
+            return True
+
+        return batch_remove(
+            entries.model,
+            entries,
+            self.BATCH_SIZE,
+            self.is_time_exceeded,
+        )
+
     def get_source_old_entries_to_remove(self, source):
         """
         If links are old and should be removed
@@ -213,7 +225,7 @@ class EntriesCleanup(object):
 
         condition_source = Q(source=source) & stale_conditions
 
-        return self.filter_objects(condition_source)
+        return self.filter_objects(condition_source & self.get_removable_condition())
 
     def get_general_old_entries_to_remove(self):
         """
@@ -224,7 +236,7 @@ class EntriesCleanup(object):
         if not stale_conditions:
             return
 
-        return self.filter_objects(stale_conditions)
+        return self.filter_objects(stale_conditions & self.get_removable_condition())
 
     def get_source_stale_entries_to_remove(self, source):
         """
@@ -239,7 +251,7 @@ class EntriesCleanup(object):
 
         condition_source = Q(source=source) & stale_conditions
 
-        return self.filter_objects(condition_source)
+        return self.filter_objects(condition_source & self.get_removable_condition())
 
     def get_general_stale_entries_to_remove(self):
         """
@@ -250,7 +262,17 @@ class EntriesCleanup(object):
         if not stale_conditions:
             return
 
-        return self.filter_objects(stale_conditions)
+        return self.filter_objects(stale_conditions & self.get_removable_condition())
+
+    def get_removable_condition(self):
+        """
+        Same as entry.is_removable, for many entries
+        """
+        config = Configuration.get_object().config_entry
+
+        return Q(bookmarked=False, permanent=False) & ~Q(
+            page_rating_votes__gt=config.remove_entry_vote_threshold
+        )
 
     def get_stale_status_condition(self):
         return self.get_status_condition_invalid() & ~Q(manual_status_code=HTTP_STATUS_OK)
@@ -356,22 +378,68 @@ class EntriesCleanup(object):
 
     def move_old_links_to_archive(self):
         """
-        TODO Refactor IT? I think we should operate on 'chunks' rather than entry-entry
+        Moves entries in batches, with INSERT ... SELECT
         """
         entries = self.get_links_to_move_to_archive()
         # no more entries to process, cleaned up everything
-        if not entries:
+        if entries is None:
             return True
 
         AppLogging.debug("Moving link to archive")
 
-        for entry in entries:
-            EntryWrapper(entry=entry).move_to_archive()
+        while True:
+            batch_ids = list(
+                entries.values_list("id", flat=True)[: self.BATCH_SIZE]
+            )
+            if not batch_ids:
+                break
+
+            self.move_to_archive(batch_ids)
+
+            if self.is_time_exceeded():
+                return False
 
         AppLogging.debug("Moving link to archive DONE")
 
         return True
 
+    def move_to_archive(self, entry_ids):
+        """
+        Copies entries to archive, and removes them.
+        Entries that are already in archive are only removed.
+        """
+        archive_fields = set(
+            field.column
+            for field in ArchiveLinkDataController._meta.concrete_fields
+            if not field.primary_key
+        )
+        fields = [
+            field
+            for field in LinkDataController._meta.concrete_fields
+            if field.column in archive_fields
+        ]
+
+        entries = LinkDataController.objects.filter(id__in=entry_ids).exclude(
+            link__in=ArchiveLinkDataController.objects.values("link")
+        )
+        select_sql, params = (
+            entries.order_by()
+            .values_list(*[field.attname for field in fields])
+            .query.sql_with_params()
+        )
+
+        insert_sql = "INSERT INTO {} ({}) {}".format(
+            connection.ops.quote_name(ArchiveLinkDataController._meta.db_table),
+            ", ".join(connection.ops.quote_name(field.column) for field in fields),
+            select_sql,
+        )
+
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute(insert_sql, params)
+
+            LinkDataController.objects.filter(id__in=entry_ids).delete()
+
     def get_links_to_move_to_archive(self):
         day_to_move = Configuration.get_object().get_entry_move_to_archive_date()
 
@@ -391,40 +459,121 @@ class EntriesCleanup(object):
         """
         Moves all duplicate links matching criteria
         """
-        http_entries = LinkDataController.objects.filter(link__icontains="http://")
-        if http_entries.exists():
-            for http_entry in http_entries:
-                https_url = http_entry.get_https_url()
-                https_entries = LinkDataController.objects.filter(link=https_url)
-                if https_entries.exists():
-                    w = EntryWrapper(entry=http_entry)
-                    w.move_entry(https_entries[0])
-
-        return True
+        return self.move_duplicate_links()
 
     def move_existing_www_to_nonwww(self):
         """
         Moves all duplicate links matching criteria
         """
-        www_entries = LinkDataController.objects.filter(link__icontains="https://www.")
-        if www_entries.exists():
-            for www_entry in www_entries:
-                nonwww_url = www_entry.link.replace("https://www.", "https://")
-                nonwww_entries = LinkDataController.objects.filter(link=nonwww_url)
-                if nonwww_entries.exists():
-                    w = EntryWrapper(entry=www_entry)
-                    w.move_entry(nonwww_entries[0])
-
-        www_entries = LinkDataController.objects.filter(link__icontains="http://www.")
-        if www_entries.exists():
-            for www_entry in www_entries:
-                nonwww_url = www_entry.link.replace("http://www.", "http://")
-                nonwww_entries = LinkDataController.objects.filter(link=nonwww_url)
-                if nonwww_entries.exists():
-                    w = EntryWrapper(entry=www_entry)
-                    w.move_entry(nonwww_entries[0])
+        return self.move_duplicate_links()
 
-        return True
+    def move_duplicate_links(self):
+        """
+        Entries with the same link key are variants of one link (http, https, www.).
+        Each group is moved into one entry, as EntryWrapper.get would return.
+
+        @return False if time has been exceeded
+        """
+        if not self.update_link_keys():
+            return False
+
+        # groups without alive entry cannot be moved, they are not selected
+        duplicate_keys = (
+            LinkDataController.objects.exclude(link_key__isnull=True)
+            .order_by()
+            .values("link_key")
+            .annotate(
+                count=Count("id"),
+                alive=Count("id", filter=self.get_alive_condition()),
+            )
+            .filter(count__gt=1, alive__gt=0)
+            .values_list("link_key", flat=True)
+        )
+
+        last_key = None
+        while True:
+            keys = duplicate_keys
+            if last_key is not None:
+                keys = keys.filter(link_key__gt=last_key)
+
+            keys = list(keys.order_by("link_key")[: self.BATCH_SIZE])
+            if not keys:
+                return True
+
+            groups = {}
+            for entry in LinkDataController.objects.filter(link_key__in=keys):
+                groups.setdefault(entry.link_key, []).append(entry)
+
+            for entries in groups.values():
+                self.move_duplicate_group(entries)
+
+            last_key = keys[-1]
+
+            if self.is_time_exceeded():
+                return False
+
+    def get_alive_condition(self):
+        """
+        Entries which are not dead, see entry.is_dead
+        """
+        return Q(manual_status_code=BaseLinkDataController.STATUS_ACTIVE) | (
+            Q(date_dead_since__isnull=True)
+            & ~Q(manual_status_code=BaseLinkDataController.STATUS_DEAD)
+        )
+
+    def move_duplicate_group(self, entries):
+        destination = EntriesCleanup.get_duplicate_destination(entries)
+
+        # entries can be moved only to alive entry
+        if destination.is_dead():
+            AppLogging.debug(
+                "Duplicates of:{} not moved, all are dead".format(destination.link)
+            )
+            return
+
+        for entry in entries:
+            if entry != destination:
+                AppLogging.debug(
+                    "Moving duplicate:{} to:{}".format(entry.link, destination.link)
+                )
+                EntryWrapper(entry=entry).move_entry(destination)
+
+    def get_duplicate_destination(entries):
+        """
+        Alive entries are preferred, then https, then link without www.
+        """
+
+        def get_order(entry):
+            domain = entry.link.split("://", 1)[-1]
+            return (
+                entry.is_dead(),
+                not entry.link.startswith("https://"),
+                domain.startswith("www."),
+                entry.id,
+            )
+
+        return sorted(entries, key=get_order)[0]
+
+    def update_link_keys(self):
+        """
+        Sets link key of entries, which were added before key was introduced.
+
+        @return False if time has been exceeded
+        """
+        entries = self.filter_objects(Q(link_key__isnull=True)).only("id", "link")
+
+        while True:
+            batch = list(entries[: self.BATCH_SIZE])
+            if not batch:
+                return True
+
+            for entry in batch:
+                entry.link_key = BaseLinkDataController.get_link_key(entry.link)
+
+            entries.model.objects.bulk_update(batch, ["link_key"])
+
+            if self.is_time_exceeded():
+                return False
 
     def is_time_exceeded(self):
         passed_seconds = time.time() - self.start_processing_time
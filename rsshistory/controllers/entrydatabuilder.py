@@ -1,7 +1,7 @@
 import time
 import ipaddress
 
-from django.db import models
+from django.db import models, transaction, IntegrityError
 from django.db.models import Q, F
 
 from webtoolkit import UrlLocation, is_status_code_invalid
@@ -15,7 +15,7 @@ from ..models import (
 )
 from ..configuration import Configuration
 from ..apps import LinkDatabase
-from .entries import LinkDataController
+from .entries import LinkDataController, ArchiveLinkDataController
 from .entrywrapper import EntryWrapper
 from .entriesutils import add_all_domains, EntryContentsCrawler
 from .backgroundjob import BackgroundJobController
@@ -245,24 +245,7 @@ class EntryDataBuilder(object):
     def build_from_props(self, ignore_errors=False):
         self.ignore_errors = ignore_errors
 
-        if "link" not in self.link_data:
-            return
-
-        self.link = self.link_data["link"]
-        if not self.link:
-            return
-
-        obj = None
-
-        self.link_data["link"] = UrlLocation.get_cleaned_link(self.link_data["link"])
-        self.link = self.link_data["link"]
-
-        if not self.is_enabled_to_store_link():
-            return
-
-        self.add_domain()
-
-        if self.is_too_old():
+        if not self.prepare_props():
             return
 
         wrapper = EntryWrapper(link=self.link)
@@ -278,6 +261,31 @@ class EntryDataBuilder(object):
         self.result = entry
         return entry
 
+    def prepare_props(self):
+        """
+        Cleans link, and makes checks that do not require entry.
+        @return False if link data should not be stored
+        """
+        if "link" not in self.link_data:
+            return False
+
+        self.link = self.link_data["link"]
+        if not self.link:
+            return False
+
+        self.link_data["link"] = UrlLocation.get_cleaned_link(self.link_data["link"])
+        self.link = self.link_data["link"]
+
+        if not self.is_enabled_to_store_link():
+            return False
+
+        self.add_domain()
+
+        if self.is_too_old():
+            return False
+
+        return True
+
     def is_too_old(self):
         day_to_remove = Configuration.get_object().get_entry_remove_date()
         if not day_to_remove:
@@ -345,6 +353,28 @@ class EntryDataBuilder(object):
         return p.get_domain().url == link_data["link"]
 
     def add_entry_internal(self):
+        new_link_data = self.get_entry_data()
+
+        AppLogging.debug("Adding link: {}".format(new_link_data["link"]))
+
+        wrapper = EntryWrapper(
+            link=new_link_data["link"],
+            date=new_link_data["date_published"],
+            user=self.user,
+            strict_ids=self.strict_ids,
+        )
+
+        entry = wrapper.create(new_link_data)
+
+        if entry:
+            BackgroundJobController.link_scan(entry=entry)
+
+        return entry
+
+    def get_entry_data(self):
+        """
+        Returns link data with default values, as they should be inserted
+        """
         link_data = self.link_data
 
         new_link_data = dict(link_data)
@@ -366,21 +396,7 @@ class EntryDataBuilder(object):
             if age:
                 new_link_data["age"] = age
 
-        AppLogging.debug("Adding link: {}".format(new_link_data["link"]))
-
-        wrapper = EntryWrapper(
-            link=new_link_data["link"],
-            date=new_link_data["date_published"],
-            user=self.user,
-            strict_ids=self.strict_ids,
-        )
-
-        entry = wrapper.create(new_link_data)
-
-        if entry:
-            BackgroundJobController.link_scan(entry=entry)
-
-        return entry
+        return new_link_data
 
     def set_domain_object(self):
         config = Configuration.get_object().config_entry
@@ -535,7 +551,7 @@ class EntryDataBuilder(object):
         config = Configuration.get_object().config_entry
 
         self.add_sub_links(entry)
-        # self.add_keywords(entry) # TODO
+        self.add_keywords(entry)
         self.add_socialdata(entry)
 
         if config.auto_scan_new_entries:
@@ -602,14 +618,336 @@ class EntryDataBuilder(object):
                 add_all_domains(link)
 
     def add_keywords(self, entry):
+        """
+        Keywords are added by background job, language model is slow
+        """
         config = Configuration.get_object().config_entry
 
-        if config.enable_keyword_support:
-            if entry.title and entry.title != "":
-                KeyWords.add_link_data(entry.title)
+        if config.enable_keyword_support and entry and entry.title:
+            BackgroundJobController.link_add_keywords(entry)
 
     def read_domains_from_bookmarks():
         objs = LinkDataController.objects.filter(bookmarked=True)
         for obj in objs:
             p = UrlLocation(obj.link)
             EntryDataBuilder(link=p.get_domain().url)
+
+
+class EntryDataBatchBuilder(object):
+    """
+    Adds many entries at once, for example all entries read by a source.
+
+     - existing entries are found with one query per table
+     - sources, and domains are resolved once for the batch
+     - new entries are inserted with bulk_create
+     - subsequent work (update, scan, thumbnails, sub links) is done by background jobs.
+       Social data are not fetched here, it is left to the caller
+     - domain entries have special save handling, they are added by EntryDataBuilder
+    """
+
+    QUERY_CHUNK_SIZE = 500
+
+    def __init__(self, source_is_auto=True, user=None, strict_ids=False):
+        self.source_is_auto = source_is_auto
+        self.user = user
+        self.strict_ids = strict_ids
+        self.errors = []
+        self.new_entries = []
+
+    def build(self, links_data):
+        """
+        @return existing, and new entries, in the order of links data
+        """
+        builders = self.get_builders(links_data)
+        entries = self.get_entries(builders)
+
+        result = []
+        for builder in builders:
+            if builder.link in entries:
+                result.append(entries[builder.link])
+
+        return result
+
+    def build_map(self, links_data, add_new=True):
+        """
+        @param add_new if False, only existing entries are returned
+
+        @return map of link, as in links data, to existing, or new entry
+        """
+        links = {}
+        builders = self.get_builders(links_data, links)
+        entries = self.get_entries(builders, add_new)
+
+        result = {}
+        for link, builder_link in links.items():
+            if builder_link in entries:
+                result[link] = entries[builder_link]
+
+        return result
+
+    def get_entries(self, builders, add_new=True):
+        """
+        @return map of builder link to entry
+        """
+        existing = self.get_existing_entries(builders)
+        if not add_new:
+            return existing
+
+        new_builders = []
+        for builder in builders:
+            if builder.link not in existing:
+                new_builders.append(builder)
+
+        new_entries = self.add_entries(new_builders)
+
+        return {**existing, **new_entries}
+
+    def get_builders(self, links_data, links=None):
+        """
+        @param links if provided, it is filled with links data link to builder link
+        """
+        builders = {}
+
+        for link_data in links_data:
+            builder = EntryDataBuilder(
+                source_is_auto=self.source_is_auto,
+                user=self.user,
+                strict_ids=self.strict_ids,
+            )
+            builder.link_data = dict(link_data)
+
+            if not builder.prepare_props():
+                self.errors.extend(builder.errors)
+                continue
+
+            if builder.link not in builders:
+                builders[builder.link] = builder
+
+            if links is not None:
+                links[link_data["link"]] = builder.link
+
+        return list(builders.values())
+
+    def get_existing_entries(self, builders):
+        """
+        @return map of builder link to entry
+        """
+        candidates = {}
+        for builder in builders:
+            wrapper = EntryWrapper(link=builder.link)
+            candidates[builder.link] = wrapper.get_link_candidates()
+
+        all_links = set()
+        for links in candidates.values():
+            all_links.update(links)
+
+        found = {}
+        for objects in self.get_tables():
+            for entry in self.get_entries_for_links(objects, all_links):
+                found.setdefault(entry.link, entry)
+
+        result = {}
+        for link, links in candidates.items():
+            entries = [found[item] for item in links if item in found]
+
+            alive = [entry for entry in entries if not entry.is_dead()]
+            if alive:
+                result[link] = alive[0]
+            elif entries:
+                result[link] = entries[0]
+
+        return result
+
+    def get_tables(self):
+        config = Configuration.get_object().config_entry
+        if config.days_to_move_to_archive == 0:
+            return [LinkDataController.objects]
+
+        return [LinkDataController.objects, ArchiveLinkDataController.objects]
+
+    def get_entries_for_links(self, objects, links):
+        links = list(links)
+
+        for index in range(0, len(links), EntryDataBatchBuilder.QUERY_CHUNK_SIZE):
+            chunk = links[index : index + EntryDataBatchBuilder.QUERY_CHUNK_SIZE]
+            for entry in objects.filter(link__in=chunk):
+                yield entry
+
+    def add_entries(self, builders):
+        """
+        @return map of builder link to new entry
+        """
+        from .entryupdater import EntryUpdater
+
+        sources = self.get_sources(builders)
+
+        result = {}
+        entries = []
+        archive_entries = []
+
+        accepted = []
+        for builder in builders:
+            if not builder.is_enabled_to_store():
+                self.errors.extend(builder.errors)
+                continue
+
+            builder.link_data = builder.get_clean_link_data()
+            self.set_source_object(builder, sources)
+            accepted.append(builder)
+
+        domains = self.get_domains(accepted)
+
+        for builder in accepted:
+            self.set_domain_object(builder, domains)
+
+            if UrlLocation(builder.link).is_domain():
+                entry = builder.build_from_props_internal()
+                if entry:
+                    result[builder.link] = entry
+                    self.new_entries.append(entry)
+                continue
+
+            link_data = builder.get_entry_data()
+
+            wrapper = EntryWrapper(
+                link=link_data["link"],
+                date=link_data["date_published"],
+                user=self.user,
+                strict_ids=self.strict_ids,
+            )
+            is_archive = wrapper.prepare_create(link_data)
+
+            if is_archive:
+                entry = ArchiveLinkDataController(**link_data)
+            else:
+                entry = LinkDataController(**link_data)
+
+            if not entry.prepare_for_save():
+                continue
+
+            entry.page_rating = EntryUpdater.calculate_page_rating(entry)
+
+            if is_archive:
+                archive_entries.append((builder, entry))
+            else:
+                entries.append((builder, entry))
+
+        for model, items in [
+            (LinkDataController, entries),
+            (ArchiveLinkDataController, archive_entries),
+        ]:
+            inserted = self.insert(model, items)
+
+            for builder, entry in inserted:
+                AppLogging.debug("Adding link: {}".format(entry.link))
+
+                result[builder.link] = entry
+                self.new_entries.append(entry)
+                self.add_addition_link_data(builder, entry)
+
+            if model is LinkDataController:
+                self.add_keywords([entry for builder, entry in inserted])
+
+        return result
+
+    def add_keywords(self, entries):
+        config = Configuration.get_object().config_entry
+
+        if config.enable_keyword_support:
+            entries = [entry for entry in entries if entry.title]
+            if entries:
+                BackgroundJobController.link_add_keywords_entries(entries)
+
+    def get_sources(self, builders):
+        source_urls = set()
+        for builder in builders:
+            link_data = builder.link_data
+            if "source" not in link_data and link_data.get("source_url"):
+                source_urls.add(link_data["source_url"])
+
+        sources = {}
+        if source_urls:
+            for source in SourceDataController.objects.filter(url__in=source_urls):
+                sources[source.url] = source
+
+        return sources
+
+    def set_source_object(self, builder, sources):
+        link_data = builder.link_data
+        if "source" not in link_data and "source_url" in link_data:
+            link_data["source"] = sources.get(link_data["source_url"])
+
+    def get_domains(self, builders):
+        """
+        @return map of builder link to domain
+        """
+        config = Configuration.get_object().config_entry
+        if not config.enable_domain_support:
+            return {}
+
+        return DomainsController.add_many([builder.link for builder in builders])
+
+    def set_domain_object(self, builder, domains):
+        domain = domains.get(builder.link)
+        if domain:
+            builder.link_data["domain"] = domain
+
+    def insert(self, model, items):
+        """
+        @return list of builder, and entry, for inserted entries
+        """
+        if not items:
+            return []
+
+        try:
+            with transaction.atomic():
+                model.objects.bulk_create([entry for builder, entry in items])
+        except IntegrityError:
+            # some of entries were added meanwhile by other thread
+            return self.insert_one_by_one(items)
+
+        if any(entry.pk is None for builder, entry in items):
+            # database backend does not return ids from bulk insert
+            links = [entry.link for builder, entry in items]
+            inserted = {}
+            for entry in self.get_entries_for_links(model.objects, links):
+                inserted[entry.link] = entry
+
+            return [
+                (builder, inserted[entry.link])
+                for builder, entry in items
+                if entry.link in inserted
+            ]
+
+        return items
+
+    def insert_one_by_one(self, items):
+        result = []
+
+        for builder, entry in items:
+            try:
+                with transaction.atomic():
+                    entry.save()
+            except IntegrityError:
+                continue
+
+            result.append((builder, entry))
+
+        return result
+
+    def add_addition_link_data(self, builder, entry):
+        c = Configuration.get_object().config_entry
+
+        BackgroundJobController.link_scan(entry=entry)
+
+        if c.new_entries_use_clean_data:
+            BackgroundJobController.entry_reset_data(entry)
+        elif c.new_entries_merge_data:
+            BackgroundJobController.entry_update_data(entry)
+
+        builder.add_sub_links(entry)
+
+        if c.auto_scan_new_entries:
+            BackgroundJobController.link_scan(entry.link)
+
+        builder.download_thumbnail(entry.thumbnail)
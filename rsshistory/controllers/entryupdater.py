@@ -2,7 +2,7 @@ import time
 from datetime import timedelta
 
 from django.db import models
-from django.db.models import Q, F
+from django.db.models import Q, F, Sum, Count
 
 from webtoolkit import RemoteServer, RemoteUrl
 from utils.dateutils import DateUtils
@@ -380,16 +380,11 @@ class EntryUpdater(object):
         if not self.entry.is_taggable():
             return 0
 
-        votes = self.entry.votes.all()
-        count = votes.count()
-        if count == 0:
+        votes = self.entry.votes.aggregate(total=Sum("vote"), count=Count("id"))
+        if votes["count"] == 0:
             return 0
 
-        sum_num = 0
-        for vote in votes:
-            sum_num += vote.vote
-
-        return sum_num / count
+        return votes["total"] / votes["count"]
 
     def get_visits(self):
         from ..models import UserEntryVisitHistory
@@ -397,13 +392,11 @@ class EntryUpdater(object):
         if self.entry.is_archive_entry():
             return 0
 
-        visits = UserEntryVisitHistory.objects.filter(entry=self.entry)
-
-        sum_num = 0
-        for visit in visits:
-            sum_num += visit.visits
+        visits = UserEntryVisitHistory.objects.filter(entry=self.entry).aggregate(
+            total=Sum("visits")
+        )
 
-        return sum_num
+        return visits["total"] or 0
 
     def update_calculated_vote(self):
         """
@@ -420,6 +413,11 @@ class EntryUpdater(object):
             if tags.exists():
                 are_tags = 1
 
+        entry.page_rating = EntryUpdater.calculate_page_rating(entry, are_tags)
+
+        entry.save()
+
+    def calculate_page_rating(entry, are_tags=0):
         # votes are twice as important as contents
         page_rating = (
             (2 * entry.page_rating_votes) + entry.page_rating_contents
@@ -427,9 +425,7 @@ class EntryUpdater(object):
         max_page_rating = 2 * 100 + 100 + 10
 
         # rating in percentage. Range -100..100
-        entry.page_rating = page_rating * 100 / max_page_rating
-
-        entry.save()
+        return page_rating * 100 / max_page_rating
 
     def handle_invalid_response(self, url):
         entry = self.entry
@@ -474,6 +470,128 @@ class EntryUpdater(object):
         entry.save()
 
 
+class EntriesRatingUpdater(object):
+    """
+    Recalculates page rating of many entries with aggregate queries.
+    Result is the same as of EntryUpdater.update_calculated_vote.
+
+    Archive entries are not taggable, and have no visits. They are not updated.
+    """
+
+    BATCH_SIZE = 1000
+
+    FIELDS = ["page_rating_votes", "page_rating_visits", "page_rating"]
+
+    def update(self, entry_ids=None):
+        """
+        @param entry_ids entries to update, all entries if None
+        @returns number of entries with changed rating
+        """
+        if entry_ids is None:
+            return self.update_all()
+
+        entry_ids = list(entry_ids)
+
+        changed = 0
+        for index in range(0, len(entry_ids), EntriesRatingUpdater.BATCH_SIZE):
+            changed += self.update_batch(
+                entry_ids[index : index + EntriesRatingUpdater.BATCH_SIZE]
+            )
+
+        return changed
+
+    def update_all(self):
+        changed = 0
+        last_id = 0
+
+        while True:
+            entry_ids = list(
+                LinkDataController.objects.filter(id__gt=last_id)
+                .order_by("id")
+                .values_list("id", flat=True)[: EntriesRatingUpdater.BATCH_SIZE]
+            )
+            if len(entry_ids) == 0:
+                return changed
+
+            changed += self.update_batch(entry_ids)
+            last_id = entry_ids[-1]
+
+    def update_batch(self, entry_ids):
+        votes = self.get_votes(entry_ids)
+        visits = self.get_visits(entry_ids)
+        tagged = self.get_tagged(entry_ids)
+
+        entries = LinkDataController.objects.filter(id__in=entry_ids).only(
+            "id", "page_rating_contents", *EntriesRatingUpdater.FIELDS
+        )
+
+        # entries with the same new values are updated by one statement.
+        # Ratings have a small range, so there are few such groups
+        changed = {}
+        for entry in entries:
+            old_values = [getattr(entry, field) for field in EntriesRatingUpdater.FIELDS]
+
+            are_tags = 0
+            if entry.id in tagged:
+                are_tags = 1
+
+            # average is used for rating calculation, like in EntryUpdater
+            entry.page_rating_votes = votes.get(entry.id, 0)
+            entry.page_rating_visits = visits.get(entry.id, 0)
+            page_rating = EntryUpdater.calculate_page_rating(entry, are_tags)
+
+            entry.page_rating_votes = int(entry.page_rating_votes)
+            entry.page_rating = int(page_rating)
+
+            new_values = [getattr(entry, field) for field in EntriesRatingUpdater.FIELDS]
+            if new_values != old_values:
+                changed.setdefault(tuple(new_values), []).append(entry.id)
+
+        for new_values, ids in changed.items():
+            LinkDataController.objects.filter(id__in=ids).update(
+                **dict(zip(EntriesRatingUpdater.FIELDS, new_values))
+            )
+
+        return sum(len(ids) for ids in changed.values())
+
+    def get_votes(self, entry_ids):
+        """
+        @returns map of entry id to average vote
+        """
+        from ..models import UserVotes
+
+        rows = (
+            UserVotes.objects.filter(entry_id__in=entry_ids)
+            .order_by()
+            .values("entry_id")
+            .annotate(total=Sum("vote"), count=Count("id"))
+        )
+
+        return {row["entry_id"]: row["total"] / row["count"] for row in rows}
+
+    def get_visits(self, entry_ids):
+        from ..models import UserEntryVisitHistory
+
+        rows = (
+            UserEntryVisitHistory.objects.filter(entry_id__in=entry_ids)
+            .order_by()
+            .values("entry_id")
+            .annotate(total=Sum("visits"))
+        )
+
+        return {row["entry_id"]: row["total"] or 0 for row in rows}
+
+    def get_tagged(self, entry_ids):
+        from ..models import UserTags
+
+        return set(
+            UserTags.objects.filter(entry_id__in=entry_ids)
+            .order_by()
+            .values_list("entry_id", flat=True)
+            .distinct()
+        )
+
+
 class EntriesUpdater(object):
     def get_entries_to_update(self, max_number_of_entries):
         """
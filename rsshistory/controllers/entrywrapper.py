@@ -78,53 +78,81 @@ class EntryWrapper(object):
                 return obj
 
     def get_from_db(self, objects):
+        """
+        If there are links with www. at front, and without it, return the one without it.
+        Alive entries are preferred. If all are dead - return https.
+
+        All variants are read with one query
+        """
+        candidates = self.get_link_candidates()
+
+        found = {}
+        for entry in objects.filter(link__in=candidates):
+            found[entry.link] = entry
+
+        for link in candidates:
+            if link in found and not found[link].is_dead():
+                return found[link]
+
+        for link in candidates:
+            if link in found:
+                return found[link]
+
+    def get_link_candidates(self):
+        """
+        Returns links, under which entry can be stored, in the order of get_from_db
+        """
+        candidates = []
+
         if self.link.startswith("http"):
             p = UrlLocation(self.link)
 
-            """
-            If there are links with www. at front, and without it, return the one without it
-            """
             if p.get_domain_only().startswith("www."):
-                link_url = p.get_protocol_url("https")
-                link_url = link_url.replace("www.", "")
-                entry_objs = objects.filter(link=link_url)
+                candidates.append(p.get_protocol_url("https").replace("www.", ""))
+                candidates.append(p.get_protocol_url("http").replace("www.", ""))
 
-                if entry_objs.exists() and not entry_objs[0].is_dead():
-                    return entry_objs[0]
+            candidates.append(p.get_protocol_url("https"))
+            candidates.append(p.get_protocol_url("http"))
 
-                link_url = p.get_protocol_url("http")
-                link_url = link_url.replace("www.", "")
-                entry_objs = objects.filter(link=link_url)
+        candidates.append(self.link)
 
-                if entry_objs.exists() and not entry_objs[0].is_dead():
-                    return entry_objs[0]
+        # remove duplicates, keep order
+        return list(dict.fromkeys(candidates))
 
-            link_https = p.get_protocol_url("https")
-            https_objs = objects.filter(link=link_https)
-
-            if https_objs.exists() and not https_objs[0].is_dead():
-                return https_objs[0]
+    def create(self, link_data):
+        is_archive = self.prepare_create(link_data)
 
-            link_http = p.get_protocol_url("http")
-            http_objs = objects.filter(link=link_http)
+        if not is_archive:
+            if self.strict_ids and "id" in link_data:
+                objs = LinkDataController.objects.filter(id=link_data["id"])
+                if objs.exists():
+                    return
 
-            if http_objs.exists() and not http_objs[0].is_dead():
-                return http_objs[0]
+            try:
+                ob = LinkDataController.objects.create(**link_data)
+            except Exception as E:
+                AppLogging.exc(E, "Cannot create link {}".format(link_data))
+                raise
 
-            """
-            If both are dead - return https
-            """
+        else:
+            if self.strict_ids and "id" in link_data:
+                objs = ArchiveLinkDataController.objects.filter(id=link_data["id"])
+                if objs.exists():
+                    return
 
-            if https_objs.exists():
-                return https_objs[0]
-            if http_objs.exists():
-                return http_objs[0]
+            try:
+                ob = ArchiveLinkDataController.objects.create(**link_data)
+            except Exception as E:
+                AppLogging.exc(E, "Cannot create archive link {}".format(link_data))
+                raise
 
-        objs = objects.filter(link=self.link)
-        if objs.exists():
-            return objs[0]
+        return ob
 
-    def create(self, link_data):
+    def prepare_create(self, link_data):
+        """
+        Fixes link data before it is inserted.
+        @return True if entry should be inserted into archive
+        """
         if "date_published" in link_data:
             self.date = link_data["date_published"]
         else:
@@ -175,31 +203,7 @@ class EntryWrapper(object):
         if self.user:
             link_data["user"] = self.user
 
-        if not is_archive or self.date is None:
-            if self.strict_ids and "id" in link_data:
-                objs = LinkDataController.objects.filter(id=link_data["id"])
-                if objs.exists():
-                    return
-
-            try:
-                ob = LinkDataController.objects.create(**link_data)
-            except Exception as E:
-                AppLogging.exc(E, "Cannot create link {}".format(link_data))
-                raise
-
-        elif is_archive:
-            if self.strict_ids and "id" in link_data:
-                objs = ArchiveLinkDataController.objects.filter(id=link_data["id"])
-                if objs.exists():
-                    return
-
-            try:
-                ob = ArchiveLinkDataController.objects.create(**link_data)
-            except Exception as E:
-                AppLogging.exc(E, "Cannot create archive link {}".format(link_data))
-                raise
-
-        return ob
+        return is_archive and self.date is not None
 
     def move_to_archive(self):
         entry_obj = self.entry
@@ -0,0 +1,352 @@
+from django.db import connection, transaction, DatabaseError
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+from ..apps import LinkDatabase
+from ..models import AppLogging, UserTags
+from .entries import LinkDataController
+
+
+class EntriesSearchIndex(object):
+    """
+    Full text search index of entries.
+
+     - SQLite uses FTS5 virtual table, Postgres uses tsvector table with GIN index
+     - index is kept in sync by database triggers, so bulk operations are also covered
+     - entries moved to archive are removed from the index. Archive is not indexed
+    """
+
+    TABLE_NAME = "{}_entries_search".format(LinkDatabase.name)
+
+    FIELDS = ["title", "link", "author", "album", "description"]
+
+    # pseudo column, which can be used in search view ordering
+    RANK = "search_rank"
+
+    def is_supported():
+        if connection.vendor == "postgresql":
+            return True
+
+        if connection.vendor == "sqlite":
+            return EntriesSearchIndex.is_fts5_supported()
+
+        return False
+
+    def is_fts5_supported():
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA compile_options")
+            options = [row[0] for row in cursor.fetchall()]
+
+        if "ENABLE_FTS5" in options:
+            return True
+
+        # python sqlite builds often have FTS5 built-in
+        try:
+            with transaction.atomic():
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        "CREATE VIRTUAL TABLE temp.{}_check USING fts5(text)".format(
+                            EntriesSearchIndex.TABLE_NAME
+                        )
+                    )
+                    cursor.execute(
+                        "DROP TABLE temp.{}_check".format(EntriesSearchIndex.TABLE_NAME)
+                    )
+            return True
+        except DatabaseError:
+            return False
+
+    def is_created():
+        return EntriesSearchIndex.TABLE_NAME in connection.introspection.table_names()
+
+    def is_enabled():
+        """
+        @returns True if search can use the index
+        """
+        from ..configuration import Configuration
+
+        config = Configuration.get_object().config_entry
+        if not config.enable_search_index:
+            return False
+
+        return EntriesSearchIndex.is_created()
+
+    def check():
+        """
+        Creates, or drops the index, according to configuration.
+        Called periodically.
+        """
+        from ..configuration import Configuration
+
+        config = Configuration.get_object().config_entry
+
+        if config.enable_search_index:
+            if not EntriesSearchIndex.is_created():
+                if not EntriesSearchIndex.is_supported():
+                    AppLogging.error(
+                        "Search index is not supported by database:{}".format(
+                            connection.vendor
+                        )
+                    )
+                    return
+
+                EntriesSearchIndex.create()
+        else:
+            if EntriesSearchIndex.is_created():
+                EntriesSearchIndex.drop()
+
+    def create():
+        """
+        Creates index, triggers and indexes all entries
+        """
+        if connection.vendor == "postgresql":
+            statements = EntriesSearchIndex.get_postgres_create_statements()
+        else:
+            statements = EntriesSearchIndex.get_sqlite_create_statements()
+
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                for statement in statements:
+                    cursor.execute(statement)
+
+            EntriesSearchIndex.rebuild()
+
+        AppLogging.info("Search index was created")
+
+    def drop():
+        if connection.vendor == "postgresql":
+            statements = EntriesSearchIndex.get_postgres_drop_statements()
+        else:
+            statements = EntriesSearchIndex.get_sqlite_drop_statements()
+
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                for statement in statements:
+                    cursor.execute(statement)
+
+        AppLogging.info("Search index was removed")
+
+    def rebuild():
+        """
+        Indexes all entries again. Set based, entries are not read by python.
+        """
+        names = EntriesSearchIndex.get_names()
+
+        with connection.cursor() as cursor:
+            cursor.execute("DELETE FROM {index}".format(**names))
+
+            if connection.vendor == "postgresql":
+                cursor.execute(
+                    "INSERT INTO {index}(entry_id, document) "
+                    "SELECT id, {index}_document(id) FROM {entries}".format(**names)
+                )
+            else:
+                cursor.execute(
+                    "INSERT INTO {index}(rowid, {fields}, tags) "
+                    "SELECT id, {fields}, "
+                    "(SELECT group_concat(tag, ' ') FROM {tags} WHERE entry_id = {entries}.id) "
+                    "FROM {entries}".format(**names)
+                )
+
+    def get_names():
+        return {
+            "index": EntriesSearchIndex.TABLE_NAME,
+            "entries": LinkDataController._meta.db_table,
+            "tags": UserTags._meta.db_table,
+            "fields": ", ".join(EntriesSearchIndex.FIELDS),
+        }
+
+    def get_sqlite_create_statements():
+        names = EntriesSearchIndex.get_names()
+
+        new_fields = ", ".join(
+            ["new.{}".format(field) for field in EntriesSearchIndex.FIELDS]
+        )
+        set_fields = ", ".join(
+            ["{0} = new.{0}".format(field) for field in EntriesSearchIndex.FIELDS]
+        )
+        set_tags = (
+            "UPDATE {index} SET tags = "
+            "(SELECT group_concat(tag, ' ') FROM {tags} WHERE entry_id = {{0}}.entry_id) "
+            "WHERE rowid = {{0}}.entry_id;".format(**names)
+        )
+
+        statements = []
+        statements.append(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS {index} USING fts5("
+            "{fields}, tags, tokenize = 'unicode61 remove_diacritics 2')".format(
+                **names
+            )
+        )
+        statements.append(
+            "CREATE TRIGGER IF NOT EXISTS {index}_ai AFTER INSERT ON {entries} BEGIN "
+            "INSERT INTO {index}(rowid, {fields}, tags) "
+            "VALUES (new.id, {new_fields}, ''); END".format(
+                new_fields=new_fields, **names
+            )
+        )
+        statements.append(
+            "CREATE TRIGGER IF NOT EXISTS {index}_au AFTER UPDATE OF {fields} ON {entries} BEGIN "
+            "UPDATE {index} SET {set_fields} WHERE rowid = new.id; END".format(
+                set_fields=set_fields, **names
+            )
+        )
+        statements.append(
+            "CREATE TRIGGER IF NOT EXISTS {index}_ad AFTER DELETE ON {entries} BEGIN "
+            "DELETE FROM {index} WHERE rowid = old.id; END".format(**names)
+        )
+        statements.append(
+            "CREATE TRIGGER IF NOT EXISTS {index}_tags_ai AFTER INSERT ON {tags} BEGIN "
+            "{set_tags} END".format(set_tags=set_tags.format("new"), **names)
+        )
+        statements.append(
+            "CREATE TRIGGER IF NOT EXISTS {index}_tags_ad AFTER DELETE ON {tags} BEGIN "
+            "{set_tags} END".format(set_tags=set_tags.format("old"), **names)
+        )
+        statements.append(
+            "CREATE TRIGGER IF NOT EXISTS {index}_tags_au AFTER UPDATE ON {tags} BEGIN "
+            "{old_tags} {new_tags} END".format(
+                old_tags=set_tags.format("old"),
+                new_tags=set_tags.format("new"),
+                **names
+            )
+        )
+        return statements
+
+    def get_sqlite_drop_statements():
+        names = EntriesSearchIndex.get_names()
+
+        statements = []
+        for trigger in ["ai", "au", "ad", "tags_ai", "tags_ad", "tags_au"]:
+            statements.append(
+                "DROP TRIGGER IF EXISTS {index}_{trigger}".format(
+                    trigger=trigger, **names
+                )
+            )
+        statements.append("DROP TABLE IF EXISTS {index}".format(**names))
+        return statements
+
+    def get_postgres_create_statements():
+        names = EntriesSearchIndex.get_names()
+
+        document_fields = ", ".join(
+            ["entry.{}".format(field) for field in EntriesSearchIndex.FIELDS]
+        )
+
+        statements = []
+        statements.append(
+            "CREATE TABLE IF NOT EXISTS {index} ("
+            "entry_id integer PRIMARY KEY REFERENCES {entries}(id) ON DELETE CASCADE, "
+            "document tsvector NOT NULL)".format(**names)
+        )
+        statements.append(
+            "CREATE INDEX IF NOT EXISTS {index}_document ON {index} USING GIN(document)".format(
+                **names
+            )
+        )
+        statements.append(
+            "CREATE OR REPLACE FUNCTION {index}_document(input_id integer) RETURNS tsvector AS $$ "
+            "SELECT to_tsvector('simple', concat_ws(' ', {document_fields}, "
+            "(SELECT string_agg(tag, ' ') FROM {tags} WHERE entry_id = entry.id))) "
+            "FROM {entries} entry WHERE entry.id = input_id "
+            "$$ LANGUAGE sql STABLE".format(document_fields=document_fields, **names)
+        )
+        statements.append(
+            "CREATE OR REPLACE FUNCTION {index}_refresh(input_id integer) RETURNS void AS $$ "
+            "INSERT INTO {index}(entry_id, document) "
+            "SELECT id, {index}_document(id) FROM {entries} WHERE id = input_id "
+            "ON CONFLICT (entry_id) DO UPDATE SET document = EXCLUDED.document "
+            "$$ LANGUAGE sql".format(**names)
+        )
+        statements.append(
+            "CREATE OR REPLACE FUNCTION {index}_entries_trigger() RETURNS trigger AS $$ "
+            "BEGIN PERFORM {index}_refresh(NEW.id); RETURN NULL; END "
+            "$$ LANGUAGE plpgsql".format(**names)
+        )
+        statements.append(
+            "CREATE OR REPLACE FUNCTION {index}_tags_trigger() RETURNS trigger AS $$ "
+            "BEGIN "
+            "IF TG_OP <> 'INSERT' AND OLD.entry_id IS NOT NULL THEN PERFORM {index}_refresh(OLD.entry_id); END IF; "
+            "IF TG_OP <> 'DELETE' AND NEW.entry_id IS NOT NULL THEN PERFORM {index}_refresh(NEW.entry_id); END IF; "
+            "RETURN NULL; END "
+            "$$ LANGUAGE plpgsql".format(**names)
+        )
+        statements.append(
+            "DROP TRIGGER IF EXISTS {index}_entries ON {entries}".format(**names)
+        )
+        statements.append(
+            "CREATE TRIGGER {index}_entries AFTER INSERT OR UPDATE OF {fields} ON {entries} "
+            "FOR EACH ROW EXECUTE FUNCTION {index}_entries_trigger()".format(**names)
+        )
+        statements.append(
+            "DROP TRIGGER IF EXISTS {index}_tags ON {tags}".format(**names)
+        )
+        statements.append(
+            "CREATE TRIGGER {index}_tags AFTER INSERT OR UPDATE OR DELETE ON {tags} "
+            "FOR EACH ROW EXECUTE FUNCTION {index}_tags_trigger()".format(**names)
+        )
+        return statements
+
+    def get_postgres_drop_statements():
+        names = EntriesSearchIndex.get_names()
+
+        return [
+            "DROP TRIGGER IF EXISTS {index}_entries ON {entries}".format(**names),
+            "DROP TRIGGER IF EXISTS {index}_tags ON {tags}".format(**names),
+            "DROP FUNCTION IF EXISTS {index}_entries_trigger()".format(**names),
+            "DROP FUNCTION IF EXISTS {index}_tags_trigger()".format(**names),
+            "DROP FUNCTION IF EXISTS {index}_refresh(integer)".format(**names),
+            "DROP FUNCTION IF EXISTS {index}_document(integer)".format(**names),
+            "DROP TABLE IF EXISTS {index}".format(**names),
+        ]
+
+    def get_match_text(search_text):
+        """
+        Converts user text into FTS5 query.
+        Each word is quoted, so that URL characters are not treated as FTS5 syntax.
+        Last token of each word is matched as prefix.
+        """
+        words = []
+        for word in search_text.split():
+            words.append('"{}"*'.format(word.replace('"', '""')))
+
+        return " ".join(words)
+
+    def get_condition(search_text):
+        """
+        @returns Q condition matching entries, or None if text cannot be searched
+        """
+        if not search_text or not search_text.strip():
+            return
+
+        names = EntriesSearchIndex.get_names()
+
+        if connection.vendor == "postgresql":
+            sql = (
+                "SELECT entry_id FROM {index} "
+                "WHERE document @@ websearch_to_tsquery('simple', %s)".format(**names)
+            )
+            return Q(id__in=RawSQL(sql, (search_text,)))
+
+        sql = "SELECT rowid FROM {index} WHERE {index} MATCH %s".format(**names)
+        return Q(id__in=RawSQL(sql, (EntriesSearchIndex.get_match_text(search_text),)))
+
+    def get_rank(search_text):
+        """
+        @returns expression for annotating entries with rank. Higher is better
+        """
+        names = EntriesSearchIndex.get_names()
+
+        if connection.vendor == "postgresql":
+            sql = (
+                "SELECT ts_rank(document, websearch_to_tsquery('simple', %s)) "
+                "FROM {index} WHERE entry_id = {entries}.id".format(**names)
+            )
+            return RawSQL(sql, (search_text,))
+
+        # bm25 rank is lower for better matches
+        sql = (
+            "SELECT -rank FROM {index} "
+            "WHERE {index} MATCH %s AND rowid = {entries}.id".format(**names)
+        )
+        return RawSQL(sql, (EntriesSearchIndex.get_match_text(search_text),))
@@ -0,0 +1,244 @@
+import threading
+from datetime import timedelta
+
+from django.db import connection, DatabaseError
+
+from utils.dateutils import DateUtils
+
+from ..models import (
+    AppLogging,
+    BackgroundJob,
+    BackgroundJobHistory,
+    SourceOperationalData,
+)
+from .backgroundjob import BackgroundJobController
+from .system import SystemOperationController
+
+
+class StatisticsCache(object):
+    """
+    Process local cache of computed values. Each value expires after its period.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        with self.lock:
+            self.values = {}
+            self.hits = 0
+            self.misses = 0
+
+    def get(self, key, period_s, function):
+        now = DateUtils.get_datetime_now_utc()
+
+        with self.lock:
+            if key in self.values:
+                value, date = self.values[key]
+                if (now - date).total_seconds() < period_s:
+                    self.hits += 1
+                    return value
+
+        value = function()
+
+        with self.lock:
+            self.misses += 1
+            self.values[key] = (value, now)
+
+        return value
+
+    def get_stats(self):
+        with self.lock:
+            return {"hits": self.hits, "misses": self.misses}
+
+
+class TableStatistics(object):
+    """
+    Number of rows of tables, for status pages.
+
+     - COUNT(*) of a big table is a sequential scan, so database estimate is used.
+       PostgreSQL keeps it in pg_class.reltuples, SQLite in sqlite_stat1 (after ANALYZE)
+     - SQLite does not update sqlite_stat1 by itself. ANALYZE is run by the cleanup
+       job, and the estimate is used only if it is not older than ANALYZE_MAX_AGE_S
+     - small tables, and tables without estimate are counted. Counts are cached
+       for COUNT_PERIOD_S
+     - exact counts are available on demand
+    """
+
+    COUNT_PERIOD_S = 5 * 60
+    ESTIMATE_PERIOD_S = 60
+
+    # cleanup runs every day
+    ANALYZE_MAX_AGE_S = 2 * 24 * 60 * 60
+
+    # rows of index read by ANALYZE, big tables are analyzed approximately
+    ANALYZE_LIMIT = 1000
+
+    # estimates of small tables are not precise, and counting them is cheap
+    MIN_ESTIMATED_ROWS = 10000
+
+    cache = StatisticsCache()
+
+    def get_tables(models, exact=False):
+        """
+        @param models list of table name, and model
+        @return list of table name, count, and estimate indication
+        """
+        result = []
+
+        for name, model in models:
+            if exact:
+                count = model.objects.count()
+                estimated = False
+            else:
+                count, estimated = TableStatistics.get_count(model)
+
+            result.append({"name": name, "count": count, "estimated": estimated})
+
+        return result
+
+    def get_count(model):
+        """
+        @return number of rows, and estimate indication
+        """
+        db_table = model._meta.db_table
+
+        estimate = TableStatistics.cache.get(
+            ("estimate", db_table),
+            TableStatistics.ESTIMATE_PERIOD_S,
+            lambda: TableStatistics.get_estimate(db_table),
+        )
+
+        if estimate is not None and estimate >= TableStatistics.MIN_ESTIMATED_ROWS:
+            return estimate, True
+
+        count = TableStatistics.cache.get(
+            ("count", db_table),
+            TableStatistics.COUNT_PERIOD_S,
+            lambda: model.objects.count(),
+        )
+        return count, False
+
+    def get_estimate(db_table):
+        """
+        @return estimated number of rows, or None if database does not know it
+        """
+        try:
+            if connection.vendor == "postgresql":
+                return TableStatistics.get_estimate_postgresql(db_table)
+
+            if connection.vendor == "sqlite":
+                return TableStatistics.get_estimate_sqlite(db_table)
+        except DatabaseError as E:
+            AppLogging.exc(
+                exception_object=E,
+                info_text="Cannot read table statistics:{}".format(db_table),
+            )
+
+    def get_estimate_postgresql(db_table):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT reltuples FROM pg_class WHERE oid = to_regclass(%s)",
+                [db_table],
+            )
+            row = cursor.fetchone()
+
+        # table that was never analyzed has -1
+        if row and row[0] is not None and row[0] >= 0:
+            return int(row[0])
+
+    def get_estimate_sqlite(db_table):
+        if not TableStatistics.is_analyzed():
+            return
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT name FROM sqlite_master WHERE type='table' AND name='sqlite_stat1'"
+            )
+            if cursor.fetchone() is None:
+                # ANALYZE was never run
+                return
+
+            cursor.execute("SELECT stat FROM sqlite_stat1 WHERE tbl = %s", [db_table])
+            rows = cursor.fetchall()
+
+        # first number of stat is the number of rows of index, or table
+        counts = []
+        for row in rows:
+            if row[0]:
+                counts.append(int(row[0].split(" ")[0]))
+
+        if counts:
+            return max(counts)
+
+    def is_analyzed():
+        """
+        @return indication if statistics of tables were updated recently
+        """
+        date_limit = DateUtils.get_datetime_now_utc() - timedelta(
+            seconds=TableStatistics.ANALYZE_MAX_AGE_S
+        )
+        return BackgroundJobHistory.objects.filter(
+            job=BackgroundJob.JOB_CLEANUP,
+            subject="TableStatistics",
+            date_created__gt=date_limit,
+        ).exists()
+
+    def cleanup(cfg=None):
+        """
+        Updates statistics of tables, which are used for estimates
+        """
+        if connection.vendor != "sqlite":
+            # PostgreSQL statistics are updated by autovacuum
+            return
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "PRAGMA analysis_limit={}".format(TableStatistics.ANALYZE_LIMIT)
+            )
+            cursor.execute("ANALYZE")
+
+        BackgroundJobHistory.objects.filter(
+            job=BackgroundJob.JOB_CLEANUP, subject="TableStatistics"
+        ).delete()
+        BackgroundJobHistory.objects.create(
+            job=BackgroundJob.JOB_CLEANUP, subject="TableStatistics", task="", args=""
+        )
+
+        TableStatistics.cache.clear()
+
+
+class SystemIndicators(object):
+    """
+    Indicators are polled by every open page. They are shared by users,
+    so they are computed at most once per PERIOD_S.
+    """
+
+    PERIOD_S = 5
+
+    cache = StatisticsCache()
+
+    def get():
+        return SystemIndicators.cache.get(
+            "indicators", SystemIndicators.PERIOD_S, SystemIndicators.calculate
+        )
+
+    def calculate():
+        system_controller = SystemOperationController()
+
+        data = {}
+        data["sources_queue_size"] = BackgroundJobController.get_number_of_jobs(
+            BackgroundJob.JOB_PROCESS_SOURCE
+        )
+        data["is_sources_error"] = SourceOperationalData.objects.filter(
+            consecutive_errors__gt=0, source_obj__enabled=True
+        ).exists()
+        data["is_internet_ok"] = system_controller.is_internet_ok()
+        data["is_remote_server_down"] = system_controller.is_remote_server_down()
+        data["is_threading_ok"] = system_controller.is_threading_ok()
+        data["is_backgroundjobs_error"] = BackgroundJobController.objects.filter(
+            errors__gt=0
+        ).exists()
+
+        return data
@@ -17,6 +17,9 @@ from ..pluginurl import UrlHandler
 class SystemOperationController(object):
 
     def refresh(self, thread_id):
+        """
+        Called before jobs. Statuses are cached, so usually it does not touch the database
+        """
         # any thread can ping, check
 
         if self.is_it_time_to_ping():
@@ -83,27 +86,23 @@ class SystemOperationController(object):
         thread_ids = SystemOperationController.get_threads()
 
         # delete any obsolte
-        current_thread_ids = SystemOperationController.get_model_threads()
-
-        diff_elements = set(current_thread_ids) - set(thread_ids)
-        for diff in diff_elements:
-            rows = SystemOperation.objects.filter(thread_id=diff)
-            rows.delete()
-
-        check_types = SystemOperation.objects.values_list(
-            "check_type", flat=True
-        ).distinct()
-
-        for thread_id in thread_ids:
-            for check_type in check_types:
-                # leave one entry
-                all_entries = SystemOperation.objects.filter(
-                    thread_id=thread_id, check_type=check_type
-                )
-                if all_entries.exists() and all_entries.count() > 1:
-                    entries = all_entries[1:]
-                    for entry in entries:
-                        entry.delete()
+        SystemOperation.objects.exclude(thread_id__in=thread_ids).delete()
+
+        # leave one entry for each thread, and check type
+        kept = set()
+        obsolete_ids = []
+
+        rows = SystemOperation.objects.order_by("-date_created", "-id").values_list(
+            "id", "thread_id", "check_type"
+        )
+        for row_id, thread_id, check_type in rows:
+            if (thread_id, check_type) in kept:
+                obsolete_ids.append(row_id)
+            else:
+                kept.add((thread_id, check_type))
+
+        if obsolete_ids:
+            SystemOperation.objects.filter(id__in=obsolete_ids).delete()
 
     def is_it_time_to_ping(self):
         datetime = self.last_operation_status_date()
@@ -111,7 +110,7 @@ class SystemOperationController(object):
             return True
 
         timedelta = DateUtils.get_datetime_now_utc() - datetime
-        if timedelta.seconds > 60:
+        if timedelta.total_seconds() > 60:
             return True
         return False
 
@@ -183,16 +182,14 @@ class SystemOperationController(object):
     def last_operation_status_date(
         self, check_type=SystemOperation.CHECK_TYPE_INTERNET
     ):
-        entries = SystemOperation.objects.filter(check_type=check_type)
-
-        if entries.exists():
-            return entries[0].date_created
+        status = SystemOperation.cache.get_status(check_type)
+        if status:
+            return status[1]
 
     def last_operation_status(self, check_type=SystemOperation.CHECK_TYPE_INTERNET):
-        entries = SystemOperation.objects.filter(check_type=check_type)
-
-        if entries.exists():
-            return entries[0].status
+        status = SystemOperation.cache.get_status(check_type)
+        if status:
+            return status[0]
         return True
 
     def get_thread_info(self, thread_id):
@@ -128,6 +128,7 @@ class ConfigForm(forms.ModelForm):
             "enable_link_archiving",
             "enable_source_archiving",
             "enable_crawling",
+            "enable_search_index",
             # database link contents
             "accept_domain_links",
             "accept_non_domain_links",
@@ -138,6 +139,7 @@ class ConfigForm(forms.ModelForm):
             "accept_same_hashes",
             "prefer_https_links",
             "prefer_non_www_links",
+            "merge_duplicate_links",
             "enable_social_data",
             "auto_crawl_sources", # crawl
             "auto_scan_new_entries", # crawl
@@ -154,6 +156,8 @@ class ConfigForm(forms.ModelForm):
             "default_source_state",
             # updates
             "sources_refresh_period",
+            "sources_fetch_workers",
+            "sources_fetch_per_domain",
             "days_to_move_to_archive",
             "days_to_remove_links",
             "days_to_remove_stale_entries",
@@ -237,6 +241,7 @@ class DataExportForm(forms.ModelForm):
             "format_md",
             "format_rss",
             "format_html",
+            "format_csv",
             "format_sources_opml",
             "output_zip",
             "output_sqlite",
@@ -0,0 +1,400 @@
+"""
+Measures performance of critical paths.
+
+All data created by benchmarks are rolled back, so the command can be run on a working instance.
+
+Examples:
+    python manage.py benchmark --case jobqueue --size 100000
+    python manage.py benchmark --case entryrules --size 500
+    python manage.py benchmark --case export --size 100000
+    python manage.py benchmark --case sqlite --size 100000
+    python manage.py benchmark --case import --size 10000
+    python manage.py benchmark --case ratings --size 100000
+"""
+
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+
+
+def benchmark_jobqueue(size, repeat):
+    """
+    Claim latency with 'size' queued update jobs, and a few urgent link add jobs
+    """
+    from ...controllers import BackgroundJobController
+    from ...models import BackgroundJob
+
+    update_priority = BackgroundJobController.get_job_priority(
+        BackgroundJob.JOB_LINK_UPDATE_DATA
+    )
+    add_priority = BackgroundJobController.get_job_priority(BackgroundJob.JOB_LINK_ADD)
+
+    batch = []
+    for index in range(size):
+        batch.append(
+            BackgroundJob(
+                job=BackgroundJob.JOB_LINK_UPDATE_DATA,
+                subject=str(index),
+                priority=update_priority,
+            )
+        )
+        if len(batch) >= 1000:
+            BackgroundJob.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        BackgroundJob.objects.bulk_create(batch)
+
+    for index in range(repeat):
+        BackgroundJob.objects.create(
+            job=BackgroundJob.JOB_LINK_ADD,
+            subject="https://example.com/{}".format(index),
+            priority=add_priority,
+        )
+
+    conditions = Q(enabled=True) & (
+        Q(job=BackgroundJob.JOB_LINK_ADD) | Q(job=BackgroundJob.JOB_LINK_UPDATE_DATA)
+    )
+    conditions &= Q(task="benchmark") | Q(task__isnull=True)
+
+    timings = []
+    urgent_first = True
+    for index in range(repeat):
+        start = time.perf_counter()
+        claimed = BackgroundJobController.claim_jobs(
+            conditions,
+            task="benchmark",
+            limit=BackgroundJobController.CLAIM_BATCH_SIZE,
+        )
+        timings.append(time.perf_counter() - start)
+
+        if index == 0 and claimed and claimed[0].job != BackgroundJob.JOB_LINK_ADD:
+            urgent_first = False
+
+        # release claimed jobs, as processing would
+        BackgroundJob.objects.filter(id__in=[job.id for job in claimed]).delete()
+
+    timings.sort()
+    return {
+        "queued jobs": size,
+        "claims": repeat,
+        "median claim ms": 1000 * timings[len(timings) // 2],
+        "max claim ms": 1000 * timings[-1],
+        "urgent job claimed first": urgent_first,
+    }
+
+
+def benchmark_entryrules(size, repeat):
+    """
+    Rule checks per second with 'size' enabled block rules
+    """
+    from ...models import EntryRules
+
+    batch = []
+    for index in range(size):
+        batch.append(
+            EntryRules(
+                enabled=True,
+                block=True,
+                priority=index,
+                rule_name="benchmark {}".format(index),
+                trigger_rule_url="spam{}\\.com, casino{}\\.".format(index, index),
+                trigger_text="blocked phrase {}".format(index),
+            )
+        )
+    # bulk create does not send signals
+    EntryRules.objects.bulk_create(batch)
+    EntryRules.cache.clear()
+
+    dictionaries = []
+    for index in range(1000):
+        dictionaries.append(
+            {
+                "link": "https://example{}.com/article/{}".format(index % 50, index),
+                "title": "Article title number {}".format(index),
+                "description": "Article description, that is not blocked",
+            }
+        )
+
+    start = time.perf_counter()
+    EntryRules.cache.get_rules()
+    build_time = time.perf_counter() - start
+
+    checks = 0
+    start = time.perf_counter()
+    for index in range(repeat):
+        for dictionary in dictionaries:
+            EntryRules.is_dict_blocked(dictionary)
+            checks += 1
+    total_time = time.perf_counter() - start
+
+    blocked = EntryRules.is_dict_blocked({"link": "https://spam7.com", "title": ""})
+
+    EntryRules.cache.clear()
+
+    return {
+        "rules": size,
+        "checks": checks,
+        "rule set build ms": 1000 * build_time,
+        "checks per second": checks / total_time,
+        "blocked url detected": bool(blocked),
+    }
+
+
+def create_bookmarked_entries(size):
+    from ...controllers import LinkDataController
+
+    batch = []
+    for index in range(size):
+        batch.append(
+            LinkDataController(
+                link="https://example{}.com/article/{}".format(index % 100, index),
+                title="Article title number {}".format(index),
+                description="Article description " * 10,
+                bookmarked=True,
+                language="en",
+            )
+        )
+        if len(batch) >= 1000:
+            LinkDataController.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        LinkDataController.objects.bulk_create(batch)
+
+
+def benchmark_export(size, repeat):
+    """
+    Peak memory of JSON, markdown, RSS, and CSV export of 'size' entries
+    """
+    from ...configuration import Configuration
+    from ...controllers import LinkDataController
+    from ...datawriter import DataWriterConfiguration
+    from ...models import DataExport
+    from ...serializers.entriesexporter import EntriesExporter
+
+    create_bookmarked_entries(size)
+
+    export = DataExport.objects.create(
+        export_type=DataExport.EXPORT_TYPE_GIT,
+        export_data=DataExport.EXPORT_YEAR_DATA,
+        local_path="benchmark",
+        remote_path="benchmark",
+        format_json=True,
+        format_md=True,
+        format_rss=True,
+        format_csv=True,
+    )
+
+    config = Configuration.get_object().config_entry
+    entries = LinkDataController.objects.filter(bookmarked=True)
+
+    with tempfile.TemporaryDirectory() as directory:
+        data_writer_config = DataWriterConfiguration(config, export, Path(directory))
+        exporter = EntriesExporter(data_writer_config, entries)
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        exporter.export_entries(
+            export_file_name="benchmark", export_path=Path(directory)
+        )
+        total_time = time.perf_counter() - start
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        file_size = sum(path.stat().st_size for path in Path(directory).iterdir())
+
+    peak_mb = peak / (1024 * 1024)
+
+    return {
+        "entries": size,
+        "export s": total_time,
+        "files MB": file_size / (1024 * 1024),
+        "peak MB": peak_mb,
+        "MB per 100k entries": peak_mb * 100000 / max(size, 1),
+    }
+
+
+def benchmark_sqlite(size, repeat):
+    """
+    Time of SQLite snapshot of 'size' entries
+    """
+    from ...configuration import Configuration
+    from ...controllers import LinkDataController
+    from ...datawriter import DataWriterConfiguration
+    from ...models import DataExport
+    from ...serializers.entriesexporter import EntriesExporter
+
+    create_bookmarked_entries(size)
+
+    export = DataExport.objects.create(
+        export_type=DataExport.EXPORT_TYPE_GIT,
+        export_data=DataExport.EXPORT_YEAR_DATA,
+        local_path="benchmark",
+        remote_path="benchmark",
+        output_sqlite=True,
+    )
+
+    config = Configuration.get_object().config_entry
+    entries = LinkDataController.objects.filter(bookmarked=True)
+
+    with tempfile.TemporaryDirectory() as directory:
+        data_writer_config = DataWriterConfiguration(config, export, Path(directory))
+        exporter = EntriesExporter(data_writer_config, entries)
+
+        file_name = Path(directory) / "benchmark.db"
+
+        start = time.perf_counter()
+        exporter.items2sqlite(entries, file_name)
+        total_time = time.perf_counter() - start
+
+        file_size = file_name.stat().st_size
+
+    return {
+        "entries": size,
+        "snapshot s": total_time,
+        "entries/s": size / total_time,
+        "file MB": file_size / (1024 * 1024),
+    }
+
+
+def benchmark_import(size, repeat):
+    """
+    Links imported per second, from JSON files of 1000 links
+    """
+    import json
+    from django.contrib.auth.models import User
+
+    from ...controllers import LinkDataController
+    from ...serializers import JsonImporter
+
+    user = User.objects.create_user(username="benchmark", password="benchmark")
+
+    with tempfile.TemporaryDirectory() as directory:
+        for start in range(0, size, 1000):
+            links = []
+            for index in range(start, min(start + 1000, size)):
+                links.append(
+                    {
+                        "link": "https://example{}.com/article/{}".format(
+                            index % 100, index
+                        ),
+                        "title": "Article title number {}".format(index),
+                        "description": "Article description " * 10,
+                        "bookmarked": True,
+                        "language": "en",
+                        "tags": ["tag{}".format(index % 10)],
+                        "vote": 0,
+                    }
+                )
+
+            path = Path(directory) / "entries_{:08d}.json".format(start)
+            path.write_text(json.dumps(links))
+
+        importer = JsonImporter(path=directory, user=user)
+
+        start = time.perf_counter()
+        importer.import_all()
+        total_time = time.perf_counter() - start
+
+    return {
+        "links": size,
+        "imported": LinkDataController.objects.count(),
+        "import s": total_time,
+        "links/s": size / total_time,
+    }
+
+
+def benchmark_ratings(size, repeat):
+    """
+    Page rating recalculation of 'size' entries, with votes, visits and tags
+    """
+    from django.contrib.auth.models import User
+
+    from ...controllers import LinkDataController, EntryUpdater, EntriesRatingUpdater
+    from ...models import UserVotes, UserTags, UserEntryVisitHistory
+
+    user = User.objects.create_user(username="benchmark", password="benchmark")
+
+    create_bookmarked_entries(size)
+
+    votes = []
+    tags = []
+    visits = []
+    for entry_id in LinkDataController.objects.values_list("id", flat=True):
+        votes.append(UserVotes(user=user, entry_id=entry_id, vote=entry_id % 100))
+        if entry_id % 2 == 0:
+            tags.append(UserTags(user=user, entry_id=entry_id, tag="benchmark"))
+        if entry_id % 3 == 0:
+            visits.append(UserEntryVisitHistory(user=user, entry_id=entry_id, visits=2))
+
+    UserVotes.objects.bulk_create(votes, batch_size=1000)
+    UserTags.objects.bulk_create(tags, batch_size=1000)
+    UserEntryVisitHistory.objects.bulk_create(visits, batch_size=1000)
+
+    # one entry at a time, measured on a sample
+    sample = list(LinkDataController.objects.all()[:1000])
+    start = time.perf_counter()
+    for entry in sample:
+        EntryUpdater(entry).update_calculated_vote()
+    single_time = (time.perf_counter() - start) * size / max(len(sample), 1)
+
+    LinkDataController.objects.update(
+        page_rating_votes=0, page_rating_visits=0, page_rating=0
+    )
+
+    start = time.perf_counter()
+    changed = EntriesRatingUpdater().update()
+    bulk_time = time.perf_counter() - start
+
+    return {
+        "entries": size,
+        "changed": changed,
+        "one by one s (estimated)": single_time,
+        "bulk s": bulk_time,
+        "entries/s": size / bulk_time,
+    }
+
+
+BENCHMARKS = {
+    "jobqueue": benchmark_jobqueue,
+    "entryrules": benchmark_entryrules,
+    "export": benchmark_export,
+    "sqlite": benchmark_sqlite,
+    "import": benchmark_import,
+    "ratings": benchmark_ratings,
+}
+
+
+class Command(BaseCommand):
+    help = "Runs performance benchmarks. Created data are rolled back"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--case",
+            type=str,
+            help="Benchmark name",
+            choices=list(BENCHMARKS.keys()),
+            required=True,
+        )
+        parser.add_argument("--size", type=int, default=100000, help="Size of data set")
+        parser.add_argument(
+            "--repeat", type=int, default=20, help="Number of measurements"
+        )
+
+    def handle(self, *args, **options):
+        case = options["case"]
+        benchmark = BENCHMARKS[case]
+
+        with transaction.atomic():
+            result = benchmark(options["size"], options["repeat"])
+            transaction.set_rollback(True)
+
+        self.stdout.write(f"{case}:")
+        for key, value in result.items():
+            if isinstance(value, float):
+                value = "{:.3f}".format(value)
+            self.stdout.write(f"  {key}: {value}")
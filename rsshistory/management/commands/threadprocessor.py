@@ -9,7 +9,9 @@ I have tried some things for background processing:
  - this - I can clearly see threads - by name. Is much closer to what I wanted to achieve
 """
 
+import sys
 import time
+import signal
 import importlib
 import threading
 import traceback
@@ -55,6 +57,56 @@ def process_workspace(workspace, processor_class_name, processors_list, thread_n
         print(error_text)
 
 
+def startup_workspace(workspace, processor_class_name, processors_list, thread_name):
+    """
+    Lets workspace prepare for work, for example load slow resources
+    """
+    try:
+        threadprocessors_module = importlib.import_module(
+            f"{workspace}.threadprocessors"
+        )
+    except ModuleNotFoundError as e:
+        return
+
+    startup = getattr(threadprocessors_module, "startup", None)
+    processor_class = getattr(threadprocessors_module, processor_class_name, None)
+    if not startup or not processor_class:
+        return
+
+    try:
+        startup(Processor=processor_class,
+                processors_list=processors_list,
+                thread_name=thread_name)
+    except Exception as e:
+        print("Error while starting workspace: ", str(e), workspace)
+
+
+def shutdown_workspace(workspace):
+    """
+    Lets workspace finish its work, for example write buffered logs
+    """
+    try:
+        threadprocessors_module = importlib.import_module(
+            f"{workspace}.threadprocessors"
+        )
+    except ModuleNotFoundError as e:
+        return
+
+    shutdown = getattr(threadprocessors_module, "shutdown", None)
+    if not shutdown:
+        return
+
+    try:
+        shutdown()
+    except Exception as e:
+        print("Error while closing workspace: ", str(e), workspace)
+
+
+def on_terminate(signum, frame):
+    # leave through 'finally' blocks, as for Ctrl-C
+    sys.exit(0)
+
+
 class Command(BaseCommand):
     help = "Runs a background worker indefinitely"
 
@@ -68,7 +120,23 @@ class Command(BaseCommand):
         process = options["process"]
         input_workspace = options["workspace"]
 
-        self.handle_threaded(input_workspace, process, thread)
+        signal.signal(signal.SIGTERM, on_terminate)
+
+        # workers finish their current job, and write their buffered logs
+        self.stop_event = threading.Event()
+        self.threads = []
+
+        try:
+            self.handle_threaded(input_workspace, process, thread)
+        except (KeyboardInterrupt, SystemExit):
+            print(f"{process}/{thread}: Closing...")
+            self.stop_threads(process, thread)
+        finally:
+            for workspace in settings.WORKSPACES:
+                if input_workspace is not None and input_workspace != workspace:
+                    continue
+
+                shutdown_workspace(workspace)
 
     def handle_single_thread(self, process, thread):
         print(f"{process}/{thread}: Starting...")
@@ -129,8 +197,6 @@ class Command(BaseCommand):
     def handle_threaded(self, input_workspace, process, thread):
         print(f"{process}/{thread}: Starting...")
 
-        threads = []
-
         for workspace in settings.WORKSPACES:
             if input_workspace is not None and input_workspace != workspace:
                 continue
@@ -142,17 +208,26 @@ class Command(BaseCommand):
                     daemon=True,
             )
             thread_id.start()
-            threads.append(thread_id)
+            self.threads.append(thread_id)
 
         print(f"{process}/{thread}: Waiting for threads to complete...")
-        for thread_id in threads:
+        for thread_id in self.threads:
+            thread_id.join()
+
+    def stop_threads(self, process, thread):
+        self.stop_event.set()
+
+        print(f"{process}/{thread}: Waiting for threads to finish jobs...")
+        for thread_id in self.threads:
             thread_id.join()
 
     def handle_workspace_threaded(self, workspace, process, thread):
         iteration = 0
         check_memory = False
 
-        while True:
+        startup_workspace(workspace, process, settings.PROCESSORS_INFO, thread)
+
+        while not self.stop_event.is_set():
             print(f"{workspace}/{process}/{thread}: Start")
 
             #iteration += 1
@@ -167,7 +242,7 @@ class Command(BaseCommand):
                                                                      process,
                                                                      check_memory)
             if not more_jobs_workspace:
-                time.sleep(30)  # 30 sec
+                self.stop_event.wait(30)  # 30 sec
             else:
                 print(f"{workspace}/{process}/{thread}: More jobs to do")
 
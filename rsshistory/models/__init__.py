@@ -6,10 +6,13 @@ When a model has too much code, some of it is moved to "controllers"
 
 from .system import (
     ConfigurationEntry,
+    ConfigurationCache,
     SystemOperation,
     UserConfig,
     AppLogging,
+    AppLoggingBuffer,
     AppLoggingController,
+    batch_remove,
 )
 from .backgroundjob import (
     BackgroundJob,
@@ -42,6 +45,9 @@ from .keywords import (
 )
 from .entryrules import (
     EntryRules,
+    EntryRuleSet,
+    EntryRulesCache,
+    EntryRulePulp,
 )
 from .apikeys import (
     ApiKeys,
@@ -63,9 +69,14 @@ from .modelfiles import ModelFiles
 
 from .readmarkers import ReadMarkers
 from .readlater import ReadLater
-from .browser import Browser
+from .browser import Browser, BrowserStatistics
 
-from .blockentry import BlockEntryList, BlockEntry, BlockListReader
+from .blockentry import (
+    BlockEntryList,
+    BlockEntry,
+    BlockListReader,
+    BlockEntryMatcher,
+)
 
 from .gateway import Gateway
 
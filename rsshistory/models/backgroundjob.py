@@ -12,7 +12,9 @@ class BackgroundJob(models.Model):
     JOB_LINK_UPDATE_DATA = "link-update-data"
     JOB_LINK_RESET_DATA = "link-reset-data"
     JOB_LINK_RESET_LOCAL_DATA = "link-reset-local-data"
+    JOB_ENTRIES_RESET_LOCAL_DATA = "entries-reset-local-data"
     JOB_LINK_DOWNLOAD_SOCIAL = "link-social-data"
+    JOB_LINK_ADD_KEYWORDS = "link-keywords"
     JOB_LINK_DOWNLOAD = "link-download"
     JOB_LINK_DOWNLOAD_MUSIC = "download-music"
     JOB_LINK_DOWNLOAD_VIDEO = "download-video"
@@ -40,6 +42,7 @@ class BackgroundJob(models.Model):
         "initialize-block-list"  # initializes one specific block list
     )
     JOB_REFRESH = "refresh"
+    JOB_PROCESS_VISITS = "process-visits"
 
     # fmt: off
     JOB_CHOICES = (
@@ -49,7 +52,9 @@ class BackgroundJob(models.Model):
         (JOB_LINK_UPDATE_DATA, JOB_LINK_UPDATE_DATA),           # fetches data from the internet, updates what is missing, updates page rating
         (JOB_LINK_RESET_DATA, JOB_LINK_RESET_DATA,),            # fetches data from the internet, replaces data, updates page rating
         (JOB_LINK_RESET_LOCAL_DATA, JOB_LINK_RESET_LOCAL_DATA,),# recalculates page rating
+        (JOB_ENTRIES_RESET_LOCAL_DATA, JOB_ENTRIES_RESET_LOCAL_DATA,),  # recalculates page rating of all entries
         (JOB_LINK_DOWNLOAD_SOCIAL, JOB_LINK_DOWNLOAD_SOCIAL,),  # downloads social data
+        (JOB_LINK_ADD_KEYWORDS, JOB_LINK_ADD_KEYWORDS,),        # adds keywords of entry title
         (JOB_LINK_DOWNLOAD, JOB_LINK_DOWNLOAD),                 # link is downloaded using wget
         (JOB_LINK_DOWNLOAD_MUSIC, JOB_LINK_DOWNLOAD_MUSIC),     #
         (JOB_LINK_DOWNLOAD_VIDEO, JOB_LINK_DOWNLOAD_VIDEO),     #
@@ -73,6 +78,7 @@ class BackgroundJob(models.Model):
         (JOB_INITIALIZE, JOB_INITIALIZE),
         (JOB_INITIALIZE_BLOCK_LIST, JOB_INITIALIZE_BLOCK_LIST),
         (JOB_RUN_RULE, JOB_RUN_RULE),
+        (JOB_PROCESS_VISITS, JOB_PROCESS_VISITS),               # aggregates recorded user visits
     )
     # fmt: on
 
@@ -91,6 +97,8 @@ class BackgroundJob(models.Model):
     priority = models.IntegerField(default=0)
     errors = models.IntegerField(default=0)
     enabled = models.BooleanField(default=True)
+    # until when the job is reserved for the task. Expired leases can be taken over
+    lease_expires = models.DateTimeField(null=True, blank=True)
 
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -100,14 +108,22 @@ class BackgroundJob(models.Model):
         blank=True,
     )
 
+    # smaller priority first, then oldest first
+    QUEUE_ORDERING = ["priority", "date_created", "pk"]
+
     class Meta:
         ordering = [
             "-enabled",
+            "priority",
             "date_created",
-            "job",
             "pk",
-            "subject",
-            "errors",
+        ]
+
+        indexes = [
+            # used when processors select jobs they support
+            models.Index(fields=["enabled", "job", "task", "priority", "date_created"]),
+            # used when jobs are taken in priority order
+            models.Index(fields=["enabled", "priority", "date_created"]),
         ]
 
     def __str__(self):
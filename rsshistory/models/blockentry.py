@@ -2,14 +2,18 @@
 Defined by automated hosts files, ad block extensions
 """
 
+import threading
+
 from django.contrib.auth.models import User
 from django.db import models
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
 from django.urls import reverse
 from django.templatetags.static import static
 from django.conf import settings
 
 from ..apps import LinkDatabase
-from .system import AppLogging
+from .system import AppLogging, ConfigurationEntry
 
 
 class BlockListReader(object):
@@ -17,16 +21,7 @@ class BlockListReader(object):
         self.contents = contents
 
     def read(self):
-        self.contents = self.contents.replace("\r", "")
-
-        while True:
-            wh = self.contents.find("\n")
-            if wh == -1:
-                return
-
-            line = self.contents[:wh]
-            self.contents = self.contents[wh + 1 :]
-
+        for line in self.contents.splitlines():
             line = line.strip()
             if not line:
                 continue
@@ -106,10 +101,78 @@ class BlockListReader(object):
         return line
 
 
+class BlockEntryMatcher(object):
+    """
+    Process local set of blocked domains.
+
+     - domain is blocked if it, or any of its parent domains is in the set
+     - set is built from the BlockEntry table on first use
+     - changes of block entries bump configuration version, so other processes
+       see them after configuration check
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        with self.lock:
+            self.domains = None
+            self.version = None
+
+    def load(self):
+        version = ConfigurationEntry.cache.get_version()
+
+        with self.lock:
+            if self.domains is not None and self.version == version:
+                return self.domains
+
+        domains = set()
+        for url in BlockEntry.objects.values_list("url", flat=True).iterator(
+            chunk_size=BlockEntryList.BATCH_SIZE
+        ):
+            domains.add(url.lower())
+
+        with self.lock:
+            self.domains = domains
+            self.version = version
+
+        return domains
+
+    def get_domain_candidates(self, domain):
+        """
+        Returns domain, and its parent domains, without top level domain
+        """
+        domain = domain.strip().lower().rstrip(".")
+
+        labels = domain.split(".")
+        count = max(len(labels) - 1, 1)
+
+        return [".".join(labels[index:]) for index in range(count)]
+
+    def get_match(self, domain):
+        if not domain:
+            return
+
+        domains = self.load()
+
+        for candidate in self.get_domain_candidates(domain):
+            if candidate in domains:
+                return candidate
+
+    def get_size(self):
+        with self.lock:
+            if self.domains is None:
+                return 0
+            return len(self.domains)
+
+
 class BlockEntryList(models.Model):
     url = models.CharField(max_length=1000, unique=True)
     processed = models.BooleanField(default=False)
 
+    BATCH_SIZE = 1000
+
     STARTUP_ENTRY_LIST = "https://v.firebog.net/hosts/lists.php?type=tick"
 
     class Meta:
@@ -151,6 +214,7 @@ class BlockEntryList(models.Model):
     def reset():
         BlockEntry.objects.all().delete()
         BlockEntryList.objects.all().delete()
+        BlockEntry.update_version()
         BlockEntryList.initialize()
 
     def read_lists_group(lists_group):
@@ -190,15 +254,33 @@ class BlockEntryList(models.Model):
             reader = BlockListReader(contents)
             AppLogging.debug("Reading block list {}".format(self.url))
 
-            for domain in reader.read():
-                blocked = BlockEntry.objects.filter(url=domain)
-                if not blocked.exists():
-                    AppLogging.debug("Added {}".format(domain))
-                    BlockEntry.objects.create(url=domain, block_list=self)
+            self.add_domains(reader.read())
 
         self.processed = True
         self.save()
 
+    def add_domains(self, domains):
+        """
+        Domains are inserted in batches. Domains that are already blocked,
+        also by other lists, are skipped by the database.
+        """
+        batch = {}
+        for domain in domains:
+            domain = domain.lower()
+            if len(domain) > 1000:
+                continue
+
+            batch[domain] = BlockEntry(url=domain, block_list=self)
+            if len(batch) >= BlockEntryList.BATCH_SIZE:
+                BlockEntry.objects.bulk_create(batch.values(), ignore_conflicts=True)
+                batch = {}
+
+        if batch:
+            BlockEntry.objects.bulk_create(batch.values(), ignore_conflicts=True)
+
+        # bulk_create does not send signals
+        BlockEntry.update_version()
+
 
 class BlockEntry(models.Model):
     url = models.CharField(max_length=1000, unique=True)
@@ -211,16 +293,38 @@ class BlockEntry(models.Model):
         null=True,
     )
 
+    matcher = BlockEntryMatcher()
+
     class Meta:
         ordering = ["url"]
 
     def __str__(self):
         return "BlockEntry Url:{} {}".format(self.url, self.block_list)
 
+    def update_version():
+        """
+        Called after blocked domains were changed. Bulk operations do not
+        send signals, they call it directly
+        """
+        # other processes check configuration version
+        ConfigurationEntry.update_version()
+        BlockEntry.matcher.clear()
+
     def is_blocked(domain_only_url):
-        return BlockEntry.objects.filter(url=domain_only_url).exists()
+        """
+        Domain is blocked also if its parent domain is blocked
+        """
+        return BlockEntry.matcher.get_match(domain_only_url) is not None
 
     def get_entry(domain_only_url):
-        blocks = BlockEntry.objects.filter(url=domain_only_url)
-        if blocks.exists():
-            return blocks[0]
+        domain = BlockEntry.matcher.get_match(domain_only_url)
+        if domain:
+            return BlockEntry.objects.filter(url=domain).first()
+
+
+# post_delete of BlockEntry is not handled, it would disable fast deletes
+# of block lists, which have many entries
+@receiver(post_save, sender=BlockEntry)
+@receiver(post_delete, sender=BlockEntryList)
+def on_block_entry_changed(sender, **kwargs):
+    BlockEntry.update_version()
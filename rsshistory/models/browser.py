@@ -1,13 +1,92 @@
+import copy
 import json
+import random
+import threading
+from types import MappingProxyType
 
-from django.db import models
+from django.db import models, transaction, IntegrityError
+from django.db.models import F
 from django.conf import settings
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from webtoolkit import UrlLocation
+from utils.dateutils import DateUtils
 
 from .system import AppLogging
 
 from ..apps import LinkDatabase
 
 
+class BrowserCache(object):
+    """
+    Process local list of enabled browsers, with request templates.
+
+     - browsers are read from the database once, not for every URL
+     - JSON fields are parsed once, into request template
+     - cache is cleared when a browser is saved, or deleted. Changes bump
+       configuration version, so other processes see them after configuration check
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        with self.lock:
+            self.browsers = None
+            self.templates = {}
+            self.version = None
+
+    def load(self):
+        from .system import ConfigurationEntry
+
+        version = ConfigurationEntry.cache.get_version()
+
+        with self.lock:
+            if self.browsers is not None and self.version == version:
+                return self.browsers, self.templates
+
+        browsers = list(Browser.objects.filter(enabled=True))
+
+        templates = {}
+        for browser in browsers:
+            templates[browser.id] = MappingProxyType(browser.get_request_template())
+
+        with self.lock:
+            self.browsers = browsers
+            self.templates = templates
+            self.version = version
+
+        return browsers, templates
+
+    def get_browsers(self):
+        browsers, templates = self.load()
+        return list(browsers)
+
+    def get_browser(self, browser_id):
+        """
+        @return enabled browser, or None
+        """
+        browsers, templates = self.load()
+        for browser in browsers:
+            if browser.id == browser_id:
+                return browser
+
+    def get_request_template(self, browser):
+        """
+        @return request properties of browser. Caller can modify them
+        """
+        browsers, templates = self.load()
+
+        template = templates.get(browser.id)
+        if template is None:
+            # disabled browser, or not saved
+            template = browser.get_request_template()
+
+        return {name: copy.deepcopy(value) for name, value in template.items()}
+
+
 class Browser(models.Model):
     EMPTY_FORM = -1
     AUTO = -2
@@ -34,6 +113,8 @@ class Browser(models.Model):
     handler_name = models.CharField(blank=True, max_length=2000, help_text="Handler name")
 
 
+    cache = BrowserCache()
+
     class Meta:
         ordering = ["-enabled", "priority", "name"]
 
@@ -83,7 +164,41 @@ class Browser(models.Model):
                 )
 
     def get_browsers():
-        return Browser.objects.filter(enabled=True)
+        return Browser.cache.get_browsers()
+
+    def get_request_template(self):
+        """
+        @return map of request property name to value
+        """
+        template = {}
+
+        template["user_agent"] = self.user_agent
+        template["request_headers"] = self.get_json_field("request_headers")
+        template["timeout_s"] = self.timeout_s
+        template["delay_s"] = self.delay_s
+        template["ssl_verify"] = self.ssl_verify
+        template["respect_robots"] = self.respect_robots_txt
+        template["accept_types"] = self.accept_types
+        template["bytes_limit"] = self.bytes_limit
+        template["http_proxy"] = self.http_proxy
+        template["https_proxy"] = self.https_proxy
+        template["cookies"] = self.get_json_field("cookies")
+        template["settings"] = self.get_json_field("settings")
+
+        # fields which were not set are not present
+        return {name: value for name, value in template.items() if value is not None}
+
+    def get_json_field(self, name):
+        text = getattr(self, name)
+        if not text:
+            return
+
+        try:
+            return json.loads(text)
+        except ValueError as E:
+            AppLogging.error(
+                "Browser:{} incorrect JSON in {}:{}".format(self.name, name, E)
+            )
 
     def reset_priorities():
         browsers = list(Browser.objects.all().order_by("priority"))
@@ -126,3 +241,193 @@ class Browser(models.Model):
         return "{}".format(
             self.name,
         )
+
+
+class BrowserStatistics(models.Model):
+    """
+    Results of browsers, per domain.
+
+    Browsers which work for a domain are tried first. Sites block some crawlers,
+    and every failed browser costs a call to crawling server.
+
+     - older results decay, with every new result of the browser
+     - score is success rate (browser without results has 1/2), reduced by latency
+     - sometimes other than the best browser is tried first, so that
+       results of the other browsers do not become stale
+    """
+
+    # weight of previous results, when new result is added
+    DECAY = 0.9
+
+    # probability of trying a browser, which is not the best
+    EXPLORATION_RATE = 0.05
+
+    # latency, which halves the score
+    LATENCY_SCALE_S = 10.0
+
+    browser = models.ForeignKey(
+        Browser,
+        on_delete=models.CASCADE,
+        related_name="statistics",
+    )
+    domain = models.CharField(max_length=1000)
+    successes = models.FloatField(default=0)
+    failures = models.FloatField(default=0)
+    average_time_s = models.FloatField(default=0)
+    date_updated = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["domain", "-successes"]
+        unique_together = ("domain", "browser")
+
+    def get_domain(url):
+        if not url:
+            return
+
+        return UrlLocation(url).get_domain_only()
+
+    def add(browser, url, success, time_s):
+        """
+        @returns statistics of the browser for the domain of url
+        """
+        domain = BrowserStatistics.get_domain(url)
+        if not domain or not browser.id:
+            return
+
+        BrowserStatistics.add_many(url, [(browser, success, time_s)])
+
+        return BrowserStatistics.objects.filter(
+            browser_id=browser.id, domain=domain
+        ).first()
+
+    def add_many(url, results):
+        """
+        Adds results of browsers, in the order in which they were obtained.
+
+        Every browser is updated by one query. Values are changed by the
+        database, so results added by other threads, and processes are kept.
+
+        @param results list of (browser, success, time_s)
+        """
+        domain = BrowserStatistics.get_domain(url)
+        if not domain:
+            return
+
+        browser_results = {}
+        for browser, success, time_s in results:
+            if browser.id:
+                browser_results.setdefault(browser.id, []).append((success, time_s))
+
+        for browser_id, items in browser_results.items():
+            changes = BrowserStatistics.get_changes(items)
+
+            if BrowserStatistics.update_with(browser_id, domain, changes):
+                continue
+
+            try:
+                # savepoint, enclosing transaction is usable after error
+                with transaction.atomic():
+                    BrowserStatistics.create_with(browser_id, domain, changes)
+            except IntegrityError:
+                # other process has added statistics of domain at the same time
+                BrowserStatistics.update_with(browser_id, domain, changes)
+
+    def get_changes(items):
+        """
+        @returns decay of previous values, and successes, failures,
+                 time added by the items
+        """
+        decay = BrowserStatistics.DECAY
+
+        previous = 1.0
+        successes = 0
+        failures = 0
+        time_s = 0
+        for success, call_time_s in items:
+            previous *= decay
+            successes = successes * decay + (1 if success else 0)
+            failures = failures * decay + (0 if success else 1)
+            time_s = time_s * decay + call_time_s * (1 - decay)
+
+        return previous, successes, failures, time_s
+
+    def update_with(browser_id, domain, changes):
+        previous, successes, failures, time_s = changes
+
+        return BrowserStatistics.objects.filter(
+            browser_id=browser_id, domain=domain
+        ).update(
+            successes=F("successes") * previous + successes,
+            failures=F("failures") * previous + failures,
+            average_time_s=F("average_time_s") * previous + time_s,
+            date_updated=DateUtils.get_datetime_now_utc(),
+        )
+
+    def create_with(browser_id, domain, changes):
+        previous, successes, failures, time_s = changes
+
+        # without previous results, average is weighted by new results only
+        return BrowserStatistics.objects.create(
+            browser_id=browser_id,
+            domain=domain,
+            successes=successes,
+            failures=failures,
+            average_time_s=time_s / (1 - previous),
+        )
+
+    def order(browsers, url, exploration_rate=None):
+        """
+        @return browsers, the best for the domain of url first.
+                Browsers with equal score keep their order
+        """
+        if exploration_rate is None:
+            exploration_rate = BrowserStatistics.EXPLORATION_RATE
+
+        domain = BrowserStatistics.get_domain(url)
+        if not domain or len(browsers) < 2:
+            return browsers
+
+        scores = {}
+        times = []
+        for statistics in BrowserStatistics.objects.filter(domain=domain):
+            scores[statistics.browser_id] = statistics.get_score()
+            times.append(statistics.average_time_s)
+
+        if len(scores) == 0:
+            return browsers
+
+        # browser without results is expected to be as fast as others
+        unknown_score = BrowserStatistics.get_score_for(0, 0, sum(times) / len(times))
+        result = sorted(browsers, key=lambda browser: -scores.get(browser.id, unknown_score))
+
+        if random.random() < exploration_rate:
+            explored = random.choice(result[1:])
+            result.remove(explored)
+            result.insert(0, explored)
+
+        return result
+
+    def get_score_for(successes, failures, average_time_s):
+        success_rate = (successes + 1) / (successes + failures + 2)
+        return success_rate / (1 + average_time_s / BrowserStatistics.LATENCY_SCALE_S)
+
+    def get_success_rate(self):
+        return (self.successes + 1) / (self.successes + self.failures + 2)
+
+    def get_score(self):
+        return BrowserStatistics.get_score_for(
+            self.successes, self.failures, self.average_time_s
+        )
+
+    def __str__(self):
+        return "{} {}".format(self.domain, self.browser_id)
+
+
+@receiver(post_save, sender=Browser)
+@receiver(post_delete, sender=Browser)
+def on_browser_changed(sender, **kwargs):
+    from .system import ConfigurationEntry
+
+    # other processes check configuration version
+    ConfigurationEntry.update_version()
+    Browser.cache.clear()
@@ -32,6 +32,9 @@ class BaseLinkDataModel(models.Model):
 
     link = models.CharField(max_length=1000, unique=True)
 
+    # link without protocol, and www. All variants of link have the same key
+    link_key = models.CharField(max_length=1000, null=True, blank=True)
+
     # URL of source, might be RSS source
     source_url = models.CharField(blank=True, max_length=2000)
 
@@ -117,14 +120,23 @@ class BaseLinkDataModel(models.Model):
         indexes = [
             models.Index(fields=["title"]),
             models.Index(fields=["link"]),
+            models.Index(fields=["link_key"]),
             models.Index(fields=["date_published"]),
         ]
 
     def save(self, *args, **kwargs):
+        if not self.prepare_for_save():
+            return
+
+        super().save(*args, **kwargs)
+
+    def prepare_for_save(self):
         """
         We can fix some database errors here.
         We can trim title and description. No harm done.
         We cannot trim thumbnails, or link, it will not work after adding.
+
+        @return False if entry cannot be saved
         """
         link_length = BaseLinkDataModel._meta.get_field("link").max_length
         title_length = BaseLinkDataModel._meta.get_field("title").max_length
@@ -138,7 +150,7 @@ class BaseLinkDataModel(models.Model):
             AppLogging.error(
                 "URL:{} URL is too long, cannot save such link".format(self.link)
             )
-            return
+            return False
 
         # Trim the input string to fit within max_length
         if self.title and len(self.title) > title_length:
@@ -175,8 +187,25 @@ class BaseLinkDataModel(models.Model):
                 domain.update(self)
 
         self.permanent = self.should_entry_be_permanent()
+        self.link_key = BaseLinkDataModel.get_link_key(self.link)
 
-        super().save(*args, **kwargs)
+        return True
+
+    def get_link_key(link):
+        """
+        Returns the same key for http, https, www. and non www. variants of link
+        """
+        for protocol in ["https://", "http://"]:
+            if link.startswith(protocol):
+                key = link[len(protocol) :]
+                break
+        else:
+            return link
+
+        if key.startswith("www."):
+            key = key[4:]
+
+        return key
 
     def get_domain_safe(self):
         try:
@@ -3,9 +3,12 @@ Defined by user, by GUI
 """
 
 import re
+import threading
 from datetime import date
 from django.db import models
 from django.db.models import Q
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
 
 from webtoolkit import UrlLocation
 
@@ -15,6 +18,187 @@ from .system import AppLogging
 from ..apps import LinkDatabase
 
 
+class EntryRuleSet(object):
+    """
+    Enabled rules, with patterns of all rules combined into one regex.
+    Most urls, and texts do not trigger any rule, and are rejected by one search
+    """
+
+    def __init__(self, rules):
+        self.rules = rules
+        self.block_rules = [rule for rule in rules if rule.block or rule.trust]
+        self.block_fields = set(
+            rule.get_trigger_fields() for rule in self.block_rules if rule.trigger_text
+        )
+
+        self.url_regex = EntryRuleSet.get_combined_regex(
+            [pattern for rule in rules for pattern in rule.get_rule_urls()]
+        )
+
+        rules_by_fields = {}
+        for rule in rules:
+            rules_by_fields.setdefault(rule.get_trigger_fields(), []).append(rule)
+
+        self.text_regexes = {}
+        for fields, field_rules in rules_by_fields.items():
+            if any(rule.trigger_text_hits <= 0 for rule in field_rules):
+                # such rules trigger without any text
+                self.text_regexes[fields] = None
+                continue
+
+            texts = [text for rule in field_rules for text in rule.get_lower_trigger_texts()]
+            self.text_regexes[fields] = EntryRuleSet.get_combined_regex(
+                [re.escape(text) for text in texts]
+            )
+
+    def get_combined_regex(patterns):
+        """
+        @return compiled regex, or None, if patterns cannot be combined
+        """
+        if not patterns:
+            return re.compile("(?!)")
+
+        for pattern in patterns:
+            # group numbers change when patterns are combined
+            if re.search(r"\\[1-9]|\(\?P=", pattern):
+                return None
+
+        try:
+            return re.compile("|".join("(?:{})".format(item) for item in patterns))
+        except re.error:
+            return None
+
+    def is_url_possible(self, url):
+        """
+        @return False if url does not trigger any rule for sure
+        """
+        if self.url_regex is None:
+            return True
+
+        return self.url_regex.search(url) is not None
+
+    def is_text_possible(self, fields, text):
+        """
+        @return False if text does not trigger any rule using fields for sure
+        """
+        text_regex = self.text_regexes.get(fields)
+        if text_regex is None:
+            return True
+
+        return text_regex.search(text) is not None
+
+
+class EntryRulesCache(object):
+    """
+    Process local EntryRuleSet.
+
+     - rules are read from the database once, not for every check
+     - cache is cleared when a rule is saved, or deleted. Rule changes bump
+       configuration version, so other processes see them after configuration check
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        with self.lock:
+            self.rule_set = None
+            self.version = None
+
+    def get_rule_set(self):
+        from .system import ConfigurationEntry
+
+        version = ConfigurationEntry.cache.get_version()
+
+        with self.lock:
+            if self.rule_set is not None and self.version == version:
+                return self.rule_set
+
+        rules = EntryRules.objects.filter(enabled=True).select_related("browser")
+        rule_set = EntryRuleSet(list(rules))
+
+        with self.lock:
+            self.rule_set = rule_set
+            self.version = version
+
+        return rule_set
+
+    def get_rules(self):
+        return self.get_rule_set().rules
+
+
+class EntryRulePulp(object):
+    """
+    Rule text of entry, or dictionary. Texts are built once for each set of fields
+    """
+
+    def __init__(self, entry=None, dictionary=None):
+        self.entry = entry
+        self.dictionary = dictionary
+        self.entry_json = None
+        self.texts = {}
+        self.possible = {}
+
+    def is_possible(self, rule_set, fields):
+        """
+        @return False if text of fields does not trigger any rule for sure
+        """
+        if fields not in self.possible:
+            text = self.get_text(fields)
+            self.possible[fields] = rule_set.is_text_possible(fields, text)
+
+        return self.possible[fields]
+
+    def get_text(self, fields):
+        fields = tuple(fields)
+
+        if fields not in self.texts:
+            pulp = ""
+            for field in fields:
+                value = self.get_value(field)
+                if value is not EntryRulePulp.MISSING:
+                    pulp += str(value)
+
+            # ignore case
+            self.texts[fields] = pulp.lower()
+
+        return self.texts[fields]
+
+    MISSING = object()
+
+    def get_value(self, field):
+        if self.dictionary is not None:
+            return self.dictionary.get(field, EntryRulePulp.MISSING)
+
+        if field in EntryRulePulp.ENTRY_FIELDS:
+            return getattr(self.entry, field)
+
+        # other values are as in JSON
+        if self.entry_json is None:
+            self.entry_json = EntryRulePulp.get_entry_json(self.entry)
+
+        return self.entry_json.get(field, EntryRulePulp.MISSING)
+
+    ENTRY_FIELDS = {
+        "link",
+        "title",
+        "description",
+        "author",
+        "album",
+        "language",
+    }
+
+    def get_entry_json(entry):
+        from ..serializers import entry_to_json
+        from ..models import UserConfig
+
+        user_config = UserConfig.get()
+        user_config.birth_date = date(2024, 3, 28)
+
+        return entry_to_json(user_config, entry)
+
+
 class EntryRules(models.Model):
     enabled = models.BooleanField(default=True)
     priority = models.IntegerField(default=0, help_text="Priority")
@@ -65,6 +249,8 @@ class EntryRules(models.Model):
         null=True,
     )
 
+    cache = EntryRulesCache()
+
     class Meta:
         ordering = [
             "-enabled",
@@ -112,47 +298,79 @@ class EntryRules(models.Model):
         return result
 
     def get_trigger_fields(self):
-        if not self.trigger_text_fields or self.trigger_text_fields == "":
-            return ["title", "description"]
+        """
+        @return tuple of fields
+        """
+        compiled = getattr(self, "compiled_trigger_fields", None)
+        if compiled and compiled[0] == self.trigger_text_fields:
+            return compiled[1]
 
-        if "," not in self.trigger_text_fields:
-            return [self.trigger_text_fields.strip()]
+        if not self.trigger_text_fields or self.trigger_text_fields == "":
+            fields = ("title", "description")
+        elif "," not in self.trigger_text_fields:
+            fields = (self.trigger_text_fields.strip(),)
+        else:
+            fields = tuple(
+                field.strip() for field in self.trigger_text_fields.split(",")
+            )
 
-        fields = [field.strip() for field in self.trigger_text_fields.split(",")]
+        self.compiled_trigger_fields = (self.trigger_text_fields, fields)
         return fields
 
+    def get_url_patterns(self):
+        """
+        Compiled patterns are kept by the rule object, until trigger is changed
+        """
+        compiled = getattr(self, "compiled_rule_url", None)
+        if compiled and compiled[0] == self.trigger_rule_url:
+            return compiled[1]
+
+        patterns = []
+        for rule_pattern in self.get_rule_urls():
+            try:
+                patterns.append(re.compile(rule_pattern))
+            except re.error as E:
+                AppLogging.error(
+                    "Rule:{} incorrect pattern:{} {}".format(
+                        self.id, rule_pattern, str(E)
+                    )
+                )
+
+        self.compiled_rule_url = (self.trigger_rule_url, patterns)
+        return patterns
+
+    def get_lower_trigger_texts(self):
+        compiled = getattr(self, "compiled_trigger_text", None)
+        if compiled and compiled[0] == self.trigger_text:
+            return compiled[1]
+
+        # ignore case
+        texts = [text.lower() for text in self.get_trigger_texts()]
+
+        self.compiled_trigger_text = (self.trigger_text, texts)
+        return texts
+
     def is_url_triggering(self, url):
         if not self.enabled:
             return False
 
-        rule_urls = self.get_rule_urls()
-        for rule_pattern in rule_urls:
-            if re.search(rule_pattern, url):
+        for rule_pattern in self.get_url_patterns():
+            if rule_pattern.search(url):
                 return True
 
         return False
 
-    def get_entry_pulp(self, entry):
-        from ..serializers import entry_to_json
-        from ..models import UserConfig
-
-        user_config = UserConfig.get()
-        user_config.birth_date = date(2024, 3, 28)
+    def get_entry_pulp(self, entry, pulp=None):
+        if pulp is None:
+            pulp = EntryRulePulp(entry=entry)
 
-        entry_json = entry_to_json(user_config, entry)
-        return self.get_dict_pulp(entry_json)
+        return pulp.get_text(self.get_trigger_fields())
 
-    def get_dict_pulp(self, dictionary):
-        pulp = ""
+    def get_dict_pulp(self, dictionary, pulp=None):
+        if pulp is None:
+            pulp = EntryRulePulp(dictionary=dictionary)
 
-        fields = self.get_trigger_fields()
-
-        for field in fields:
-            if field in dictionary:
-                pulp += str(dictionary[field])
-
-        # ignore case
-        return pulp.lower()
+        return pulp.get_text(self.get_trigger_fields())
 
     def is_text_triggered(self, text):
         if not self.enabled:
@@ -160,22 +378,23 @@ class EntryRules(models.Model):
 
         sum = 0
 
-        trigger_split = self.get_trigger_texts()
+        for trigger_text in self.get_lower_trigger_texts():
+            sum += text.count(trigger_text)
 
-        for trigger_text in trigger_split:
-            # ignore case
-            trigger_text = trigger_text.lower()
-            trigger_text = trigger_text.strip()
+            if sum >= self.trigger_text_hits:
+                return True
 
-            if trigger_text != "":
-                sum += text.count(trigger_text)
+        return sum >= self.trigger_text_hits
 
-        if sum >= self.trigger_text_hits:
-            return True
+    def is_pulp_triggered(self, pulp, rule_set=None):
+        fields = self.get_trigger_fields()
 
-        return False
+        if rule_set and not pulp.is_possible(rule_set, fields):
+            return False
 
-    def check_rule(self, entry):
+        return self.is_text_triggered(pulp.get_text(fields))
+
+    def check_rule(self, entry, pulp=None, rule_set=None):
         p = UrlLocation(entry.link)
         domain_only = p.get_domain_only()
 
@@ -184,8 +403,10 @@ class EntryRules(models.Model):
                 if self.apply_entry_rule_action(entry):
                     return True
 
-        text = self.get_entry_pulp(entry)
-        if self.is_text_triggered(text):
+        if pulp is None:
+            pulp = EntryRulePulp(entry=entry)
+
+        if self.is_pulp_triggered(pulp, rule_set):
             if self.apply_entry_rule_action(entry):
                 return True
 
@@ -209,22 +430,25 @@ class EntryRules(models.Model):
 
     def get_rules_for(url=None, entry=None):
         result = []
-        conditions = Q(enabled=True)
-        rules = EntryRules.objects.filter(conditions)
-        for rule in rules:
-            if not rule.enabled:
-                continue
+        rule_set = EntryRules.cache.get_rule_set()
+
+        pulp = None
+        if entry:
+            pulp = EntryRulePulp(entry=entry)
 
-            if url:
+        url_possible = url and rule_set.is_url_possible(url)
+        entry_url_possible = entry and rule_set.is_url_possible(entry.link)
+
+        for rule in rule_set.rules:
+            if url_possible:
                 if rule.is_url_triggering(url):
                     result.append(rule)
                     continue
             if entry:
-                if rule.is_url_triggering(entry.link):
+                if entry_url_possible and rule.is_url_triggering(entry.link):
                     result.append(rule)
                     continue
-                text = rule.get_entry_pulp(entry)
-                if rule.is_text_triggered(text):
+                if rule.is_pulp_triggered(pulp, rule_set):
                     result.append(rule)
                     continue
 
@@ -237,15 +461,15 @@ class EntryRules(models.Model):
     def is_url_blocked(url):
         from .blockentry import BlockEntry
 
-        conditions = (Q(block=True) | Q(trust=True)) & Q(enabled=True)
+        rule_set = EntryRules.cache.get_rule_set()
 
-        rules = EntryRules.objects.filter(conditions)
-        for rule in rules:
-            if rule.is_url_triggering(url):
-                if rule.trust:
-                    return False
+        if rule_set.is_url_possible(url):
+            for rule in rule_set.block_rules:
+                if rule.is_url_triggering(url):
+                    if rule.trust:
+                        return False
 
-                return rule
+                    return rule
 
         p = UrlLocation(url)
         domain_only = p.get_domain_only()
@@ -254,45 +478,49 @@ class EntryRules(models.Model):
         if block:
             return block
 
-    def is_dict_blocked(dictionary):
-        if "link" in dictionary:
-            reason = EntryRules.is_url_blocked(dictionary["link"])
-            if reason:
-                return reason
+    def is_pulp_blocked(pulp):
+        rule_set = EntryRules.cache.get_rule_set()
 
-        conditions = (Q(block=True) | Q(trust=True)) & Q(enabled=True)
+        for fields in rule_set.block_fields:
+            if pulp.is_possible(rule_set, fields):
+                break
+        else:
+            return
 
-        rules = EntryRules.objects.filter(conditions).exclude(trigger_text="")
-        for rule in rules:
-            text = rule.get_dict_pulp(dictionary)
-            if rule.is_text_triggered(text):
+        for rule in rule_set.block_rules:
+            if rule.trigger_text == "":
+                continue
+
+            if rule.is_pulp_triggered(pulp, rule_set):
                 if rule.trust:
                     return False
 
                 return rule
 
+    def is_dict_blocked(dictionary):
+        if "link" in dictionary:
+            reason = EntryRules.is_url_blocked(dictionary["link"])
+            if reason:
+                return reason
+
+        return EntryRules.is_pulp_blocked(EntryRulePulp(dictionary=dictionary))
+
     def is_entry_blocked(entry):
         reason = EntryRules.is_url_blocked(entry.link)
         if reason:
             return reason
 
-        conditions = (Q(block=True) | Q(trust=True)) & Q(enabled=True)
-
-        rules = EntryRules.objects.filter(conditions).exclude(trigger_text="")
-        for rule in rules:
-            text = rule.get_entry_pulp(entry)
-            if rule.is_text_triggered(text):
-                if rule.trust:
-                    return False
-
-                return rule
+        return EntryRules.is_pulp_blocked(EntryRulePulp(entry=entry))
 
     def check_all(entry):
         """
         @returns True if entry is deleted
         """
-        for rule in EntryRules.objects.filter(enabled=True):
-            rule.check_rule(entry)
+        rule_set = EntryRules.cache.get_rule_set()
+        pulp = EntryRulePulp(entry=entry)
+
+        for rule in rule_set.rules:
+            rule.check_rule(entry, pulp, rule_set)
 
     def attemp_delete(entry, entry_rule=None):
         if not entry.is_removable():
@@ -312,13 +540,16 @@ class EntryRules(models.Model):
 
     def get_age_for_dictionary(dictionary):
         age = None
+        rule_set = EntryRules.cache.get_rule_set()
+        pulp = EntryRulePulp(dictionary=dictionary)
 
-        rules = EntryRules.objects.filter(enabled=True, apply_age_limit__gt=0).exclude(
-            trigger_text=""
-        )
-        for rule in rules:
-            text = rule.get_dict_pulp(dictionary)
-            if rule.is_text_triggered(text):
+        for rule in rule_set.rules:
+            if not rule.apply_age_limit or rule.apply_age_limit <= 0:
+                continue
+            if rule.trigger_text == "":
+                continue
+
+            if rule.is_pulp_triggered(pulp, rule_set):
                 if not age:
                     age = rule.apply_age_limit
                 elif rule.apply_age_limit:
@@ -328,10 +559,14 @@ class EntryRules(models.Model):
         return age
 
     def check_entry_text_rules(entry):
-        rules = EntryRules.objects.filter(enabled=True).exclude(trigger_text="")
-        for rule in rules:
-            text = rule.get_entry_pulp(entry)
-            if rule.is_text_triggered(text):
+        rule_set = EntryRules.cache.get_rule_set()
+        pulp = EntryRulePulp(entry=entry)
+
+        for rule in rule_set.rules:
+            if rule.trigger_text == "":
+                continue
+
+            if rule.is_pulp_triggered(pulp, rule_set):
                 rule.apply_entry_rule_action(entry)
 
     def update_link_service_rule():
@@ -399,3 +634,13 @@ class EntryRules(models.Model):
 
     def __str__(self):
         return "EntryRule ID:{}, Name:{}".format(self.id, self.rule_name)
+
+
+@receiver(post_save, sender=EntryRules)
+@receiver(post_delete, sender=EntryRules)
+def on_entry_rules_changed(sender, **kwargs):
+    from .system import ConfigurationEntry
+
+    # other processes check configuration version
+    ConfigurationEntry.update_version()
+    EntryRules.cache.clear()
@@ -87,6 +87,7 @@ class DataExport(models.Model):
     format_md = models.BooleanField(default=True)
     format_rss = models.BooleanField(default=False)
     format_html = models.BooleanField(default=False)
+    format_csv = models.BooleanField(default=False)
 
     format_sources_opml = models.BooleanField(
         default=False,
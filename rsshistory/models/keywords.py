@@ -10,6 +10,11 @@ from .system import AppLogging, ConfigurationEntry
 
 
 class KeyWords(models.Model):
+    # tagger, and attribute ruler provide part of speech, other components are not used
+    UNUSED_PIPES = ["parser", "ner", "lemmatizer", "textcat"]
+    PIPE_BATCH_SIZE = 256
+    INSERT_BATCH_SIZE = 1000
+
     keyword = models.CharField(max_length=200)
     language = models.CharField(max_length=10, default="en")
     date_published = models.DateTimeField(auto_now_add=True)
@@ -93,27 +98,19 @@ class KeyWords(models.Model):
 
         return True
 
-    def add_text(text, language):
-        from ..configuration import Configuration
-
+    def get_supported_language(language):
+        """
+        @return language, or None if keywords are not supported for it
+        """
         if not language:
             return
 
-        if language == "":
-            language = "en"
-
         if language.find("en") == -1:
             return
 
-        nlp = Configuration.get_object().get_nlp(language)
-        if not nlp:
-            AppLogging.error(
-                "Cannot load token program for language:{}".format(language)
-            )
-            return
-
-        doc = nlp(text)
+        return language
 
+    def get_important_tokens(doc):
         # insert one occurance for the text
         # should limit spamming words
         important_tokens = set()
@@ -130,8 +127,85 @@ class KeyWords(models.Model):
             if token.pos_ == "NOUN" or token.pos_ == "PROPN":
                 important_tokens.add(str_token)
 
-        for str_token in important_tokens:
-            KeyWords.objects.create(keyword=str_token, language=language)
+        return important_tokens
+
+    def add_text(text, language):
+        return KeyWords.add_texts([text], language)
+
+    def add_texts(texts, language):
+        """
+        Adds keywords of many texts. Texts are processed by nlp.pipe,
+        keywords are inserted with bulk_create.
+
+        @return number of inserted keywords
+        """
+        from ..configuration import Configuration
+
+        language = KeyWords.get_supported_language(language)
+        if not language:
+            return 0
+
+        texts = [text for text in texts if text]
+        if len(texts) == 0:
+            return 0
+
+        nlp = Configuration.get_object().get_nlp(language)
+        if not nlp:
+            AppLogging.error(
+                "Cannot load token program for language:{}".format(language)
+            )
+            return 0
+
+        docs = nlp.pipe(
+            texts,
+            batch_size=KeyWords.PIPE_BATCH_SIZE,
+            disable=KeyWords.UNUSED_PIPES,
+        )
+
+        keywords = []
+        for doc in docs:
+            for str_token in KeyWords.get_important_tokens(doc):
+                keywords.append(KeyWords(keyword=str_token, language=language))
+
+        KeyWords.objects.bulk_create(keywords, batch_size=KeyWords.INSERT_BATCH_SIZE)
+
+        return len(keywords)
+
+    def add_entries(entries):
+        """
+        Adds keywords of entries titles, entries are processed per language.
+
+        @return number of inserted keywords
+        """
+        if not ConfigurationEntry.get().enable_keyword_support:
+            return 0
+
+        texts = {}
+        for entry in entries:
+            if not entry.title or not entry.date_published:
+                continue
+
+            if not KeyWords.is_keyword_date_range(entry.date_published):
+                continue
+
+            texts.setdefault(entry.language, []).append(entry.title)
+
+        added = 0
+        for language, language_texts in texts.items():
+            added += KeyWords.add_texts(language_texts, language)
+
+        return added
+
+    def warm_up():
+        """
+        Loads language model. It takes seconds, so it is done when worker starts
+        """
+        from ..configuration import Configuration
+
+        if not ConfigurationEntry.get().enable_keyword_support:
+            return
+
+        Configuration.get_object().get_nlp("en")
 
     def add_link_data(link_data):
         from ..configuration import Configuration
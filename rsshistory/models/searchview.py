@@ -50,7 +50,7 @@ class SearchView(models.Model):
     order_by = models.CharField(
         default="link",
         max_length=500,
-        help_text="Entries order",
+        help_text="Entries order. With search index enabled, -search_rank orders by search relevance",
     )
 
     entry_limit = models.IntegerField(
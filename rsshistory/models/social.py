@@ -2,6 +2,7 @@ from django.db import models
 from django.conf import settings
 from django.db import DataError 
 
+from concurrent.futures import ThreadPoolExecutor
 from datetime import timedelta
 from utils.dateutils import DateUtils
 from webtoolkit import RemoteServer, RemoteUrl, UrlLocation
@@ -69,6 +70,14 @@ class SocialData(models.Model):
 
     date_updated = models.DateTimeField(auto_now=True, help_text="Date of update")
 
+    # number of concurrent requests to the crawling server
+    MAX_WORKERS = 4
+
+    # how long social data are valid, depends on entry age
+    TTL_NEW = timedelta(hours=1)
+    TTL_RECENT = timedelta(days=1)
+    TTL_OLD = timedelta(days=7)
+
     def is_supported(entry):
         from ..configuration import Configuration
 
@@ -112,16 +121,97 @@ class SocialData(models.Model):
         """
         Adds entry social data from web server
         """
-        new_social = SocialData.get_from_server(entry)
-        if new_social:
-            social_data = SocialData.objects.filter(entry=entry)
-            if social_data.exists():
-                social_data.delete()
+        socials = SocialData.update_entries([entry], force=True)
+        return socials.get(entry.id)
 
-            try:
-                return SocialData.objects.create(**new_social)
-            except DataError as E:
-                AppLogging.exc(E, info_text = "Data:{}".format(new_social))
+    def get_ttl(entry):
+        """
+        New entries gain votes, and views fast. Old entries change slowly.
+        """
+        if not entry.date_published:
+            return SocialData.TTL_OLD
+
+        age = DateUtils.get_datetime_now_utc() - entry.date_published
+        if age < timedelta(days=1):
+            return SocialData.TTL_NEW
+        if age < timedelta(days=7):
+            return SocialData.TTL_RECENT
+
+        return SocialData.TTL_OLD
+
+    def is_fresh(social, entry):
+        if not social.date_updated:
+            return False
+
+        date_now = DateUtils.get_datetime_now_utc()
+        return date_now - social.date_updated < SocialData.get_ttl(entry)
+
+    def update_entries(entries, force=False):
+        """
+        Updates social data of many entries.
+
+         - entries with fresh social data are not fetched again, unless forced
+         - data are fetched concurrently, crawling server has no call for many links
+         - rows are upserted in one statement
+
+        @returns map of entry id to social data
+        """
+        existing = {}
+        for social in SocialData.objects.filter(
+            entry_id__in=[entry.id for entry in entries]
+        ):
+            existing[social.entry_id] = social
+
+        stale = []
+        for entry in entries:
+            social = existing.get(entry.id)
+            if force or not social or not SocialData.is_fresh(social, entry):
+                stale.append(entry)
+
+        socials = []
+        for new_social in SocialData.get_from_server_many(stale):
+            socials.append(SocialData(**new_social))
+
+        SocialData.save_many(socials)
+
+        result = {}
+        for social in socials:
+            result[social.entry_id] = social
+        return result
+
+    def save_many(socials):
+        if len(socials) == 0:
+            return
+
+        update_fields = [
+            field.name
+            for field in SocialData._meta.concrete_fields
+            if not field.primary_key and field.name != "entry"
+        ]
+
+        try:
+            SocialData.objects.bulk_create(
+                socials,
+                update_conflicts=True,
+                unique_fields=["entry"],
+                update_fields=update_fields,
+            )
+        except DataError as E:
+            AppLogging.exc(E, info_text="Social data could not be saved in bulk")
+
+            for social in socials:
+                SocialData.save_one(social)
+
+    def save_one(social):
+        SocialData.objects.filter(entry_id=social.entry_id).delete()
+
+        try:
+            social.pk = None
+            social.save()
+        except DataError as E:
+            AppLogging.exc(
+                E, info_text="Entry ID:{} link:{}".format(social.entry.id, social.entry.link)
+            )
 
     def get_from_model(entry):
         """
@@ -137,9 +227,10 @@ class SocialData(models.Model):
 
             return social_data
 
-    def get_from_server(entry):
+    def get_remote_server():
         """
-        Returns social data from server
+        Returns remote server, or None if it is not configured.
+        Raises IOError if it is down.
         """
         from ..configuration import Configuration
         from ..controllers import SystemOperationController
@@ -151,38 +242,84 @@ class SocialData(models.Model):
             if controller.is_remote_server_down():
                 raise IOError("Remote server is down")
 
-            link = config.remote_webtools_server_location
-            remote_server = RemoteServer(link)
-            index = 0
-            while True:
-                index += 1
-                if index > 4:
-                    raise IOError(f"Could not obtain response from server about link entry ID:{entry.id} entry link:{entry.link} ")
-
-                json_obj = remote_server.get_socialj(url=entry.link)
-                if not json_obj:
-                    raise IOError("Invalid social data response from remote server - no json object")
+            return RemoteServer(config.remote_webtools_server_location)
 
-                if len(json_obj) == 0:
-                    raise IOError("Invalid social data response from remote server - json object length is null")
+    def get_from_server(entry):
+        """
+        Returns social data from server
+        """
+        remote_server = SocialData.get_remote_server()
+        if remote_server:
+            return SocialData.get_from_remote_server(remote_server, entry)
 
-                if isinstance(json_obj, list):
-                    # it should be map, not list
-                    url = RemoteUrl(url=entry.link, all_properties=json_obj)
-                    status_code = url.get_status_code()
-                    if status_code == webtoolkit.HTTP_STATUS_CODE_SERVER_TOO_MANY_REQUESTS:
-                        continue
+    def get_from_server_many(entries):
+        """
+        Returns list of social data of entries.
 
-                    # raise IOError(f"Invalid social data response from remote server - a list. Entry id:{entry.id} link:{entry.link} status_code:{status_code}")
-                    return
+        Number of concurrent requests to the crawling server is limited.
+        Entries, for which data could not be obtained, are skipped.
+        """
+        if len(entries) == 0:
+            return []
 
-                break
+        remote_server = SocialData.get_remote_server()
+        if not remote_server:
+            return []
 
-            if SocialData.is_all_none(json_obj):
+        def fetch(entry):
+            # only network calls, no database access in worker threads.
+            # Errors are logged by the calling thread
+            try:
+                return SocialData.get_from_remote_server(remote_server, entry)
+            except IOError as E:
+                return E
+
+        if SocialData.MAX_WORKERS <= 1 or len(entries) == 1:
+            results = [fetch(entry) for entry in entries]
+        else:
+            with ThreadPoolExecutor(max_workers=SocialData.MAX_WORKERS) as executor:
+                results = list(executor.map(fetch, entries))
+
+        social_datas = []
+        for result in results:
+            if isinstance(result, IOError):
+                AppLogging.error(str(result))
+            elif result:
+                social_datas.append(result)
+
+        return social_datas
+
+    def get_from_remote_server(remote_server, entry):
+        index = 0
+        while True:
+            index += 1
+            if index > 4:
+                raise IOError(f"Could not obtain response from server about link entry ID:{entry.id} entry link:{entry.link} ")
+
+            json_obj = remote_server.get_socialj(url=entry.link)
+            if not json_obj:
+                raise IOError("Invalid social data response from remote server - no json object")
+
+            if len(json_obj) == 0:
+                raise IOError("Invalid social data response from remote server - json object length is null")
+
+            if isinstance(json_obj, list):
+                # it should be map, not list
+                url = RemoteUrl(url=entry.link, all_properties=json_obj)
+                status_code = url.get_status_code()
+                if status_code == webtoolkit.HTTP_STATUS_CODE_SERVER_TOO_MANY_REQUESTS:
+                    continue
+
+                # raise IOError(f"Invalid social data response from remote server - a list. Entry id:{entry.id} link:{entry.link} status_code:{status_code}")
                 return
 
-            json_obj["entry"] = entry
-            return json_obj
+            break
+
+        if SocialData.is_all_none(json_obj):
+            return
+
+        json_obj["entry"] = entry
+        return json_obj
 
     def is_all_none(json_obj):
         """
@@ -1,5 +1,7 @@
+import copy
 import logging
 import traceback
+import threading
 from pathlib import Path
 import os
 from pytz import timezone
@@ -9,6 +11,7 @@ from dateutil.relativedelta import relativedelta
 from django.conf import settings
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.db import models
+from django.db.models import F
 from django.urls import reverse
 from django.conf import settings
 from django.contrib.auth.models import User
@@ -19,13 +22,24 @@ from utils.dateutils import DateUtils
 from ..apps import LinkDatabase
 
 
-def batch_remove(model, query, batch_size):
+def batch_remove(model, query, batch_size, is_time_exceeded=None):
+    """
+    Removes rows in batches of IDs, one delete does not lock table for long.
+
+    @return False if removal was stopped by is_time_exceeded
+    """
     while True:
         batch_ids = list(query.values_list("id", flat=True)[:batch_size])
         if not batch_ids:
-            break
+            return True
+
+        deleted, _ = model.objects.filter(id__in=batch_ids).delete()
+        if deleted == 0:
+            # rows cannot be removed, do not loop forever
+            return True
 
-        model.objects.filter(id__in=batch_is).delete()
+        if is_time_exceeded and is_time_exceeded():
+            return False
 
 
 DISPLAY_STYLE_LIGHT = "style-light"
@@ -37,6 +51,126 @@ STYLE_TYPES = (
 )
 
 
+class ConfigurationCache(object):
+    """
+    Process local cache of configuration, and user configurations.
+
+     - version is bumped when configuration is saved
+     - version is read from the database at most once per CHECK_PERIOD_S.
+       Changes made by other threads, and processes are visible after that delay
+     - user configuration is invalidated only for the user who saved it.
+       Other processes read it again after USER_CONFIG_PERIOD_S
+     - callers receive copies, changes of one request are not seen by others
+     - counters show how many database reads were avoided
+    """
+
+    CHECK_PERIOD_S = 5
+    USER_CONFIG_PERIOD_S = 60
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reads = 0
+        self.reads_avoided = 0
+        self.version_checks = 0
+        self.clear()
+
+    def clear(self):
+        with self.lock:
+            self.version = None
+            self.date_checked = None
+            self.config_entry = None
+            self.user_configs = {}
+
+    def check_version(self):
+        now = DateUtils.get_datetime_now_utc()
+
+        with self.lock:
+            if self.date_checked:
+                if (now - self.date_checked).total_seconds() < ConfigurationCache.CHECK_PERIOD_S:
+                    return
+
+        version = ConfigurationEntry.get_version_from_database()
+
+        with self.lock:
+            self.version_checks += 1
+            self.date_checked = now
+
+            if version != self.version:
+                self.version = version
+                self.config_entry = None
+                self.user_configs = {}
+
+    def get_version(self):
+        """
+        Other caches can compare this version, to know if they are stale
+        """
+        self.check_version()
+
+        with self.lock:
+            return self.version
+
+    def get_config_entry(self):
+        self.check_version()
+
+        with self.lock:
+            if self.config_entry is not None:
+                self.reads_avoided += 1
+                return copy.copy(self.config_entry)
+
+        config_entry = ConfigurationEntry.get_from_database()
+
+        with self.lock:
+            self.reads += 1
+            self.config_entry = copy.copy(config_entry)
+
+        return config_entry
+
+    def set_config_entry(self, config_entry):
+        with self.lock:
+            self.config_entry = copy.copy(config_entry)
+            self.version = config_entry.config_version
+            self.date_checked = DateUtils.get_datetime_now_utc()
+            # user configuration defaults depend on configuration
+            self.user_configs = {}
+
+    def clear_user_config(self, user_id):
+        """
+        Called after user configuration was saved
+        """
+        with self.lock:
+            self.user_configs.pop(user_id, None)
+
+    def get_user_config(self, user_id, read_function):
+        self.check_version()
+
+        now = DateUtils.get_datetime_now_utc()
+
+        with self.lock:
+            if user_id in self.user_configs:
+                user_config, date_read = self.user_configs[user_id]
+                age = (now - date_read).total_seconds()
+                if age < ConfigurationCache.USER_CONFIG_PERIOD_S:
+                    self.reads_avoided += 1
+                    return copy.copy(user_config)
+
+        user_config = read_function()
+
+        with self.lock:
+            self.reads += 1
+            self.user_configs[user_id] = (copy.copy(user_config), now)
+
+        return user_config
+
+    def get_stats(self):
+        with self.lock:
+            return {
+                "version": self.version,
+                "reads": self.reads,
+                "reads_avoided": self.reads_avoided,
+                "version_checks": self.version_checks,
+            }
+
+
 class ConfigurationEntry(models.Model):
     # fmt: off
     ACCESS_TYPE_ALL = "access-type-all"
@@ -268,6 +402,11 @@ class ConfigurationEntry(models.Model):
         help_text="Enable social data for links.",
     )
 
+    enable_search_index = models.BooleanField(
+        default=False,
+        help_text="Uses full text search index for searching entries. Index is built by refresh job. Requires SQLite FTS5, or Postgres.",
+    )
+
     # database link contents
 
     accept_dead_links = models.BooleanField(
@@ -382,6 +521,11 @@ class ConfigurationEntry(models.Model):
         help_text="Prefer non-www links. Replace www links with cleaner versions if available during updates.",
     )
 
+    merge_duplicate_links = models.BooleanField(
+        default=False,
+        help_text="Cleanup merges variants of a link (http, https, www) into one entry. Other variants are removed.",
+    )
+
     # updates
 
     sources_refresh_period = models.IntegerField(
@@ -389,6 +533,16 @@ class ConfigurationEntry(models.Model):
         help_text="Unit [s]. Defines how often sources are checked for data.",
     )
 
+    sources_fetch_workers = models.IntegerField(
+        default=4,
+        help_text="Number of sources fetched at the same time. Sources are fetched one by one if set to 1.",
+    )
+
+    sources_fetch_per_domain = models.IntegerField(
+        default=1,
+        help_text="Number of sources from one domain fetched at the same time.",
+    )
+
     days_to_move_to_archive = models.IntegerField(
         default=50,
         help_text="Number of days after which entries are moved to archive. Disabled if 0.",
@@ -568,16 +722,31 @@ class ConfigurationEntry(models.Model):
         default=False, help_text="Enable debug mode to see errors more clearly."
     )
 
+    config_version = models.IntegerField(
+        default=0, help_text="Bumped on every change of configuration, or user configuration."
+    )
+
+    cache = ConfigurationCache()
+
     def get():
         """
-        Most probably should not be used directly. Should be cached in application
+        Returns configuration cached by the process
         """
+        return ConfigurationEntry.cache.get_config_entry()
+
+    def get_from_database():
         confs = ConfigurationEntry.objects.all()
         if not confs.exists():
             return ConfigurationEntry.objects.create()
         else:
             return confs[0]
 
+    def get_version_from_database():
+        return ConfigurationEntry.objects.values_list("config_version", flat=True).first()
+
+    def update_version():
+        ConfigurationEntry.objects.update(config_version=F("config_version") + 1)
+
     def get_main_directory(self):
         file_path = os.path.realpath(__file__)
         full_path = Path(file_path)
@@ -634,8 +803,103 @@ class ConfigurationEntry(models.Model):
         except Exception as E:
             self.time_zone = "UTC"
 
+        # version could have been bumped by user configuration
+        version = ConfigurationEntry.get_version_from_database()
+        self.config_version = (version or 0) + 1
+
         super().save(*args, **kwargs)
 
+        ConfigurationEntry.cache.set_config_entry(self)
+
+
+class SystemHealthCache(object):
+    """
+    Process local cache of connection statuses, and thread heartbeats.
+
+     - last status of each check type is read from the database at most once
+       per CHECK_PERIOD_S. Checks done by other processes are visible after that delay
+     - checks done by this process are visible immediately
+     - heartbeat of a thread is written at most once per HEARTBEAT_PERIOD_S
+    """
+
+    CHECK_PERIOD_S = 10
+    HEARTBEAT_PERIOD_S = 60
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reads = 0
+        self.reads_avoided = 0
+        self.writes_avoided = 0
+        self.clear()
+
+    def clear(self):
+        with self.lock:
+            self.statuses = {}
+            self.date_checked = None
+            self.heartbeats = {}
+
+    def load(self):
+        now = DateUtils.get_datetime_now_utc()
+
+        with self.lock:
+            if self.date_checked:
+                if (now - self.date_checked).total_seconds() < SystemHealthCache.CHECK_PERIOD_S:
+                    self.reads_avoided += 1
+                    return
+
+        rows = (
+            SystemOperation.objects.exclude(check_type="")
+            .filter(date_created__isnull=False)
+            .order_by("-date_created")
+            .values_list("check_type", "status", "date_created")
+        )
+
+        statuses = {}
+        for check_type, status, date_created in rows:
+            if check_type not in statuses:
+                statuses[check_type] = (status, date_created)
+
+        with self.lock:
+            self.reads += 1
+            self.statuses = statuses
+            self.date_checked = now
+
+    def get_status(self, check_type):
+        """
+        @return status, and date of the last check, or None if it was not checked
+        """
+        self.load()
+
+        with self.lock:
+            return self.statuses.get(check_type)
+
+    def set_status(self, check_type, status, date_created):
+        with self.lock:
+            self.statuses[check_type] = (status, date_created)
+
+    def is_heartbeat_required(self, thread_id):
+        now = DateUtils.get_datetime_now_utc()
+
+        with self.lock:
+            date = self.heartbeats.get(thread_id)
+            if date and (now - date).total_seconds() < SystemHealthCache.HEARTBEAT_PERIOD_S:
+                self.writes_avoided += 1
+                return False
+
+        return True
+
+    def set_heartbeat(self, thread_id, date_created):
+        with self.lock:
+            self.heartbeats[thread_id] = date_created
+
+    def get_stats(self):
+        with self.lock:
+            return {
+                "reads": self.reads,
+                "reads_avoided": self.reads_avoided,
+                "writes_avoided": self.writes_avoided,
+            }
+
 
 class SystemOperation(models.Model):
     CHECK_TYPE_INTERNET = "Internet"
@@ -659,31 +923,39 @@ class SystemOperation(models.Model):
         help_text="Is connection OK",
     )
 
+    cache = SystemHealthCache()
+
     class Meta:
         ordering = ["-date_created"]
 
     def add_by_thread(thread_id, check_type="", status=True):
-        # delete all entries without internet check
-        all_entries = SystemOperation.objects.filter(
-            thread_id=thread_id,
-            check_type="",
-        )
-        all_entries.delete()
+        """
+        Thread has one row for each check type, the row is updated.
+        Rows without check type are heartbeats, they are written only from time to time.
+        """
+        if check_type == "" and not SystemOperation.cache.is_heartbeat_required(
+            thread_id
+        ):
+            return
 
-        # leave one entry with time check
-        all_entries = SystemOperation.objects.filter(
+        date_created = DateUtils.get_datetime_now_utc()
+
+        updated = SystemOperation.objects.filter(
             thread_id=thread_id, check_type=check_type
-        )
-        if all_entries.exists() and all_entries.count() > 1:
-            entries = all_entries[1:]
-            for entry in entries:
-                entry.delete()
-
-        SystemOperation.objects.create(
-            thread_id=thread_id,
-            check_type=check_type,
-            status=status,
-        )
+        ).update(status=status, date_created=date_created)
+
+        if updated == 0:
+            operation = SystemOperation.objects.create(
+                thread_id=thread_id,
+                check_type=check_type,
+                status=status,
+            )
+            date_created = operation.date_created
+
+        if check_type == "":
+            SystemOperation.cache.set_heartbeat(thread_id, date_created)
+        else:
+            SystemOperation.cache.set_status(check_type, status, date_created)
 
 
 class UserConfig(models.Model):
@@ -745,8 +1017,17 @@ class UserConfig(models.Model):
         """
         This is used if no request is specified. Use configured by admin setup.
         """
+        user_id = None
         if input_user and input_user.is_authenticated:
-            confs = UserConfig.objects.filter(user__id=input_user.id)
+            user_id = input_user.id
+
+        return ConfigurationEntry.cache.get_user_config(
+            user_id, lambda: UserConfig.get_from_database(user_id)
+        )
+
+    def get_from_database(user_id=None):
+        if user_id is not None:
+            confs = UserConfig.objects.filter(user__id=user_id).select_related("user")
             if confs.exists():
                 return confs[0]
 
@@ -792,6 +1073,9 @@ class UserConfig(models.Model):
 
         super().save(*args, **kwargs)
 
+        # other users, and configuration stay cached
+        ConfigurationEntry.cache.clear_user_config(self.user_id)
+
     def cleanup(cfg=None):
         configs = UserConfig.objects.filter(user__isnull=True)
         for uc in configs:
@@ -841,6 +1125,104 @@ class UserConfig(models.Model):
         return False
 
 
+class AppLoggingBuffer(object):
+    """
+    Log records waiting to be written to the database.
+
+     - records are written in bulk, if there are enough of them, or if they wait too long
+     - buffering is enabled by background workers, which log a lot.
+       Otherwise records are written immediately
+     - records, and buffering are kept per thread. Pool threads, and other processors
+       are not affected, and a thread writes only its own records.
+       Enabling is counted, buffering ends when every caller disabled it
+     - overflow is checked after a number of records were written, not for every record
+    """
+
+    MAX_SIZE = 100
+    MAX_AGE_S = 10
+    TRIM_PERIOD = 100
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.written_since_trim = 0
+
+    def get_state(self):
+        """
+        @returns state of the calling thread
+        """
+        state = self.local
+        if not hasattr(state, "records"):
+            state.records = []
+            state.enabled_count = 0
+            state.date_first = None
+        return state
+
+    def set_enabled(self, enabled):
+        """
+        @returns True if buffering of the calling thread was ended
+        """
+        state = self.get_state()
+
+        if enabled:
+            state.enabled_count += 1
+        elif state.enabled_count > 0:
+            state.enabled_count -= 1
+
+        return state.enabled_count == 0
+
+    def is_enabled(self):
+        return self.get_state().enabled_count > 0
+
+    def add(self, record):
+        """
+        @returns True if records should be written
+        """
+        state = self.get_state()
+
+        if len(state.records) == 0:
+            state.date_first = DateUtils.get_datetime_now_utc()
+        state.records.append(record)
+
+        return self.is_flush_needed()
+
+    def is_flush_needed(self):
+        state = self.get_state()
+
+        if state.enabled_count == 0:
+            return True
+
+        if len(state.records) >= AppLoggingBuffer.MAX_SIZE:
+            return True
+
+        if state.date_first:
+            age = DateUtils.get_datetime_now_utc() - state.date_first
+            if age.total_seconds() >= AppLoggingBuffer.MAX_AGE_S:
+                return True
+
+        return False
+
+    def take(self):
+        """
+        @returns records of the calling thread
+        """
+        state = self.get_state()
+
+        records = state.records
+        state.records = []
+        state.date_first = None
+        return records
+
+    def is_trim_needed(self, number_of_written):
+        with self.lock:
+            self.written_since_trim += number_of_written
+            if self.written_since_trim < AppLoggingBuffer.TRIM_PERIOD:
+                return False
+
+            self.written_since_trim = 0
+            return True
+
+
 class AppLogging(models.Model):
     """
     info_text should be one liner.
@@ -852,7 +1234,8 @@ class AppLogging(models.Model):
         blank=True, max_length=3000, help_text="Used to provide details about log event"
     )
     level = models.IntegerField(default=0)
-    date = models.DateTimeField(auto_now_add=True)
+    # not auto_now_add, buffered records keep date of the event
+    date = models.DateTimeField(default=DateUtils.get_datetime_now_utc)
     user = models.CharField(max_length=1000, null=True)
 
     DEBUG = 10
@@ -862,6 +1245,8 @@ class AppLogging(models.Model):
     CRITICAL = 50
     NOTIFICATION = 60  # notifications for the user
 
+    buffer = AppLoggingBuffer()
+
     class Meta:
         ordering = ["-date", "level"]
 
@@ -874,8 +1259,7 @@ class AppLogging(models.Model):
     def create_entry(
         info_text, detail_text="", level=INFO, date=None, user=None, stack=False
     ):
-        config = ConfigurationEntry.get()
-        if level < config.logging_level:
+        if level < AppLogging.get_logging_level():
             # AppLogging.debug(info_text = info_text, detail_text = detail_text)
             return
 
@@ -895,15 +1279,13 @@ class AppLogging(models.Model):
         else:
             LinkDatabase.info("AppLogging::{}:{}".format(level, info_text))
 
-        AppLogging.cleanup_overflow()
-
         # TODO replace hardcoded values with something better
         if len(info_text) > 1900:
             info_text = info_text[:1900]
         if len(detail_text) > 2900:
             detail_text = detail_text[:2900]
 
-        AppLogging.objects.create(
+        record = AppLogging(
             info_text=info_text,
             detail_text=detail_text,
             level=level,
@@ -911,6 +1293,38 @@ class AppLogging(models.Model):
             user=user,
         )
 
+        if AppLogging.buffer.add(record):
+            AppLogging.flush()
+
+    def get_logging_level():
+        """
+        Uses configuration cached by the application, not to read database for each record
+        """
+        from ..configuration import Configuration
+
+        return Configuration.get_object().config_entry.logging_level
+
+    def set_buffered(enabled):
+        """
+        Buffered records are written in bulk. Buffering is set for the calling thread,
+        and should be disabled before thread finishes
+        """
+        if AppLogging.buffer.set_enabled(enabled):
+            AppLogging.flush()
+
+    def flush():
+        """
+        Writes buffered records of the calling thread to the database
+        """
+        records = AppLogging.buffer.take()
+        if len(records) == 0:
+            return
+
+        AppLogging.objects.bulk_create(records)
+
+        if AppLogging.buffer.is_trim_needed(len(records)):
+            AppLogging.cleanup_overflow()
+
     def info(info_text, detail_text="", user=None, stack=False):
         AppLogging.create_entry(
             info_text, detail_text=detail_text, level=AppLogging.INFO, stack=stack
@@ -986,16 +1400,11 @@ class AppLogging(models.Model):
             obs.delete()
 
     def cleanup_overflow():
-        infos = AppLogging.objects.all().order_by("date")
-        info_size = infos.count()
+        info_size = AppLogging.objects.count()
         if info_size > AppLogging.get_max_log_entries():
-            index = 0
-            for info in infos:
-                info.delete()
-                index += 1
-
-                if info_size - index <= 1000:
-                    return
+            # leave 1000 newest records
+            dates = AppLogging.objects.order_by("-date").values_list("date", flat=True)
+            AppLogging.objects.filter(date__lt=dates[999]).delete()
 
     def get_max_log_entries():
         """
@@ -12,6 +12,7 @@ import os
 import time
 
 from django.db import models
+from django.db.models import Exists, OuterRef
 from django.conf import settings
 from django.urls import reverse
 from django.contrib.auth.models import User
@@ -176,16 +177,22 @@ class UserTags(models.Model):
 
     def move_entry(source_entry, destination_entry):
         tags = UserTags.objects.filter(entry=source_entry)
-        for tag in tags:
-            dst_tags = UserTags.objects.filter(
-                entry=destination_entry, user=tag.user, tag=tag.tag
-            )
-            if dst_tags.exists():
-                tag.delete()
-                continue
+        user_tags = set(tags.values_list("user", "tag"))
 
-            tag.entry = destination_entry
-            tag.save()
+        duplicates = UserTags.objects.filter(
+            entry=destination_entry, user=OuterRef("user"), tag=OuterRef("tag")
+        )
+        tags.filter(Exists(duplicates)).delete()
+        tags.update(entry=destination_entry)
+
+        # compacted tags are not updated by bulk operations
+        users = User.objects.in_bulk([user_id for user_id, tag in user_tags])
+        for user_id, tag in user_tags:
+            if user_id in users:
+                UserCompactedTags.compact(users[user_id], tag)
+
+        EntryCompactedTags.compact(source_entry)
+        EntryCompactedTags.compact(destination_entry)
 
     def save(self, *args, **kwargs):
         super().save(*args, **kwargs)
@@ -238,6 +245,30 @@ class EntryCompactedTags(models.Model):
             if tag_text != "":
                 EntryCompactedTags.objects.create(tag=tag_text, entry=entry)
 
+    def compact_entries(entry_ids):
+        """
+        Compacts tags of many entries, with a few queries
+        """
+        entry_ids = list(entry_ids)
+
+        EntryCompactedTags.objects.filter(entry_id__in=entry_ids).delete()
+
+        tags = {}
+        user_tags = (
+            UserTags.objects.filter(entry_id__in=entry_ids)
+            .order_by("tag")
+            .values_list("entry_id", "tag")
+        )
+        for entry_id, tag in user_tags:
+            tags[entry_id] = tags.get(entry_id, "") + tag + ","
+
+        EntryCompactedTags.objects.bulk_create(
+            [
+                EntryCompactedTags(tag=tag_text, entry_id=entry_id)
+                for entry_id, tag_text in tags.items()
+            ]
+        )
+
     def cleanup(cfg=None):
         pass
 
@@ -406,22 +437,12 @@ class UserVotes(models.Model):
 
     def move_entry(source_entry, destination_entry):
         votes = UserVotes.objects.filter(entry=source_entry)
-        for vote in votes:
-            dst_votes = UserVotes.objects.filter(
-                entry=destination_entry,
-                user=vote.user,
-                vote=vote.vote,
-            )
-            if dst_votes.exists():
-                dst_vote = dst_votes[0]
-                dst_vote.vote = max(dst_vote.vote, vote.vote)
-                dst_vote.save()
-
-                vote.delete()
-                continue
 
-            vote.entry = destination_entry
-            vote.save()
+        duplicates = UserVotes.objects.filter(
+            entry=destination_entry, user=OuterRef("user"), vote=OuterRef("vote")
+        )
+        votes.filter(Exists(duplicates)).delete()
+        votes.update(entry=destination_entry)
 
 
 class UserComments(models.Model):
@@ -9,10 +9,11 @@ API needs to check user privileges.
 import time
 from datetime import timedelta
 
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
 from django.contrib.auth.models import User
-from django.db.models import Q
+from django.db.models import Q, F, Exists, OuterRef, Subquery, Sum, Max, Value
+from django.db.models.functions import Coalesce, Greatest
 import urllib.parse
 
 from utils.dateutils import DateUtils
@@ -254,37 +255,37 @@ class UserEntryTransitionHistory(models.Model):
         """
         We move entry from https:// to http://. We want that history to be preserved
         """
-        transitions = UserEntryTransitionHistory.objects.filter(entry_from=source_entry)
-        for transition in transitions:
-            dst_transitions = UserEntryTransitionHistory.objects.filter(
-                entry_from=destination_entry, user=transition.user
-            )
-            if dst_transitions.exists():
-                dst_transition = dst_transitions[0]
-                dst_transition.counter += transition.counter
-                dst_transition.save()
-
-                transition.delete()
-                continue
-
-            transition.entry_from = destination_entry
-            transition.save()
+        UserEntryTransitionHistory.move_entry_field(
+            "entry_from", source_entry, destination_entry
+        )
+        UserEntryTransitionHistory.move_entry_field(
+            "entry_to", source_entry, destination_entry
+        )
 
-        transitions = UserEntryTransitionHistory.objects.filter(entry_to=source_entry)
-        for transition in transitions:
-            dst_transitions = UserEntryTransitionHistory.objects.filter(
-                entry_to=destination_entry, user=transition.user
-            )
-            if dst_transitions.exists():
-                dst_transition = dst_transitions[0]
-                dst_transition.counter += transition.counter
-                dst_transition.save()
+    def move_entry_field(field, source_entry, destination_entry):
+        """
+        Counters of the same user are summed, rest of transitions is moved
+        """
+        transitions = UserEntryTransitionHistory.objects.filter(**{field: source_entry})
+
+        user_transitions = transitions.filter(user=OuterRef("user"))
+        user_counter = (
+            user_transitions.order_by()
+            .values("user")
+            .annotate(total=Sum("counter"))
+            .values("total")
+        )
 
-                transition.delete()
-                continue
+        destinations = UserEntryTransitionHistory.objects.filter(
+            **{field: destination_entry}
+        )
+        destinations.filter(Exists(user_transitions)).update(
+            counter=F("counter") + Subquery(user_counter)
+        )
 
-            transition.entry_from = destination_entry
-            transition.save()
+        duplicates = destinations.filter(user=OuterRef("user"))
+        transitions.filter(Exists(duplicates)).delete()
+        transitions.update(**{field: destination_entry})
 
 
 class UserEntryVisitHistory(models.Model):
@@ -313,13 +314,13 @@ class UserEntryVisitHistory(models.Model):
 
     def visited(entry, user, previous_entry=None):
         """
-        User visited a link:
+        User visited a link. Visit is only recorded, and it is processed later
+        by process_visits(), outside of the request:
          - if it is just hit before a minute (f5 etc.) do nothing
          - if we transitioned from other link store that info
          - increment visits counter
         """
         from ..configuration import Configuration
-        from ..controllers import BackgroundJobController
 
         """
         TODO to think about. are we capturing data about not logged users?
@@ -340,36 +341,47 @@ class UserEntryVisitHistory(models.Model):
         if str(user.username) == "" or user.username is None:
             return
 
-        if UserEntryVisitHistory.is_link_just_visited(user, entry):
-            return
+        event = UserEntryVisitEvent.objects.create(
+            user=user,
+            entry=entry,
+            entry_from=previous_entry,
+            date_visit=DateUtils.get_datetime_now_utc(),
+        )
 
-        if not previous_entry:
-            previous_entry = UserEntryVisitHistory.get_last_user_entry(user)
+        # nobody else would process it
+        if not config.enable_background_jobs:
+            UserEntryVisitHistory.process_visits()
 
-        visits = UserEntryVisitHistory.objects.filter(user=user, entry=entry)
+        return event
 
-        if not visits.exists():
-            visit = UserEntryVisitHistory.objects.create(
-                visits=1,
-                entry=entry,
-                date_last_visit=DateUtils.get_datetime_now_utc(),
-                user=user,
-            )
-        else:
-            visit = visits[0]
-            visit.visits += 1
-            visit.date_last_visit = DateUtils.get_datetime_now_utc()
-            visit.user = user
-            visit.save()
+    def process_visits(limit=1000):
+        """
+        Aggregates recorded visits into visit counters, transitions,
+        and compacted entry visits.
+
+        @returns number of processed visit events
+        """
+        config = Configuration.get_object().config_entry
+        if not config.track_user_actions or not config.track_user_navigation:
+            UserEntryVisitEvent.objects.all().delete()
+            return 0
 
-        if previous_entry:
-            UserEntryTransitionHistory.add(user, previous_entry, entry)
+        events = list(
+            UserEntryVisitEvent.objects.order_by("date_visit", "id")[:limit]
+        )
+        if len(events) == 0:
+            return 0
 
-        UserEntryVisitHistory.delete_old_entries(user)
+        with transaction.atomic():
+            aggregator = UserEntryVisitAggregator()
+            aggregator.add_events(events)
+            aggregator.save()
 
-        EntryVisitHistory.compact(entry)
+            UserEntryVisitEvent.objects.filter(
+                id__in=[event.id for event in events]
+            ).delete()
 
-        return visit
+        return len(events)
 
     def is_link_just_visited(user, entry):
         last_entry = UserEntryVisitHistory.get_last_user_entry(user)
@@ -464,25 +476,39 @@ class UserEntryVisitHistory(models.Model):
             or not config_entry.track_user_navigation
         ):
             UserEntryVisitHistory.objects.all().delete()
+            UserEntryVisitEvent.objects.all().delete()
 
     def move_entry(source_entry, destination_entry):
+        """
+        Visits of the same user are summed, rest of visits is moved
+        """
         visits = UserEntryVisitHistory.objects.filter(entry=source_entry)
-        for visit in visits:
-            dst_visits = UserEntryVisitHistory.objects.filter(
-                entry=destination_entry, user=visit.user
-            )
-            if dst_visits.exists():
-                dst_visit = dst_visits[0]
-                dst_visit.visits += visit.visits
-                if visit.date_last_visit > dst_visit.date_last_visit:
-                    dst_visit.date_last_visit = visit.date_last_visit
-                dst_visit.save()
 
-                visit.delete()
-                continue
+        user_visits = visits.filter(user=OuterRef("user")).order_by().values("user")
+        user_total = user_visits.annotate(total=Sum("visits")).values("total")
+        user_last = user_visits.annotate(last=Max("date_last_visit")).values("last")
+
+        destinations = UserEntryVisitHistory.objects.filter(entry=destination_entry)
+        destinations.filter(Exists(user_visits)).update(
+            visits=Coalesce(F("visits"), Value(0))
+            + Coalesce(Subquery(user_total), Value(0)),
+            date_last_visit=Greatest(
+                Coalesce(F("date_last_visit"), Subquery(user_last)),
+                Coalesce(Subquery(user_last), F("date_last_visit")),
+            ),
+        )
+
+        duplicates = destinations.filter(user=OuterRef("user"))
+        visits.filter(Exists(duplicates)).delete()
+        visits.update(entry=destination_entry)
 
-            visit.entry = destination_entry
-            visit.save()
+        # not yet processed visits
+        UserEntryVisitEvent.objects.filter(entry=source_entry).update(
+            entry=destination_entry
+        )
+        UserEntryVisitEvent.objects.filter(entry_from=source_entry).update(
+            entry_from=destination_entry
+        )
 
     def delete_old_entries(user):
         qs = UserEntryVisitHistory.objects.filter(user=user).order_by("date_last_visit")
@@ -499,6 +525,202 @@ class UserEntryVisitHistory(models.Model):
                 entry.delete()
 
 
+class UserEntryVisitEvent(models.Model):
+    """
+    Visit, which was not yet processed. Append only.
+    """
+
+    date_visit = models.DateTimeField()
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name=str(LinkDatabase.name) + "_entry_visit_events",
+    )
+
+    entry = models.ForeignKey(
+        LinkDataModel,
+        on_delete=models.CASCADE,
+        related_name="visit_events",
+    )
+    entry_from = models.ForeignKey(
+        LinkDataModel,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="visit_events_from",
+    )
+
+
+class UserEntryVisitAggregator(object):
+    """
+    Applies visit events in order, in memory, with rules of
+    UserEntryVisitHistory. Rows are read, and written in bulk.
+    """
+
+    def __init__(self):
+        # (user id, entry id) -> visit row
+        self.visits = {}
+        self.changed_visits = set()
+
+        # user id -> {entry id: date of last visit}, last hour only
+        self.recent = {}
+
+        # (user id, entry from id, entry to id) -> counter increment
+        self.transitions = {}
+
+    def add_events(self, events):
+        self.load(events)
+
+        for event in events:
+            self.add_event(event)
+
+    def load(self, events):
+        user_ids = set(event.user_id for event in events)
+        entry_ids = set(event.entry_id for event in events)
+
+        visits = UserEntryVisitHistory.objects.filter(
+            user_id__in=user_ids, entry_id__in=entry_ids
+        ).order_by("-date_last_visit")
+        for visit in visits:
+            key = (visit.user_id, visit.entry_id)
+            if key not in self.visits:
+                self.visits[key] = visit
+
+        time_ago_limit = events[0].date_visit - timedelta(hours=1)
+
+        recent_visits = UserEntryVisitHistory.objects.filter(
+            user_id__in=user_ids, date_last_visit__gt=time_ago_limit
+        ).values_list("user_id", "entry_id", "date_last_visit")
+        for user_id, entry_id, date_last_visit in recent_visits:
+            recent = self.recent.setdefault(user_id, {})
+            if entry_id not in recent or recent[entry_id] < date_last_visit:
+                recent[entry_id] = date_last_visit
+
+    def add_event(self, event):
+        user_id = event.user_id
+        entry_id = event.entry_id
+        date = event.date_visit
+
+        recent = self.recent.setdefault(user_id, {})
+
+        last_entry_id = self.get_last_entry_id(user_id, date)
+        if last_entry_id == entry_id:
+            last_visit = recent.get(entry_id)
+            if last_visit and last_visit > date - timedelta(minutes=1):
+                return
+
+        key = (user_id, entry_id)
+        visit = self.visits.get(key)
+        if not visit:
+            visit = UserEntryVisitHistory(user_id=user_id, entry_id=entry_id, visits=0)
+            self.visits[key] = visit
+
+        visit.visits = (visit.visits or 0) + 1
+        visit.date_last_visit = date
+        self.changed_visits.add(key)
+
+        recent[entry_id] = date
+
+        entry_from_id = event.entry_from_id
+        if not entry_from_id:
+            entry_from_id = last_entry_id
+
+        if entry_from_id and entry_from_id != entry_id:
+            transition_key = (user_id, entry_from_id, entry_id)
+            self.transitions[transition_key] = (
+                self.transitions.get(transition_key, 0) + 1
+            )
+
+    def get_last_entry_id(self, user_id, date):
+        """
+        Same as UserEntryVisitHistory.get_last_user_entry, at the time of visit
+        """
+        time_ago_limit = date - timedelta(hours=1)
+        burst_time_limit = date - timedelta(seconds=15)
+
+        visits = []
+        for entry_id, date_last_visit in self.recent.get(user_id, {}).items():
+            if date_last_visit > time_ago_limit:
+                visits.append((date_last_visit, entry_id))
+
+        not_burst = [visit for visit in visits if visit[0] < burst_time_limit]
+        if len(not_burst) > 0:
+            return max(not_burst)[1]
+
+        # something might be in burst time
+        if len(visits) > 0:
+            return min(visits)[1]
+
+    def save(self):
+        new_visits = []
+        changed_visits = []
+        for key in self.changed_visits:
+            visit = self.visits[key]
+            if visit.pk is None:
+                new_visits.append(visit)
+            else:
+                changed_visits.append(visit)
+
+        UserEntryVisitHistory.objects.bulk_create(new_visits)
+        UserEntryVisitHistory.objects.bulk_update(
+            changed_visits, ["visits", "date_last_visit"]
+        )
+
+        self.save_transitions()
+
+        for user_id in set(key[0] for key in self.changed_visits):
+            UserEntryVisitHistory.delete_old_entries(user_id)
+
+        entry_ids = set(key[1] for key in self.changed_visits)
+
+        EntryVisitHistory.compact_entries(entry_ids)
+
+        # visits are part of page rating
+        from ..controllers import EntriesRatingUpdater
+
+        EntriesRatingUpdater().update(entry_ids)
+
+    def save_transitions(self):
+        if len(self.transitions) == 0:
+            return
+
+        user_ids = set(key[0] for key in self.transitions)
+        from_ids = set(key[1] for key in self.transitions)
+        to_ids = set(key[2] for key in self.transitions)
+
+        existing = {}
+        for transition in UserEntryTransitionHistory.objects.filter(
+            user_id__in=user_ids, entry_from_id__in=from_ids, entry_to_id__in=to_ids
+        ).order_by("-counter"):
+            key = (transition.user_id, transition.entry_from_id, transition.entry_to_id)
+            if key not in existing:
+                existing[key] = transition
+
+        new_transitions = []
+        changed_transitions = []
+        for key, counter in self.transitions.items():
+            transition = existing.get(key)
+            if transition:
+                transition.counter += counter
+                changed_transitions.append(transition)
+            else:
+                new_transitions.append(
+                    UserEntryTransitionHistory(
+                        user_id=key[0],
+                        entry_from_id=key[1],
+                        entry_to_id=key[2],
+                        counter=counter,
+                    )
+                )
+
+        UserEntryTransitionHistory.objects.bulk_create(new_transitions)
+        UserEntryTransitionHistory.objects.bulk_update(changed_transitions, ["counter"])
+
+        EntryTransitionHistory.compact_transitions(
+            set((key[1], key[2]) for key in self.transitions)
+        )
+
+
 class SearchHistory(models.Model):
     """
     Just a search history, global
@@ -569,6 +791,37 @@ class EntryVisitHistory(models.Model):
         """
         pass
 
+    def compact_entries(entry_ids):
+        """
+        Sums visits of all users, for many entries
+        """
+        entry_ids = list(entry_ids)
+
+        BATCH_SIZE = 500
+
+        for index in range(0, len(entry_ids), BATCH_SIZE):
+            batch_ids = entry_ids[index : index + BATCH_SIZE]
+
+            EntryVisitHistory.objects.filter(entry_id__in=batch_ids).delete()
+
+            rows = (
+                UserEntryVisitHistory.objects.filter(entry_id__in=batch_ids)
+                .order_by()
+                .values("entry_id")
+                .annotate(total=Sum("visits"), last=Max("date_last_visit"))
+            )
+
+            EntryVisitHistory.objects.bulk_create(
+                [
+                    EntryVisitHistory(
+                        entry_id=row["entry_id"],
+                        visits=row["total"],
+                        date_last_visit=row["last"],
+                    )
+                    for row in rows
+                ]
+            )
+
     def compact(entry):
         EntryVisitHistory.objects.filter(entry=entry).delete()
 
@@ -615,6 +868,40 @@ class EntryTransitionHistory(models.Model):
     def cleanup(cfg=None):
         pass
 
+    def compact_transitions(pairs):
+        """
+        Sums counters of all users, for many (entry from id, entry to id) pairs
+        """
+        pairs = list(pairs)
+
+        # sqlite limits depth of an expression
+        BATCH_SIZE = 100
+
+        for index in range(0, len(pairs), BATCH_SIZE):
+            condition = Q()
+            for entry_from_id, entry_to_id in pairs[index : index + BATCH_SIZE]:
+                condition |= Q(entry_from_id=entry_from_id, entry_to_id=entry_to_id)
+
+            EntryTransitionHistory.objects.filter(condition).delete()
+
+            rows = (
+                UserEntryTransitionHistory.objects.filter(condition)
+                .order_by()
+                .values("entry_from_id", "entry_to_id")
+                .annotate(total=Sum("counter"))
+            )
+
+            EntryTransitionHistory.objects.bulk_create(
+                [
+                    EntryTransitionHistory(
+                        entry_from_id=row["entry_from_id"],
+                        entry_to_id=row["entry_to_id"],
+                        counter=row["total"],
+                    )
+                    for row in rows
+                ]
+            )
+
     def compact(entry_from, entry_to):
         EntryTransitionHistory.objects.filter(entry_from=entry_from, entry_to=entry_to).delete()
 
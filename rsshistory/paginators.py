@@ -0,0 +1,190 @@
+"""
+Keyset (cursor) pagination.
+
+Paginator with page numbers uses COUNT(*), and OFFSET. Both are slower,
+the bigger the table, and the deeper the page.
+
+Keyset pagination remembers sort values of the last row of a page,
+and next page starts right after them. Fetch time does not depend on depth.
+"""
+
+import base64
+import json
+from datetime import datetime, date
+
+from django.db.models import F, Q
+
+
+class KeysetPaginator(object):
+    """
+    - order_by uses the same notation as queryset.order_by
+    - id is used as the last sort key, so the order is always unique
+    - nulls are first in ascending order, and last in descending order
+    - cursor is opaque to clients
+    """
+
+    ANNOTATION_PREFIX = "keyset_"
+
+    def __init__(self, queryset, order_by, per_page, limit=None):
+        self.queryset = queryset
+        self.order_by = self.get_unique_order_by(order_by)
+        self.per_page = per_page
+        self.limit = limit
+
+    def get_unique_order_by(self, order_by):
+        order_by = [item for item in order_by if item]
+
+        names = [item.lstrip("-") for item in order_by]
+        if "id" in names or "pk" in names:
+            return order_by
+
+        if order_by and order_by[0].startswith("-"):
+            return order_by + ["-id"]
+        return order_by + ["id"]
+
+    def get_fields(self):
+        """
+        @return list of field name, and descending flag
+        """
+        return [(item.lstrip("-"), item.startswith("-")) for item in self.order_by]
+
+    def get_ordering(self):
+        ordering = []
+
+        for field, descending in self.get_fields():
+            if descending:
+                ordering.append(F(field).desc(nulls_last=True))
+            else:
+                ordering.append(F(field).asc(nulls_first=True))
+
+        return ordering
+
+    def get_annotations(self):
+        annotations = {}
+
+        for index, (field, descending) in enumerate(self.get_fields()):
+            annotations[self.get_annotation_name(index)] = F(field)
+
+        return annotations
+
+    def get_annotation_name(self, index):
+        return "{}{}".format(KeysetPaginator.ANNOTATION_PREFIX, index)
+
+    def get_condition_after(self, values):
+        """
+        Returns condition for rows that are after values, in the sort order
+        """
+        fields = self.get_fields()
+        if len(values) != len(fields):
+            raise ValueError("Cursor does not match sort order")
+
+        result = None
+        equal = Q()
+
+        for (field, descending), value in zip(fields, values):
+            after = self.get_field_after(field, descending, value)
+            if after is not None:
+                condition = equal & after
+                if result is None:
+                    result = condition
+                else:
+                    result |= condition
+
+            if value is None:
+                equal &= Q(**{field + "__isnull": True})
+            else:
+                equal &= Q(**{field: value})
+
+        if result is None:
+            # nothing is after the last row
+            return Q(pk__in=[])
+
+        return result
+
+    def get_field_after(self, field, descending, value):
+        if descending:
+            if value is None:
+                return None
+            return Q(**{field + "__lt": value}) | Q(**{field + "__isnull": True})
+        else:
+            if value is None:
+                return Q(**{field + "__isnull": False})
+            return Q(**{field + "__gt": value})
+
+    def get_page(self, cursor=None):
+        """
+        @return list of objects, and cursor of the next page, or None
+        """
+        values = None
+        position = 0
+
+        if cursor:
+            values, position = KeysetPaginator.decode_cursor(cursor)
+
+        per_page = self.per_page
+        if self.limit is not None:
+            per_page = min(per_page, self.limit - position)
+            if per_page <= 0:
+                return [], None
+
+        queryset = self.queryset.annotate(**self.get_annotations())
+        if values is not None:
+            queryset = queryset.filter(self.get_condition_after(values))
+
+        queryset = queryset.order_by(*self.get_ordering())
+
+        objects = list(queryset[: per_page + 1])
+
+        next_cursor = None
+        if len(objects) > per_page:
+            objects = objects[:per_page]
+
+            if self.limit is None or position + per_page < self.limit:
+                next_cursor = KeysetPaginator.encode_cursor(
+                    self.get_values(objects[-1]), position + per_page
+                )
+
+        return objects, next_cursor
+
+    def get_values(self, obj):
+        values = []
+        for index in range(len(self.order_by)):
+            values.append(getattr(obj, self.get_annotation_name(index)))
+
+        return values
+
+    def encode_cursor(values, position):
+        data = {"v": [KeysetPaginator.encode_value(value) for value in values]}
+        data["p"] = position
+
+        text = json.dumps(data, separators=(",", ":"))
+        cursor = base64.urlsafe_b64encode(text.encode("utf-8")).decode("ascii")
+        # padding is not URL friendly
+        return cursor.rstrip("=")
+
+    def decode_cursor(cursor):
+        """
+        @return values, and position. Raises ValueError for invalid cursor
+        """
+        try:
+            cursor = cursor + "=" * (-len(cursor) % 4)
+            text = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8")
+            data = json.loads(text)
+            values = data["v"]
+            position = int(data["p"])
+        except (TypeError, KeyError, ValueError) as E:
+            raise ValueError("Invalid cursor") from E
+
+        if not isinstance(values, list):
+            raise ValueError("Invalid cursor")
+
+        return values, position
+
+    def encode_value(value):
+        """
+        Dates are stored as ISO text, database fields accept it for comparison
+        """
+        if isinstance(value, (datetime, date)):
+            return value.isoformat()
+
+        return value
@@ -0,0 +1,65 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import connections
+
+from webtoolkit import UrlLocation
+
+
+class SourceFetchPool(object):
+    """
+    Fetches contents of many sources at once, so that slow sources do not stall others.
+
+     - only network round-trips are performed by worker threads, they do not
+       access the database
+     - plugins are prepared, and later processed by the calling thread.
+       Entries, logs and statistics are written to the database by one thread
+     - number of concurrent requests to one domain is limited
+    """
+
+    def __init__(self, max_workers=4, max_per_domain=1):
+        self.max_workers = max_workers
+        self.max_per_domain = max(1, max_per_domain)
+        self.domain_semaphores = {}
+        self.lock = threading.Lock()
+
+    def fetch(self, plugins):
+        """
+        @returns number of plugins fetched in advance
+        """
+        fetchable = []
+        for plugin in plugins:
+            if plugin.prepare_fetch():
+                fetchable.append(plugin)
+
+        # there is nothing to overlap, plugin will fetch data when processed
+        if self.max_workers <= 1 or len(fetchable) <= 1:
+            return 0
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for plugin in fetchable:
+                domain = UrlLocation(plugin.get_address()).get_domain_only()
+                executor.submit(self.fetch_plugin, plugin, domain)
+
+        return len(fetchable)
+
+    def fetch_plugin(self, plugin, domain):
+        semaphore = self.get_domain_semaphore(domain)
+
+        with semaphore:
+            try:
+                plugin.fetch()
+            except Exception as E:
+                # raised again when plugin is processed
+                plugin.fetch_error = E
+            finally:
+                # worker threads have their own connections
+                connections.close_all()
+
+    def get_domain_semaphore(self, domain):
+        with self.lock:
+            if domain not in self.domain_semaphores:
+                self.domain_semaphores[domain] = threading.BoundedSemaphore(
+                    self.max_per_domain
+                )
+            return self.domain_semaphores[domain]
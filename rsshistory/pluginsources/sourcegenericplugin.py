@@ -6,7 +6,7 @@ from webtoolkit import RemoteServer, ContentLinkParser, calculate_hash
 from ..apps import LinkDatabase
 from ..configuration import Configuration
 from ..models import AppLogging, UserTags, BaseLinkDataController
-from ..controllers import EntryDataBuilder, SourceDataController
+from ..controllers import EntryDataBuilder, EntryDataBatchBuilder, SourceDataController
 from ..controllers import LinkDataController, BackgroundJobController
 from ..pluginurl.urlhandler import UrlHandler
 
@@ -29,6 +29,8 @@ class SourceGenericPlugin(SourcePluginInterface):
         self.contents = None
         self.content_handler = None
         self.response = None
+        self.url_handler = None
+        self.fetch_error = None
 
     def check_for_data(self):
         source = self.get_source()
@@ -112,16 +114,12 @@ class SourceGenericPlugin(SourcePluginInterface):
             yield link_data
 
     def read_data_from_container_elements(self):
-        source = self.get_source()
-
-        for link_data in self.get_enhanced_entries():
-            b = EntryDataBuilder()
-            entry = b.build(link_data=link_data, source_is_auto=True)
+        links_data = list(self.get_enhanced_entries())
 
+        b = EntryDataBatchBuilder(source_is_auto=True)
+        for entry in b.build(links_data):
             self.on_added_entry(entry)
 
-            # LinkDatabase.info("Generic plugin item stop:{}".format(link_data["link"]))
-
     def is_page_ok_to_read(self):
         source = self.get_source()
 
@@ -173,13 +171,16 @@ class SourceGenericPlugin(SourcePluginInterface):
 
         c = Configuration.get_object().config_entry
         if c.remote_webtools_server_location:
+            if self.fetch_error:
+                # raised by fetch pool thread
+                error = self.fetch_error
+                self.fetch_error = None
+                raise error
 
-            entry = self.get_source_entry()
-            if entry:
-                url_ex = UrlHandler(entry=entry)
-            else:
-                url_ex = UrlHandler(url=page_link)
+            self.prepare_fetch()
+            url_ex = self.url_handler
 
+            # contents fetched by fetch pool are written here
             self.all_properties = url_ex.get_all_properties()
             self.response = url_ex.get_response()
 
@@ -203,6 +204,31 @@ class SourceGenericPlugin(SourcePluginInterface):
 
             return self.contents
 
+    def prepare_fetch(self):
+        """
+        Prepares url handler. Reads database, so it should be called by the processing thread.
+        @returns True if there is something to fetch
+        """
+        if self.url_handler is None:
+            c = Configuration.get_object().config_entry
+            if not c.remote_webtools_server_location:
+                return False
+
+            entry = self.get_source_entry()
+            if entry:
+                self.url_handler = UrlHandler(entry=entry)
+            else:
+                self.url_handler = UrlHandler(url=self.get_address())
+
+        return self.url_handler.prepare_fetch()
+
+    def fetch(self):
+        """
+        Performs the network round-trip. Does not access the database,
+        it is called from fetch pool threads after prepare_fetch.
+        """
+        self.url_handler.fetch_properties()
+
     def get_source_entry(self):
         source = self.get_source()
 
@@ -61,6 +61,15 @@ class SourcePluginInterface(object):
     def read_entries(self):
         pass
 
+    def prepare_fetch(self):
+        """
+        @returns True if plugin has data that can be fetched in advance
+        """
+        return False
+
+    def fetch(self):
+        pass
+
     def get_source(self):
         sources = SourceDataController.objects.filter(id=self.source_id)
         if sources.exists():
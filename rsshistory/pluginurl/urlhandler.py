@@ -1,6 +1,6 @@
+import time
 import traceback
 import requests
-import json
 
 from webtoolkit import (
     RemoteServer,
@@ -21,7 +21,7 @@ from webtoolkit import (
 )
 
 from ..apps import LinkDatabase
-from ..models import AppLogging, EntryRules, BlockEntry, Browser
+from ..models import AppLogging, EntryRules, BlockEntry, Browser, BrowserStatistics
 from ..configuration import Configuration
 
 
@@ -37,72 +37,142 @@ class UrlHandler(object):
 
         self.handler_name = handler_name
         if entry:
-            self.last_browser = entry.last_browser
+            self.last_browser = self.get_entry_browser(entry)
         else:
             self.last_browser = last_browser
 
         self.browsers = browsers
+        self.is_adaptive = False
         if not browsers:
             self.browsers = Browser.get_browsers()
             self.browsers = self.get_browsers()
+            # statistics are read only if page is fetched
+            self.is_adaptive = True
 
         self.all_properties = None
 
+        # requests of browsers, prepared by processing thread
+        self.requests = None
+        self.remote_server_location = None
+        self.is_fetched = False
+        self.is_fetch_successful = False
+        self.fetch_messages = []
+        self.fetch_results = []
+        self.fetch_error = None
+
+    def get_entry_browser(self, entry):
+        if not entry.last_browser_id:
+            return
+
+        # enabled browsers are cached, relation does not have to be queried
+        browser = Browser.cache.get_browser(entry.last_browser_id)
+        if browser:
+            return browser
+
+        return entry.last_browser
+
     def get_all_properties(self):
-        if self.all_properties:
+        # properties fetched by other thread are written by the calling thread
+        if self.is_fetched:
+            self.on_fetched()
+
+        # empty result is also cached, failed calls should not be repeated
+        if self.all_properties is not None:
             return self.all_properties
 
         self.all_properties = self.get_properties_internal()
         return self.all_properties
 
     def get_properties_internal(self):
+        if not self.prepare_fetch():
+            return
+
+        self.fetch_properties()
+        return self.on_fetched()
+
+    def prepare_fetch(self):
+        """
+        Checks remote server, orders browsers and builds their requests.
+        Reads database, so it is called by the processing thread.
+        @returns True if properties can be fetched
+        """
+        if self.requests is not None:
+            return True
+
         config_entry = Configuration.get_object().config_entry
 
         remote_server = Configuration.get_object().get_remote_server()
-        if remote_server:
-            if self.is_remote_server_down():
-                AppLogging.error(
-                    "Cannot ping remote server: {}".format(
-                        config_entry.remote_webtools_server_location
-                    )
+        if not remote_server:
+            return False
+
+        if self.is_remote_server_down():
+            AppLogging.error(
+                "Cannot ping remote server: {}".format(
+                    config_entry.remote_webtools_server_location
                 )
-                return
+            )
+            return False
 
-            return self.get_properties_internal_mode_mapping(self.browsers)
+        self.remote_server_location = config_entry.remote_webtools_server_location
 
-    def get_properties_internal_mode_mapping(self, browsers):
-        config_entry = Configuration.get_object().config_entry
-        name = ""
+        if self.is_adaptive:
+            self.browsers = self.get_adaptive_browsers()
+            self.is_adaptive = False
+
+        self.requests = []
+        if self.browsers:
+            for browser in self.browsers:
+                self.requests.append((browser, self.browser_to_request(browser)))
+
+        return True
+
+    def fetch_properties(self):
+        """
+        Performs network calls. Does not access the database, so it can be called
+        by fetch pool threads. Logs, and results are written by on_fetched.
+        """
+        self.fetch_messages = []
+        self.fetch_results = []
+        self.fetch_error = None
+        self.is_fetch_successful = False
 
         # Here was code to call "default" crawler from crawler buddy
         # This might end up with 2 selenium calls, where here, one later
 
-        if browsers and len(browsers) > 0:
-            for browser in browsers:
+        if self.requests and len(self.requests) > 0:
+            for browser, request in self.requests:
                 self.last_browser = browser
 
-                AppLogging.debug(
+                self.add_fetch_message(
+                    AppLogging.debug,
                     "Url:{} Remote server request.\nBrowser:{}".format(
                         self.url, browser,
-                    )
+                    ),
                 )
 
-                request = self.browser_to_request(browser)
-
+                start_time = time.monotonic()
                 self.perform_call(request)
+                call_time_s = time.monotonic() - start_time
 
                 if not self.all_properties:
-                    AppLogging.warning(
+                    self.add_fetch_message(
+                        AppLogging.warning,
                         "Url:{} Could not communicate with remote server, Browser:{}".format(
                             self.url, browser
-                        )
+                        ),
                     )
+                    self.fetch_results.append((browser, False, call_time_s))
                     continue
 
                 if self.is_server_error() and not browser.ignore_errors:
-                    AppLogging.debug(f"{self.url}: Crawling server error",
-                               detail_text = str(self.all_properties))
-                    raise IOError(f"{self.url}: Crawling server error")
+                    self.fetch_results.append((browser, False, call_time_s))
+                    self.add_fetch_message(
+                        AppLogging.debug,
+                        f"{self.url}: Crawling server error",
+                        str(self.all_properties),
+                    )
+                    self.fetch_error = IOError(f"{self.url}: Crawling server error")
+                    break
 
                 """
                 # TODO if not valid -> we can retry using a different crawler
@@ -114,47 +184,78 @@ class UrlHandler(object):
                 """
 
                 if self.is_another_request_necessary():
+                    self.fetch_results.append((browser, False, call_time_s))
+
                     response = self.get_response()
                     if response:
                         status_code = response.get_status_code()
                         status_code_str = status_code_to_text(status_code)
-                        AppLogging.debug(f"Url:{self.url} status_code:{status_code_str} browser:{browser}. Trying another browser",
-                           detail_text = str(self.all_properties))
+                        self.add_fetch_message(
+                            AppLogging.debug,
+                            f"Url:{self.url} status_code:{status_code_str} browser:{browser}. Trying another browser",
+                            str(self.all_properties),
+                        )
                     else:
-                        AppLogging.debug(f"Url:{self.url} browser:{browser}. Trying another browser.",
-                           detail_text = str(self.all_properties))
+                        self.add_fetch_message(
+                            AppLogging.debug,
+                            f"Url:{self.url} browser:{browser}. Trying another browser.",
+                            str(self.all_properties),
+                        )
                     continue
 
                 if self.all_properties:
-                    if self.entry:
-                        self.entry.last_browser = self.last_browser
-                        self.entry.save()
-
-                    return self.all_properties
+                    self.fetch_results.append((browser, True, call_time_s))
+                    self.is_fetch_successful = True
+                    break
         else:
             request = PageRequestObject(self.url)
 
             self.perform_call(request)
 
             if not self.all_properties:
-                AppLogging.warning(
-                    "Url:{} Could not communicate with remote server".format(self.url)
+                self.add_fetch_message(
+                    AppLogging.warning,
+                    "Url:{} Could not communicate with remote server".format(self.url),
                 )
-
-            if self.all_properties:
-                if self.entry:
-                    self.entry.last_browser = self.last_browser
-                    self.entry.save()
-                return self.all_properties
+            else:
+                self.is_fetch_successful = True
 
         if not self.all_properties:
             self.all_properties = []
 
+        self.is_fetched = True
+
+    def add_fetch_message(self, function, info_text, detail_text=""):
+        self.fetch_messages.append((function, info_text, detail_text))
+
+    def on_fetched(self):
+        """
+        Writes logs, browser statistics, and browser of entry.
+        Called by the processing thread, after properties were fetched.
+        """
+        self.is_fetched = False
+
+        for function, info_text, detail_text in self.fetch_messages:
+            function(info_text, detail_text=detail_text)
+        self.fetch_messages = []
+
+        BrowserStatistics.add_many(self.url, self.fetch_results)
+        self.fetch_results = []
+
+        if self.fetch_error:
+            error = self.fetch_error
+            self.fetch_error = None
+            raise error
+
+        if self.is_fetch_successful and self.entry:
+            self.entry.last_browser = self.last_browser
+            self.entry.save()
+
         return self.all_properties
 
     def perform_call(self, request):
-        config_entry = Configuration.get_object().config_entry
-        location = config_entry.remote_webtools_server_location
+        # read by prepare_fetch, configuration is not read by fetch pool threads
+        location = self.remote_server_location
         index = 0
 
         while True:
@@ -167,7 +268,9 @@ class UrlHandler(object):
             self.response = url.get_response()
 
             if self.is_another_attempt_necessary():
-                AppLogging.debug(f"Url:{self.url} Another attempt")
+                self.add_fetch_message(
+                    AppLogging.debug, f"Url:{self.url} Another attempt"
+                )
                 continue
 
             self.all_properties = url.get_all_properties()
@@ -212,31 +315,9 @@ class UrlHandler(object):
     def browser_to_request(self, browser):
         request = PageRequestObject(self.url)
 
-        request.user_agent = browser.user_agent
-        if browser.request_headers:
-            try:
-                request.request_headers = json.loads(browser.request_headers)
-            except Exception as E:
-                print(E)
-        request.timeout_s = browser.timeout_s
-        request.delay_s = browser.delay_s
-        request.ssl_verify = browser.ssl_verify
-        request.respect_robots = browser.respect_robots_txt
-        request.accept_types = browser.accept_types
-        request.bytes_limit = browser.bytes_limit
-        request.http_proxy = browser.http_proxy
-        request.https_proxy = browser.https_proxy
-
-        if browser.cookies:
-            try:
-                request.cookies = json.loads(browser.cookies)
-            except Exception as E:
-                print(E)
-        if browser.settings:
-            try:
-                request.settings = json.loads(browser.settings)
-            except Exception as E:
-                print(E)
+        # browser JSON fields are parsed once, by browser cache
+        for name, value in Browser.cache.get_request_template(browser).items():
+            setattr(request, name, value)
 
         request.crawler_name = browser.name
         if self.handler_name:
@@ -266,12 +347,20 @@ class UrlHandler(object):
 
         return browsers
 
+    def get_adaptive_browsers(self):
+        """
+        Browsers which were successful for the domain go first.
+        Last browser of entry, and browsers of entry rules still take precedence
+        """
+        self.browsers = BrowserStatistics.order(Browser.get_browsers(), self.url)
+        return self.get_browsers()
+
     def bring_to_front(self, browsers, browser_id):
         result = []
 
-        id_browsers = Browser.objects.filter(id = browser_id)
-        if id_browsers.exists():
-            result.append(id_browsers[0])
+        browser = Browser.cache.get_browser(browser_id)
+        if browser:
+            result.append(browser)
 
         for browser in browsers:
             if browser.id == browser_id:
@@ -464,5 +553,4 @@ class UrlHandler(object):
 
     def get_response(self):
         self.get_properties()
-        config_entry = Configuration.get_object().config_entry
         return RemoteUrl(all_properties = self.all_properties).get_response()
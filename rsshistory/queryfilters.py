@@ -9,6 +9,7 @@ from .controllers import (
     LinkDataController,
     ArchiveLinkDataController,
     DomainsController,
+    EntriesSearchIndex,
 )
 from .apps import LinkDatabase
 from .models import UserConfig, AppLogging
@@ -19,6 +20,7 @@ class DjangoSingleSymbolEvaluator(SingleSymbolEvaluator):
     def __init__(self):
         super().__init__()
         self.default_search_symbols = []
+        self.search_index = None
 
         self.django_operators = []
         self.django_operators.append("isnull")
@@ -45,6 +47,9 @@ class DjangoSingleSymbolEvaluator(SingleSymbolEvaluator):
         self.errors.append("Cannot evaluate symbol:{}".format(symbol))
 
     def evaluate_simple_symbol(self, symbol):
+        if self.search_index:
+            return self.search_index.get_condition(symbol)
+
         result = None
         for item in self.default_search_symbols:
             input_map = {item: symbol}
@@ -118,6 +123,9 @@ class DjangoSingleSymbolEvaluator(SingleSymbolEvaluator):
     def set_default_search_symbols(self, symbols):
         self.default_search_symbols = symbols
 
+    def set_search_index(self, search_index):
+        self.search_index = search_index
+
 
 class BaseQueryFilter(object):
     def __init__(self, args, page_limit=False, user=None, init_objects=None):
@@ -216,6 +224,7 @@ class BaseQueryFilter(object):
         translate_names = self.get_translateable_fields()
         query_filter.set_translation_mapping(translate_names)
         query_filter.set_default_search_symbols(self.get_default_omni_search_fields())
+        query_filter.set_search_index(self.get_search_index())
 
         conditions = query_filter.get_conditions()
 
@@ -238,6 +247,12 @@ class BaseQueryFilter(object):
         """
         return []
 
+    def get_search_index(self):
+        """
+        Full text search index used instead of default omni search fields, if any
+        """
+        return None
+
     def get_args_filter_query(self):
         """
         returns condition for GET arguments, that should be used to create Q() filter
@@ -385,6 +400,10 @@ class EntryFilter(BaseQueryFilter):
             "tags__tag__icontains",
         ]
 
+    def get_search_index(self):
+        if not self.use_archive_source and EntriesSearchIndex.is_enabled():
+            return EntriesSearchIndex
+
     def set_time_limit(self, time_limit):
         self.time_limit = time_limit
 
@@ -411,11 +430,19 @@ class OmniSearchWithDefault(OmniSearch):
         super().__init__(search_query, evaluator)
 
         self.default_search_symbols = []
+        self.search_index = None
 
     def set_default_search_symbols(self, symbols):
         self.default_search_symbols = symbols
         self.symbol_evaluator.default_search_symbols = symbols
 
+    def set_search_index(self, search_index):
+        """
+        Simple symbols are searched using full text index
+        """
+        self.search_index = search_index
+        self.symbol_evaluator.set_search_index(search_index)
+
     def get_combined_query(self):
         """
         To speed things up, if query does not have any operator, use default scheme for searching
@@ -438,6 +465,9 @@ class OmniSearchWithDefault(OmniSearch):
         if not symbol or symbol == "":
             return Q()
 
+        if self.search_index:
+            return self.search_index.get_condition(symbol)
+
         result = None
         for item in self.default_search_symbols:
             input_map = {item: symbol}
@@ -468,6 +498,9 @@ class DjangoEquationProcessor:
     def set_translation_mapping(self, name_mapping):
         self.parser.set_translation_mapping(name_mapping)
 
+    def set_search_index(self, search_index):
+        self.parser.set_search_index(search_index)
+
     def get_conditions(self):
         if not self.parser.search_query:
             return Q()
@@ -502,6 +535,9 @@ class OmniSearchFilter(BaseQueryFilter):
     def set_translation_mapping(self, name_mapping):
         self.parser.set_translation_mapping(name_mapping)
 
+    def set_search_index(self, search_index):
+        self.parser.set_search_index(search_index)
+
     def get_conditions(self):
         if self.combined_query:
             return self.combined_query
@@ -2,7 +2,7 @@
 Data serializers. Mostly for Export / import
 """
 
-from .entriesexporter import MainExporter, entry_to_json, entry_parameters_json
+from .entriesexporter import MainExporter, entry_to_json, entries_to_json, entry_parameters_json
 from .entrydailydataexpoter import EntryDailyDataMainExporter
 from .entryyeardataexporter import EntryYearDataMainExporter
 from .entrynotimedataexporter import EntryNoTimeDataMainExporter
@@ -1,18 +1,17 @@
 import logging
 from string import Template
 
-from django.db.models import Q
+from django.db.models import Q, prefetch_related_objects
 from django.forms.models import model_to_dict
 
 from webtoolkit import json_encode_field, status_code_to_text
 
 from utils.serializers.converters import (
-    ModelCollectionConverter,
     JsonConverter,
+    CsvConverter,
     MarkDownConverter,
     MarkDownSourceConverter,
     RssConverter,
-    MarkDownDynamicConverter,
 )
 from utils.serializers import (
     HtmlExporter,
@@ -21,9 +20,12 @@ from utils.serializers import (
 from ..controllers import SourceDataController, LinkDataController
 from rsshistory.models import (
    SocialData,
-   UserTags,
    UserBookmarks,
    UserEntryVisitHistory,
+   UserTags,
+   UserComments,
+   UserVotes,
+   ReadLater,
 )
 
 
@@ -40,6 +42,8 @@ class EntriesExporter(object):
      - if format is SQLite, we would insert there only
     """
 
+    CHUNK_SIZE = 1000
+
     def __init__(self, data_writer_config, entries):
         self._entries = entries
         self.data_writer_config = data_writer_config
@@ -62,37 +66,39 @@ class EntriesExporter(object):
         export_path=None,
         with_description=True,
     ):
-        if self._entries.count() == 0:
+        if not self._entries.exists():
             return
 
         if not export_path.exists():
             export_path.mkdir(parents=True, exist_ok=True)
 
-        cc = ModelCollectionConverter(self._entries)
-        items = cc.get_map_full()
-
-        export_config = self.data_writer_config.export_config
-
-        self.add_all(items, export_path, export_file_name, source_url)
-
-    def add_all(self, items, export_path, export_file_name, source_url=None):
+        self.add_all(export_path, export_file_name, source_url)
 
+    def add_all(self, export_path, export_file_name, source_url=None):
+        """
+        Files are written item by item. Each format reads entries again,
+        in chunks, therefore memory does not depend on number of entries
+        """
         export_config = self.data_writer_config.export_config
         if export_config.format_json:
-            json_text = self.items2jsontext(items)
             file_name = export_path / (export_file_name + "_entries.json")
-            file_name.write_text(json_text)
+            with open(file_name, "w", encoding="utf-8") as file:
+                self.items2json(self.get_items(), file)
 
         if export_config.format_md:
-            md_text = self.items2mdtext(items=items, source_url=source_url)
             file_name = export_path / (export_file_name + "_entries.md")
-            file_name.write_text(md_text)
+            with open(file_name, "w", encoding="utf-8") as file:
+                self.items2md(self.get_items(), file, source_url=source_url)
 
         if export_config.format_rss:
-            rss_text = self.items2rsstext(items)
-
             file_name = export_path / (export_file_name + "_entries.rss")
-            file_name.write_text(rss_text)
+            with open(file_name, "w", encoding="utf-8") as file:
+                self.items2rss(self.get_items(), file, rss_file_name=str(file_name))
+
+        if export_config.format_csv:
+            file_name = export_path / (export_file_name + "_entries.csv")
+            with open(file_name, "w", encoding="utf-8", newline="") as file:
+                self.items2csv(self.get_items(), file)
 
         if export_config.format_html:
             p = export_path / "html"
@@ -102,43 +108,178 @@ class EntriesExporter(object):
             e.write()
 
         if export_config.output_sqlite:
-            self.items2sqlite(items, export_path, export_file_name)
+            file_name = export_path / (export_file_name + "_entries.db")
+            self.items2sqlite(self._entries, file_name)
+
+    def get_items(self):
+        """
+        Yields maps, as entry.get_map_full.
+
+        Entries are read with values(), in chunks. Tags, and comments are read
+        once for each chunk
+        """
+        names = LinkDataController.get_export_names()
+        rows = self._entries.values(*names, "source_id").iterator(
+            chunk_size=EntriesExporter.CHUNK_SIZE
+        )
+
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+
+            if len(chunk) >= EntriesExporter.CHUNK_SIZE:
+                yield from self.get_chunk_items(chunk)
+                chunk = []
+
+        yield from self.get_chunk_items(chunk)
+
+    def get_chunk_items(self, rows):
+        entry_ids = [row["id"] for row in rows]
+        if not entry_ids:
+            return
+
+        tags = {}
+        user_tags = (
+            UserTags.objects.filter(entry_id__in=entry_ids)
+            .order_by("tag")
+            .values_list("entry_id", "tag")
+        )
+        for entry_id, tag in user_tags:
+            tags.setdefault(entry_id, []).append(tag)
+
+        comments = {}
+        user_comments = UserComments.objects.filter(
+            entry_id__in=entry_ids
+        ).select_related("user")
+        for comment in user_comments:
+            comments.setdefault(comment.entry_id, []).append(
+                {
+                    "comment": comment.comment,
+                    "user_name": comment.user.username,
+                    "user_id": comment.user.id,
+                    "entry_id": comment.entry_id,
+                    "date_published": comment.date_published.isoformat(),
+                    "date_edited": comment.date_published.isoformat(),
+                    "reply_id": comment.reply_id,
+                }
+            )
 
-    def items2jsontext(self, items):
+        for row in rows:
+            source_id = row.pop("source_id")
+
+            for name, value in row.items():
+                if name.find("date_") >= 0 and value:
+                    row[name] = value.isoformat()
+
+            row["tags"] = tags.get(row["id"], [])
+            row["vote"] = max(row["page_rating_votes"], 0)
+            row["comments"] = comments.get(row["id"], [])
+
+            if source_id:
+                row["source__id"] = source_id
+
+            yield row
+
+    def items2json(self, items, file):
         js_converter = JsonConverter(items)
         js_converter.set_export_columns(LinkDataController.get_all_export_names())
-        return js_converter.export()
-
-    def items2mdtext(self, items, source_url=None):
-        md = MarkDownConverter(items, self.md_template_link)
-        md_text = md.export()
+        js_converter.write(file)
 
+    def items2md(self, items, file, source_url=None):
         if source_url:
             sources = SourceDataController.objects.filter(url=source_url)
             if sources.exists():
                 msc = MarkDownSourceConverter(sources[0], self.source_template)
-                msc_text = msc.export()
-                md_text = msc_text + "\n\n" + md_text
+                file.write(msc.export() + "\n\n")
+
+        md = MarkDownConverter(items, self.md_template_link)
+        md.write(file)
 
-        return md_text
+    def items2rss(self, items, file, rss_file_name=None):
+        # items are written between the start, and the end of the wrapper
+        wrapper = self.use_rss_wrapper("$channel_text", rss_file_name=rss_file_name)
+        start, _, end = wrapper.partition("$channel_text")
 
-    def items2rsstext(self, items):
+        file.write(start)
         rss_conv = RssConverter(items)
-        rss_text = rss_conv.export()
+        rss_conv.write(file)
+        file.write(end)
+
+    def items2csv(self, items, file):
+        csv_converter = CsvConverter(items)
+        csv_converter.set_export_columns(LinkDataController.get_export_names())
+        csv_converter.write(file)
+
+    def items2sqlite(self, entries, file_name):
+        """
+        Writes snapshot of entries, their sources, and user data.
+        File is always written from scratch
+        """
+        from utils import sqlmodel
+
+        if file_name.exists():
+            file_name.unlink()
 
-        return self.use_rss_wrapper(rss_text, rss_file_name=str(file_name))
+        entry_ids = entries.values("id")
+        sources = SourceDataController.objects.filter(
+            id__in=entries.values("source_id")
+        )
 
-    def items2sqlite(self, items, export_path, export_file_name):
-        from utils.sqlmodel import SqlModel
-        from utils.controllers import EntryDataBuilder
+        user_columns = {"entry_object": "entry_id", "user_object": "user_id"}
 
-        connection = SqlModel(export_path / export_file_name)
-        builder = EntryDataBuilder(connection)
-        for item in items:
-            builder.build(link_data=item)
+        with sqlmodel.SqlBulkWriter(file_name) as writer:
+            writer.insert(
+                sqlmodel.EntriesTable,
+                self.get_sqlite_rows(entries, sqlmodel.EntriesTable),
+            )
+            writer.insert(
+                sqlmodel.SourcesTable,
+                self.get_sqlite_rows(sources, sqlmodel.SourcesTable),
+            )
+            writer.insert(
+                sqlmodel.UserTags,
+                self.get_sqlite_rows(
+                    UserTags.objects.filter(entry_id__in=entry_ids),
+                    sqlmodel.UserTags,
+                    user_columns,
+                ),
+            )
+            writer.insert(
+                sqlmodel.UserBookmarks,
+                self.get_sqlite_rows(
+                    UserBookmarks.objects.filter(entry_id__in=entry_ids),
+                    sqlmodel.UserBookmarks,
+                    user_columns,
+                ),
+            )
+            writer.insert(
+                sqlmodel.UserVotes,
+                self.get_sqlite_rows(
+                    UserVotes.objects.filter(entry_id__in=entry_ids),
+                    sqlmodel.UserVotes,
+                    {**user_columns, "user": "username"},
+                ),
+            )
+
+    def get_sqlite_rows(self, queryset, table, renamed=None):
+        """
+        Yields rows for the SQLite table. Values are read directly from DB.
+
+        @param renamed map of SQLite column name to django field name
+        """
+        renamed = renamed or {}
+
+        columns = [column.name for column in table.__table__.columns]
+        fields = [renamed.get(column, column) for column in columns]
+
+        rows = queryset.values_list(*fields).iterator(
+            chunk_size=EntriesExporter.CHUNK_SIZE
+        )
+        for row in rows:
+            yield dict(zip(columns, row))
 
     def export_all_entries(self, with_description=True):
-        if self._entries.count() == 0:
+        if not self._entries.exists():
             return
 
         entries_dir = self._cfg.get_export_path() / self._cfg.get_date_file_name()
@@ -147,27 +288,21 @@ class EntriesExporter(object):
         if not export_path.exists():
             export_path.mkdir()
 
-        cc = ModelCollectionConverter(self._entries)
-        items = cc.get_map_full()
-
         export_config = self.data_writer_config.export_config
         if export_config.format_json:
-            self.items2jsontext(items)
-
             file_name = export_path / ("all_entries.json")
-            file_name.write_text(js_converter.export())
+            with open(file_name, "w", encoding="utf-8") as file:
+                self.items2json(self.get_items(), file)
 
         if export_config.format_md:
-            self.items2mdtext(items)
-
             file_name = export_path / ("all_entries.md")
-            file_name.write_bytes(md_text.encode("utf-8", "ingnore"))
+            with open(file_name, "w", encoding="utf-8", errors="ignore") as file:
+                self.items2md(self.get_items(), file)
 
         if export_config.format_rss:
-            rss_text = self.items2rsstext(items)
-
             file_name = export_path / ("all_entries.rss")
-            file_name.write_text(rss_text)
+            with open(file_name, "w", encoding="utf-8") as file:
+                self.items2rss(self.get_items(), file, rss_file_name=str(file_name))
 
     def use_rss_wrapper(self, text, language="en", rss_file_name=None):
         template = self.get_rss_template()
@@ -270,7 +405,96 @@ class MainExporter(object):
         return entries.order_by(*self.get_order_columns())
 
 
-def entry_to_json(user_config, entry, with_tags=False, with_social=False, with_visits=False):
+class EntriesRelatedData(object):
+    """
+    Data related to entries, read for all entries at once.
+
+    Serializing a page of entries one by one would require a few queries for each entry.
+    """
+
+    def __init__(self, user, entries, with_social=False, with_visits=False):
+        self.entry_ids = [entry.id for entry in entries]
+
+        prefetch_related_objects(entries, "source", "last_browser", "tags")
+
+        self.bookmarked = set(
+            UserBookmarks.objects.filter(
+                user=user, entry_id__in=self.entry_ids
+            ).values_list("entry_id", flat=True)
+        )
+
+        self.social = None
+        if with_social:
+            self.social = {}
+            for social in SocialData.objects.filter(entry_id__in=self.entry_ids):
+                self.social[social.entry_id] = social
+
+        self.visits = None
+        if with_visits:
+            self.visits = {}
+            visits = UserEntryVisitHistory.objects.filter(
+                user=user, entry_id__in=self.entry_ids
+            )
+            for visit in visits:
+                self.visits.setdefault(visit.entry_id, visit)
+
+    def is_bookmarked(self, entry):
+        return entry.id in self.bookmarked
+
+    def get_social(self, entry):
+        return self.social.get(entry.id)
+
+    def get_visit(self, entry):
+        return self.visits.get(entry.id)
+
+    def get_user_marks(self, user):
+        """
+        @returns sets of entry ids, which are in read later, and which were visited by user
+        """
+        read_later = set(
+            ReadLater.objects.filter(
+                user=user, entry_id__in=self.entry_ids
+            ).values_list("entry_id", flat=True)
+        )
+        visited = set(
+            UserEntryVisitHistory.objects.filter(
+                user=user, entry_id__in=self.entry_ids
+            ).values_list("entry_id", flat=True)
+        )
+        return read_later, visited
+
+
+def entries_to_json(user_config, entries, with_tags=False, with_social=False, with_visits=False):
+    """
+    Serializes many entries, with constant number of queries.
+
+    @returns list of json entries, and related data
+    """
+    entries = list(entries)
+    related = EntriesRelatedData(
+        user_config.user, entries, with_social=with_social, with_visits=with_visits
+    )
+
+    json_entries = []
+    for entry in entries:
+        json_entries.append(
+            entry_to_json(
+                user_config,
+                entry,
+                with_tags=with_tags,
+                with_social=with_social,
+                with_visits=with_visits,
+                related=related,
+            )
+        )
+
+    return json_entries, related
+
+
+def entry_to_json(user_config, entry, with_tags=False, with_social=False, with_visits=False, related=None):
+    """
+    @param related EntriesRelatedData, if data were already read for many entries
+    """
     json_entry = {}
     json_entry["id"] = entry.id
 
@@ -355,28 +579,33 @@ def entry_to_json(user_config, entry, with_tags=False, with_social=False, with_v
                 tags.add(tag.tag)
 
         json_entry["tags"] = list(tags)
-
-        user_tags = set()
-        user_tags_objects = UserTags.objects.filter(user = user_config.user, entry=entry)
-        for tag in user_tags_objects:
-           user_tags.add(tag.tag)
-
         json_entry["user_tags"] = list(tags)
 
-    bookmarks = UserBookmarks.objects.filter(user=user_config.user, entry=entry)
-    json_entry["user_bookmarked"] = bookmarks.count() > 0
+    if related:
+        json_entry["user_bookmarked"] = related.is_bookmarked(entry)
+    else:
+        bookmarks = UserBookmarks.objects.filter(user=user_config.user, entry=entry)
+        json_entry["user_bookmarked"] = bookmarks.count() > 0
 
     if with_social:
-        social = SocialData.get_from_model(entry)
+        if related:
+            social = related.get_social(entry)
+        else:
+            social = SocialData.get_from_model(entry)
         if social:
             social_dict = model_to_dict(social)
             for key, value in social_dict.items():
                 json_entry.setdefault(key, value)
 
     if with_visits:
-        visits = UserEntryVisitHistory.objects.filter(user=user_config.user, entry=entry)
-        if visits.exists():
-            visit = visits[0]
+        if related:
+            visit = related.get_visit(entry)
+        else:
+            visit = UserEntryVisitHistory.objects.filter(
+                user=user_config.user, entry=entry
+            ).first()
+
+        if visit:
             json_entry["number_of_visits"] = visit.visits
             json_entry["date_last_visit"] = visit.date_last_visit
         else:
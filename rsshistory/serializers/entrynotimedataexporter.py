@@ -16,12 +16,10 @@ class EntryNoTimeDataExporter(EntriesExporter):
     def __init__(self, data_writer_config, entries):
         super().__init__(data_writer_config, entries)
 
-    def items2mdtext(self, items, source_url=None):
+    def items2md(self, items, file, source_url=None):
         column_order = ["title", "link", "date_published", "tags", "date_dead_since"]
         md = MarkDownDynamicConverter(items, column_order)
-        md_text = md.export()
-
-        return md_text
+        md.write(file)
 
 
 class EntryNoTimeDataMainExporter(MainExporter):
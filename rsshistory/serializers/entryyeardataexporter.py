@@ -23,12 +23,10 @@ class EntryYearDataExporter(EntriesExporter):
     def __init__(self, data_writer_config, entries):
         super().__init__(data_writer_config, entries)
 
-    def items2mdtext(self, items, source_url=None):
+    def items2md(self, items, file, source_url=None):
         column_order = ["title", "link", "date_published", "tags", "date_dead_since"]
         md = MarkDownDynamicConverter(items, column_order)
-        md_text = md.export()
-
-        return md_text
+        md.write(file)
 
 
 class EntryYearDataMainExporter(MainExporter):
@@ -39,10 +37,13 @@ class EntryYearDataMainExporter(MainExporter):
         """
         We export from oldest entries
         """
-        entries = LinkDataController.objects.all().order_by("date_published")
+        entry = (
+            LinkDataController.objects.filter(date_published__isnull=False)
+            .order_by("date_published")
+            .first()
+        )
 
-        if len(entries) > 0:
-            entry = entries[0]
+        if entry:
             if entry.date_published:
                 str_date = entry.date_published.strftime("%Y")
                 try:
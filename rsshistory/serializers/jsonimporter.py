@@ -1,28 +1,53 @@
 import os
 import json
+import itertools
 import traceback
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from urllib.parse import urlparse, parse_qs, urlencode, urlunparse
 
 from django.contrib.auth.models import User
+from django.db import transaction
 
 from utils.dateutils import DateUtils
-
-from ..models import AppLogging, UserBookmarks, UserTags, UserVotes
+from utils.serializers import JsonStreamReader, read_json_file
+
+from ..models import (
+    AppLogging,
+    UserBookmarks,
+    UserTags,
+    UserVotes,
+    UserComments,
+    UserCompactedTags,
+    EntryCompactedTags,
+)
 
 from ..controllers import (
     LinkDataController,
     EntryDataBuilder,
+    EntryDataBatchBuilder,
     SourceDataBuilder,
     SourceDataController,
     SourceDataController,
     UserCommentsController,
+    BackgroundJobController,
     EntryWrapper,
 )
 from ..apps import LinkDatabase
 
 
 class MapImporter(object):
+    """
+    Imports maps of entries, and sources.
+
+    Links are imported in batches. Each batch needs a few queries,
+    not a few queries per link.
+    """
+
+    BATCH_SIZE = 500
+
     def __init__(self, entry_builder, source_builder, user=None, import_settings=None):
         self.user = user
         self.entry_builder = entry_builder
@@ -91,14 +116,25 @@ class MapImporter(object):
     def import_from_links(self, json_data):
         LinkDatabase.info("Import from links")
 
+        for index in range(0, len(json_data), MapImporter.BATCH_SIZE):
+            batch = json_data[index : index + MapImporter.BATCH_SIZE]
+
+            try:
+                with transaction.atomic():
+                    self.import_links_batch(batch)
+            except Exception as E:
+                AppLogging.exc(E, "Cannot import links in batch, importing one by one")
+                self.import_links_one_by_one(batch)
+
+        return True
+
+    def import_links_one_by_one(self, json_data):
         for link_data in json_data:
             try:
                 self.import_from_link(link_data)
             except Exception as E:
                 AppLogging.exc(E, "Cannot import link data {}".format(link_data))
 
-        return True
-
     def import_from_sources(self, json_data):
         LinkDatabase.info("Import from sources")
 
@@ -111,6 +147,10 @@ class MapImporter(object):
         return True
 
     def copy_props(self, entry, clean_data):
+        self.set_props(entry, clean_data)
+        entry.save()
+
+    def set_props(self, entry, clean_data):
         if self.is_import("import_bookmarks"):
             if "bookmarked" in clean_data:
                 entry.bookmarked = clean_data["bookmarked"]
@@ -124,7 +164,230 @@ class MapImporter(object):
                 entry.description = clean_data["description"]
         if "date_published" in clean_data:
             entry.date_published = clean_data["date_published"]
-        entry.save()
+
+    def import_links_batch(self, links_data):
+        """
+        Imports links, and user data of links.
+        Existing entries are found for the whole batch, new entries are inserted in bulk
+        """
+        items = []
+        for json_data in links_data:
+            clean_data = self.get_clean_entry_data(json_data)
+            items.append((json_data, clean_data))
+
+        builder = EntryDataBatchBuilder(
+            source_is_auto=True, strict_ids=self.is_import("import_ids")
+        )
+        entries = builder.build_map(
+            [dict(clean_data) for json_data, clean_data in items],
+            add_new=self.is_import("import_entries"),
+        )
+        new_entries = set(id(entry) for entry in builder.new_entries)
+
+        imported = []
+        changed = []
+
+        for json_data, clean_data in items:
+            entry = entries.get(clean_data["link"])
+            if not entry:
+                if self.is_import("import_entries"):
+                    AppLogging.error("Cannot build entry {}".format(clean_data["link"]))
+                continue
+
+            is_new = id(entry) in new_entries
+
+            if entry.is_archive_entry():
+                entry = EntryWrapper.move_from_archive(entry)
+                if not entry:
+                    continue
+                is_new = False
+
+            if not is_new:
+                self.set_props(entry, clean_data)
+                if entry.prepare_for_save():
+                    changed.append(entry)
+
+            imported.append((json_data, entry))
+
+        LinkDataController.objects.bulk_update(
+            changed,
+            ["bookmarked", "permanent", "title", "description", "date_published"],
+        )
+
+        if self.is_import("import_bookmarks"):
+            self.import_bookmarks(imported)
+
+        if self.is_import("import_tags"):
+            self.import_tags(imported)
+
+        if self.is_import("import_votes"):
+            self.import_votes(imported)
+
+        if self.is_import("import_comments"):
+            self.import_comments(imported)
+
+    def import_bookmarks(self, imported):
+        bookmarked = {}
+        not_bookmarked = {}
+        for json_data, entry in imported:
+            if entry.bookmarked:
+                bookmarked[entry.id] = entry
+            else:
+                not_bookmarked[entry.id] = entry
+
+        UserBookmarks.objects.filter(entry_id__in=not_bookmarked.keys()).delete()
+
+        if not self.is_user_authenticated(self.user):
+            return
+
+        existing = set(
+            UserBookmarks.objects.filter(
+                user=self.user, entry_id__in=bookmarked.keys()
+            ).values_list("entry_id", flat=True)
+        )
+
+        UserBookmarks.objects.bulk_create(
+            [
+                UserBookmarks(user=self.user, entry=entry)
+                for entry_id, entry in bookmarked.items()
+                if entry_id not in existing
+            ]
+        )
+
+    def import_tags(self, imported):
+        if not self.user:
+            return
+
+        tags = {}
+        for json_data, entry in imported:
+            entry_tags = json_data.get("tags")
+            if not entry_tags:
+                continue
+
+            if not entry.is_taggable():
+                AppLogging.error(
+                    "Tried to tag not taggable entry! ID:{}".format(entry.id)
+                )
+                continue
+
+            tags.setdefault(entry.id, (entry, set()))[1].update(entry_tags)
+
+        existing = set(
+            UserTags.objects.filter(
+                user=self.user, entry_id__in=tags.keys()
+            ).values_list("entry_id", "tag")
+        )
+
+        new_tags = []
+        for entry_id, (entry, tag_names) in tags.items():
+            for tag_name in sorted(tag_names):
+                if (entry_id, tag_name) not in existing:
+                    new_tags.append(UserTags(entry=entry, user=self.user, tag=tag_name))
+
+        UserTags.objects.bulk_create(new_tags)
+
+        # compacted tags are not updated by bulk operations
+        for tag_name in set(tag.tag for tag in new_tags):
+            UserCompactedTags.compact(self.user, tag_name)
+
+        EntryCompactedTags.compact_entries(set(tag.entry_id for tag in new_tags))
+
+    def import_votes(self, imported):
+        if not self.is_user_authenticated(self.user):
+            return
+
+        votes = {}
+        for json_data, entry in imported:
+            if json_data.get("vote") is not None:
+                votes[entry.id] = (entry, json_data["vote"])
+
+        existing = {}
+        user_votes = UserVotes.objects.filter(user=self.user, entry_id__in=votes.keys())
+        for user_vote in user_votes:
+            existing.setdefault(user_vote.entry_id, []).append(user_vote)
+
+        removed = []
+        updated = []
+        added = []
+        changed = []
+
+        # the same rules as in UserVotes.add
+        for entry_id, (entry, vote) in votes.items():
+            entry_votes = existing.get(entry_id, [])
+
+            if vote != 0 and len(entry_votes) == 1:
+                if entry_votes[0].vote != vote:
+                    entry_votes[0].vote = vote
+                    updated.append(entry_votes[0])
+                    changed.append(entry)
+                continue
+
+            if vote == 0 and not entry_votes:
+                continue
+
+            removed.extend(user_vote.id for user_vote in entry_votes)
+            if vote != 0:
+                added.append(UserVotes(vote=vote, entry=entry, user=self.user))
+            changed.append(entry)
+
+        UserVotes.objects.filter(id__in=removed).delete()
+        UserVotes.objects.bulk_update(updated, ["vote"])
+        UserVotes.objects.bulk_create(added)
+
+        # rating needs to be calculated again only if votes changed
+        for entry in changed:
+            BackgroundJobController.entry_reset_local_data(entry)
+
+    def import_comments(self, imported):
+        users = {}
+        comments = []
+
+        for json_data, entry in imported:
+            for comment in json_data.get("comments") or []:
+                # exports write user name as user_name
+                user_name = comment.get("user", comment.get("user_name"))
+                if user_name not in users:
+                    users[user_name] = self.get_user(user_name)
+
+                user = users[user_name]
+                if not self.is_user_authenticated(user):
+                    continue
+
+                comments.append((entry, user, comment))
+
+        existing = set(
+            UserComments.objects.filter(
+                entry_id__in=[entry.id for entry, user, comment in comments]
+            ).values_list("entry_id", "user_id", "comment")
+        )
+
+        new_comments = []
+        for entry, user, comment in comments:
+            key = (entry.id, user.id, comment["comment"])
+            if key in existing:
+                continue
+            existing.add(key)
+
+            date_edited = comment.get("date_edited")
+            if date_edited:
+                date_edited = DateUtils.parse_datetime(date_edited)
+            else:
+                date_edited = DateUtils.get_datetime_now_utc()
+
+            new_comments.append(
+                UserComments(
+                    comment=comment["comment"],
+                    date_edited=date_edited,
+                    reply_id=comment.get("reply_id"),
+                    entry=entry,
+                    user=user,
+                )
+            )
+
+        UserComments.objects.bulk_create(new_comments)
+
+    def is_user_authenticated(self, user):
+        return user is not None and user.is_authenticated
 
     def import_from_link(self, json_data):
         """
@@ -295,56 +558,176 @@ def get_list_files(directory):
     return file_list
 
 
-def read_file_contents(file_path):
+class JsonImporter(object):
     """
-    TODO use pathlib?
+    Imports JSON files.
+
+    Files are parsed by worker processes, and imported by this process,
+    one after another. Progress is stored in the job, so the job that was
+    interrupted continues where it ended.
     """
-    with open(file_path, "r") as f:
-        return f.read()
 
+    MAX_WORKERS = 4
 
-class JsonImporter(object):
-    def __init__(self, path=None, user=None, import_settings=None):
+    def __init__(self, path=None, user=None, import_settings=None, job=None):
         AppLogging.info("Importing from a file")
 
         self.path = path
         self.user = user
         self.import_settings = import_settings
+        self.job = job
 
-        if self.path is None:
-            Logger.error("Directory was not specified")
-            return
+        self.progress = None
+        if self.import_settings and "progress" in self.import_settings:
+            self.progress = self.import_settings["progress"]
 
     def import_all(self):
         if self.path is None:
-            Logger.error("Directory was not specified")
+            AppLogging.error("Directory was not specified")
             return
 
         path = Path(self.path)
         if path.is_file():
-            self.import_from_file(self.path)
+            self.import_from_files([str(path)])
         elif path.is_dir():
             self.import_from_path(self.path)
 
     def import_from_path(self, path):
         files = get_list_files(path)
-        for afile in files:
-            if afile.endswith(".json"):
-                self.import_from_file(afile)
+        self.import_from_files([afile for afile in files if afile.endswith(".json")])
 
     def import_from_file(self, afile):
-        contents = read_file_contents(afile)
-        if contents:
-            data = json.loads(contents)
+        reader = JsonStreamReader(afile)
+        return self.import_items(afile, reader.is_list(), reader.read())
 
-            entry_builder = EntryDataBuilder()
-            source_builder = SourceDataBuilder()
+    def import_from_files(self, files):
+        """
+        Files are imported in sorted order, files imported before are skipped
+        """
+        files = [afile for afile in sorted(files) if not self.is_file_imported(afile)]
 
-            return MapImporter(
-                user=self.user,
-                entry_builder=entry_builder,
-                source_builder=source_builder,
-                import_settings=self.import_settings,
-            ).import_from_data(data)
+        for afile, is_list, items in self.read_files(files):
+            self.import_items(afile, is_list, items)
 
-        return False
+    def read_files(self, files):
+        """
+        Yields file name, top level list flag, and items, in order of files.
+
+        Worker processes parse next files, while items of the current file are imported.
+        """
+        workers = min(self.get_number_of_workers(), len(files))
+        if workers < 2:
+            for afile in files:
+                reader = JsonStreamReader(afile)
+                yield afile, reader.is_list(), reader.read()
+            return
+
+        # fork is not safe in a process with threads, and database connections
+        context = multiprocessing.get_context("spawn")
+
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+            files = iter(files)
+            futures = deque()
+
+            # only a few files are parsed ahead, not to use too much memory
+            for afile in itertools.islice(files, 2 * workers):
+                futures.append((afile, executor.submit(read_json_file, afile)))
+
+            while futures:
+                afile, future = futures.popleft()
+
+                next_file = next(files, None)
+                if next_file:
+                    futures.append(
+                        (next_file, executor.submit(read_json_file, next_file))
+                    )
+
+                try:
+                    is_list, items = future.result()
+                except Exception as E:
+                    AppLogging.exc(E, "Cannot read file {}".format(afile))
+                    continue
+
+                yield afile, is_list, items
+
+    def get_number_of_workers(self):
+        if self.import_settings and "workers" in self.import_settings:
+            return int(self.import_settings["workers"])
+
+        return min(os.cpu_count() or 1, JsonImporter.MAX_WORKERS)
+
+    def import_items(self, afile, is_list, items):
+        importer = MapImporter(
+            user=self.user,
+            entry_builder=EntryDataBuilder(),
+            source_builder=SourceDataBuilder(),
+            import_settings=self.import_settings,
+        )
+
+        if not is_list:
+            for data in items:
+                importer.import_from_data(data)
+
+            self.set_progress(afile, None)
+            return True
+
+        skip = self.get_imported_items(afile)
+        index = 0
+
+        items = iter(items)
+        while True:
+            batch = list(itertools.islice(items, MapImporter.BATCH_SIZE))
+            if not batch:
+                break
+
+            start = index
+            index += len(batch)
+            if index <= skip:
+                continue
+
+            if start < skip:
+                batch = batch[skip - start :]
+
+            importer.import_from_list(batch)
+            self.set_progress(afile, index)
+
+        self.set_progress(afile, None)
+        return True
+
+    def is_file_imported(self, afile):
+        """
+        Files are imported in sorted order. Files before the file in progress are imported
+        """
+        if not self.progress:
+            return False
+
+        if afile < self.progress["file"]:
+            return True
+
+        return afile == self.progress["file"] and self.progress["items"] is None
+
+    def get_imported_items(self, afile):
+        if self.progress and self.progress["file"] == afile and self.progress["items"]:
+            return self.progress["items"]
+
+        return 0
+
+    def set_progress(self, afile, items):
+        """
+        @param items number of imported items, None if whole file was imported
+        """
+        self.progress = {"file": afile, "items": items}
+
+        if not self.job:
+            return
+
+        args = {}
+        if self.job.args:
+            try:
+                args = json.loads(self.job.args)
+            except ValueError:
+                pass
+
+        args["progress"] = self.progress
+        self.job.args = json.dumps(args)
+        self.job.save(update_fields=["args"])
@@ -59,13 +59,16 @@ from webtoolkit.tests.fakeresponse import FakeInternetData
 from webtoolkit.tests.mocks import MockRequestCounter
 
 from ..models import (
+    BlockEntry,
     AppLogging,
     ConfigurationEntry,
     Browser,
+    BrowserStatistics,
     EntryRules,
     SearchView,
+    SystemOperation,
 )
-from ..controllers import SystemOperationController
+from ..controllers import SystemOperationController, TableStatistics, SystemIndicators
 from ..configuration import Configuration
 from ..pluginurl import UrlHandler
 
@@ -118,6 +121,22 @@ class FakeInternetTestCase(TestCase):
 
         SystemOperationController.is_crawling_response_ok = self.is_crawling_response_ok
 
+        # database was rolled back after previous test
+        ConfigurationEntry.cache.clear()
+        SystemOperation.cache.clear()
+        TableStatistics.cache.clear()
+        SystemIndicators.cache.clear()
+        BlockEntry.matcher.clear()
+        EntryRules.cache.clear()
+        Browser.cache.clear()
+
+        # browsers are tried in predictable order
+        exploration_rate = BrowserStatistics.EXPLORATION_RATE
+        BrowserStatistics.EXPLORATION_RATE = 0
+        self.addCleanup(
+            setattr, BrowserStatistics, "EXPLORATION_RATE", exploration_rate
+        )
+
         c = Configuration.get_object()
         c.config_entry = ConfigurationEntry.get()
 
@@ -207,6 +226,8 @@ class FakeInternetTestCase(TestCase):
 
     def setup_configuration(self):
         # each suite should start with a default configuration entry
+        ConfigurationEntry.cache.clear()
+
         c = Configuration.get_object()
         c.config_entry = ConfigurationEntry.get()
 
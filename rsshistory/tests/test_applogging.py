@@ -1,8 +1,9 @@
 from pytz import timezone
 from datetime import datetime, date
 import logging
+import threading
 
-from ..models import AppLogging
+from ..models import AppLogging, AppLoggingBuffer
 from ..configuration import Configuration
 
 from .fakeinternet import FakeInternetTestCase
@@ -63,11 +64,109 @@ class AppLoggingTest(FakeInternetTestCase):
         self.assertEqual(AppLogging.objects.all().count(), 1)
 
     def test_message_limit(self):
-        for item in range(1, 2100):
+        for item in range(1, 2200):
             # call tested function
             AppLogging.error("error")
 
-        self.assertEqual(AppLogging.objects.all().count(), 1000 + 98)
+        # overflow is checked periodically
+        count = AppLogging.objects.all().count()
+        self.assertTrue(count >= 1000)
+        self.assertTrue(
+            count <= AppLogging.get_max_log_entries() + AppLoggingBuffer.TRIM_PERIOD
+        )
+
+    def test_buffered(self):
+        AppLogging.objects.all().delete()
+        AppLogging.set_buffered(True)
+
+        try:
+            # call tested function
+            AppLogging.error("error")
+
+            self.assertEqual(AppLogging.objects.all().count(), 0)
+
+            # call tested function
+            AppLogging.flush()
+
+            self.assertEqual(AppLogging.objects.all().count(), 1)
+        finally:
+            AppLogging.set_buffered(False)
+
+    def test_buffered__size(self):
+        AppLogging.objects.all().delete()
+        AppLogging.set_buffered(True)
+
+        try:
+            for item in range(0, AppLoggingBuffer.MAX_SIZE):
+                # call tested function
+                AppLogging.error("error")
+
+            self.assertEqual(
+                AppLogging.objects.all().count(), AppLoggingBuffer.MAX_SIZE
+            )
+        finally:
+            AppLogging.set_buffered(False)
+
+    def test_set_buffered__disable(self):
+        AppLogging.objects.all().delete()
+        AppLogging.set_buffered(True)
+
+        AppLogging.error("error")
+
+        # call tested function
+        AppLogging.set_buffered(False)
+
+        self.assertEqual(AppLogging.objects.all().count(), 1)
+
+    def test_set_buffered__nested(self):
+        AppLogging.objects.all().delete()
+        AppLogging.set_buffered(True)
+        AppLogging.set_buffered(True)
+
+        AppLogging.error("error")
+
+        # call tested function
+        AppLogging.set_buffered(False)
+
+        self.assertEqual(AppLogging.objects.all().count(), 0)
+
+        # call tested function
+        AppLogging.set_buffered(False)
+
+        self.assertEqual(AppLogging.objects.all().count(), 1)
+
+    def test_set_buffered__other_thread(self):
+        AppLogging.set_buffered(True)
+
+        result = {}
+
+        def check():
+            result["enabled"] = AppLogging.buffer.is_enabled()
+            result["records"] = AppLogging.buffer.take()
+
+        try:
+            AppLogging.error("error")
+
+            thread = threading.Thread(target=check)
+            thread.start()
+            thread.join()
+        finally:
+            AppLogging.set_buffered(False)
+
+        self.assertFalse(result["enabled"])
+        self.assertEqual(result["records"], [])
+
+    def test_logging_level(self):
+        AppLogging.objects.all().delete()
+
+        c = Configuration.get_object()
+        c.config_entry.logging_level = AppLogging.ERROR
+        c.config_entry.save()
+
+        # call tested function
+        AppLogging.warning("warning")
+
+        self.assertEqual(AppLogging.objects.all().count(), 0)
 
     def test_cleanup(self):
         AppLogging.objects.create(
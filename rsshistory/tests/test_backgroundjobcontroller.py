@@ -1,3 +1,5 @@
+from django.db.models import Q
+
 from ..controllers import (
     BackgroundJobController,
     LinkDataController,
@@ -78,7 +80,7 @@ class BackgroundJobControllerTest(FakeInternetTestCase):
         # call tested function
         self.assertEqual(
             BackgroundJobController.get_job_priority(BackgroundJob.JOB_LINK_ADD),
-            20,
+            16,
         )
 
     def test_truncate_invalid_jobs(self):
@@ -280,6 +282,82 @@ class BackgroundJobControllerTest(FakeInternetTestCase):
             1,
         )
 
+    def test_link_download_social_data(self):
+        entry = LinkDataController.objects.all()[0]
+
+        BackgroundJobController.link_download_social_data(entry)
+
+        # call tested function
+        job = BackgroundJobController.link_download_social_data(entry)
+
+        self.assertFalse(job)
+        self.assertEqual(
+            BackgroundJobController.get_number_of_jobs(
+                BackgroundJob.JOB_LINK_DOWNLOAD_SOCIAL
+            ),
+            1,
+        )
+
+    def test_link_download_social_data_entries(self):
+        entry = LinkDataController.objects.all()[0]
+        other = LinkDataController.objects.create(
+            link="https://youtube.com?v=67890",
+        )
+
+        BackgroundJobController.link_download_social_data(entry)
+
+        # call tested function
+        jobs = BackgroundJobController.link_download_social_data_entries(
+            [entry, other, other]
+        )
+
+        self.assertEqual(len(jobs), 1)
+        self.assertEqual(jobs[0].subject, str(other.id))
+        self.assertEqual(
+            BackgroundJobController.get_number_of_jobs(
+                BackgroundJob.JOB_LINK_DOWNLOAD_SOCIAL
+            ),
+            2,
+        )
+
+    def test_link_download_social_data_entries__force(self):
+        entry = LinkDataController.objects.all()[0]
+
+        BackgroundJobController.link_download_social_data(entry)
+
+        # call tested function
+        jobs = BackgroundJobController.link_download_social_data_entries(
+            [entry], force=True
+        )
+
+        self.assertEqual(len(jobs), 0)
+
+        job = BackgroundJobController.objects.get(
+            job=BackgroundJob.JOB_LINK_DOWNLOAD_SOCIAL
+        )
+        self.assertEqual(job.subject, str(entry.id))
+        self.assertTrue(job.get_cfg().get("force"))
+
+    def test_link_add_keywords_entries(self):
+        entry = LinkDataController.objects.all()[0]
+        other = LinkDataController.objects.create(
+            link="https://youtube.com?v=67890",
+        )
+
+        BackgroundJobController.link_add_keywords(entry)
+
+        # call tested function
+        jobs = BackgroundJobController.link_add_keywords_entries([entry, other])
+
+        self.assertEqual(len(jobs), 1)
+        self.assertEqual(jobs[0].subject, str(other.id))
+        self.assertEqual(
+            BackgroundJobController.get_number_of_jobs(
+                BackgroundJob.JOB_LINK_ADD_KEYWORDS
+            ),
+            2,
+        )
+
     def test_export_data(self):
         self.assertEqual(
             BackgroundJobController.get_number_of_jobs(BackgroundJob.JOB_EXPORT_DATA),
@@ -428,6 +506,94 @@ class BackgroundJobControllerTest(FakeInternetTestCase):
         # call tested function
         self.assertFalse(BackgroundJobController.is_job_valid(job))
 
+    def test_claim_jobs(self):
+        job1 = BackgroundJobController.objects.create(
+            job=BackgroundJobController.JOB_CLEANUP, subject="1"
+        )
+        job2 = BackgroundJobController.objects.create(
+            job=BackgroundJobController.JOB_CLEANUP, subject="2"
+        )
+        job3 = BackgroundJobController.objects.create(
+            job=BackgroundJobController.JOB_CLEANUP, subject="3"
+        )
+
+        conditions = Q(job=BackgroundJobController.JOB_CLEANUP, task__isnull=True)
+
+        # call tested function
+        claimed = BackgroundJobController.claim_jobs(conditions, task="task1", limit=2)
+
+        self.assertEqual(len(claimed), 2)
+        self.assertEqual(claimed[0], job1)
+        self.assertEqual(claimed[1], job2)
+        self.assertEqual(claimed[0].task, "task1")
+        self.assertTrue(claimed[0].lease_expires)
+
+        # call tested function
+        claimed = BackgroundJobController.claim_jobs(conditions, task="task2", limit=2)
+
+        self.assertEqual(len(claimed), 1)
+        self.assertEqual(claimed[0], job3)
+        self.assertEqual(claimed[0].task, "task2")
+
+        # call tested function
+        claimed = BackgroundJobController.claim_jobs(conditions, task="task3", limit=2)
+
+        self.assertEqual(claimed, [])
+
+    def test_claim_jobs__priority(self):
+        update_job = BackgroundJobController.objects.create(
+            job=BackgroundJobController.JOB_LINK_UPDATE_DATA,
+            priority=BackgroundJobController.get_job_priority(
+                BackgroundJobController.JOB_LINK_UPDATE_DATA
+            ),
+        )
+        add_job = BackgroundJobController.objects.create(
+            job=BackgroundJobController.JOB_LINK_ADD,
+            priority=BackgroundJobController.get_job_priority(
+                BackgroundJobController.JOB_LINK_ADD
+            ),
+        )
+
+        # call tested function
+        claimed = BackgroundJobController.claim_jobs(Q(enabled=True), limit=2)
+
+        self.assertEqual(claimed[0], add_job)
+        self.assertEqual(claimed[1], update_job)
+
+    def test_renew_lease(self):
+        job = BackgroundJobController.objects.create(
+            job=BackgroundJobController.JOB_CLEANUP
+        )
+        claimed = BackgroundJobController.claim_jobs(Q(id=job.id), task="task1")
+        job = claimed[0]
+
+        # call tested function
+        self.assertTrue(job.renew_lease("task1"))
+
+        # call tested function
+        self.assertFalse(job.renew_lease("task2"))
+
+        job.disable()
+
+        # call tested function
+        self.assertFalse(job.renew_lease("task1"))
+
+
+    def test_release_jobs(self):
+        job = BackgroundJobController.objects.create(
+            job=BackgroundJobController.JOB_CLEANUP
+        )
+        claimed = BackgroundJobController.claim_jobs(Q(id=job.id), task="task1")
+
+        # call tested function
+        self.assertEqual(BackgroundJobController.release_jobs(claimed, "task2"), 0)
+
+        # call tested function
+        self.assertEqual(BackgroundJobController.release_jobs(claimed, "task1"), 1)
+
+        job.refresh_from_db()
+        self.assertIsNone(job.task)
+        self.assertIsNone(job.lease_expires)
 
 class BackgroundJobHistoryTest(FakeInternetTestCase):
     def setUp(self):
@@ -1,7 +1,15 @@
 from datetime import timedelta
 from django.contrib.auth.models import User
 
-from ..models import BlockEntry, BlockEntryList, BlockListReader
+from utils.dateutils import DateUtils
+
+from ..models import (
+    BlockEntry,
+    BlockEntryList,
+    BlockListReader,
+    ConfigurationEntry,
+    ConfigurationCache,
+)
 from ..controllers import BackgroundJobController
 from ..configuration import Configuration
 
@@ -81,6 +89,14 @@ class BlockListReaderTest(FakeInternetTestCase):
         items = list(reader.read())
         self.assertEqual(len(items), 4)
 
+    def test_read__no_trailing_new_line(self):
+        contents = "first.com\r\nsecond.com"
+
+        reader = BlockListReader(contents)
+
+        items = list(reader.read())
+        self.assertEqual(items, ["first.com", "second.com"])
+
 
 class BlockEntryListTest(FakeInternetTestCase):
     def setUp(self):
@@ -138,5 +154,89 @@ class BlockEntryListTest(FakeInternetTestCase):
 
         self.assertEqual(test_list.processed, True)
 
+    def test_add_domains(self):
+        first_list = BlockEntryList.objects.create(url="https://first.com/hosts.txt")
+        second_list = BlockEntryList.objects.create(url="https://second.com/hosts.txt")
+
+        first_list.add_domains(["ads.com", "tracker.com", "ads.com"])
+
+        # call tested function
+        second_list.add_domains(["Tracker.com", "malware.com"])
+
+        self.assertEqual(BlockEntry.objects.all().count(), 3)
+        self.assertEqual(first_list.entries.count(), 2)
+        self.assertEqual(second_list.entries.count(), 1)
+
     def tearDown(self):
         BlockEntry.objects.all().delete()
+
+
+class BlockEntryTest(FakeInternetTestCase):
+    def setUp(self):
+        self.disable_web_pages()
+        self.setup_configuration()
+
+        self.block_list = BlockEntryList.objects.create(url="https://hosts.com/hosts.txt")
+        self.block_list.add_domains(["ads.com", "tracker.net"])
+
+    def test_is_blocked(self):
+        # call tested function
+        self.assertTrue(BlockEntry.is_blocked("ads.com"))
+        self.assertTrue(BlockEntry.is_blocked("sub.ads.com"))
+        self.assertTrue(BlockEntry.is_blocked("www.Tracker.NET"))
+
+        self.assertFalse(BlockEntry.is_blocked("com"))
+        self.assertFalse(BlockEntry.is_blocked("myads.com"))
+        self.assertFalse(BlockEntry.is_blocked("ads.com.org"))
+
+    def test_is_blocked__no_queries(self):
+        BlockEntry.is_blocked("ads.com")
+
+        # call tested function
+        with self.assertNumQueries(0):
+            self.assertTrue(BlockEntry.is_blocked("sub.ads.com"))
+
+    def test_is_blocked__list_updated(self):
+        self.assertFalse(BlockEntry.is_blocked("malware.com"))
+
+        self.block_list.add_domains(["malware.com"])
+
+        # call tested function
+        self.assertTrue(BlockEntry.is_blocked("malware.com"))
+
+    def test_is_blocked__entry_edited(self):
+        BlockEntry.is_blocked("ads.com")
+
+        entry = BlockEntry.objects.get(url="ads.com")
+        version = ConfigurationEntry.get_version_from_database()
+
+        entry.url = "ads2.com"
+        entry.save()
+
+        # call tested function
+        self.assertFalse(BlockEntry.is_blocked("ads.com"))
+        self.assertTrue(BlockEntry.is_blocked("ads2.com"))
+
+        self.assertEqual(ConfigurationEntry.get_version_from_database(), version + 1)
+
+    def test_is_blocked__changed_by_other_process(self):
+        BlockEntry.is_blocked("ads.com")
+
+        BlockEntry.objects.filter(url="ads.com").update(url="ads2.com")
+        ConfigurationEntry.update_version()
+
+        ConfigurationEntry.cache.date_checked = (
+            DateUtils.get_datetime_now_utc()
+            - timedelta(seconds=ConfigurationCache.CHECK_PERIOD_S + 1)
+        )
+
+        # call tested function
+        self.assertTrue(BlockEntry.is_blocked("ads2.com"))
+        self.assertFalse(BlockEntry.is_blocked("ads.com"))
+
+    def test_get_entry(self):
+        # call tested function
+        entry = BlockEntry.get_entry("sub.ads.com")
+
+        self.assertEqual(entry.url, "ads.com")
+        self.assertEqual(BlockEntry.get_entry("example.com"), None)
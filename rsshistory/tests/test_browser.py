@@ -1,4 +1,6 @@
-from ..models import Browser
+from django.db import transaction
+
+from ..models import Browser, BrowserStatistics
 
 from ..configuration import Configuration
 
@@ -111,3 +113,201 @@ class BrowserTest(FakeInternetTestCase):
 
         self.assertEqual(first.priority, 1)
         self.assertEqual(second.priority, 0)
+
+    def test_get_browsers__cached(self):
+        Browser.objects.all().delete()
+
+        Browser.objects.create(name="test1")
+        Browser.get_browsers()
+
+        # call tested function
+        with self.assertNumQueries(0):
+            browsers = Browser.get_browsers()
+
+        self.assertEqual(len(browsers), 1)
+        self.assertEqual(browsers[0].name, "test1")
+
+    def test_get_browsers__save(self):
+        Browser.objects.all().delete()
+
+        browser = Browser.objects.create(name="test1")
+        self.assertEqual(len(Browser.get_browsers()), 1)
+
+        browser.enabled = False
+        browser.save()
+
+        # call tested function
+        browsers = Browser.get_browsers()
+
+        self.assertEqual(len(browsers), 0)
+
+    def test_get_browsers__prio_up(self):
+        Browser.objects.all().delete()
+
+        Browser.objects.create(name="test1", priority=0)
+        second = Browser.objects.create(name="test2", priority=1)
+        self.assertEqual(Browser.get_browsers()[0].name, "test1")
+
+        second.prio_up()
+
+        # call tested function
+        browsers = Browser.get_browsers()
+
+        self.assertEqual(browsers[0].name, "test2")
+        self.assertEqual(browsers[1].name, "test1")
+
+    def test_get_request_template(self):
+        browser = Browser(
+            name="test1",
+            user_agent="test-user-agent",
+            request_headers="not json",
+            settings='{"test_setting" : "something"}',
+        )
+
+        # call tested function
+        template = browser.get_request_template()
+
+        self.assertEqual(template["user_agent"], "test-user-agent")
+        self.assertEqual(template["settings"], {"test_setting": "something"})
+        self.assertNotIn("request_headers", template)
+        self.assertNotIn("cookies", template)
+
+
+class BrowserStatisticsTest(FakeInternetTestCase):
+    def setUp(self):
+        self.disable_web_pages()
+
+        Browser.objects.all().delete()
+
+        self.browser1 = Browser.objects.create(name="test1", priority=0)
+        self.browser2 = Browser.objects.create(name="test2", priority=1)
+        self.browser3 = Browser.objects.create(name="test3", priority=2)
+
+    def test_add(self):
+        test_link = "https://rsspage.com/rss.xml"
+
+        BrowserStatistics.add(self.browser1, test_link, True, 10)
+
+        # call tested function
+        statistics = BrowserStatistics.add(self.browser1, test_link, False, 20)
+
+        self.assertEqual(statistics.domain, "rsspage.com")
+        self.assertAlmostEqual(statistics.successes, BrowserStatistics.DECAY)
+        self.assertAlmostEqual(statistics.failures, 1)
+        self.assertGreater(statistics.average_time_s, 10)
+        self.assertLess(statistics.average_time_s, 20)
+        self.assertEqual(BrowserStatistics.objects.count(), 1)
+
+    def test_add_many(self):
+        test_link = "https://rsspage.com/rss.xml"
+
+        # call tested function
+        BrowserStatistics.add_many(
+            test_link,
+            [
+                (self.browser1, False, 10),
+                (self.browser1, True, 20),
+                (self.browser2, True, 5),
+            ],
+        )
+
+        statistics = BrowserStatistics.objects.get(browser=self.browser1)
+        self.assertEqual(statistics.domain, "rsspage.com")
+        self.assertAlmostEqual(statistics.successes, 1)
+        self.assertAlmostEqual(statistics.failures, BrowserStatistics.DECAY)
+        self.assertGreater(statistics.average_time_s, 10)
+        self.assertLess(statistics.average_time_s, 20)
+
+        statistics = BrowserStatistics.objects.get(browser=self.browser2)
+        self.assertAlmostEqual(statistics.successes, 1)
+        self.assertAlmostEqual(statistics.average_time_s, 5)
+
+    def test_add_many__one_query_per_browser(self):
+        test_link = "https://rsspage.com/rss.xml"
+
+        BrowserStatistics.add(self.browser1, test_link, True, 10)
+
+        # call tested function
+        with self.assertNumQueries(1):
+            BrowserStatistics.add_many(
+                test_link, [(self.browser1, False, 10), (self.browser1, True, 10)]
+            )
+
+        statistics = BrowserStatistics.objects.get(browser=self.browser1)
+        decay = BrowserStatistics.DECAY
+        self.assertAlmostEqual(statistics.successes, decay * decay + 1)
+        self.assertAlmostEqual(statistics.failures, decay)
+        self.assertAlmostEqual(statistics.average_time_s, 10)
+
+    def test_add_many__changed_by_other_process(self):
+        test_link = "https://rsspage.com/rss.xml"
+
+        BrowserStatistics.add(self.browser1, test_link, True, 10)
+        stale = BrowserStatistics.objects.get(browser=self.browser1)
+
+        BrowserStatistics.add(self.browser1, test_link, True, 10)
+
+        # call tested function
+        with transaction.atomic():
+            BrowserStatistics.add_many(test_link, [(self.browser1, True, 10)])
+
+        statistics = BrowserStatistics.objects.get(browser=self.browser1)
+        self.assertGreater(statistics.successes, stale.successes * 0.9 + 1)
+        self.assertEqual(BrowserStatistics.objects.count(), 1)
+
+    def test_order__no_statistics(self):
+        browsers = Browser.get_browsers()
+
+        # call tested function
+        result = BrowserStatistics.order(browsers, "https://rsspage.com/rss.xml")
+
+        self.assertEqual(result, browsers)
+
+    def test_order(self):
+        test_link = "https://rsspage.com/rss.xml"
+
+        BrowserStatistics.add(self.browser1, test_link, False, 10)
+        BrowserStatistics.add(self.browser3, test_link, True, 10)
+
+        # call tested function
+        result = BrowserStatistics.order(
+            Browser.get_browsers(), test_link, exploration_rate=0
+        )
+
+        # browser without statistics goes before the failing one
+        self.assertEqual(
+            [browser.name for browser in result], ["test3", "test2", "test1"]
+        )
+
+    def test_order__other_domain(self):
+        BrowserStatistics.add(self.browser3, "https://other.com", True, 10)
+
+        browsers = Browser.get_browsers()
+
+        # call tested function
+        result = BrowserStatistics.order(
+            browsers, "https://rsspage.com/rss.xml", exploration_rate=0
+        )
+
+        self.assertEqual(result, browsers)
+
+    def test_order__exploration(self):
+        test_link = "https://rsspage.com/rss.xml"
+
+        BrowserStatistics.add(self.browser3, test_link, True, 10)
+
+        # call tested function
+        result = BrowserStatistics.order(
+            Browser.get_browsers(), test_link, exploration_rate=1
+        )
+
+        self.assertEqual(len(result), 3)
+        self.assertNotEqual(result[0].name, "test3")
+
+    def test_get_score__latency(self):
+        fast = BrowserStatistics(successes=1, failures=0, average_time_s=1)
+        slow = BrowserStatistics(successes=1, failures=0, average_time_s=30)
+
+        # call tested function
+        self.assertGreater(fast.get_score(), slow.get_score())
+
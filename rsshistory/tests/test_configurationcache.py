@@ -0,0 +1,156 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+
+from utils.dateutils import DateUtils
+
+from ..models import ConfigurationEntry, ConfigurationCache, UserConfig
+from ..configuration import Configuration
+from .fakeinternet import FakeInternetTestCase
+
+
+class ConfigurationCacheTest(FakeInternetTestCase):
+    def setUp(self):
+        self.disable_web_pages()
+
+        self.user = User.objects.create_user(
+            username="testuser",
+            password="testpassword",
+            is_staff=True,
+        )
+        UserConfig.get_or_create(self.user)
+
+    def expire_version_check(self):
+        cache = ConfigurationEntry.cache
+        cache.date_checked = DateUtils.get_datetime_now_utc() - timedelta(
+            seconds=ConfigurationCache.CHECK_PERIOD_S + 1
+        )
+
+    def test_get__cached(self):
+        ConfigurationEntry.get()
+
+        reads_avoided = ConfigurationEntry.cache.get_stats()["reads_avoided"]
+
+        # call tested function
+        with self.assertNumQueries(0):
+            config = ConfigurationEntry.get()
+
+        self.assertTrue(config)
+        self.assertEqual(
+            ConfigurationEntry.cache.get_stats()["reads_avoided"], reads_avoided + 1
+        )
+
+    def test_get__version_check(self):
+        ConfigurationEntry.get()
+        self.expire_version_check()
+
+        # call tested function
+        with self.assertNumQueries(1):
+            ConfigurationEntry.get()
+
+    def test_get__changed_by_other_process(self):
+        config = ConfigurationEntry.get()
+        links_per_page = config.links_per_page
+
+        ConfigurationEntry.objects.update(links_per_page=links_per_page + 1)
+        ConfigurationEntry.update_version()
+
+        # change is not visible before version is checked
+        self.assertEqual(ConfigurationEntry.get().links_per_page, links_per_page)
+
+        self.expire_version_check()
+
+        # call tested function
+        config = ConfigurationEntry.get()
+
+        self.assertEqual(config.links_per_page, links_per_page + 1)
+
+    def test_save(self):
+        config = ConfigurationEntry.get()
+        version = config.config_version
+
+        config.links_per_page = 30
+
+        # call tested function
+        config.save()
+
+        self.assertEqual(config.config_version, version + 1)
+        self.assertEqual(ConfigurationEntry.get_version_from_database(), version + 1)
+        self.assertEqual(ConfigurationEntry.get().links_per_page, 30)
+
+    def test_user_config__cached(self):
+        UserConfig.get(self.user)
+
+        # call tested function
+        with self.assertNumQueries(0):
+            user_config = UserConfig.get(self.user)
+
+        self.assertEqual(user_config.user, self.user)
+
+    def test_user_config__save(self):
+        user_config = UserConfig.get(self.user)
+        version = ConfigurationEntry.get_version_from_database()
+
+        user_config.links_per_page = 20
+
+        # call tested function
+        user_config.save()
+
+        # configuration, browsers, and rules of other processes stay cached
+        self.assertEqual(ConfigurationEntry.get_version_from_database(), version)
+        self.assertEqual(UserConfig.get(self.user).links_per_page, 20)
+
+    def test_user_config__expired(self):
+        UserConfig.get(self.user)
+
+        UserConfig.objects.filter(user=self.user).update(links_per_page=21)
+
+        # change of other process is not visible before user configuration expires
+        self.assertNotEqual(UserConfig.get(self.user).links_per_page, 21)
+
+        user_configs = ConfigurationEntry.cache.user_configs
+        user_config, date_read = user_configs[self.user.id]
+        user_configs[self.user.id] = (
+            user_config,
+            date_read - timedelta(seconds=ConfigurationCache.USER_CONFIG_PERIOD_S + 1),
+        )
+
+        # call tested function
+        self.assertEqual(UserConfig.get(self.user).links_per_page, 21)
+
+    def test_user_config__copy(self):
+        user_config = UserConfig.get()
+        user_config.links_per_page = 7
+
+        # call tested function
+        self.assertNotEqual(UserConfig.get().links_per_page, 7)
+
+    def test_get__copy(self):
+        config = ConfigurationEntry.get()
+        config.links_per_page = 7
+
+        # call tested function
+        self.assertNotEqual(ConfigurationEntry.get().links_per_page, 7)
+
+    def test_configuration__config_entry(self):
+        c = Configuration.get_object()
+        c.config_entry.links_per_page = 7
+
+        # call tested function
+        self.assertEqual(c.config_entry.links_per_page, 7)
+
+        c.config_entry.save()
+
+        self.assertEqual(ConfigurationEntry.get().links_per_page, 7)
+
+    def test_configuration__config_entry_changed_by_other_process(self):
+        c = Configuration.get_object()
+        links_per_page = c.config_entry.links_per_page
+
+        ConfigurationEntry.objects.update(links_per_page=links_per_page + 1)
+        ConfigurationEntry.update_version()
+
+        self.expire_version_check()
+
+        # call tested function
+        self.assertEqual(c.config_entry.links_per_page, links_per_page + 1)
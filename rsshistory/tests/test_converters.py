@@ -1,4 +1,8 @@
+import json
+from io import StringIO
+
 from utils.serializers import PageSystem, MarkDownConverter, MarkDownDynamicConverter
+from utils.serializers.converters import JsonConverter, CsvConverter
 
 from .fakeinternet import FakeInternetTestCase
 
@@ -170,3 +174,78 @@ class MarkDownDynamicConverterTest(FakeInternetTestCase):
 """
 
         self.assertEqual(text, expected_text)
+
+
+class JsonConverterTest(FakeInternetTestCase):
+    def setUp(self):
+        self.disable_web_pages()
+
+    def test_write(self):
+        items = [
+            {"title": "test_title_01", "link": "https://test-link-01.com", "tags": []},
+            {"title": "test_title_02", "link": "https://test-link-02.com", "tags": ["a"]},
+        ]
+
+        converter = JsonConverter(items)
+
+        file = StringIO()
+
+        # call tested function
+        converter.write(file)
+
+        self.assertEqual(file.getvalue(), json.dumps(items, sort_keys=True, indent=4))
+
+    def test_write__generator(self):
+        items = ({"title": "test_title_{}".format(index)} for index in range(3))
+
+        converter = JsonConverter(items)
+
+        # call tested function
+        text = converter.export()
+
+        self.assertEqual(len(json.loads(text)), 3)
+
+    def test_write__empty(self):
+        converter = JsonConverter([])
+
+        # call tested function
+        text = converter.export()
+
+        self.assertEqual(text, json.dumps([], sort_keys=True, indent=4))
+
+
+class CsvConverterTest(FakeInternetTestCase):
+    def setUp(self):
+        self.disable_web_pages()
+
+    def test_export(self):
+        items = [
+            {"title": "test;title_01", "link": "https://test-link-01.com"},
+            {"title": "test_title_02", "link": "https://test-link-02.com"},
+        ]
+
+        converter = CsvConverter(items)
+
+        # call tested function
+        text = converter.export()
+
+        expected_text = (
+            "title;link\r\n"
+            '"test;title_01";https://test-link-01.com\r\n'
+            "test_title_02;https://test-link-02.com\r\n"
+        )
+
+        self.assertEqual(text, expected_text)
+
+    def test_export__columns(self):
+        items = [
+            {"title": "test_title_01", "link": "https://test-link-01.com"},
+        ]
+
+        converter = CsvConverter(items)
+        converter.set_export_columns(["link"])
+
+        # call tested function
+        text = converter.export()
+
+        self.assertEqual(text, "link\r\nhttps://test-link-01.com\r\n")
@@ -2,9 +2,13 @@ from pathlib import Path
 import shutil
 import json
 
+from django.contrib.auth.models import User
+
 from utils.dateutils import DateUtils
+from utils import sqlmodel
+from utils.sqlmodel import SqlModel
 
-from ..models import ConfigurationEntry, DataExport
+from ..models import ConfigurationEntry, DataExport, UserTags
 from ..controllers import SourceDataController, LinkDataController, DomainsController
 from ..configuration import Configuration
 from ..datawriter import DataWriter, DataWriterConfiguration
@@ -205,6 +209,52 @@ class DataWriterTest(FakeInternetTestCase):
         json_file = Path("./data") / "test" / "notime" / "sources.json"
         self.assertEqual(json_file.exists(), True)
 
+    def test_write__notime__sqlite(self):
+        entry = ConfigurationEntry.get()
+        entry.data_export_path = self.test_export_path
+        entry.save()
+
+        conf = Configuration.get_object()
+
+        self.export_notime.format_json = False
+        self.export_notime.format_md = False
+        self.export_notime.format_rss = False
+        self.export_notime.format_html = False
+        self.export_notime.output_sqlite = True
+        self.export_notime.save()
+
+        user = User.objects.create_user(username="TestUser", password="testpassword")
+        entry = LinkDataController.objects.get(link="https://linkedin.com")
+        UserTags.objects.create(tag="social", user=user, entry=entry)
+
+        dw_conf = DataWriterConfiguration(
+            conf, self.export_notime, Path("./data/test/notime")
+        )
+        writer = DataWriter.get(dw_conf)
+        # call tested function
+        writer.write()
+
+        db_file = (
+            Path("./data")
+            / "test"
+            / "notime"
+            / "permanent"
+            / "00000"
+            / "permanent_entries.db"
+        )
+        self.assertEqual(db_file.exists(), True)
+
+        model = SqlModel(db_file.as_posix())
+        entries = model.all(sqlmodel.EntriesTable)
+        sources = model.all(sqlmodel.SourcesTable)
+        tags = model.all(sqlmodel.UserTags)
+        model.close()
+
+        self.assertEqual(len(entries), 3)
+        self.assertEqual(len(sources), 1)
+        self.assertEqual(len(tags), 1)
+        self.assertEqual(tags[0].entry_object, entry.id)
+
     def test_write__daily_data__json(self):
         entry = ConfigurationEntry.get()
         entry.data_export_path = self.test_export_path
@@ -324,6 +374,34 @@ class DataWriterTest(FakeInternetTestCase):
         md_file = Path("./data") / "test" / "year" / "2024" / "bookmarks_entries.md"
         self.assertEqual(md_file.exists(), True)
 
+    def test_write__year__csv(self):
+        entry = ConfigurationEntry.get()
+        entry.data_export_path = self.test_export_path
+        entry.save()
+
+        conf = Configuration.get_object()
+
+        self.export_year.format_json = False
+        self.export_year.format_md = False
+        self.export_year.format_rss = False
+        self.export_year.format_html = False
+        self.export_year.format_csv = True
+        self.export_year.save()
+
+        dw_conf = DataWriterConfiguration(
+            conf, self.export_year, Path("./data/test/year")
+        )
+        writer = DataWriter.get(dw_conf)
+        # call tested function
+        writer.write()
+
+        csv_file = Path("./data") / "test" / "year" / "2023" / "bookmarks_entries.csv"
+        self.assertEqual(csv_file.exists(), True)
+
+        lines = csv_file.read_text().splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertIn("https://youtube.com?v=bookmarked", lines[1])
+
     def test_write__notime__md(self):
         entry = ConfigurationEntry.get()
         entry.data_export_path = self.test_export_path
@@ -140,3 +140,62 @@ class DomainTest(FakeInternetTestCase):
 
         entries = LinkDataController.objects.filter(link="https://test.com")
         self.assertEqual(entries.count(), 1)
+
+    def test_add_many(self):
+        LinkDataController.objects.all().delete()
+        DomainsController.objects.all().delete()
+
+        existing = DomainsController.add("https://test.com")
+
+        urls = [
+            "https://test.com/page",
+            "https://waiterrant.blogspot.com/nothing-important",
+            "https://waiterrant.blogspot.com",
+            "https://linkedin.com",
+        ]
+
+        # call tested function
+        domains = DomainsController.add_many(urls)
+
+        self.assertEqual(len(domains), 4)
+        self.assertEqual(domains["https://test.com/page"], existing)
+        self.assertEqual(
+            domains["https://waiterrant.blogspot.com"].domain,
+            "waiterrant.blogspot.com",
+        )
+        self.assertEqual(domains["https://waiterrant.blogspot.com"].main, "blogspot")
+        self.assertEqual(DomainsController.objects.count(), 3)
+
+    def test_add_many__existing_number_of_queries(self):
+        urls = ["https://test{}.com".format(index) for index in range(20)]
+        DomainsController.add_many(urls)
+
+        # call tested function
+        with self.assertNumQueries(1):
+            domains = DomainsController.add_many(urls)
+
+        self.assertEqual(len(domains), 20)
+
+    def test_get_domain_parts(self):
+        # call tested function
+        parts = DomainsController.get_domain_parts("waiterrant.blogspot.com")
+
+        self.assertEqual(parts, ("blogspot", "waiterrant", "com", "com"))
+
+    def test_create_missing_domains(self):
+        LinkDataController.objects.all().delete()
+        DomainsController.objects.all().delete()
+
+        LinkDataController.objects.create(link="https://test.com/1")
+        LinkDataController.objects.create(link="https://test.com/2")
+        LinkDataController.objects.create(link="https://linkedin.com/3")
+
+        # call tested function
+        DomainsController.create_missing_domains()
+
+        self.assertEqual(DomainsController.objects.count(), 2)
+        self.assertFalse(LinkDataController.objects.filter(domain__isnull=True).exists())
+        self.assertEqual(
+            LinkDataController.objects.get(link="https://test.com/2").domain.domain,
+            "test.com",
+        )
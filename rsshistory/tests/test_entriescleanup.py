@@ -478,3 +478,192 @@ class EntriesCleanupTest(FakeInternetTestCase):
 
         self.assertEqual(archived[1].domain, domains[0])
         self.assertEqual(archived[1].date_published, date_to_remove)
+
+    def test_move_old_links_to_archive__already_archived(self):
+        conf = Configuration.get_object().config_entry
+        conf.days_to_move_to_archive = 1
+        conf.save()
+
+        date_link_publish = DateUtils.get_datetime_now_utc() - timedelta(days=3)
+
+        self.clear()
+
+        LinkDataController.objects.create(
+            link="https://youtube.com?v=archived",
+            title="New title",
+            date_published=date_link_publish,
+        )
+        ArchiveLinkDataController.objects.create(
+            link="https://youtube.com?v=archived",
+            title="Archived title",
+            date_published=date_link_publish,
+        )
+
+        # call tested function
+        EntriesCleanup().move_old_links_to_archive()
+
+        self.assertEqual(LinkDataController.objects.count(), 0)
+        self.assertEqual(ArchiveLinkDataController.objects.count(), 1)
+        self.assertEqual(
+            ArchiveLinkDataController.objects.all()[0].title, "Archived title"
+        )
+
+    def test_cleanup__time_exceeded(self):
+        conf = Configuration.get_object().config_entry
+        conf.days_to_remove_links = 2
+        conf.save()
+
+        date_link_publish = DateUtils.get_datetime_now_utc() - timedelta(days=5)
+
+        self.clear()
+
+        for index in range(5):
+            LinkDataController.objects.create(
+                link="https://youtube.com?v={}".format(index),
+                date_published=date_link_publish,
+            )
+
+        cleanup = EntriesCleanup()
+        cleanup.BATCH_SIZE = 2
+        cleanup.is_time_exceeded = lambda: True
+
+        # call tested function
+        self.assertFalse(cleanup.cleanup_remove_entries())
+
+        self.assertEqual(LinkDataController.objects.count(), 3)
+
+        cleanup = EntriesCleanup()
+        cleanup.BATCH_SIZE = 2
+
+        # call tested function
+        self.assertTrue(cleanup.cleanup_remove_entries())
+
+        self.assertEqual(LinkDataController.objects.count(), 0)
+
+    def test_move_duplicate_links(self):
+        self.clear()
+
+        entry_http = LinkDataController.objects.create(
+            link="http://www.youtube.com?v=1",
+            title="Video",
+        )
+        entry_www = LinkDataController.objects.create(
+            link="https://www.youtube.com?v=1",
+            title="Video",
+        )
+        entry = LinkDataController.objects.create(
+            link="https://youtube.com?v=1",
+            title="Video",
+        )
+        LinkDataController.objects.create(
+            link="https://youtube.com?v=2",
+            title="Video",
+        )
+
+        UserBookmarks.add(self.user_staff, entry_http)
+
+        # entries added before link key was introduced
+        LinkDataController.objects.filter(id=entry_www.id).update(link_key=None)
+
+        # call tested function
+        self.assertTrue(EntriesCleanup().move_duplicate_links())
+
+        links = set(LinkDataController.objects.values_list("link", flat=True))
+        self.assertEqual(links, {"https://youtube.com?v=1", "https://youtube.com?v=2"})
+
+        entry.refresh_from_db()
+        self.assertTrue(entry.bookmarked)
+        self.assertTrue(UserBookmarks.is_bookmarked(entry))
+
+    def test_cleanup_remove_entries__source_entries_kept(self):
+        conf = Configuration.get_object().config_entry
+        conf.days_to_remove_links = 0
+        conf.days_to_remove_stale_entries = 0
+        conf.save()
+
+        self.clear()
+
+        source = SourceDataController.objects.create(
+            url="https://youtube.com",
+            title="YouTube",
+            remove_after_days=1,
+        )
+        LinkDataController.objects.create(
+            link="https://youtube.com?v=old",
+            source=source,
+            date_published=DateUtils.get_datetime_now_utc() - timedelta(days=5),
+        )
+
+        # call tested function
+        self.assertTrue(EntriesCleanup().cleanup_remove_entries())
+
+        # entries of sources are only reported
+        self.assertEqual(LinkDataController.objects.count(), 1)
+
+    def test_move_duplicate_links__dead(self):
+        self.clear()
+
+        date_dead = DateUtils.get_datetime_now_utc()
+
+        LinkDataController.objects.create(
+            link="http://youtube.com?v=1",
+            title="Video",
+            date_dead_since=date_dead,
+        )
+        LinkDataController.objects.create(
+            link="https://youtube.com?v=1",
+            title="Video",
+            date_dead_since=date_dead,
+        )
+
+        cleanup = EntriesCleanup()
+        cleanup.move_duplicate_group = lambda entries: self.fail("Group selected")
+
+        # call tested function
+        self.assertTrue(cleanup.move_duplicate_links())
+
+        self.assertEqual(LinkDataController.objects.count(), 2)
+
+    def test_cleanup__duplicates_kept(self):
+        conf = Configuration.get_object().config_entry
+        conf.merge_duplicate_links = False
+        conf.save()
+
+        self.clear()
+
+        LinkDataController.objects.create(
+            link="http://youtube.com?v=1",
+            title="Video",
+        )
+        LinkDataController.objects.create(
+            link="https://youtube.com?v=1",
+            title="Video",
+        )
+
+        # call tested function
+        EntriesCleanup().cleanup()
+
+        self.assertEqual(LinkDataController.objects.count(), 2)
+
+    def test_cleanup__duplicates_merged(self):
+        conf = Configuration.get_object().config_entry
+        conf.merge_duplicate_links = True
+        conf.save()
+
+        self.clear()
+
+        LinkDataController.objects.create(
+            link="http://youtube.com?v=1",
+            title="Video",
+        )
+        LinkDataController.objects.create(
+            link="https://youtube.com?v=1",
+            title="Video",
+        )
+
+        # call tested function
+        EntriesCleanup().cleanup()
+
+        links = list(LinkDataController.objects.values_list("link", flat=True))
+        self.assertEqual(links, ["https://youtube.com?v=1"])
+
@@ -5,6 +5,7 @@ from utils.dateutils import DateUtils
 
 from ..controllers import (
     EntryDataBuilder,
+    EntryDataBatchBuilder,
     EntryWrapper,
     SourceDataController,
     DomainsController,
@@ -776,3 +777,158 @@ class EntryDataBuilderTest(FakeInternetTestCase):
 
         objs = BackgroundJobController.objects.filter(job = BackgroundJobController.JOB_LINK_SCAN)
         self.assertEqual(objs.count(), 1)
+
+
+class EntryDataBatchBuilderTest(FakeInternetTestCase):
+    def setUp(self):
+        self.disable_web_pages()
+        self.setup_configuration()
+
+        LinkDataController.objects.all().delete()
+        ArchiveLinkDataController.objects.all().delete()
+        EntryRules.objects.all().delete()
+
+        config = Configuration.get_object().config_entry
+        config.accept_non_domain_links = True
+        config.accept_domain_links = False
+        config.auto_create_sources = False
+        config.auto_scan_new_entries = True
+        config.save()
+
+        self.source = SourceDataController.objects.create(
+            url="https://youtube.com/feed.xml", title="YouTube"
+        )
+
+    def get_link_data(self, link, days_ago=1):
+        date = DateUtils.get_datetime_now_utc() - timedelta(days=days_ago)
+
+        return {
+            "link": link,
+            "source_url": self.source.url,
+            "title": "title {}".format(link),
+            "description": "description",
+            "language": "en",
+            "date_published": date,
+            "page_rating_contents": 31,
+        }
+
+    def test_build(self):
+        links_data = [
+            self.get_link_data("https://youtube.com/v=1"),
+            self.get_link_data("https://youtube.com/v=2"),
+            self.get_link_data("https://youtube.com/v=1"),
+        ]
+
+        b = EntryDataBatchBuilder()
+        # call tested function
+        entries = b.build(links_data)
+
+        self.assertEqual(len(entries), 2)
+        self.assertEqual(len(b.new_entries), 2)
+        self.assertEqual(LinkDataController.objects.count(), 2)
+
+        entry = LinkDataController.objects.get(link="https://youtube.com/v=1")
+        self.assertEqual(entry.source, self.source)
+        self.assertEqual(entry.page_rating_contents, 31)
+        self.assertEqual(entry.page_rating, 10)
+
+        objs = BackgroundJobController.objects.filter(
+            job=BackgroundJobController.JOB_LINK_SCAN
+        )
+        self.assertEqual(objs.count(), 2)
+
+    def test_build__keywords(self):
+        config = Configuration.get_object().config_entry
+        config.enable_keyword_support = True
+        config.save()
+
+        links_data = [
+            self.get_link_data("https://youtube.com/v=1"),
+            self.get_link_data("https://youtube.com/v=2"),
+        ]
+
+        b = EntryDataBatchBuilder()
+        # call tested function
+        b.build(links_data)
+
+        objs = BackgroundJobController.objects.filter(
+            job=BackgroundJobController.JOB_LINK_ADD_KEYWORDS
+        )
+        self.assertEqual(objs.count(), 2)
+
+    def test_build__existing(self):
+        existing = LinkDataController.objects.create(
+            link="https://youtube.com/v=1", title="Existing"
+        )
+        archived = ArchiveLinkDataController.objects.create(
+            link="https://youtube.com/v=2", title="Archived"
+        )
+
+        links_data = [
+            self.get_link_data("http://youtube.com/v=1"),
+            self.get_link_data("https://youtube.com/v=2"),
+            self.get_link_data("https://youtube.com/v=3"),
+        ]
+
+        b = EntryDataBatchBuilder()
+        # call tested function
+        entries = b.build(links_data)
+
+        self.assertEqual(len(entries), 3)
+        self.assertEqual(entries[0], existing)
+        self.assertEqual(entries[1], archived)
+        self.assertEqual(len(b.new_entries), 1)
+        self.assertEqual(LinkDataController.objects.count(), 2)
+
+    def test_build__rejected(self):
+        links_data = [
+            self.get_link_data("https://youtube.com/v=1"),
+            self.get_link_data("https://youtube.com/v=2"),
+        ]
+        del links_data[1]["title"]
+
+        b = EntryDataBatchBuilder()
+        # call tested function
+        entries = b.build(links_data)
+
+        self.assertEqual(len(entries), 1)
+        self.assertEqual(LinkDataController.objects.count(), 1)
+        self.assertTrue(len(b.errors) > 0)
+
+    def test_build__archive(self):
+        config = Configuration.get_object().config_entry
+        config.days_to_move_to_archive = 100
+        config.save()
+
+        links_data = [
+            self.get_link_data("https://youtube.com/v=1", days_ago=1),
+            self.get_link_data("https://youtube.com/v=2", days_ago=200),
+        ]
+
+        b = EntryDataBatchBuilder()
+        # call tested function
+        entries = b.build(links_data)
+
+        self.assertEqual(len(entries), 2)
+        self.assertEqual(LinkDataController.objects.count(), 1)
+        self.assertEqual(ArchiveLinkDataController.objects.count(), 1)
+
+    def test_build__number_of_queries(self):
+        links_data = [
+            self.get_link_data("https://youtube.com/v={}".format(index))
+            for index in range(20)
+        ]
+        b = EntryDataBatchBuilder()
+        b.build(links_data)
+
+        links_data.append(self.get_link_data("https://youtube.com/v=new"))
+
+        b = EntryDataBatchBuilder()
+        builders = b.get_builders(links_data)
+
+        # existing entries are checked with one query per table
+        with self.assertNumQueries(2):
+            # call tested function
+            existing = b.get_existing_entries(builders)
+
+        self.assertEqual(len(existing), 20)
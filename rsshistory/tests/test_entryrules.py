@@ -8,7 +8,7 @@ from ..controllers import (
     LinkDataController,
     EntryUpdater,
 )
-from ..models import EntryRules, Browser, UserBookmarks
+from ..models import EntryRules, EntryRuleSet, Browser, UserBookmarks, BlockEntry
 from ..configuration import Configuration
 
 from .fakeinternet import FakeInternetTestCase
@@ -397,3 +397,80 @@ class EntryUpdaterTest(FakeInternetTestCase):
         pulp = therule.get_dict_pulp(dictionary)
 
         self.assertEqual(pulp, "titledescription")
+
+
+class EntryRulesCacheTest(FakeInternetTestCase):
+    def setUp(self):
+        self.disable_web_pages()
+        self.setup_configuration()
+
+        EntryRules.objects.all().delete()
+
+        EntryRules.objects.create(
+            enabled=True,
+            block=True,
+            rule_name="Casinos",
+            trigger_rule_url="casino, gambling",
+            trigger_text="casino",
+        )
+
+    def test_is_url_blocked__no_queries(self):
+        EntryRules.is_url_blocked("https://casino.com")
+        BlockEntry.is_blocked("casino.com")
+
+        # call tested function
+        with self.assertNumQueries(0):
+            self.assertFalse(EntryRules.is_url_blocked("https://linux.com"))
+
+    def test_is_url_blocked__rule_saved(self):
+        self.assertFalse(EntryRules.is_url_blocked("https://spam.com"))
+
+        EntryRules.objects.create(
+            enabled=True, block=True, rule_name="Spam", trigger_rule_url="spam"
+        )
+
+        # call tested function
+        self.assertTrue(EntryRules.is_url_blocked("https://spam.com"))
+
+    def test_is_url_blocked__rule_deleted(self):
+        self.assertTrue(EntryRules.is_url_blocked("https://casino.com"))
+
+        EntryRules.objects.all().delete()
+
+        # call tested function
+        self.assertFalse(EntryRules.is_url_blocked("https://casino.com"))
+
+    def test_is_url_blocked__back_reference(self):
+        EntryRules.objects.create(
+            enabled=True,
+            block=True,
+            rule_name="Repeated",
+            trigger_rule_url=r"(\w+)\.\1\.com",
+        )
+
+        # call tested function
+        self.assertTrue(EntryRules.is_url_blocked("https://spam.spam.com"))
+        self.assertFalse(EntryRules.is_url_blocked("https://spam.ham.com"))
+
+    def test_is_dict_blocked(self):
+        # call tested function
+        rule = EntryRules.is_dict_blocked(
+            {"link": "https://example.com", "title": "Best CASINO", "description": ""}
+        )
+
+        self.assertEqual(rule.rule_name, "Casinos")
+        self.assertFalse(
+            EntryRules.is_dict_blocked(
+                {"link": "https://example.com", "title": "Linux", "description": ""}
+            )
+        )
+
+    def test_get_combined_regex(self):
+        # call tested function
+        regex = EntryRuleSet.get_combined_regex(["casino", "spam[0-9]"])
+
+        self.assertTrue(regex.search("https://spam1.com"))
+        self.assertFalse(regex.search("https://spam.com"))
+
+        self.assertEqual(EntryRuleSet.get_combined_regex([r"(a)\1"]), None)
+        self.assertEqual(EntryRuleSet.get_combined_regex(["(unclosed"]), None)
@@ -7,10 +7,11 @@ from ..controllers import (
     SourceDataController,
     LinkDataController,
     EntryUpdater,
+    EntriesRatingUpdater,
     BackgroundJobController,
     DomainsController,
 )
-from ..models import UserTags, UserVotes, EntryRules
+from ..models import UserTags, UserVotes, UserEntryVisitHistory, EntryRules
 from ..configuration import Configuration
 
 from .fakeinternet import FakeInternetTestCase, MockRequestCounter
@@ -900,3 +901,73 @@ class EntryUpdaterTest(FakeInternetTestCase):
         u.update_data()
 
         self.assertEqual(DomainsController.objects.all().count(), 1)
+
+
+class EntriesRatingUpdaterTest(FakeInternetTestCase):
+    def setUp(self):
+        self.disable_web_pages()
+        self.setup_configuration()
+
+        self.user = User.objects.create_user(
+            username="TestUser", password="testpassword", is_staff=True
+        )
+        self.other_user = User.objects.create_user(
+            username="OtherUser", password="testpassword"
+        )
+
+        self.entries = []
+        for index in range(3):
+            self.entries.append(
+                LinkDataController.objects.create(
+                    link="https://youtube.com?v={}".format(index),
+                    title="Entry {}".format(index),
+                    page_rating_contents=50,
+                )
+            )
+
+        entry = self.entries[0]
+        UserVotes.objects.create(user=self.user, entry=entry, vote=40)
+        UserVotes.objects.create(user=self.other_user, entry=entry, vote=-5)
+        UserTags.objects.create(user=self.user, entry=entry, tag="test")
+        UserTags.objects.create(user=self.other_user, entry=entry, tag="other")
+        UserEntryVisitHistory.objects.create(user=self.user, entry=entry, visits=3)
+        UserEntryVisitHistory.objects.create(
+            user=self.other_user, entry=entry, visits=2
+        )
+
+        UserVotes.objects.create(user=self.user, entry=self.entries[1], vote=-7)
+
+    def get_expected(self, entry):
+        entry = LinkDataController.objects.get(id=entry.id)
+        EntryUpdater(entry).update_calculated_vote()
+
+        entry.refresh_from_db()
+        return entry.page_rating_votes, entry.page_rating_visits, entry.page_rating
+
+    def test_update(self):
+        # call tested function
+        changed = EntriesRatingUpdater().update([entry.id for entry in self.entries])
+
+        self.assertEqual(changed, 3)
+
+        for entry in self.entries:
+            entry.refresh_from_db()
+            calculated = (
+                entry.page_rating_votes,
+                entry.page_rating_visits,
+                entry.page_rating,
+            )
+            self.assertEqual(calculated, self.get_expected(entry))
+
+        self.assertEqual(self.entries[0].page_rating_votes, 17)
+        self.assertEqual(self.entries[0].page_rating_visits, 5)
+
+    def test_update__all(self):
+        # call tested function
+        changed = EntriesRatingUpdater().update()
+
+        self.assertEqual(changed, 3)
+
+        # nothing changes in the second run
+        self.assertEqual(EntriesRatingUpdater().update(), 0)
+
@@ -897,6 +897,7 @@ class EntryWrapperTest(FakeInternetTestCase):
 
         UserEntryVisitHistory.visited(http_entry, self.user_not_staff)
         UserEntryVisitHistory.visited(youtube_entry, self.user_not_staff)
+        UserEntryVisitHistory.process_visits()
 
         # verify before call
 
@@ -992,6 +993,7 @@ class EntryWrapperTest(FakeInternetTestCase):
 
         UserEntryVisitHistory.visited(http_entry, self.user_not_staff)
         UserEntryVisitHistory.visited(youtube_entry, self.user_not_staff)
+        UserEntryVisitHistory.process_visits()
 
         # verify before call
 
@@ -1078,6 +1080,7 @@ class EntryWrapperTest(FakeInternetTestCase):
 
         UserEntryVisitHistory.visited(http_entry, self.user_not_staff)
         UserEntryVisitHistory.visited(youtube_entry, self.user_not_staff)
+        UserEntryVisitHistory.process_visits()
 
         # verify before call
 
@@ -556,3 +556,21 @@ class LinkDataControllerTest(FakeInternetTestCase):
 
         self.assertEqual(len(comment_data), 1)
         self.assertIn("comment", comment_data[0])
+
+    def test_get_link_key(self):
+        # call tested function
+        key = LinkDataController.get_link_key("https://www.youtube.com/watch?v=1")
+
+        self.assertEqual(key, "youtube.com/watch?v=1")
+        self.assertEqual(
+            LinkDataController.get_link_key("http://youtube.com/watch?v=1"), key
+        )
+        self.assertEqual(LinkDataController.get_link_key("ftp://youtube.com"), "ftp://youtube.com")
+
+    def test_save__link_key(self):
+        # call tested function
+        entry = LinkDataController.objects.create(
+            link="http://www.youtube.com/watch?v=1",
+        )
+
+        self.assertEqual(entry.link_key, "youtube.com/watch?v=1")
@@ -0,0 +1,89 @@
+from datetime import timedelta
+
+from utils.dateutils import DateUtils
+
+from ..controllers import LinkDataController
+from ..paginators import KeysetPaginator
+
+from .fakeinternet import FakeInternetTestCase
+
+
+class KeysetPaginatorTest(FakeInternetTestCase):
+    def setUp(self):
+        self.disable_web_pages()
+
+        date = DateUtils.get_datetime_now_utc()
+
+        for index in range(7):
+            date_published = None
+            if index % 3 != 0:
+                date_published = date - timedelta(days=index)
+
+            LinkDataController.objects.create(
+                link="https://example.com/{}".format(index),
+                title="Example",
+                date_published=date_published,
+            )
+
+    def get_all_pages(self, paginator):
+        result = []
+        cursor = None
+
+        while True:
+            objects, cursor = paginator.get_page(cursor)
+            result.extend(objects)
+
+            if cursor is None:
+                return result
+
+    def test_get_page__descending(self):
+        queryset = LinkDataController.objects.all()
+        paginator = KeysetPaginator(queryset, ["-date_published", "title"], 2)
+
+        # call tested function
+        objects = self.get_all_pages(paginator)
+
+        dated = list(
+            queryset.filter(date_published__isnull=False).order_by("-date_published")
+        )
+        not_dated = list(queryset.filter(date_published__isnull=True).order_by("-id"))
+
+        self.assertEqual(objects, dated + not_dated)
+
+    def test_get_page__ascending(self):
+        queryset = LinkDataController.objects.all()
+        paginator = KeysetPaginator(queryset, ["date_published"], 3)
+
+        # call tested function
+        objects = self.get_all_pages(paginator)
+
+        not_dated = list(queryset.filter(date_published__isnull=True).order_by("id"))
+        dated = list(
+            queryset.filter(date_published__isnull=False).order_by("date_published")
+        )
+
+        self.assertEqual(objects, not_dated + dated)
+
+    def test_get_page__limit(self):
+        queryset = LinkDataController.objects.all()
+        paginator = KeysetPaginator(queryset, ["id"], 3, limit=4)
+
+        # call tested function
+        objects = self.get_all_pages(paginator)
+
+        self.assertEqual(len(objects), 4)
+
+    def test_decode_cursor__invalid(self):
+        with self.assertRaises(ValueError):
+            # call tested function
+            KeysetPaginator.decode_cursor("not a cursor")
+
+    def test_encode_cursor(self):
+        date = DateUtils.get_datetime_now_utc()
+
+        # call tested function
+        cursor = KeysetPaginator.encode_cursor([date, 5, None], 10)
+
+        values, position = KeysetPaginator.decode_cursor(cursor)
+        self.assertEqual(values, [date.isoformat(), 5, None])
+        self.assertEqual(position, 10)
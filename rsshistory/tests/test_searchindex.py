@@ -0,0 +1,174 @@
+from django.contrib.auth.models import User
+
+from utils.dateutils import DateUtils
+
+from ..controllers import (
+    LinkDataController,
+    ArchiveLinkDataController,
+    EntryWrapper,
+    EntriesSearchIndex,
+)
+from ..models import UserTags
+from ..configuration import Configuration
+from ..queryfilters import DjangoEquationProcessor
+
+from .fakeinternet import FakeInternetTestCase
+
+
+class EntriesSearchIndexTest(FakeInternetTestCase):
+    def setUp(self):
+        self.disable_web_pages()
+
+        self.user = User.objects.create_user(
+            username="TestUser", password="testpassword", is_staff=True
+        )
+
+        self.entry_linux = LinkDataController.objects.create(
+            link="https://linux.com/kernel",
+            title="Linux kernel released",
+            description="New version of the kernel",
+            bookmarked=True,
+            date_published=DateUtils.get_datetime_now_utc(),
+            language="en",
+        )
+        self.entry_youtube = LinkDataController.objects.create(
+            link="https://youtube.com?v=1234",
+            title="Video about cats",
+            description="Cats, and kernels",
+            date_published=DateUtils.get_datetime_now_utc(),
+            language="en",
+        )
+
+    def search(self, text):
+        condition = EntriesSearchIndex.get_condition(text)
+        return set(LinkDataController.objects.filter(condition))
+
+    def test_create(self):
+        # call tested function
+        EntriesSearchIndex.create()
+
+        self.assertTrue(EntriesSearchIndex.is_created())
+
+        self.assertEqual(self.search("linux"), {self.entry_linux})
+        self.assertEqual(self.search("youtube.com"), {self.entry_youtube})
+        self.assertEqual(self.search("kern"), {self.entry_linux, self.entry_youtube})
+        self.assertEqual(self.search("linux cats"), set())
+
+    def test_drop(self):
+        EntriesSearchIndex.create()
+
+        # call tested function
+        EntriesSearchIndex.drop()
+
+        self.assertFalse(EntriesSearchIndex.is_created())
+
+    def test_sync__save(self):
+        EntriesSearchIndex.create()
+
+        entry = LinkDataController.objects.create(
+            link="https://example.com",
+            title="Example title",
+            date_published=DateUtils.get_datetime_now_utc(),
+        )
+
+        self.assertEqual(self.search("example"), {entry})
+
+        entry.title = "Renamed"
+        entry.save()
+
+        self.assertEqual(self.search("renamed"), {entry})
+
+        LinkDataController.objects.filter(id=entry.id).update(author="Douglas")
+
+        self.assertEqual(self.search("douglas"), {entry})
+
+        entry.delete()
+
+        self.assertEqual(self.search("renamed"), set())
+
+    def test_sync__tags(self):
+        EntriesSearchIndex.create()
+
+        tag = UserTags.objects.create(
+            tag="operating", user=self.user, entry=self.entry_linux
+        )
+
+        self.assertEqual(self.search("operating"), {self.entry_linux})
+
+        tag.delete()
+
+        self.assertEqual(self.search("operating"), set())
+
+    def test_sync__move_to_archive(self):
+        EntriesSearchIndex.create()
+
+        EntryWrapper(entry=self.entry_youtube).move_to_archive()
+
+        self.assertEqual(ArchiveLinkDataController.objects.count(), 1)
+        self.assertEqual(self.search("cats"), set())
+
+    def test_get_condition__quotes(self):
+        EntriesSearchIndex.create()
+
+        # call tested function
+        self.assertEqual(self.search('"linux kernel" AND'), set())
+
+    def test_get_rank(self):
+        EntriesSearchIndex.create()
+
+        rank = EntriesSearchIndex.get_rank("kernel")
+        entries = (
+            LinkDataController.objects.filter(
+                EntriesSearchIndex.get_condition("kernel")
+            )
+            .annotate(search_rank=rank)
+            .order_by("-search_rank")
+        )
+
+        # call tested function
+        self.assertEqual(entries[0], self.entry_linux)
+
+    def test_check(self):
+        config = Configuration.get_object().config_entry
+        config.enable_search_index = True
+        config.save()
+
+        # call tested function
+        EntriesSearchIndex.check()
+
+        self.assertTrue(EntriesSearchIndex.is_enabled())
+
+        config.enable_search_index = False
+        config.save()
+
+        # call tested function
+        EntriesSearchIndex.check()
+
+        self.assertFalse(EntriesSearchIndex.is_created())
+
+    def test_equation_processor(self):
+        EntriesSearchIndex.create()
+
+        processor = DjangoEquationProcessor("linux")
+        processor.set_default_search_symbols(["title__icontains"])
+        processor.set_search_index(EntriesSearchIndex)
+
+        # call tested function
+        conditions = processor.get_conditions()
+
+        entries = LinkDataController.objects.filter(conditions)
+        self.assertEqual(set(entries), {self.entry_linux})
+
+    def test_equation_processor__complex(self):
+        EntriesSearchIndex.create()
+
+        processor = DjangoEquationProcessor("kernel & bookmarked == True")
+        processor.set_translation_mapping(LinkDataController.get_query_names())
+        processor.set_default_search_symbols(["title__icontains"])
+        processor.set_search_index(EntriesSearchIndex)
+
+        # call tested function
+        conditions = processor.get_conditions()
+
+        entries = LinkDataController.objects.filter(conditions)
+        self.assertEqual(set(entries), {self.entry_linux})
@@ -1,4 +1,5 @@
 import json
+import shutil
 from pathlib import Path
 from django.contrib.auth.models import User
 
@@ -16,6 +17,8 @@ from ..controllers import (
     EntryWrapper,
 )
 from ..models import (
+    BackgroundJob,
+    UserBookmarks,
     UserVotes,
     UserTags,
 )
@@ -126,3 +129,115 @@ class JsonImporterTest(FakeInternetTestCase):
 
         self.assertEqual(UserVotes.objects.all().count(), 1)
         self.assertEqual(UserTags.objects.all().count(), 2)
+
+    def test_import_from_data__existing(self):
+        entry = LinkDataController.objects.create(
+            link="https://linkedin.com",
+            title="Old title",
+            bookmarked=False,
+            permanent=True,
+        )
+
+        # call tested functionality
+        import_from_data(self.user, entry_contents)
+
+        self.assertEqual(LinkDataController.objects.all().count(), 1)
+
+        entry.refresh_from_db()
+        self.assertEqual(entry.title, "Page Title")
+        self.assertEqual(entry.bookmarked, True)
+
+        self.assertEqual(UserBookmarks.objects.filter(entry=entry).count(), 1)
+        self.assertEqual(UserTags.objects.filter(entry=entry).count(), 2)
+
+        # call tested functionality
+        import_from_data(self.user, entry_contents)
+
+        self.assertEqual(UserBookmarks.objects.filter(entry=entry).count(), 1)
+        self.assertEqual(UserTags.objects.filter(entry=entry).count(), 2)
+        self.assertEqual(UserVotes.objects.filter(entry=entry).count(), 1)
+
+
+class JsonImporterFilesTest(FakeInternetTestCase):
+    def setUp(self):
+        self.disable_web_pages()
+
+        self.user = User.objects.create_user(
+            username="test_username", password="testpassword"
+        )
+
+        self.import_path = Path("./test_data/imports")
+        self.import_path.mkdir(parents=True, exist_ok=True)
+
+        for index in range(3):
+            links = []
+            for link_index in range(4):
+                links.append(
+                    {
+                        "link": "https://linkedin.com/{}/{}".format(index, link_index),
+                        "title": "Page Title",
+                        "bookmarked": True,
+                        "tags": ["test"],
+                    }
+                )
+
+            path = self.import_path / "entries_{}.json".format(index)
+            path.write_text(json.dumps(links, indent=4))
+
+    def tearDown(self):
+        shutil.rmtree(self.import_path.parent.as_posix())
+
+    def test_import_all(self):
+        importer = JsonImporter(
+            path=self.import_path, user=self.user, import_settings={"workers": 0}
+        )
+
+        # call tested function
+        importer.import_all()
+
+        self.assertEqual(LinkDataController.objects.all().count(), 12)
+        self.assertEqual(UserTags.objects.all().count(), 12)
+        self.assertEqual(UserBookmarks.objects.all().count(), 12)
+
+    def test_import_all__workers(self):
+        importer = JsonImporter(
+            path=self.import_path, user=self.user, import_settings={"workers": 2}
+        )
+
+        # call tested function
+        importer.import_all()
+
+        self.assertEqual(LinkDataController.objects.all().count(), 12)
+
+    def test_import_all__progress(self):
+        second_file = str(self.import_path / "entries_1.json")
+
+        args = {"progress": {"file": second_file, "items": 2}}
+        job = BackgroundJob.objects.create(
+            job=BackgroundJob.JOB_IMPORT_FROM_FILES,
+            subject="",
+            args=json.dumps(args),
+        )
+
+        import_settings = json.loads(job.args)
+        import_settings["workers"] = 0
+        importer = JsonImporter(
+            path=self.import_path,
+            user=self.user,
+            import_settings=import_settings,
+            job=job,
+        )
+
+        # call tested function
+        importer.import_all()
+
+        # first file, and two links of the second file were imported before
+        self.assertEqual(LinkDataController.objects.all().count(), 6)
+        self.assertFalse(
+            LinkDataController.objects.filter(link__startswith="https://linkedin.com/0/").exists()
+        )
+
+        job.refresh_from_db()
+        progress = json.loads(job.args)["progress"]
+        self.assertEqual(progress["file"], str(self.import_path / "entries_2.json"))
+        self.assertEqual(progress["items"], None)
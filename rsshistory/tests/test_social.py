@@ -7,7 +7,7 @@ from ..controllers import LinkDataController
 from ..models import SocialData
 from ..configuration import Configuration
 
-from .fakeinternet import FakeInternetTestCase
+from .fakeinternet import FakeInternetTestCase, MockRequestCounter
 
 
 class SocialDataTest(FakeInternetTestCase):
@@ -168,6 +168,106 @@ class SocialDataTest(FakeInternetTestCase):
 
         self.assertTrue(social_data)
 
+    def test_update__keeps_one_row(self):
+        entry = LinkDataController.objects.create(
+            source_url="https://youtube.com",
+            link="https://youtube.com/watch?v=bookmarked",
+            title="The first link",
+        )
+
+        social_data = SocialData.objects.create(view_count=1, entry=entry)
+
+        # call tested function
+        SocialData.update(entry)
+
+        socials = SocialData.objects.filter(entry=entry)
+        self.assertEqual(socials.count(), 1)
+        self.assertEqual(socials[0].id, social_data.id)
+        self.assertEqual(socials[0].view_count, 15)
+
+    def test_update_entries(self):
+        entries = []
+        for index in range(5):
+            entries.append(
+                LinkDataController.objects.create(
+                    link="https://youtube.com/watch?v={}".format(index),
+                    title="Link {}".format(index),
+                )
+            )
+
+        # call tested function
+        socials = SocialData.update_entries(entries)
+
+        self.assertEqual(len(socials), 5)
+        self.assertEqual(SocialData.objects.count(), 5)
+        self.assertEqual(SocialData.objects.filter(view_count=15).count(), 5)
+
+    def test_update_entries__fresh(self):
+        entry = LinkDataController.objects.create(
+            link="https://youtube.com/watch?v=bookmarked",
+            title="The first link",
+            date_published=DateUtils.get_datetime_now_utc() - timedelta(days=30),
+        )
+        SocialData.objects.create(view_count=1, entry=entry)
+
+        MockRequestCounter.reset()
+
+        # call tested function
+        socials = SocialData.update_entries([entry])
+
+        self.assertEqual(socials, {})
+        self.assertEqual(len(MockRequestCounter.request_history), 0)
+        self.assertEqual(SocialData.objects.get(entry=entry).view_count, 1)
+
+    def test_update_entries__stale(self):
+        entry = LinkDataController.objects.create(
+            link="https://youtube.com/watch?v=bookmarked",
+            title="The first link",
+            date_published=DateUtils.get_datetime_now_utc(),
+        )
+        SocialData.objects.create(view_count=1, entry=entry)
+        SocialData.objects.filter(entry=entry).update(
+            date_updated=DateUtils.get_datetime_now_utc() - SocialData.TTL_NEW * 2
+        )
+
+        # call tested function
+        socials = SocialData.update_entries([entry])
+
+        self.assertEqual(len(socials), 1)
+        self.assertEqual(SocialData.objects.get(entry=entry).view_count, 15)
+
+    def test_get_from_server_many__errors(self):
+        entries = []
+        for index in range(3):
+            entries.append(
+                LinkDataController.objects.create(
+                    link="https://notsupported.com/{}".format(index),
+                    title="Link {}".format(index),
+                )
+            )
+
+        # call tested function
+        socials = SocialData.get_from_server_many(entries)
+
+        self.assertEqual(socials, [])
+        self.assertFalse(self.no_errors())
+
+    def test_get_ttl(self):
+        date_now = DateUtils.get_datetime_now_utc()
+
+        new_entry = LinkDataController.objects.create(
+            link="https://youtube.com/watch?v=1",
+            date_published=date_now,
+        )
+        old_entry = LinkDataController.objects.create(
+            link="https://youtube.com/watch?v=2",
+            date_published=date_now - timedelta(days=30),
+        )
+
+        # call tested function
+        self.assertEqual(SocialData.get_ttl(new_entry), SocialData.TTL_NEW)
+        self.assertEqual(SocialData.get_ttl(old_entry), SocialData.TTL_OLD)
+
     def test_cleanup(self):
         entry = LinkDataController.objects.create(
             source_url="https://youtube.com",
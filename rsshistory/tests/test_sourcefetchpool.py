@@ -0,0 +1,132 @@
+import threading
+import time
+
+from ..pluginsources.sourcefetchpool import SourceFetchPool
+
+from .fakeinternet import FakeInternetTestCase
+
+
+class FakeFetchPlugin(object):
+    def __init__(self, address, tracker, delay_s=0.05, error=None):
+        self.address = address
+        self.tracker = tracker
+        self.delay_s = delay_s
+        self.error = error
+        self.fetch_error = None
+        self.fetched = False
+
+    def prepare_fetch(self):
+        return True
+
+    def get_address(self):
+        return self.address
+
+    def fetch(self):
+        self.tracker.enter(self.address)
+        time.sleep(self.delay_s)
+        self.tracker.leave(self.address)
+
+        if self.error:
+            raise self.error
+
+        self.fetched = True
+
+
+class ConcurrencyTracker(object):
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.running = 0
+        self.max_running = 0
+        self.running_domains = {}
+        self.max_running_domain = 0
+
+    def enter(self, address):
+        with self.lock:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+
+            domain = address.split("/")[2]
+            self.running_domains[domain] = self.running_domains.get(domain, 0) + 1
+            self.max_running_domain = max(
+                self.max_running_domain, self.running_domains[domain]
+            )
+
+    def leave(self, address):
+        with self.lock:
+            self.running -= 1
+
+            domain = address.split("/")[2]
+            self.running_domains[domain] -= 1
+
+
+class SourceFetchPoolTest(FakeInternetTestCase):
+    def setUp(self):
+        self.disable_web_pages()
+
+    def test_fetch__concurrent(self):
+        tracker = ConcurrencyTracker()
+        plugins = [
+            FakeFetchPlugin("https://first.com/rss", tracker),
+            FakeFetchPlugin("https://second.com/rss", tracker),
+            FakeFetchPlugin("https://third.com/rss", tracker),
+        ]
+
+        pool = SourceFetchPool(max_workers=3)
+
+        # call tested function
+        self.assertEqual(pool.fetch(plugins), 3)
+
+        for plugin in plugins:
+            self.assertTrue(plugin.fetched)
+
+        self.assertTrue(tracker.max_running > 1)
+
+    def test_fetch__domain_limit(self):
+        tracker = ConcurrencyTracker()
+        plugins = [
+            FakeFetchPlugin("https://first.com/rss1", tracker),
+            FakeFetchPlugin("https://first.com/rss2", tracker),
+            FakeFetchPlugin("https://first.com/rss3", tracker),
+        ]
+
+        pool = SourceFetchPool(max_workers=3, max_per_domain=1)
+
+        # call tested function
+        pool.fetch(plugins)
+
+        for plugin in plugins:
+            self.assertTrue(plugin.fetched)
+
+        self.assertEqual(tracker.max_running_domain, 1)
+
+    def test_fetch__error(self):
+        tracker = ConcurrencyTracker()
+        error = IOError("Crawling server error")
+        plugins = [
+            FakeFetchPlugin("https://first.com/rss", tracker, error=error),
+            FakeFetchPlugin("https://second.com/rss", tracker),
+        ]
+
+        pool = SourceFetchPool(max_workers=2)
+
+        # call tested function
+        pool.fetch(plugins)
+
+        self.assertEqual(plugins[0].fetch_error, error)
+        self.assertTrue(plugins[1].fetched)
+
+    def test_fetch__one_worker(self):
+        tracker = ConcurrencyTracker()
+        plugins = [
+            FakeFetchPlugin("https://first.com/rss", tracker),
+            FakeFetchPlugin("https://second.com/rss", tracker),
+        ]
+
+        pool = SourceFetchPool(max_workers=1)
+
+        # call tested function
+        self.assertEqual(pool.fetch(plugins), 0)
+
+        # plugins fetch contents when processed
+        for plugin in plugins:
+            self.assertFalse(plugin.fetched)
@@ -0,0 +1,114 @@
+from datetime import timedelta
+
+from django.db import connection
+
+from utils.dateutils import DateUtils
+
+from ..controllers import LinkDataController, TableStatistics, SystemIndicators
+from ..models import BackgroundJob, BackgroundJobHistory
+
+from .fakeinternet import FakeInternetTestCase
+
+
+class TableStatisticsTest(FakeInternetTestCase):
+    def setUp(self):
+        self.disable_web_pages()
+
+        LinkDataController.objects.create(
+            link="https://youtube.com?v=1", title="Example"
+        )
+
+    def get_models(self):
+        return [("LinkDataModel", LinkDataController)]
+
+    def test_get_tables__cached(self):
+        TableStatistics.get_tables(self.get_models())
+
+        LinkDataController.objects.create(
+            link="https://youtube.com?v=2", title="Example"
+        )
+
+        # call tested function
+        with self.assertNumQueries(0):
+            tables = TableStatistics.get_tables(self.get_models())
+
+        self.assertEqual(
+            tables, [{"name": "LinkDataModel", "count": 1, "estimated": False}]
+        )
+
+    def test_get_tables__exact(self):
+        TableStatistics.get_tables(self.get_models())
+
+        LinkDataController.objects.create(
+            link="https://youtube.com?v=2", title="Example"
+        )
+
+        # call tested function
+        tables = TableStatistics.get_tables(self.get_models(), exact=True)
+
+        self.assertEqual(tables[0]["count"], 2)
+        self.assertFalse(tables[0]["estimated"])
+
+    def test_get_estimate__sqlite(self):
+        if connection.vendor != "sqlite":
+            return
+
+        db_table = LinkDataController._meta.db_table
+
+        self.assertIsNone(TableStatistics.get_estimate(db_table))
+
+        TableStatistics.cleanup()
+
+        # call tested function
+        estimate = TableStatistics.get_estimate(db_table)
+
+        self.assertEqual(estimate, 1)
+
+    def test_get_estimate__sqlite_stale(self):
+        if connection.vendor != "sqlite":
+            return
+
+        db_table = LinkDataController._meta.db_table
+
+        TableStatistics.cleanup()
+
+        BackgroundJobHistory.objects.filter(
+            job=BackgroundJob.JOB_CLEANUP, subject="TableStatistics"
+        ).update(
+            date_created=DateUtils.get_datetime_now_utc()
+            - timedelta(seconds=TableStatistics.ANALYZE_MAX_AGE_S + 1)
+        )
+
+        # call tested function
+        estimate = TableStatistics.get_estimate(db_table)
+
+        self.assertIsNone(estimate)
+
+    def test_get_estimate__sqlite_not_recorded(self):
+        if connection.vendor != "sqlite":
+            return
+
+        db_table = LinkDataController._meta.db_table
+
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+        # call tested function
+        estimate = TableStatistics.get_estimate(db_table)
+
+        self.assertIsNone(estimate)
+
+
+class SystemIndicatorsTest(FakeInternetTestCase):
+    def setUp(self):
+        self.disable_web_pages()
+
+    def test_get__cached(self):
+        SystemIndicators.get()
+
+        # call tested function
+        with self.assertNumQueries(0):
+            indicators = SystemIndicators.get()
+
+        self.assertIn("sources_queue_size", indicators)
+        self.assertIn("is_threading_ok", indicators)
@@ -70,6 +70,53 @@ class SystemOperationTest(FakeInternetTestCase):
         self.assertEqual(operations[2].check_type, "Internet")
         self.assertEqual(operations[2].status, True)
 
+    def test_refresh__cached(self):
+        SystemOperation.objects.all().delete()
+
+        controller = SystemOperationController()
+        controller.refresh("RefreshProcessor")
+        controller.refresh("RefreshProcessor")
+
+        # call tested function
+        with self.assertNumQueries(0):
+            controller.refresh("RefreshProcessor")
+            self.assertTrue(controller.is_internet_ok())
+            self.assertFalse(controller.is_remote_server_down())
+
+        self.assertEqual(SystemOperation.objects.count(), 3)
+
+    def test_refresh__reads_other_process_status(self):
+        SystemOperation.objects.all().delete()
+
+        controller = SystemOperationController()
+        controller.refresh("RefreshProcessor")
+
+        SystemOperation.objects.filter(check_type="Internet").update(status=False)
+
+        # other process status is visible after cache period
+        SystemOperation.cache.date_checked -= timedelta(
+            seconds=SystemOperation.cache.CHECK_PERIOD_S + 1
+        )
+
+        # call tested function
+        self.assertFalse(controller.is_internet_ok())
+
+    def test_add_by_thread__updates(self):
+        SystemOperation.objects.all().delete()
+
+        SystemOperation.add_by_thread(
+            "RefreshProcessor", check_type="Internet", status=True
+        )
+
+        # call tested function
+        SystemOperation.add_by_thread(
+            "RefreshProcessor", check_type="Internet", status=False
+        )
+
+        operations = SystemOperation.objects.all()
+        self.assertEqual(operations.count(), 1)
+        self.assertEqual(operations[0].status, False)
+
     def test_is_threading_ok(self):
         SystemOperation.objects.all().delete()
         BackgroundJob.objects.all().delete()
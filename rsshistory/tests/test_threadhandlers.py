@@ -18,6 +18,7 @@ from ..models import (
     DataExport,
     SourceExportHistory,
     KeyWords,
+    SocialData,
     SystemOperation,
     UserTags,
     EntryRules,
@@ -33,6 +34,8 @@ from ..threadhandlers import (
     ExportDataJobHandler,
     ProcessSourceJobHandler,
     RunRuleJobHandler,
+    LinkDownloadSocialData,
+    LinkAddKeywordsJobHandler,
 )
 
 from .fakeinternet import FakeInternetTestCase, MockRequestCounter
@@ -542,12 +545,22 @@ class ProcessSourceHandlerTest(FakeInternetTestCase):
 
         self.assertEqual(result, True)
 
-        subjects = BackgroundJobController.objects.values_list("job", flat=True)
+        subjects = BackgroundJobController.objects.exclude(
+            job=BackgroundJob.JOB_LINK_ADD_KEYWORDS
+        ).values_list("job", flat=True)
 
         self.assertEqual(len(subjects), 1)
         # still process source is present
         self.assertTrue("process-source" in subjects)
 
+        # keywords of new entries are added later, in batch
+        self.assertEqual(
+            BackgroundJobController.get_number_of_jobs(
+                BackgroundJob.JOB_LINK_ADD_KEYWORDS
+            ),
+            LinkDataController.objects.count(),
+        )
+
         self.assertEqual(UserTags.objects.all().count(), 0)
         self.assertEqual(MockRequestCounter.mock_page_requests, 1)
 
@@ -582,7 +595,9 @@ class ProcessSourceHandlerTest(FakeInternetTestCase):
 
         self.assertEqual(result, True)
 
-        subjects = BackgroundJobController.objects.values_list("job", flat=True)
+        subjects = BackgroundJobController.objects.exclude(
+            job=BackgroundJob.JOB_LINK_ADD_KEYWORDS
+        ).values_list("job", flat=True)
 
         self.assertEqual(len(subjects), 1)
         # jobs are removed by processors
@@ -683,6 +698,94 @@ class ExportDataJobHandlerTest(FakeInternetTestCase):
         self.assertEqual(result, True)
 
 
+class LinkDownloadSocialDataTest(FakeInternetTestCase):
+    def setUp(self):
+        self.disable_web_pages()
+        self.setup_configuration()
+
+        config = Configuration.get_object().config_entry
+        config.enable_social_data = True
+        config.save()
+
+    def test_process__coalesces_jobs(self):
+        entries = []
+        for index in range(3):
+            entries.append(
+                LinkDataController.objects.create(
+                    link="https://youtube.com/watch?v={}".format(index),
+                    title="Link {}".format(index),
+                )
+            )
+
+        jobs = BackgroundJobController.link_download_social_data_entries(entries)
+
+        handler = LinkDownloadSocialData()
+
+        # call tested function
+        result = handler.process(jobs[0])
+
+        self.assertTrue(result)
+        self.assertEqual(SocialData.objects.count(), 3)
+
+        remaining = BackgroundJobController.objects.filter(
+            job=BackgroundJob.JOB_LINK_DOWNLOAD_SOCIAL
+        )
+        self.assertEqual(list(remaining), [jobs[0]])
+
+    def test_process__force(self):
+        entry = LinkDataController.objects.create(
+            link="https://youtube.com/watch?v=1",
+            title="Link",
+            date_published=DateUtils.get_datetime_now_utc() - timedelta(days=30),
+        )
+        SocialData.objects.create(view_count=1, entry=entry)
+
+        job = BackgroundJobController.link_download_social_data(entry, force=True)
+
+        handler = LinkDownloadSocialData()
+
+        # call tested function
+        handler.process(job)
+
+        self.assertEqual(SocialData.objects.get(entry=entry).view_count, 15)
+
+
+class LinkAddKeywordsJobHandlerTest(FakeInternetTestCase):
+    def setUp(self):
+        self.disable_web_pages()
+        self.setup_configuration()
+
+        config = Configuration.get_object().config_entry
+        config.enable_keyword_support = True
+        config.save()
+
+    def test_process__coalesces_jobs(self):
+        entries = []
+        for index in range(3):
+            entries.append(
+                LinkDataController.objects.create(
+                    link="https://youtube.com/watch?v={}".format(index),
+                    title="Link {}".format(index),
+                    language="en",
+                    date_published=DateUtils.get_datetime_now_utc(),
+                )
+            )
+
+        jobs = BackgroundJobController.link_add_keywords_entries(entries)
+
+        handler = LinkAddKeywordsJobHandler()
+
+        # call tested function
+        result = handler.process(jobs[0])
+
+        self.assertTrue(result)
+
+        remaining = BackgroundJobController.objects.filter(
+            job=BackgroundJob.JOB_LINK_ADD_KEYWORDS
+        )
+        self.assertEqual(list(remaining), [jobs[0]])
+
+
 class RunRuleJobHandlerTest(FakeInternetTestCase):
     def setUp(self):
         self.disable_web_pages()
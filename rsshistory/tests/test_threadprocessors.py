@@ -34,6 +34,7 @@ from ..threadprocessors import (
     LeftOverJobsProcessor,
     RefreshProcessor,
     SystemJobsProcessor,
+    process_job_task,
 )
 
 from .fakeinternet import FakeInternetTestCase
@@ -780,6 +781,37 @@ class SourceJobsProcessorTest(FakeInternetTestCase):
         self.assertEqual(handler_obj, job2)
         self.assertEqual(handler.get_job(), BackgroundJobController.JOB_PROCESS_SOURCE)
 
+    def test_claim_source_jobs(self):
+        job1 = BackgroundJobController.objects.create(
+            job=BackgroundJobController.JOB_PROCESS_SOURCE,
+            enabled=True,
+            subject=str(self.source.id),
+            task="task1",
+        )
+        job2 = BackgroundJobController.objects.create(
+            job=BackgroundJobController.JOB_PROCESS_SOURCE,
+            enabled=True,
+            subject=str(self.source2.id),
+        )
+        job3 = BackgroundJobController.objects.create(
+            job=BackgroundJobController.JOB_PROCESS_SOURCE,
+            enabled=True,
+            subject=str(self.source_linkedin.id),
+        )
+
+        mgr = SourceJobsProcessor(thread_name="task2")
+        # call tested function
+        claimed = mgr.claim_source_jobs()
+
+        # youtube is processed by task 1
+        self.assertEqual(claimed, [job3])
+
+        mgr = SourceJobsProcessor(thread_name="task1")
+        # call tested function
+        claimed = mgr.claim_source_jobs()
+
+        self.assertEqual(claimed, [job1, job2])
+
 
 class SystenJobProcessorTest(FakeInternetTestCase):
     def setUp(self):
@@ -856,6 +888,156 @@ class SystenJobProcessorTest(FakeInternetTestCase):
         self.assertEqual(handler_obj, self.obj)
         self.assertEqual(handler.get_job(), BackgroundJobController.JOB_TRUNCATE_TABLE)
 
+    def test_get_handler_and_object__claims_batch(self):
+        BackgroundJobController.objects.all().delete()
+
+        job1 = BackgroundJobController.objects.create(
+            job=BackgroundJobController.JOB_CLEANUP,
+            subject="1",
+            enabled=True,
+        )
+        job2 = BackgroundJobController.objects.create(
+            job=BackgroundJobController.JOB_CLEANUP,
+            subject="2",
+            enabled=True,
+        )
+
+        mgr = SystemJobsProcessor(thread_name="task1")
+        # call tested function
+        items = mgr.get_handler_and_object()
+
+        self.assertEqual(items[0], job1)
+        self.assertTrue(mgr.is_claimed_jobs())
+
+        job2.refresh_from_db()
+        self.assertEqual(job2.task, "task1")
+
+        other = SystemJobsProcessor(thread_name="task2")
+        # call tested function
+        self.assertEqual(other.get_handler_and_object(), [])
+
+        # call tested function
+        items = mgr.get_handler_and_object()
+
+        self.assertEqual(items[0], job2)
+        self.assertFalse(mgr.is_claimed_jobs())
+
+    def test_get_handler_and_object__lease_expired(self):
+        BackgroundJobController.objects.all().delete()
+
+        job = BackgroundJobController.objects.create(
+            job=BackgroundJobController.JOB_CLEANUP,
+            task="task1",
+            lease_expires=DateUtils.get_datetime_now_utc() - timedelta(minutes=1),
+            enabled=True,
+        )
+
+        mgr = SystemJobsProcessor(thread_name="task2")
+        # call tested function
+        items = mgr.get_handler_and_object()
+
+        self.assertEqual(items[0], job)
+        self.assertEqual(items[0].task, "task2")
+
+
+    def test_is_more_jobs__does_not_claim(self):
+        BackgroundJobController.objects.all().delete()
+
+        job = BackgroundJobController.objects.create(
+            job=BackgroundJobController.JOB_CLEANUP,
+            enabled=True,
+        )
+
+        mgr = SystemJobsProcessor(thread_name="task1")
+
+        # call tested function
+        self.assertTrue(mgr.is_more_jobs())
+
+        job.refresh_from_db()
+        self.assertIsNone(job.task)
+        self.assertIsNone(job.lease_expires)
+
+    def test_release_claimed_jobs(self):
+        BackgroundJobController.objects.all().delete()
+
+        job1 = BackgroundJobController.objects.create(
+            job=BackgroundJobController.JOB_CLEANUP,
+            subject="1",
+            enabled=True,
+        )
+        job2 = BackgroundJobController.objects.create(
+            job=BackgroundJobController.JOB_CLEANUP,
+            subject="2",
+            enabled=True,
+        )
+
+        mgr = SystemJobsProcessor(thread_name="task1")
+        mgr.get_handler_and_object()
+
+        # call tested function
+        mgr.release_claimed_jobs()
+
+        self.assertFalse(mgr.is_claimed_jobs())
+
+        job2.refresh_from_db()
+        self.assertIsNone(job2.task)
+        self.assertIsNone(job2.lease_expires)
+
+        # job which is being processed keeps its lease
+        job1.refresh_from_db()
+        self.assertEqual(job1.task, "task1")
+
+        other = SystemJobsProcessor(thread_name="task2")
+        items = other.get_handler_and_object()
+        self.assertEqual(items[0], job2)
+
+    def test_run_one_job__checks_failed(self):
+        BackgroundJobController.objects.all().delete()
+
+        for subject in ["1", "2", "3"]:
+            BackgroundJobController.objects.create(
+                job=BackgroundJobController.JOB_CLEANUP,
+                subject=subject,
+                enabled=True,
+            )
+
+        mgr = SystemJobsProcessor(thread_name="task1")
+        mgr.get_handler_and_object()
+
+        c = Configuration.get_object()
+        c.config_entry.block_job_queue = True
+        c.config_entry.save()
+
+        # call tested function
+        status = mgr.run_one_job()
+
+        self.assertFalse(status)
+        self.assertTrue(mgr.run_checks_failed)
+        self.assertEqual(len(mgr.claimed_jobs), 2)
+
+    def test_process_job_task__checks_failed(self):
+        BackgroundJobController.objects.all().delete()
+
+        BackgroundJobController.objects.create(
+            job=BackgroundJobController.JOB_CLEANUP,
+            subject="1",
+            enabled=True,
+        )
+
+        c = Configuration.get_object()
+        c.config_entry.enable_background_jobs = True
+        c.config_entry.block_job_queue = True
+        c.config_entry.save()
+
+        # call tested function
+        more_jobs, errors = process_job_task(
+            SystemJobsProcessor, None, "task1", False
+        )
+
+        self.assertFalse(more_jobs)
+        self.assertEqual(
+            BackgroundJobController.objects.filter(task__isnull=False).count(), 0
+        )
 
 class LeftOverJobsProcessorTest(FakeInternetTestCase):
     def setUp(self):
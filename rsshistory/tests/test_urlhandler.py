@@ -1,8 +1,13 @@
+import threading
+
+from django.db import connection
+
 from webtoolkit import (
     RssPage,
     HtmlPage,
 )
-from ..models import Browser, EntryRules
+from ..controllers import LinkDataController
+from ..models import Browser, BrowserStatistics, ConfigurationEntry, EntryRules
 
 from ..pluginurl.urlhandler import UrlHandler
 
@@ -165,6 +170,42 @@ class UrlHandlerTest(FakeInternetTestCase):
         self.assertIn("cookie1", request.cookies)
         self.assertFalse(request.handler_name)
 
+    def test_browser_to_request__copy(self):
+        Browser.objects.all().delete()
+
+        browser1 = Browser.objects.create(
+            name="test1",
+            settings='{"test_setting1" : "something1"}',
+        )
+
+        test_link = "https://rsspage.com/rss.xml"
+
+        handler = UrlHandler(test_link)
+        request = handler.browser_to_request(browser1)
+        request.settings["test_setting1"] = "changed"
+
+        # call tested function
+        with self.assertNumQueries(0):
+            request = handler.browser_to_request(browser1)
+
+        self.assertEqual(request.settings["test_setting1"], "something1")
+
+    def test_constructor__cached_browsers(self):
+        Browser.objects.all().delete()
+
+        Browser.objects.create(name="test1")
+        Browser.objects.create(name="test2")
+
+        test_link = "https://rsspage.com/rss.xml"
+
+        UrlHandler(test_link)
+
+        # call tested function
+        with self.assertNumQueries(0):
+            handler = UrlHandler(test_link)
+
+        self.assertEqual(len(handler.browsers), 2)
+
     def test_browser_to_request__arg_handler_name(self):
         Browser.objects.all().delete()
 
@@ -268,6 +309,72 @@ class UrlHandlerTest(FakeInternetTestCase):
         self.assertTrue(request.settings)
         self.assertIn("timeout_s", request.settings)
 
+    def test_get_properties__browser_statistics(self):
+        Browser.objects.all().delete()
+
+        browser1 = Browser.objects.create(name="test1", priority=0)
+        browser2 = Browser.objects.create(name="test2", priority=1)
+
+        test_url = "https://rsspage.com/rss.xml"
+
+        BrowserStatistics.add(browser1, test_url, False, 10)
+        BrowserStatistics.add(browser2, test_url, True, 10)
+
+        handler = UrlHandler(test_url)
+
+        # call tested function
+        properties = handler.get_properties()
+
+        self.assertTrue(properties)
+        self.assertEqual(handler.browsers[0].name, "test2")
+        self.assertEqual(handler.last_browser, browser2)
+
+        statistics = BrowserStatistics.objects.get(browser=browser2)
+        self.assertGreater(statistics.successes, 1)
+
+    def test_fetch_properties__no_database_access(self):
+        Browser.objects.all().delete()
+
+        browser = Browser.objects.create(name="test1")
+        entry = LinkDataController.objects.create(
+            link="https://rsspage.com/rss.xml", title="RSS"
+        )
+
+        handler = UrlHandler(entry=entry)
+        self.assertTrue(handler.prepare_fetch())
+
+        # configuration version would be checked by the next read of configuration
+        ConfigurationEntry.cache.date_checked = None
+
+        queries = []
+
+        def block_database(execute, sql, params, many, context):
+            queries.append(sql)
+            raise AssertionError("Database accessed by fetch thread")
+
+        def fetch():
+            with connection.execute_wrapper(block_database):
+                # call tested function
+                handler.fetch_properties()
+
+        thread = threading.Thread(target=fetch)
+        thread.start()
+        thread.join()
+
+        self.assertEqual(queries, [])
+        self.assertTrue(handler.is_fetched)
+
+        entry.refresh_from_db()
+        self.assertIsNone(entry.last_browser)
+
+        properties = handler.get_all_properties()
+
+        self.assertTrue(properties)
+
+        entry.refresh_from_db()
+        self.assertEqual(entry.last_browser, browser)
+        self.assertEqual(BrowserStatistics.objects.filter(browser=browser).count(), 1)
+
     def test_get_cleaned_link__linkedin(self):
         MockRequestCounter.mock_page_requests = 0
 
@@ -365,6 +365,25 @@ class EntryCompactedTagsTest(TestCase):
         compacts = EntryCompactedTags.objects.all()
         self.assertEqual(compacts.count(), 0)
 
+    def test_compact_entries(self):
+        UserTags.objects.all().delete()
+
+        UserTags.objects.bulk_create(
+            [
+                UserTags(entry=self.entry, user=self.user, tag="tag2"),
+                UserTags(entry=self.entry, user=self.user_super, tag="tag1"),
+            ]
+        )
+
+        # call tested function
+        EntryCompactedTags.compact_entries([self.entry.id])
+
+        compacts = EntryCompactedTags.objects.all()
+        self.assertEqual(compacts.count(), 1)
+
+        self.assertEqual(compacts[0].entry, self.entry)
+        self.assertEqual(compacts[0].tag, "tag1,tag2,")
+
 
 class UserVotesTest(TestCase):
     def setUp(self):
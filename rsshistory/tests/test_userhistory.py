@@ -7,6 +7,7 @@ from utils.dateutils import DateUtils
 from ..models import (
     UserSearchHistory,
     UserEntryVisitHistory,
+    UserEntryVisitEvent,
     UserEntryTransitionHistory,
     SearchHistory,
     EntryVisitHistory,
@@ -276,6 +277,7 @@ class UserEntryVisitHistoryTest(FakeInternetTestCase):
 
         # call tested function
         UserEntryVisitHistory.visited(entries[0], self.user)
+        UserEntryVisitHistory.process_visits()
 
         visits = UserEntryVisitHistory.objects.filter(entry=entries[0])
         self.assertEqual(visits.count(), 1)
@@ -284,6 +286,7 @@ class UserEntryVisitHistoryTest(FakeInternetTestCase):
 
         # call tested function
         UserEntryVisitHistory.visited(entries[0], self.user)
+        UserEntryVisitHistory.process_visits()
 
         # this call is not taken into consideration. Happened to fast. refresh, etc.
 
@@ -305,6 +308,7 @@ class UserEntryVisitHistoryTest(FakeInternetTestCase):
 
         # call tested function
         UserEntryVisitHistory.visited(youtube_entries[0], self.user, tiktok_entries[0])
+        UserEntryVisitHistory.process_visits()
 
         visits = UserEntryVisitHistory.objects.filter(entry=youtube_entries[0])
         self.assertEqual(visits.count(), 1)
@@ -317,6 +321,110 @@ class UserEntryVisitHistoryTest(FakeInternetTestCase):
         self.assertEqual(transition.entry_from, tiktok_entries[0])
         self.assertEqual(transition.entry_to, youtube_entries[0])
 
+    def test_visited__records_event(self):
+        # call tested function
+        with self.assertNumQueries(1):
+            UserEntryVisitHistory.visited(self.youtube_object, self.user)
+
+        self.assertEqual(UserEntryVisitEvent.objects.count(), 1)
+        self.assertEqual(UserEntryVisitHistory.objects.count(), 0)
+
+    def test_process_visits(self):
+        date = DateUtils.get_datetime_now_utc() - timedelta(minutes=30)
+
+        # f5 after half a minute is ignored
+        dates = [
+            date,
+            date + timedelta(minutes=5),
+            date + timedelta(minutes=10),
+            date + timedelta(minutes=10, seconds=30),
+        ]
+        entries = [
+            self.youtube_object,
+            self.tiktok_object,
+            self.youtube_object,
+            self.youtube_object,
+        ]
+
+        for entry, date_visit in zip(entries, dates):
+            UserEntryVisitEvent.objects.create(
+                user=self.user, entry=entry, date_visit=date_visit
+            )
+
+        # call tested function
+        processed = UserEntryVisitHistory.process_visits()
+
+        self.assertEqual(processed, 4)
+        self.assertEqual(UserEntryVisitEvent.objects.count(), 0)
+
+        visit = UserEntryVisitHistory.objects.get(entry=self.youtube_object)
+        self.assertEqual(visit.visits, 2)
+        self.assertEqual(visit.date_last_visit, dates[2])
+
+        visit = UserEntryVisitHistory.objects.get(entry=self.tiktok_object)
+        self.assertEqual(visit.visits, 1)
+
+        transitions = UserEntryTransitionHistory.objects.all()
+        self.assertEqual(transitions.count(), 2)
+        self.assertEqual(
+            transitions.get(entry_from=self.youtube_object).entry_to,
+            self.tiktok_object,
+        )
+        self.assertEqual(
+            transitions.get(entry_from=self.tiktok_object).entry_to,
+            self.youtube_object,
+        )
+
+        compacted = EntryVisitHistory.objects.get(entry=self.youtube_object)
+        self.assertEqual(compacted.visits, 2)
+
+        compacted = EntryTransitionHistory.objects.get(
+            entry_from=self.youtube_object, entry_to=self.tiktok_object
+        )
+        self.assertEqual(compacted.counter, 1)
+
+    def test_process_visits__existing(self):
+        date = DateUtils.get_datetime_now_utc() - timedelta(minutes=30)
+
+        UserEntryVisitHistory.objects.create(
+            user=self.user, entry=self.youtube_object, visits=3, date_last_visit=date
+        )
+        UserEntryTransitionHistory.objects.create(
+            user=self.user,
+            entry_from=self.youtube_object,
+            entry_to=self.tiktok_object,
+            counter=2,
+        )
+
+        UserEntryVisitEvent.objects.create(
+            user=self.user,
+            entry=self.tiktok_object,
+            date_visit=date + timedelta(minutes=5),
+        )
+        UserEntryVisitEvent.objects.create(
+            user=self.user,
+            entry=self.youtube_object,
+            entry_from=self.odysee_object,
+            date_visit=date + timedelta(minutes=10),
+        )
+
+        # call tested function
+        UserEntryVisitHistory.process_visits()
+
+        visit = UserEntryVisitHistory.objects.get(entry=self.youtube_object)
+        self.assertEqual(visit.visits, 4)
+
+        transition = UserEntryTransitionHistory.objects.get(
+            entry_from=self.youtube_object
+        )
+        self.assertEqual(transition.counter, 3)
+
+        transition = UserEntryTransitionHistory.objects.get(
+            entry_from=self.odysee_object
+        )
+        self.assertEqual(transition.entry_to, self.youtube_object)
+        self.assertEqual(transition.counter, 1)
+
     def test_entry_get_last_user_entry(self):
         """
         item cannot be too old, and cannot be too new
@@ -365,6 +473,7 @@ class UserEntryVisitHistoryTest(FakeInternetTestCase):
 
     def test_move_entry(self):
         UserEntryVisitHistory.visited(self.youtube_object, self.user)
+        UserEntryVisitHistory.process_visits()
 
         # call tested function
         UserEntryVisitHistory.move_entry(self.youtube_object, self.youtube_object_new)
@@ -374,6 +483,32 @@ class UserEntryVisitHistoryTest(FakeInternetTestCase):
         self.assertTrue(rows.count() > 0)
         self.assertEqual(rows[0].entry, self.youtube_object_new)
 
+    def test_move_entry__destination_visited(self):
+        date_visit = DateUtils.get_datetime_now_utc()
+
+        UserEntryVisitHistory.objects.create(
+            entry=self.youtube_object,
+            user=self.user,
+            visits=3,
+            date_last_visit=date_visit,
+        )
+        UserEntryVisitHistory.objects.create(
+            entry=self.youtube_object_new,
+            user=self.user,
+            visits=2,
+            date_last_visit=date_visit - timedelta(days=1),
+        )
+
+        # call tested function
+        UserEntryVisitHistory.move_entry(self.youtube_object, self.youtube_object_new)
+
+        rows = UserEntryVisitHistory.objects.filter(user=self.user)
+
+        self.assertEqual(rows.count(), 1)
+        self.assertEqual(rows[0].entry, self.youtube_object_new)
+        self.assertEqual(rows[0].visits, 5)
+        self.assertEqual(rows[0].date_last_visit, date_visit)
+
     def test_visit_burst(self):
         https_entry = LinkDataController.objects.create(
             source_url="https://archive.com/test",
@@ -404,6 +539,7 @@ class UserEntryVisitHistoryTest(FakeInternetTestCase):
 
         UserEntryVisitHistory.visited(http_entry, self.user)
         UserEntryVisitHistory.visited(youtube_entry, self.user)
+        UserEntryVisitHistory.process_visits()
 
         # verify before call
 
@@ -443,6 +579,7 @@ class UserEntryVisitHistoryTest(FakeInternetTestCase):
 
         UserEntryVisitHistory.visited(http_entry, self.user)
         UserEntryVisitHistory.visited(youtube_entry, self.user)
+        UserEntryVisitHistory.process_visits()
 
         all_transitions = UserEntryVisitHistory.cleanup()
 
@@ -4,7 +4,7 @@ from django.contrib.auth.models import User
 from utils.dateutils import DateUtils
 
 from ..apps import LinkDatabase
-from ..models import Browser
+from ..models import Browser, BrowserStatistics
 from ..controllers import (
     LinkDataController,
     BackgroundJobController,
@@ -31,6 +31,18 @@ class BrowserViewsTest(FakeInternetTestCase):
 
         self.assertEqual(response.status_code, 200)
 
+    def test_browser_statistics(self):
+        browser = Browser.objects.create(name="Test")
+        BrowserStatistics.add(browser, "https://rsspage.com/rss.xml", True, 1)
+
+        self.client.login(username="testuser", password="testpassword")
+
+        url = reverse("{}:browser-statistics".format(LinkDatabase.name))
+        response = self.client.get(url + "?domain=rsspage")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "rsspage.com")
+
     def test_browser_add(self):
         Browser.objects.create(name="Test")
 
@@ -1,6 +1,8 @@
 from django.urls import reverse
 from django.contrib.auth.models import User
-from datetime import date
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from datetime import date, timedelta
 
 from utils.dateutils import DateUtils
 
@@ -12,6 +14,7 @@ from ..controllers import (
     ArchiveLinkDataController,
     EntryDataBuilder,
     BackgroundJobController,
+    EntriesSearchIndex,
 )
 from ..models import (
     UserEntryVisitHistory,
@@ -21,7 +24,11 @@ from ..models import (
     DataExport,
     UserBookmarks,
     UserConfig,
+    UserTags,
     ApiKeys,
+    ReadLater,
+    SocialData,
+    SearchView,
 )
 from ..configuration import Configuration
 
@@ -107,6 +114,187 @@ class EntriesGenericViewsTest(FakeInternetTestCase):
 
         self.assertEqual(response.status_code, 200)
 
+    def create_entries_with_user_data(self, source, start, stop):
+        for index in range(start, stop):
+            entry = LinkDataController.objects.create(
+                link="https://example.com/{}".format(index),
+                title="Example {}".format(index),
+                source=source,
+                date_published=DateUtils.get_datetime_now_utc(),
+                language="en",
+            )
+            UserTags.objects.create(tag="tag{}".format(index), user=self.user, entry=entry)
+            UserBookmarks.objects.create(user=self.user, entry=entry)
+            ReadLater.objects.create(user=self.user, entry=entry)
+            SocialData.objects.create(entry=entry, view_count=index)
+
+    def test_entries_json__number_of_queries(self):
+        source = SourceDataController.objects.create(
+            url="https://example.com/rss.xml", title="Example"
+        )
+        url = reverse("{}:entries-json".format(LinkDatabase.name))
+
+        self.create_entries_with_user_data(source, 0, 2)
+
+        # configuration caches are filled by the first request
+        self.client.get(url)
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+
+        self.create_entries_with_user_data(source, 2, 10)
+
+        # call tested function
+        with self.assertNumQueries(len(context.captured_queries)):
+            response = self.client.get(url)
+
+        self.assertEqual(response.status_code, 200)
+
+        entries = response.json()["entries"]
+        self.assertEqual(len(entries), 11)
+
+        example = [entry for entry in entries if entry["link"] == "https://example.com/5"]
+        self.assertEqual(example[0]["tags"], ["tag5"])
+        self.assertEqual(example[0]["source__title"], "Example")
+        self.assertEqual(example[0]["view_count"], 5)
+        self.assertTrue(example[0]["user_bookmarked"])
+        self.assertTrue(example[0]["read_later"])
+        self.assertFalse(example[0]["visited"])
+
+    def test_entries_json__search_index(self):
+        config = Configuration.get_object().config_entry
+        config.enable_search_index = True
+        config.save()
+
+        EntriesSearchIndex.create()
+
+        entry = LinkDataController.objects.create(
+            link="https://linkedin.com/page3",
+            title="The third link, linkedin linkedin",
+            date_published=DateUtils.get_datetime_now_utc(),
+            language="en",
+        )
+
+        search_view = SearchView.objects.create(
+            name="Relevance", order_by="-search_rank, link", default=True
+        )
+
+        url = reverse("{}:entries-json".format(LinkDatabase.name))
+        url += "?search=linkedin&view={}".format(search_view.id)
+
+        # call tested function
+        response = self.client.get(url)
+
+        self.assertEqual(response.status_code, 200)
+
+        data = response.json()
+        links = [entry["link"] for entry in data["entries"]]
+
+        self.assertEqual(links, ["https://linkedin.com/page3", "https://linkedin.com"])
+
+    def get_cursor_pages(self, url):
+        pages = []
+        cursor = ""
+
+        while cursor is not None:
+            response = self.client.get(url + "&cursor={}".format(cursor))
+            self.assertEqual(response.status_code, 200)
+
+            data = response.json()
+            pages.append([entry["link"] for entry in data["entries"]])
+            cursor = data["next"]
+
+        return pages
+
+    def test_entries_json__cursor(self):
+        user_config = UserConfig.get(self.user)
+        user_config.links_per_page = 5
+        user_config.save()
+
+        date = DateUtils.get_datetime_now_utc()
+        for index in range(12):
+            LinkDataController.objects.create(
+                link="https://example.com/{:02}".format(index),
+                title="Example {}".format(index),
+                # two entries share each date
+                date_published=date - timedelta(days=index // 2),
+                language="en",
+            )
+
+        search_view = SearchView.objects.create(
+            name="Oldest", order_by="date_published", default=True
+        )
+
+        url = reverse("{}:entries-json".format(LinkDatabase.name))
+        url += "?view={}".format(search_view.id)
+
+        # call tested function
+        pages = self.get_cursor_pages(url)
+
+        self.assertEqual([len(page) for page in pages], [5, 5, 3])
+
+        links = [link for page in pages for link in page]
+        expected = list(
+            LinkDataController.objects.filter(age__isnull=True)
+            .order_by("date_published", "id")
+            .values_list("link", flat=True)
+        )
+        self.assertEqual(links, expected)
+
+    def test_entries_json__cursor__entry_limit(self):
+        user_config = UserConfig.get(self.user)
+        user_config.links_per_page = 5
+        user_config.save()
+
+        for index in range(12):
+            LinkDataController.objects.create(
+                link="https://example.com/{:02}".format(index),
+                title="Example {}".format(index),
+                date_published=DateUtils.get_datetime_now_utc(),
+                language="en",
+            )
+
+        search_view = SearchView.objects.create(
+            name="Limited", order_by="-date_published", entry_limit=7, default=True
+        )
+
+        url = reverse("{}:entries-json".format(LinkDatabase.name))
+        url += "?view={}".format(search_view.id)
+
+        # call tested function
+        pages = self.get_cursor_pages(url)
+
+        self.assertEqual([len(page) for page in pages], [5, 2])
+
+    def test_entries_json__cursor__count(self):
+        url = reverse("{}:entries-json".format(LinkDatabase.name))
+
+        # call tested function
+        response = self.client.get(url + "?cursor=")
+
+        data = response.json()
+        self.assertEqual(data["count"], None)
+        self.assertEqual(data["next"], None)
+
+        # call tested function
+        response = self.client.get(url + "?cursor=&count=1")
+
+        data = response.json()
+        self.assertEqual(data["count"], 1)
+
+    def test_entries_json__cursor__invalid(self):
+        url = reverse("{}:entries-json".format(LinkDatabase.name))
+
+        # call tested function
+        response = self.client.get(url + "?cursor=invalid")
+
+        self.assertEqual(response.status_code, 200)
+
+        data = response.json()
+        self.assertEqual(data["entries"], [])
+        self.assertTrue(len(data["errors"]) > 0)
+
     def test_entry_detail(self):
         url = reverse("{}:entry-detail".format(LinkDatabase.name), args=[0])
         response = self.client.get(url)
@@ -910,6 +1098,8 @@ class EntriesDetailViews(FakeInternetTestCase):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(MockRequestCounter.mock_page_requests, 0)
 
+        UserEntryVisitHistory.process_visits()
+
         visits = UserEntryVisitHistory.objects.all()
 
         self.assertEqual(visits.count(), 1)
@@ -941,6 +1131,8 @@ class EntriesDetailViews(FakeInternetTestCase):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(MockRequestCounter.mock_page_requests, 0)
 
+        UserEntryVisitHistory.process_visits()
+
         visits = UserEntryVisitHistory.objects.all()
 
         self.assertEqual(visits.count(), 1)
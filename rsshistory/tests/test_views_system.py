@@ -151,6 +151,16 @@ class SystemViewsTest(FakeInternetTestCase):
 
         self.assertEqual(response.status_code, 200)
 
+    def test_json_table_status__exact(self):
+        url = reverse("{}:json-table-status".format(LinkDatabase.name))
+        response = self.client.get(url + "?exact")
+
+        self.assertEqual(response.status_code, 200)
+
+        data = response.json()
+        self.assertIn("tables", data)
+        self.assertFalse(data["tables"][0]["estimated"])
+
     def test_json_system_status(self):
         url = reverse("{}:json-system-status".format(LinkDatabase.name))
         response = self.client.get(url)
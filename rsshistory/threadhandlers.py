@@ -44,6 +44,7 @@ from .models import (
     SearchHistory,
     UserEntryTransitionHistory,
     UserEntryVisitHistory,
+    UserEntryVisitEvent,
     EntryTransitionHistory,
     EntryVisitHistory,
     ModelFiles,
@@ -67,10 +68,13 @@ from .controllers import (
     EntriesCleanup,
     EntryUpdater,
     EntriesUpdater,
+    EntriesRatingUpdater,
     EntryPageCrawler,
     ModelFilesBuilder,
     SourceDataBuilder,
     SystemOperationController,
+    EntriesSearchIndex,
+    TableStatistics,
 )
 from .configuration import Configuration
 from .pluginurl import UrlHandler
@@ -98,7 +102,7 @@ class BaseJobHandler(object):
 
     def get_files_with_extension(self, input_path, extension):
         result = []
-        for root, dirs, files in os.walk(path):
+        for root, dirs, files in os.walk(input_path):
             for afile in files:
                 if afile.endswith(extension):
                     result.append(os.path.join(root, afile))
@@ -110,15 +114,43 @@ class BaseJobHandler(object):
 
         return {}
 
+    def claim_other_jobs(self, obj, limit):
+        """
+        Claims waiting jobs of the same kind, so that they are processed in one batch
+        """
+        conditions = Q(job=obj.job, enabled=True)
+        conditions &= ~Q(id=obj.id)
+
+        not_claimed = Q(task__isnull=True) | Q(
+            lease_expires__lt=DateUtils.get_datetime_now_utc()
+        )
+        if obj.task:
+            not_claimed |= Q(task=obj.task)
+        conditions &= not_claimed
+
+        return BackgroundJobController.claim_jobs(
+            conditions,
+            task=obj.task,
+            limit=limit,
+        )
+
 
 class ProcessSourceJobHandler(BaseJobHandler):
     """!
     Processes source, checks if contains new entries
     """
 
+    def __init__(self, config=None):
+        super().__init__(config)
+        # plugins with already fetched contents, by job subject
+        self.plugins = {}
+
     def get_job():
         return BackgroundJob.JOB_PROCESS_SOURCE
 
+    def set_plugins(self, plugins):
+        self.plugins = plugins
+
     def process(self, obj=None):
         try:
             source_id = int(obj.subject)
@@ -140,7 +172,9 @@ class ProcessSourceJobHandler(BaseJobHandler):
 
         source = sources[0]
 
-        plugin = SourceControllerBuilder.get(source_id)
+        plugin = self.plugins.pop(obj.subject, None)
+        if not plugin:
+            plugin = SourceControllerBuilder.get(source_id)
         if plugin:
             if plugin.check_for_data():
                 elapsed_sec = self.get_time_diff()
@@ -336,14 +370,53 @@ class LinkResetLocalDataJobHandler(BaseJobHandler):
         return cfg
 
 
+class EntriesResetLocalDataJobHandler(BaseJobHandler):
+    """!
+    Recalculates page rating of all entries
+    """
+
+    def get_job():
+        return BackgroundJob.JOB_ENTRIES_RESET_LOCAL_DATA
+
+    def process(self, obj=None):
+        changed = EntriesRatingUpdater().update()
+
+        AppLogging.debug("Page rating changed for {} entries".format(changed))
+
+        return True
+
+
+class ProcessVisitsJobHandler(BaseJobHandler):
+    """!
+    Aggregates visits recorded by web requests
+    """
+
+    def get_job():
+        return BackgroundJob.JOB_PROCESS_VISITS
+
+    def process(self, obj=None):
+        limit = 1000
+
+        while UserEntryVisitHistory.process_visits(limit) == limit:
+            pass
+
+        return True
+
+
 class LinkDownloadSocialData(BaseJobHandler):
+    """!
+    Downloads social data. Other waiting social data jobs are processed
+    together with this job, so that data are fetched, and saved in batches.
+    """
+
+    BATCH_SIZE = 20
+
     def get_job():
         return BackgroundJob.JOB_LINK_DOWNLOAD_SOCIAL
 
     def process(self, obj=None):
-        entry_id = None
         try:
-            entry_id = int(obj.subject)
+            int(obj.subject)
         except ValueError as E:
             AppLogging.exc(
                 exception_object=E,
@@ -352,10 +425,32 @@ class LinkDownloadSocialData(BaseJobHandler):
             # consume job
             return True
 
-        entries = LinkDataController.objects.filter(id=entry_id)
-        if entries.exists():
-            entry = entries[0]
-            SocialData.update(entry)
+        jobs = [obj] + self.claim_other_jobs(
+            obj, LinkDownloadSocialData.BATCH_SIZE - 1
+        )
+
+        entry_ids = []
+        forced_ids = set()
+        for job in jobs:
+            try:
+                entry_id = int(job.subject)
+            except ValueError:
+                continue
+
+            entry_ids.append(entry_id)
+            if job.get_cfg().get("force"):
+                forced_ids.add(entry_id)
+
+        entries = list(LinkDataController.objects.filter(id__in=entry_ids))
+
+        forced = [entry for entry in entries if entry.id in forced_ids]
+        other = [entry for entry in entries if entry.id not in forced_ids]
+
+        SocialData.update_entries(forced, force=True)
+        SocialData.update_entries(other)
+
+        # this job is removed by the processor
+        BackgroundJob.objects.filter(id__in=[job.id for job in jobs[1:]]).delete()
 
         return True
 
@@ -371,6 +466,54 @@ class LinkDownloadSocialData(BaseJobHandler):
         return cfg
 
 
+class LinkAddKeywordsJobHandler(BaseJobHandler):
+    """!
+    Adds keywords of entries. Other waiting keyword jobs are processed
+    together with this job, so that language model processes titles in batches.
+    """
+
+    BATCH_SIZE = 500
+
+    def get_job():
+        return BackgroundJob.JOB_LINK_ADD_KEYWORDS
+
+    def process(self, obj=None):
+        try:
+            int(obj.subject)
+        except ValueError as E:
+            AppLogging.exc(
+                exception_object=E,
+                info_text="Incorrect link ID:{}".format(obj.subject),
+            )
+            # consume job
+            return True
+
+        jobs = [obj] + self.claim_other_jobs(
+            obj, LinkAddKeywordsJobHandler.BATCH_SIZE - 1
+        )
+
+        entry_ids = []
+        for job in jobs:
+            try:
+                entry_ids.append(int(job.subject))
+            except ValueError:
+                continue
+
+        entries = LinkDataController.objects.filter(id__in=entry_ids).only(
+            "id", "title", "language", "date_published"
+        )
+
+        added = KeyWords.add_entries(entries)
+        AppLogging.debug(
+            "Added {} keywords for {} entries".format(added, len(entry_ids))
+        )
+
+        # this job is removed by the processor
+        BackgroundJob.objects.filter(id__in=[job.id for job in jobs[1:]]).delete()
+
+        return True
+
+
 class LinkDownloadJobHandler(BaseJobHandler):
     """!
     downloads entry
@@ -762,27 +905,22 @@ class ImportDailyDataJobHandler(BaseJobHandler):
             if adir != "bookmarks":
                 valid_dirs.append(import_path / adir)
 
+        files = []
         for avalid_dir in valid_dirs:
-            files = self.get_files_with_extension(avalid_dir, "json")
-            for afile in files:
-                self.import_one_file(afile)
-
-        return True
-
-    def import_one_file(self, afile):
-        with open(import_file) as json_file:
-            data = json.load(json_file)
-
-            for json_entry in data:
-                export_names = LinkDataController.get_export_names()
+            files.extend(self.get_files_with_extension(avalid_dir, "json"))
 
-                create_args = {}
-                for export_name in export_names:
-                    create_args[export_name] = json_source[export_name]
+        import_settings = {}
+        if obj and obj.args:
+            try:
+                import_settings = json.loads(obj.args)
+            except ValueError:
+                AppLogging.error("Cannot load JSON")
 
-                LinkDataController.objects.create(create_args)
+        # progress is stored in the job, interrupted import continues
+        importer = JsonImporter(import_settings=import_settings, job=obj)
+        importer.import_from_files(files)
 
-                # TODO import tags also
+        return True
 
 
 class ImportBookmarksJobHandler(BaseJobHandler):
@@ -914,7 +1052,8 @@ class ImportFromFilesJobHandler(BaseJobHandler):
         AppLogging.notify(
             "Importing from {}".format(path), detail_text="{}".format(data)
         )
-        importer = JsonImporter(path=path, user=user, import_settings=data)
+        # progress is stored in the job, interrupted import continues
+        importer = JsonImporter(path=path, user=user, import_settings=data, job=obj)
         importer.import_all()
 
         AppLogging.notify("Importing from {} DONE".format(path))
@@ -1250,6 +1389,9 @@ class CleanupJobHandler(BaseJobHandler):
         BackgroundJobController.create_single_job(
             BackgroundJob.JOB_CLEANUP, subject="SocialData", args=args
         )
+        BackgroundJobController.create_single_job(
+            BackgroundJob.JOB_CLEANUP, subject="TableStatistics", args=args
+        )
 
     def process(self, obj=None):
         """
@@ -1272,9 +1414,11 @@ class CleanupJobHandler(BaseJobHandler):
         AppLogging.notify("Cleanup. Table:{}".format(table))
 
         if table == "all" or table == "LinkDataController":
-            status = EntriesCleanup(archive_cleanup=False).cleanup(cfg)
+            if not EntriesCleanup(archive_cleanup=False).cleanup(cfg):
+                self.continue_cleanup(obj, "LinkDataController")
         if table == "all" or table == "ArchiveLinkDataController":
-            status = EntriesCleanup(archive_cleanup=True).cleanup(cfg)
+            if not EntriesCleanup(archive_cleanup=True).cleanup(cfg):
+                self.continue_cleanup(obj, "ArchiveLinkDataController")
         if table == "all" or table == "SourceDataController":
             SourceDataController.cleanup(cfg)
         if table == "all" or table == "AppLogging":
@@ -1321,6 +1465,8 @@ class CleanupJobHandler(BaseJobHandler):
             EntryTransitionHistory.cleanup(cfg)
         if table == "all" or table == "EntryVisitHistory":
             EntryVisitHistory.cleanup(cfg)
+        if table == "all" or table == "TableStatistics":
+            TableStatistics.cleanup(cfg)
 
         status = True
 
@@ -1328,6 +1474,21 @@ class CleanupJobHandler(BaseJobHandler):
         AppLogging.notify("Cleanup. Table:{} DONE. Time:{}".format(table, elapsed_sec))
         return status
 
+    def continue_cleanup(self, obj, table):
+        """
+        Time limit has been exceeded. Next job continues with remaining rows.
+
+        Current job still exists, therefore create_single_job cannot be used
+        """
+        AppLogging.notify("Cleanup. Table:{} continues in next job".format(table))
+
+        BackgroundJobController.objects.create(
+            job=BackgroundJob.JOB_CLEANUP,
+            subject=table,
+            args=obj.args,
+            priority=BackgroundJobController.get_job_priority(BackgroundJob.JOB_CLEANUP),
+        )
+
 
 class TruncateTableJobHandler(BaseJobHandler):
     """!
@@ -1589,6 +1750,11 @@ class RefreshJobHandler(BaseJobHandler):
         if systemcontroller.is_time_to_cleanup():
             CleanupJobHandler.create_jobs()
 
+        EntriesSearchIndex.check()
+
+        if UserEntryVisitEvent.objects.exists():
+            BackgroundJobController.create_single_job(BackgroundJob.JOB_PROCESS_VISITS)
+
         self.update_entries()
 
     def check_sources(self):
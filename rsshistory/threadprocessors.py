@@ -13,6 +13,7 @@ import traceback
 import json
 import os
 import gc
+from collections import deque
 from datetime import date, datetime, timedelta
 from pathlib import Path
 
@@ -33,8 +34,10 @@ from .models import (
     BackgroundJob,
     BackgroundJobHistory,
     ConfigurationEntry,
+    KeyWords,
 )
 from .pluginsources.sourcecontrollerbuilder import SourceControllerBuilder
+from .pluginsources.sourcefetchpool import SourceFetchPool
 from .controllers import (
     BackgroundJobController,
     SourceDataController,
@@ -63,7 +66,10 @@ from .threadhandlers import (
     LinkScanJobHandler,
     LinkResetDataJobHandler,
     LinkResetLocalDataJobHandler,
+    ProcessVisitsJobHandler,
+    EntriesResetLocalDataJobHandler,
     LinkDownloadSocialData,
+    LinkAddKeywordsJobHandler,
     LinkDownloadJobHandler,
     LinkMusicDownloadJobHandler,
     LinkVideoDownloadJobHandler,
@@ -85,6 +91,10 @@ class ProcessorInterface(object):
         self.check_memory = check_memory
         self.processors_list = processors_list
         self.thread_name = thread_name
+        self.claimed_jobs = deque()
+        self.claim_batch_size = BackgroundJobController.CLAIM_BATCH_SIZE
+        # set by run_one_job, if jobs could not be run
+        self.run_checks_failed = False
 
     def run(self):
         raise NotImplementedError("Not implemented")
@@ -123,8 +133,11 @@ class ProcessorInterface(object):
             LinkScanJobHandler,
             LinkResetDataJobHandler,
             LinkResetLocalDataJobHandler,
+            ProcessVisitsJobHandler,
+            EntriesResetLocalDataJobHandler,
             LinkDownloadJobHandler,
             LinkDownloadSocialData,
+            LinkAddKeywordsJobHandler,
             LinkMusicDownloadJobHandler,
             LinkVideoDownloadJobHandler,
             DownloadModelFileJobHandler,
@@ -188,33 +201,56 @@ class ProcessorInterface(object):
             query_conditions &= jobs_conditions
 
         if self.thread_name:
-            query_conditions &= (Q(task=self.thread_name) | Q(task__isnull=True))
+            lease_expired = Q(lease_expires__lt=DateUtils.get_datetime_now_utc())
+            query_conditions &= (Q(task=self.thread_name) | Q(task__isnull=True) | lease_expired)
 
         return query_conditions
 
     def get_handler_and_object(self):
         """
-        TODO select should be based on priority
+        Jobs are claimed in batches, and processed locally.
+        Every next job from the batch has its lease renewed before processing.
         """
         jobs = self.get_supported_jobs()
         if not jobs:
             return []
 
-        query_conditions = self.get_query_conditions()
+        while True:
+            if len(self.claimed_jobs) == 0:
+                query_conditions = self.get_query_conditions()
 
-        # AppLogging.debug("Query conditions:{}".format(query_conditions))
+                # AppLogging.debug("Query conditions:{}".format(query_conditions))
 
-        # order is in meta
-        objs = BackgroundJobController.objects.filter(query_conditions)
-        if objs.exists():
-            obj = objs.first()
-            if obj:
-                obj.task = self.thread_name
-                obj.save()
+                # priority order
+                claimed = BackgroundJobController.claim_jobs(
+                    query_conditions,
+                    task=self.thread_name,
+                    limit=self.claim_batch_size,
+                )
+                if len(claimed) == 0:
+                    return []
 
-                handler = self.get_job_handler(obj)
-                return [obj, handler]
-        return []
+                obj = claimed[0]
+                self.claimed_jobs.extend(claimed[1:])
+            else:
+                obj = self.claimed_jobs.popleft()
+                if not obj.renew_lease(self.thread_name):
+                    continue
+
+            handler = self.get_job_handler(obj)
+            return [obj, handler]
+
+    def is_claimed_jobs(self):
+        return len(self.claimed_jobs) > 0
+
+    def release_claimed_jobs(self):
+        """
+        Claimed jobs, which were not processed, are released for other tasks
+        """
+        jobs = list(self.claimed_jobs)
+        self.claimed_jobs.clear()
+
+        BackgroundJobController.release_jobs(jobs, self.thread_name)
 
     def get_job_handler(self, obj):
         for handler_class in self.get_handlers():
@@ -382,28 +418,27 @@ class GenericJobsProcessor(ProcessorInterface):
         self.process_job(items)
 
     def is_more_jobs(self):
-        if not self.perform_run_checks():
-            return False
+        if self.is_claimed_jobs():
+            return True
 
-        items = self.get_handler_and_object()
-        if len(items) == 0:
-            # AppLogging.debug("{}: No jobs".format(self.get_name()))
+        if not self.perform_run_checks():
             return False
 
-        AppLogging.debug("{}: we have more items {}".format(self.get_name(), items))
-
-        c = Configuration.get_object()
-        config = c.config_entry
-        if config.block_job_queue:
+        if not self.get_supported_jobs():
             return False
 
-        return True
+        # jobs are not claimed, they are only checked
+        return BackgroundJobController.objects.filter(
+            self.get_query_conditions()
+        ).exists()
 
     def run_one_job(self):
         """
-        return True, if processing should stop
+        return True, if processing should stop.
+        run_checks_failed is set, if no job could be run
         """
-        if not self.perform_run_checks():
+        self.run_checks_failed = not self.perform_run_checks()
+        if self.run_checks_failed:
             return False
 
         items = self.get_handler_and_object()
@@ -417,6 +452,7 @@ class GenericJobsProcessor(ProcessorInterface):
 
         except KeyboardInterrupt:
             AppLogging.debug("{}: Keyboard interrupt".format(self.get_name()))
+            BackgroundJobController.release_jobs([items[0]], self.thread_name)
             return True
 
         except Exception as E:
@@ -444,6 +480,7 @@ class GenericJobsProcessor(ProcessorInterface):
                     info_text="Job:{}, Subject:{}".format(obj.job, obj.subject),
                 )
                 obj.on_error()
+                BackgroundJobController.release_jobs([obj], self.thread_name)
             else:
                 AppLogging.exc(
                     E,
@@ -466,7 +503,7 @@ class GenericJobsProcessor(ProcessorInterface):
         AppLogging.debug("{}: Processing job {}".format(self.get_name(), str(obj)))
 
         if handler_class:
-            handler = handler_class(config)
+            handler = self.create_handler(handler_class, config)
 
             if handler:
                 BackgroundJobHistory.mark_job_done(obj)
@@ -498,6 +535,9 @@ class GenericJobsProcessor(ProcessorInterface):
             if handler_class.get_job() == obj.job:
                 return handler_class
 
+    def create_handler(self, handler_class, config):
+        return handler_class(config)
+
     def on_not_safe_exit(self, items):
         AppLogging.debug("Not safe exit, adjusting job priorities.")
 
@@ -511,6 +551,11 @@ class SourceJobsProcessor(GenericJobsProcessor):
     Processes only source jobs
     """
 
+    def __init__(self, processors_list=None, thread_name=None, check_memory=False, timeout_s=60 * 1):
+        super().__init__(processors_list=processors_list, thread_name=thread_name, check_memory=check_memory, timeout_s=timeout_s)
+        # plugins with fetched contents, by job subject
+        self.fetched_plugins = {}
+
     def get_supported_jobs(self):
         return [
             BackgroundJob.JOB_PROCESS_SOURCE,
@@ -518,50 +563,144 @@ class SourceJobsProcessor(GenericJobsProcessor):
 
     def get_handler_and_object(self):
         """
-        TODO select should be based on priority
+        Source jobs are claimed in batches. Contents of claimed sources are fetched
+        concurrently, then sources are processed one by one.
         @return [] if nothing to do
         """
         jobs = self.get_supported_jobs()
         if not jobs:
             return []
 
-        # AppLogging.debug("Query conditions:{}".format(query_conditions))
+        while True:
+            if len(self.claimed_jobs) == 0:
+                claimed = self.claim_source_jobs()
+                if len(claimed) == 0:
+                    return []
+
+                self.fetch_sources(claimed)
+                self.claimed_jobs.extend(claimed)
+
+            job = self.claimed_jobs.popleft()
+            if not job.renew_lease(self.thread_name):
+                self.fetched_plugins.pop(job.subject, None)
+                continue
+
+            handler = self.get_job_handler(job)
+            return [job, handler]
 
-        # order is in meta
+    def get_used_domains(self):
+        """
+        Domains that are processed by other tasks
+        """
         used_domains = set()
 
         used_jobs = BackgroundJobController.objects.filter(job = BackgroundJob.JOB_PROCESS_SOURCE,
                                                            task__isnull=False,
                                                            enabled=True)
-        if used_jobs.exists():
-            for used_job in used_jobs:
-                source = used_job.get_source()
-                if source:
-                    location = UrlLocation(source.url)
-                    domain = location.get_domain_only()
-                    if domain:
-                        used_domains.add(domain)
+        if self.thread_name:
+            used_jobs = used_jobs.exclude(task=self.thread_name)
+
+        for used_job in used_jobs:
+            source = used_job.get_source()
+            if source:
+                location = UrlLocation(source.url)
+                domain = location.get_domain_only()
+                if domain:
+                    used_domains.add(domain)
+
+        return used_domains
+
+    def claim_source_jobs(self):
+        # AppLogging.debug("Query conditions:{}".format(query_conditions))
+
+        used_domains = self.get_used_domains()
 
         query_conditions = self.get_query_conditions()
 
-        jobs = BackgroundJobController.objects.filter(query_conditions)
-        if jobs.exists():
-            for job in jobs:
-                if self.thread_name and job.task == self.thread_name:
-                    handler = self.get_job_handler(job)
-                    return [job, handler]
-
-                source = job.get_source()
-                if source:
-                    location = UrlLocation(source.url)
-                    domain = location.get_domain_only()
-                    if domain and domain not in used_domains:
-                        job.task = self.thread_name
-                        job.save()
-
-                        handler = self.get_job_handler(job)
-                        return [job, handler]
-        return []
+        # priority order is in meta
+        jobs = BackgroundJobController.objects.filter(query_conditions).values_list(
+            "id", "subject"
+        )
+
+        selected_ids = []
+        for jobs_page in self.get_pages(jobs, 500):
+            source_ids = []
+            for job_id, subject in jobs_page:
+                try:
+                    source_ids.append(int(subject))
+                except ValueError:
+                    pass
+
+            sources = SourceDataController.objects.filter(id__in=source_ids)
+            source_urls = dict(sources.values_list("id", "url"))
+
+            for job_id, subject in jobs_page:
+                try:
+                    url = source_urls.get(int(subject))
+                except ValueError:
+                    url = None
+
+                # invalid jobs are also claimed. Handler will report them
+                domain = None
+                if url:
+                    domain = UrlLocation(url).get_domain_only()
+
+                if domain is None or domain not in used_domains:
+                    selected_ids.append(job_id)
+
+                if len(selected_ids) >= self.claim_batch_size:
+                    break
+
+            if len(selected_ids) >= self.claim_batch_size:
+                break
+
+        if len(selected_ids) == 0:
+            return []
+
+        return BackgroundJobController.claim_jobs(
+            Q(id__in=selected_ids) & query_conditions,
+            task=self.thread_name,
+            limit=len(selected_ids),
+        )
+
+    def get_pages(self, queryset, page_size):
+        paginator = Paginator(queryset, page_size)
+        for page_num in paginator.page_range:
+            yield list(paginator.page(page_num).object_list)
+
+    def fetch_sources(self, jobs):
+        config = Configuration.get_object().config_entry
+
+        plugins = []
+        for job in jobs:
+            source = job.get_source()
+            if not source or not source.enabled:
+                continue
+
+            plugin = SourceControllerBuilder.get(source.id)
+            if plugin:
+                self.fetched_plugins[job.subject] = plugin
+                plugins.append(plugin)
+
+        pool = SourceFetchPool(
+            max_workers=config.sources_fetch_workers,
+            max_per_domain=config.sources_fetch_per_domain,
+        )
+        pool.fetch(plugins)
+
+    def release_claimed_jobs(self):
+        for job in self.claimed_jobs:
+            self.fetched_plugins.pop(job.subject, None)
+
+        super().release_claimed_jobs()
+
+    def create_handler(self, handler_class, config):
+        handler = super().create_handler(handler_class, config)
+
+        if isinstance(handler, ProcessSourceJobHandler):
+            handler.set_plugins(self.fetched_plugins)
+
+        return handler
 
 
 class WriteJobsProcessor(GenericJobsProcessor):
@@ -604,6 +743,8 @@ class SystemJobsProcessor(GenericJobsProcessor):
             BackgroundJob.JOB_CLEANUP,
             BackgroundJob.JOB_TRUNCATE_TABLE,
             BackgroundJob.JOB_LINK_RESET_LOCAL_DATA,
+            BackgroundJob.JOB_PROCESS_VISITS,
+            BackgroundJob.JOB_ENTRIES_RESET_LOCAL_DATA,
         ]
 
 
@@ -616,6 +757,7 @@ class UpdateJobsProcessor(GenericJobsProcessor):
         return [
             BackgroundJob.JOB_LINK_UPDATE_DATA,
             BackgroundJob.JOB_LINK_DOWNLOAD_SOCIAL,
+            BackgroundJob.JOB_LINK_ADD_KEYWORDS,
         ]
 
 
@@ -722,14 +864,15 @@ def process_jobs_task(Processor, processors_list, thread_name, check_memory):
     if not c.config_entry.enable_background_jobs:
         return False, False
 
-    c.config_entry = ConfigurationEntry.get()
-
     handler = Processor(processors_list=processors_list, thread_name=thread_name, check_memory=check_memory)
 
-    handler.run()
+    try:
+        handler.run()
 
-    more_jobs = handler.is_more_jobs()
-    errors = handler.is_error()
+        more_jobs = handler.is_more_jobs()
+        errors = handler.is_error()
+    finally:
+        handler.release_claimed_jobs()
 
     gc.collect()
 
@@ -745,15 +888,62 @@ def process_job_task(Processor, processors_list, thread_name, check_memory):
     if not c.config_entry.enable_background_jobs:
         return False, False
 
-    c.config_entry = ConfigurationEntry.get()
+    # jobs log a lot, records are written in bulk
+    AppLogging.set_buffered(True)
 
-    handler = Processor(processors_list=processors_list, thread_name=thread_name, check_memory=check_memory)
+    handler = None
+
+    try:
+        handler = Processor(processors_list=processors_list, thread_name=thread_name, check_memory=check_memory)
+
+        status = handler.run_one_job()
+
+        # process the rest of claimed batch locally. If jobs cannot be run,
+        # the batch is released for other tasks
+        while handler.is_claimed_jobs():
+            if status or handler.run_checks_failed or handler.is_error():
+                break
+
+            claimed_count = len(handler.claimed_jobs)
+
+            status = handler.run_one_job()
+
+            if not handler.run_checks_failed and len(handler.claimed_jobs) >= claimed_count:
+                # no job was taken from the batch
+                break
 
-    status = handler.run_one_job()
+        more_jobs = handler.is_more_jobs()
+        errors = handler.is_error()
+    finally:
+        if handler:
+            handler.release_claimed_jobs()
 
-    more_jobs = handler.is_more_jobs()
-    errors = handler.is_error()
+        AppLogging.set_buffered(False)
 
     gc.collect()
 
     return more_jobs, errors
+
+
+def startup(Processor, processors_list, thread_name):
+    """!
+    Called once, when worker thread is started
+    """
+    c = Configuration.get_object()
+    if not c.config_entry.enable_keyword_support:
+        return
+
+    processor = Processor(processors_list=processors_list, thread_name=thread_name)
+    jobs = processor.get_supported_jobs()
+
+    # loading language model takes seconds, the first job should not wait for it
+    if jobs and BackgroundJob.JOB_LINK_ADD_KEYWORDS in jobs:
+        KeyWords.warm_up()
+
+
+def shutdown():
+    """!
+    Called when worker process is closed. Worker threads have already
+    finished, and written their buffered logs
+    """
+    AppLogging.set_buffered(False)
@@ -60,6 +60,7 @@ urlpatterns = [
     path("json-entry-reset-data/<int:pk>/", entries.json_entry_reset_data, name="json-entry-reset-data"),
     path("json-entry-update-data/<int:pk>/", entries.json_entry_update_data, name="json-entry-update-data"),
     path("json-entry-reset-local-data/<int:pk>/", entries.json_entry_reset_local_data, name="json-entry-reset-local-data"),
+    path("json-entries-reset-local-data", entries.json_entries_reset_local_data, name="json-entries-reset-local-data"),
     path("entry-edit/<int:pk>/", entries.edit_entry, name="entry-edit"),
     path("json-entry-remove/<int:pk>/", entries.entry_remove, name="json-entry-remove"),
     path("entry-dislikes/<int:pk>/", entries.entry_dislikes, name="entry-dislikes"),
@@ -277,6 +278,7 @@ urlpatterns = [
     path("browser-edit/<int:pk>/", browsers.edit, name="browser-edit"),
     path("browser-prio-up/<int:pk>/", browsers.prio_up, name="browser-prio-up"),
     path("browser-prio-down/<int:pk>/", browsers.prio_down, name="browser-prio-down"),
+    path("browser-statistics/", browsers.BrowserStatisticsListView.as_view(), name="browser-statistics",),
     # gateways
     path("gateways", tools.gateways, name="gateways",),
     path("gateways-initialize", tools.gateways_initialize, name="gateways-initialize",),
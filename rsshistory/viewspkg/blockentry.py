@@ -84,6 +84,7 @@ def block_lists_clear(request):
 
     BlockEntryList.objects.all().delete()
     BlockEntry.objects.all().delete()
+    BlockEntry.update_version()
 
     return redirect("{}:block-lists".format(LinkDatabase.name))
 
@@ -112,6 +113,7 @@ class BlockEntryListView(GenericListView):
             value = self.request.GET["url"]
             queryset = super().get_queryset().filter(url=value)
             queryset.delete()
+            BlockEntry.update_version()
 
         print("BlockEntryListView:get_queryset")
         if "url" in self.request.GET:
@@ -6,7 +6,7 @@ from ..models import Browser
 from ..controllers import (
     LinkDataController,
 )
-from ..models import ConfigurationEntry, Browser
+from ..models import ConfigurationEntry, Browser, BrowserStatistics
 from ..views import ViewPage, SimpleViewPage, GenericListView, get_form_errors
 from ..apps import LinkDatabase
 from ..forms import BrowserEditForm
@@ -21,6 +21,28 @@ class BrowserListView(GenericListView):
         return "Browsers"
 
 
+class BrowserStatisticsListView(GenericListView):
+    model = BrowserStatistics
+    context_object_name = "content_list"
+    paginate_by = 100
+
+    def get_queryset(self):
+        p = SimpleViewPage(self.request)
+        if not p.is_allowed():
+            return redirect("{}:missing-rights".format(LinkDatabase.name))
+
+        objects = BrowserStatistics.objects.select_related("browser")
+
+        domain = self.request.GET.get("domain")
+        if domain:
+            objects = objects.filter(domain__icontains=domain)
+
+        return objects
+
+    def get_title(self):
+        return "Browser statistics"
+
+
 def apply_browser_setup(request):
     p = ViewPage(request)
     p.set_title("Clear entire later list")
@@ -19,7 +19,7 @@ from webtoolkit import UrlLocation
 
 from ..apps import LinkDatabase
 
-from ..serializers import entry_to_json, entry_parameters_json
+from ..serializers import entry_to_json, entries_to_json, entry_parameters_json
 
 from ..models import (
     BaseLinkDataController,
@@ -46,6 +46,7 @@ from ..controllers import (
     BackgroundJobController,
     SearchEngines,
     SystemOperationController,
+    EntriesSearchIndex,
 )
 from ..forms import (
     EntryForm,
@@ -68,6 +69,7 @@ from ..views import (
     get_search_view,
 )
 from ..queryfilters import EntryFilter, DjangoEquationProcessor
+from ..paginators import KeysetPaginator
 from ..configuration import Configuration
 from ..serializers.instanceimporter import InstanceExporter
 from .plugins.entrypreviewbuilder import EntryPreviewBuilder
@@ -170,6 +172,7 @@ class EntriesSearchListView(object):
         self.conditions = None
         self.search_view = None
         self.query_filter = None
+        self.search_index = None
         self.start_time = time.time()
         self.errors = []
 
@@ -187,7 +190,7 @@ class EntriesSearchListView(object):
     def get_time_diff_text(self, text):
         print(text + " " + str(self.get_time_diff()))
 
-    def get_queryset(self):
+    def get_queryset(self, use_entry_limit=True):
         """
         API: Returns queryset
         """
@@ -202,16 +205,16 @@ class EntriesSearchListView(object):
 
         # TODO can we check if filtered objects are none?
         try:
-            queryset = (
-                self.get_filtered_objects().order_by(*self.get_order_by()).distinct()
-            )
+            queryset = self.get_filtered_objects()
+            queryset = self.annotate_search_rank(queryset)
+            queryset = queryset.order_by(*self.get_order_by()).distinct()
         except Exception as E:
             self.errors.append("Cannot obtain filtered objects {}".format(str(E)))
             return self.get_nonequery_set()
 
         self.get_time_diff_text("EntriesSearchListView:get_queryset - after distinct")
 
-        if search_view.entry_limit:
+        if search_view.entry_limit and use_entry_limit:
             queryset = queryset[: search_view.entry_limit]
 
         self.get_time_diff_text("EntriesSearchListView:get_queryset DONE")
@@ -250,8 +253,32 @@ class EntriesSearchListView(object):
         delimiter = ","
         input_string = search_view.order_by
         result_list = [item.strip() for item in input_string.split(delimiter)]
+
+        if not self.is_search_rank():
+            result_list = [
+                item
+                for item in result_list
+                if item.lstrip("-") != EntriesSearchIndex.RANK
+            ]
+
         return result_list
 
+    def is_search_rank(self):
+        """
+        Entries can be sorted by rank, if search index is used
+        """
+        if not self.search_index:
+            return False
+
+        return bool(self.request.GET.get("search"))
+
+    def annotate_search_rank(self, queryset):
+        if not self.is_search_rank():
+            return queryset
+
+        rank = self.search_index.get_rank(self.request.GET["search"])
+        return queryset.annotate(**{EntriesSearchIndex.RANK: rank})
+
     def get_search_view(self):
         if self.search_view:
             return self.search_view
@@ -271,6 +298,10 @@ class EntriesSearchListView(object):
         translate = BaseLinkDataController.get_query_names()
         query_filter.set_translation_mapping(translate)
 
+        if not self.is_archive() and EntriesSearchIndex.is_enabled():
+            self.search_index = EntriesSearchIndex
+            query_filter.set_search_index(self.search_index)
+
         if "archive" in self.request.GET and self.request.GET["archive"] == "on":
             query_filter.set_default_search_symbols(
                 [
@@ -432,7 +463,6 @@ class EntryDetailView(generic.DetailView):
             entry = self.object
 
             UserEntryVisitHistory.visited(entry, self.request.user, from_entry)
-            BackgroundJobController.entry_reset_local_data(entry)
 
     def get_from_entry(self):
         from_entry = None
@@ -814,6 +844,20 @@ def json_entry_reset_local_data(request, pk):
     return JsonResponse(data, json_dumps_params={"indent": 4})
 
 
+def json_entries_reset_local_data(request):
+    p = SimpleViewPage(request, ConfigurationEntry.ACCESS_TYPE_STAFF)
+    if not p.is_allowed():
+        return redirect("{}:missing-rights".format(LinkDatabase.name))
+
+    data = {}
+
+    BackgroundJobController.entries_reset_local_data()
+    data["status"] = True
+    data["message"] = "Added page rating job"
+
+    return JsonResponse(data, json_dumps_params={"indent": 4})
+
+
 def edit_entry(request, pk):
     p = ViewPage(request)
     p.set_title("Edit entry")
@@ -1076,7 +1120,34 @@ def entry_json(request, pk):
     return JsonResponse(full_json, json_dumps_params={"indent": 4})
 
 
+def get_json_entries(request, entries):
+    user_config = UserConfig.get(request.user)
+    config_entry = Configuration.get_object().config_entry
+
+    json_entries, related = entries_to_json(
+        user_config, entries, with_tags=True, with_social=True
+    )
+    read_laters, visits = related.get_user_marks(request.user)
+
+    social_entries = []
+    for entry, entry_json in zip(entries, json_entries):
+        if config_entry.browse_entries_fetch_social_data:
+            if not related.get_social(entry) and SocialData.is_supported(entry):
+                social_entries.append(entry)
+
+        entry_json["read_later"] = entry.id in read_laters
+        entry_json["visited"] = entry.id in visits
+
+    if len(social_entries) > 0:
+        BackgroundJobController.link_download_social_data_entries(social_entries)
+
+    return json_entries
+
+
 def handle_json_view(request, view_to_use):
+    if "cursor" in request.GET:
+        return handle_json_view_keyset(request, view_to_use)
+
     page_num = get_page_num(request.GET)
 
     show_tags = False
@@ -1095,9 +1166,6 @@ def handle_json_view(request, view_to_use):
 
     view_to_use.get_time_diff_text("handle_json_view start")
 
-    user_config = UserConfig.get(request.user)
-    config_entry = Configuration.get_object().config_entry
-
     if view_to_use:
         view_to_use.get_time_diff_text("handle_json_view get queryset")
         entries = view_to_use.get_queryset()
@@ -1121,26 +1189,65 @@ def handle_json_view(request, view_to_use):
             start -= 1
 
         if page_num <= p.num_pages:
-            for entry in page_obj:
-                if config_entry.browse_entries_fetch_social_data:
-                    SocialData.get(entry)
+            json_obj["entries"] = get_json_entries(request, list(page_obj))
+
+        json_obj["timestamp_s"] = time.time() - start_time
+        view_to_use.get_time_diff_text("handle_json_view returning")
+
+        return JsonResponse(json_obj, json_dumps_params={"indent": 4})
+
+
+def handle_json_view_keyset(request, view_to_use):
+    """
+    Pages are identified by opaque "cursor". Empty cursor is the first page,
+    "next" is the cursor of the next page, or None.
+    Count is calculated only if "count" is requested.
+    """
+    json_obj = {}
+    json_obj["entries"] = []
+    json_obj["count"] = None
+    json_obj["next"] = None
+    json_obj["view"] = None
+    json_obj["errors"] = []
 
-                entry_json = entry_to_json(user_config, entry, with_tags=True, with_social=True)
+    start_time = time.time()
 
-                read_laters = ReadLater.objects.filter(entry=entry, user=request.user)
-                entry_json["read_later"] = read_laters.exists()
+    entries = view_to_use.get_queryset(use_entry_limit=False)
 
-                visits = UserEntryVisitHistory.objects.filter(
-                    entry=entry, user=request.user
-                )
-                entry_json["visited"] = visits.exists()
+    search_view = view_to_use.get_search_view()
+    json_obj["view"] = search_view.name
+    json_obj["conditions"] = str(view_to_use.get_conditions())
+    json_obj["errors"] = view_to_use.get_errors()
 
-                json_obj["entries"].append(entry_json)
+    limit = None
+    if search_view.entry_limit:
+        limit = search_view.entry_limit
 
-        json_obj["timestamp_s"] = time.time() - start_time
-        view_to_use.get_time_diff_text("handle_json_view returning")
+    if "count" in request.GET:
+        json_obj["count"] = entries.count()
+        if limit is not None:
+            json_obj["count"] = min(json_obj["count"], limit)
 
-        return JsonResponse(json_obj, json_dumps_params={"indent": 4})
+    paginator = KeysetPaginator(
+        entries,
+        view_to_use.get_order_by(),
+        view_to_use.get_paginate_by(),
+        limit=limit,
+    )
+
+    try:
+        page_entries, json_obj["next"] = paginator.get_page(request.GET["cursor"])
+    except ValueError as E:
+        json_obj["errors"].append(str(E))
+        page_entries = []
+    except Exception as E:
+        json_obj["errors"].append("Cannot obtain entries {}".format(str(E)))
+        page_entries = []
+
+    json_obj["entries"] = get_json_entries(request, page_entries)
+    json_obj["timestamp_s"] = time.time() - start_time
+
+    return JsonResponse(json_obj, json_dumps_params={"indent": 4})
 
 
 def entries_json(request):
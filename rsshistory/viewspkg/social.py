@@ -73,7 +73,7 @@ def social_data_update(request, pk):
         p.context["summary_text"] = "Social data not supported"
         return p.render("summary_present.html")
 
-    BackgroundJobController.link_download_social_data(entry=entry)
+    BackgroundJobController.link_download_social_data(entry=entry, force=True)
 
     p.context["summary_text"] = "OK"
     return p.render("summary_present.html")
@@ -39,6 +39,7 @@ from ..models import (
     UserBookmarks,
     UserSearchHistory,
     UserEntryVisitHistory,
+    UserEntryVisitEvent,
     UserEntryTransitionHistory,
     KeyWords,
     BlockEntry,
@@ -65,6 +66,8 @@ from ..controllers import (
     EntriesUpdater,
     BackgroundJobController,
     SystemOperationController,
+    TableStatistics,
+    SystemIndicators,
     system_setup_for_news,
     system_setup_for_gallery,
     system_setup_for_search_engine,
@@ -253,102 +256,52 @@ def system_status(request):
     return p.render("system_status.html")
 
 
+def get_status_tables():
+    return [
+        ("LinkDataModel", LinkDataController),
+        ("ArchiveLinkDataModel", ArchiveLinkDataController),
+        ("SourceDataModel", SourceDataController),
+        ("SourceOperationalData", SourceOperationalData),
+        ("ConfigurationEntry", ConfigurationEntry),
+        ("BackgroundJob", BackgroundJob),
+        ("BackgroundJobHistory", BackgroundJobHistory),
+        ("AppLogging", AppLogging),
+        ("UserConfig", UserConfig),
+        ("SystemOperation", SystemOperation),
+        ("KeyWords", KeyWords),
+        ("BlockEntry", BlockEntry),
+        ("BlockEntryList", BlockEntryList),
+        ("SocialData", SocialData),
+        ("UserTags", UserTags),
+        ("UserCompactedTags", UserCompactedTags),
+        ("CompactedTags", CompactedTags),
+        ("EntryCompactedTags", EntryCompactedTags),
+        ("UserVotes", UserVotes),
+        ("UserBookmarks", UserBookmarks),
+        ("UserComments", UserCommentsController),
+        ("UserSearchHistory", UserSearchHistory),
+        ("UserEntryVisitHistory", UserEntryVisitHistory),
+        ("UserEntryVisitEvent", UserEntryVisitEvent),
+        ("UserEntryTransitionHistory", UserEntryTransitionHistory),
+        ("SearchHistory", SearchHistory),
+        ("EntryVisitHistory", EntryVisitHistory),
+        ("EntryTransitionHistory", EntryTransitionHistory),
+        ("DataExport", DataExport),
+        ("SourceExportHistory", SourceExportHistory),
+        ("ModelFiles", ModelFiles),
+        ("Domains", Domains),
+    ]
+
+
 def json_table_status(request):
     p = SimpleViewPage(request, ConfigurationEntry.ACCESS_TYPE_STAFF)
     if not p.is_allowed():
         return redirect("{}:missing-rights".format(LinkDatabase.name))
 
-    table = []
-
-    table.append({"name": "LinkDataModel", "count": LinkDataController.objects.count()})
-    table.append(
-        {
-            "name": "ArchiveLinkDataModel",
-            "count": ArchiveLinkDataController.objects.count(),
-        }
-    )
-
-    table.append(
-        {"name": "SourceDataModel", "count": SourceDataController.objects.count()}
-    )
-    table.append(
-        {
-            "name": "SourceOperationalData",
-            "count": SourceOperationalData.objects.count(),
-        }
-    )
-
-    table.append(
-        {"name": "ConfigurationEntry", "count": ConfigurationEntry.objects.count()}
-    )
-
-    table.append({"name": "BackgroundJob", "count": BackgroundJob.objects.count()})
-    table.append(
-        {"name": "BackgroundJobHistory", "count": BackgroundJobHistory.objects.count()}
-    )
-    table.append({"name": "AppLogging", "count": AppLogging.objects.count()})
-
-    table.append({"name": "UserConfig", "count": UserConfig.objects.count()})
-    table.append({"name": "SystemOperation", "count": SystemOperation.objects.count()})
-
-    table.append({"name": "KeyWords", "count": KeyWords.objects.count()})
-    table.append({"name": "BlockEntry", "count": BlockEntry.objects.count()})
-    table.append({"name": "BlockEntryList", "count": BlockEntryList.objects.count()})
-
-    table.append({"name": "SocialData", "count": SocialData.objects.count()})
-    table.append({"name": "UserTags", "count": UserTags.objects.count()})
-    table.append(
-        {"name": "UserCompactedTags", "count": UserCompactedTags.objects.count()}
-    )
-    table.append({"name": "CompactedTags", "count": CompactedTags.objects.count()})
-    table.append(
-        {"name": "EntryCompactedTags", "count": EntryCompactedTags.objects.count()}
-    )
-    table.append({"name": "UserVotes", "count": UserVotes.objects.count()})
-    table.append({"name": "UserBookmarks", "count": UserBookmarks.objects.count()})
-    table.append(
-        {"name": "UserComments", "count": UserCommentsController.objects.count()}
-    )
-    table.append(
-        {"name": "UserSearchHistory", "count": UserSearchHistory.objects.count()}
-    )
-    table.append(
-        {
-            "name": "UserEntryVisitHistory",
-            "count": UserEntryVisitHistory.objects.count(),
-        }
-    )
-    table.append(
-        {
-            "name": "UserEntryTransitionHistory",
-            "count": UserEntryTransitionHistory.objects.count(),
-        }
-    )
-    table.append(
-        {
-            "name": "SearchHistory",
-            "count": SearchHistory.objects.count(),
-        }
-    )
-    table.append(
-        {
-            "name": "EntryVisitHistory",
-            "count": EntryVisitHistory.objects.count(),
-        }
-    )
-    table.append(
-        {
-            "name": "EntryTransitionHistory",
-            "count": EntryTransitionHistory.objects.count(),
-        }
-    )
+    # exact counts can be slow for big tables
+    exact = "exact" in request.GET
 
-    table.append({"name": "DataExport", "count": DataExport.objects.count()})
-    table.append(
-        {"name": "SourceExportHistory", "count": SourceExportHistory.objects.count()}
-    )
-    table.append({"name": "ModelFiles", "count": ModelFiles.objects.count()})
-    table.append({"name": "Domains", "count": Domains.objects.count()})
+    table = TableStatistics.get_tables(get_status_tables(), exact=exact)
 
     # u = EntriesUpdater()
     # entries = u.get_entries_to_update()
@@ -436,6 +389,9 @@ def json_system_status(request):
 
     data["directory"] = c.directory
 
+    data["configuration_cache"] = ConfigurationEntry.cache.get_stats()
+    data["system_health_cache"] = SystemOperation.cache.get_stats()
+
     data["threads"] = []
 
     threads = SystemOperationController.get_threads()
@@ -836,32 +792,23 @@ def json_indicators(request):
     if not p.is_allowed():
         return redirect("{}:missing-rights".format(LinkDatabase.name))
 
-    process_source_queue_size = BackgroundJobController.get_number_of_jobs(
-        BackgroundJobController.JOB_PROCESS_SOURCE
-    )
-
-    sources = SourceOperationalData.objects.filter(
-        consecutive_errors__gt=0, source_obj__enabled=True
-    )
-
-    error_jobs = BackgroundJobController.objects.filter(errors__gt=0)
-
     configuration_entry = Configuration.get_object().config_entry
-    system_controller = SystemOperationController()
 
     if not request.user.is_authenticated:
         indicators = {}
         data = {"indicators": indicators}
         return JsonResponse(data, json_dumps_params={"indent": 4})
 
-    sources_are_fetched = process_source_queue_size > 0
-    sources_queue_size = process_source_queue_size
-    is_sources_error = sources.count() > 0
-    is_internet_ok = system_controller.is_internet_ok()
+    system_indicators = SystemIndicators.get()
+
+    sources_queue_size = system_indicators["sources_queue_size"]
+    sources_are_fetched = sources_queue_size > 0
+    is_sources_error = system_indicators["is_sources_error"]
+    is_internet_ok = system_indicators["is_internet_ok"]
 
-    is_threading_ok = system_controller.is_threading_ok()
+    is_threading_ok = system_indicators["is_threading_ok"]
 
-    is_backgroundjobs_error = error_jobs.count() > 0
+    is_backgroundjobs_error = system_indicators["is_backgroundjobs_error"]
     is_configuration_error = False
     check_later_queue_size = ReadLater.objects.filter(user=request.user).count()
     check_later = check_later_queue_size > 0
@@ -889,7 +836,7 @@ def json_indicators(request):
     indicators["internet_error"]["message"] = f"Internet error"
     indicators["internet_error"]["status"] = is_internet_error
 
-    is_remote_server_down = system_controller.is_remote_server_down()
+    is_remote_server_down = system_indicators["is_remote_server_down"]
     indicators["crawling_server_error"] = {}
     indicators["crawling_server_error"]["message"] = f"Crawling server error"
     indicators["crawling_server_error"]["status"] = is_remote_server_down
@@ -12,3 +12,4 @@ from .converters import (
     MarkDownConverter,
     MarkDownDynamicConverter,
 )
+from .jsonreader import JsonStreamReader, read_json_file
@@ -1,5 +1,9 @@
 import logging
 import traceback
+import itertools
+import textwrap
+from io import StringIO
+
 from utils.logger import get_logger
 
 
@@ -94,18 +98,33 @@ class ItemConverterFabric(object):
         if self.export_columns_all:
             return self.items
 
-        result = []
+        return list(self.get_filtered_items())
+
+    def get_filtered_items(self):
+        """
+        Items are filtered one by one. Items can be a generator
+        """
         for item in self.items:
+            if self.export_columns_all:
+                yield item
+                continue
+
             result_dict = {}
             for use_column in self.export_columns:
                 if use_column in item:
                     result_dict[use_column] = item[use_column]
 
-            result.append(result_dict)
-
-        return result
+            yield result_dict
 
     def export(self):
+        with StringIO() as fh:
+            self.write(fh)
+            return fh.getvalue()
+
+    def write(self, file):
+        """
+        Writes items to file, item by item. Memory does not depend on number of items
+        """
         raise NotImplemented("Not implemented")
 
     def from_text(self, text):
@@ -116,15 +135,32 @@ class JsonConverter(ItemConverterFabric):
     def __init__(self, items):
         super().__init__(items)
 
-    def export(self):
-        item_data = self.get_filtered_columns()
-
+    def write(self, file):
+        """
+        Output is the same as json.dumps of the whole list
+        """
         import json
 
-        # if keys are not sorted, then order of keys in maps will be random
-        # this can result in unnecessary export commit operations
+        file.write("[")
+
+        first = True
+        for item in self.get_filtered_items():
+            # if keys are not sorted, then order of keys in maps will be random
+            # this can result in unnecessary export commit operations
+            item_text = json.dumps(item, sort_keys=True, indent=4)
+
+            if first:
+                file.write("\n")
+            else:
+                file.write(",\n")
+            file.write(textwrap.indent(item_text, "    "))
+
+            first = False
 
-        return json.dumps(item_data, sort_keys=True, indent=4)
+        if first:
+            file.write("]")
+        else:
+            file.write("\n]")
 
     def from_text(self, text):
         import json
@@ -133,29 +169,35 @@ class JsonConverter(ItemConverterFabric):
 
 
 import csv
-from io import StringIO
 
 
 class CsvConverter(ItemConverterFabric):
     def __init__(self, items):
         super().__init__(items)
-        csv.register_dialect("semi", delimiter=";", quoting=csv.QUOTE_NONE)
+        csv.register_dialect("semi", delimiter=";", quoting=csv.QUOTE_MINIMAL)
 
-    def export(self):
-        # TODO
-        item_data = self.get_filtered_columns()
+    def write(self, file):
+        items = iter(self.get_filtered_items())
 
-        fieldnames = self.get_export_columns()
-        with StringIO() as fh:
-            writer = csv.DictWriter(fh, fieldnames=fieldnames, dialect="semi")
+        if self.export_columns_all:
+            # columns of the first item are used
+            first_item = next(items, None)
+            if first_item is None:
+                return
+
+            fieldnames = list(first_item.keys())
+            items = itertools.chain([first_item], items)
+        else:
+            fieldnames = self.export_columns
 
-            writer.writeheader()
+        writer = csv.DictWriter(
+            file, fieldnames=fieldnames, dialect="semi", extrasaction="ignore"
+        )
 
-            for item in item_data:
-                writer.writerow(item)
+        writer.writeheader()
 
-            fh.seek(0)
-            return fh.read()
+        for item in items:
+            writer.writerow(item)
 
     def from_text(self, text):
         items = []
@@ -170,62 +212,35 @@ class CsvConverter(ItemConverterFabric):
 from string import Template
 
 
-class MarkDownConverter(ItemConverterFabric):
-    def __init__(self, items, item_template):
-        super().__init__(items)
-        self.item_template = item_template
-
-    def export(self):
-        result = ""
-
-        items_data = self.get_filtered_columns()
-        for item in items_data:
-            item_data = self.use_template(item)
-            result += item_data + "\n"
-
-        return result
-
-    def use_template(self, map_data):
-        try:
-            t = Template(self.item_template)
-            return t.safe_substitute(map_data)
-        except KeyError:
-            logger = get_logger("utils")
-            logger.exc(
-                "Template exception {0} {1}".format(
-                    self.item_template,
-                    str(map_data),
-                )
-            )
-        return ""
-
-
 class MarkDownDynamicConverter(object):
     def __init__(self, items, column_order):
         self.items = items
         self.column_order = column_order
 
     def export(self):
-        result = ""
+        with StringIO() as fh:
+            self.write(fh)
+            return fh.getvalue()
 
+    def write(self, file):
         for item in self.items:
-            column_index = 0
-            for acolumn in self.column_order:
-                if acolumn in item and item[acolumn] != None and item[acolumn] != []:
-                    aproperty_value = item[acolumn]
+            file.write(self.get_item_text(item))
+
+    def get_item_text(self, item):
+        result = ""
 
-                    if acolumn == "title":
-                        result += " ## {}\n".format(aproperty_value)
-                    elif acolumn == "link" or acolumn == "url":
-                        result += " - [{}]({})\n".format(
-                            aproperty_value, aproperty_value
-                        )
-                    else:
-                        result += " - {}: {}\n".format(acolumn, aproperty_value)
+        for acolumn in self.column_order:
+            if acolumn in item and item[acolumn] != None and item[acolumn] != []:
+                aproperty_value = item[acolumn]
 
-                    column_index += 1
+                if acolumn == "title":
+                    result += " ## {}\n".format(aproperty_value)
+                elif acolumn == "link" or acolumn == "url":
+                    result += " - [{}]({})\n".format(aproperty_value, aproperty_value)
+                else:
+                    result += " - {}: {}\n".format(acolumn, aproperty_value)
 
-            result += "\n"
+        result += "\n"
 
         return result
 
@@ -234,22 +249,16 @@ class MarkDownConverter(ItemConverterFabric):
     def __init__(self, items, item_template):
         super().__init__(items)
         self.item_template = item_template
+        self.template = Template(item_template)
 
-    def export(self):
-        result = ""
-
-        items_data = self.get_filtered_columns()
-        for item in items_data:
-            item_data = self.use_template(item)
-            result += item_data + "\n"
-
-        return result
+    def write(self, file):
+        for item in self.get_filtered_items():
+            file.write(self.use_template(item) + "\n")
 
     def use_template(self, map_data):
         try:
-            t = Template(self.item_template)
-            return t.safe_substitute(map_data)
-        except KeyError:
+            return self.template.safe_substitute(map_data)
+        except KeyError as E:
             logger = get_logger("utils")
 
             logger.exc(
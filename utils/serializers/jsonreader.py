@@ -0,0 +1,120 @@
+"""
+Streaming reader of JSON files.
+
+Does not depend on django, it can be used by worker processes.
+"""
+
+import json
+
+
+class JsonStreamReader(object):
+    """
+    Reads items of top level JSON list one by one. Whole file is not loaded
+    into memory, only the item that is being decoded.
+
+    Any other top level value is read whole, and returned as the only item.
+    """
+
+    READ_SIZE = 64 * 1024
+
+    WHITESPACE = " \t\r\n"
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.decoder = json.JSONDecoder()
+
+        self.file = None
+        self.buffer = ""
+        self.position = 0
+
+    def is_list(self):
+        with open(self.file_path, "r", encoding="utf-8") as file:
+            while True:
+                text = file.read(1)
+                if text == "":
+                    return False
+                if text not in JsonStreamReader.WHITESPACE:
+                    return text == "["
+
+    def read(self):
+        """
+        Yields items of the file
+        """
+        with open(self.file_path, "r", encoding="utf-8") as file:
+            self.file = file
+            self.buffer = ""
+            self.position = 0
+
+            if self.peek() != "[":
+                if self.peek() != "":
+                    yield self.decode()
+                return
+
+            self.position += 1
+
+            while True:
+                character = self.peek()
+                if character == "]" or character == "":
+                    return
+                if character == ",":
+                    self.position += 1
+                    continue
+
+                yield self.decode()
+
+    def fill(self):
+        """
+        Reads next part of file. Already decoded text is dropped.
+
+        @return False if end of file was reached
+        """
+        text = self.file.read(JsonStreamReader.READ_SIZE)
+        if text == "":
+            return False
+
+        self.buffer = self.buffer[self.position :] + text
+        self.position = 0
+        return True
+
+    def peek(self):
+        """
+        Returns the next character, which is not whitespace
+        """
+        while True:
+            while (
+                self.position < len(self.buffer)
+                and self.buffer[self.position] in JsonStreamReader.WHITESPACE
+            ):
+                self.position += 1
+
+            if self.position < len(self.buffer):
+                return self.buffer[self.position]
+
+            if not self.fill():
+                return ""
+
+    def decode(self):
+        while True:
+            try:
+                item, end = self.decoder.raw_decode(self.buffer, self.position)
+            except json.JSONDecodeError:
+                if not self.fill():
+                    raise
+                continue
+
+            # number at the end of the buffer could be cut in half
+            if end == len(self.buffer) and self.fill():
+                continue
+
+            self.position = end
+            return item
+
+
+def read_json_file(file_path):
+    """
+    Worker process function.
+
+    @return top level list flag, and list of items
+    """
+    reader = JsonStreamReader(file_path)
+    return reader.is_list(), list(reader.read())
@@ -20,6 +20,7 @@ from sqlalchemy import (
     DateTime,
     delete,
     update,
+    insert,
     asc,
     desc,
 )
@@ -473,3 +474,126 @@ class SqlModel(object):
             query = query.offset(offset).limit(rows_per_page)
 
             return query.all()
+
+
+class SqlBulkWriter(object):
+    """
+    Writes snapshot database in bulk.
+
+     - rows are inserted with executemany, in large transactions
+     - journal, and synchronous writes are disabled during the build.
+       If build is interrupted, file should be removed
+     - secondary indices are built after all rows were inserted
+    """
+
+    BATCH_SIZE = 5000
+
+    # table, columns. Created after the load
+    INDICES = [
+        (EntriesTable, ["date_published"]),
+        (EntriesTable, ["source_id"]),
+        (EntriesTable, ["bookmarked"]),
+        (UserTags, ["entry_object"]),
+        (UserTags, ["tag"]),
+        (UserBookmarks, ["entry_object"]),
+        (UserVotes, ["entry_object"]),
+    ]
+
+    def __init__(self, database_file="test.db", engine=None):
+        self.db_file = database_file
+
+        if not engine:
+            self.engine = create_engine("sqlite:///" + str(self.db_file))
+        else:
+            self.engine = engine
+
+        self.connection = None
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.finish()
+        self.close()
+
+    def open(self):
+        Base.metadata.create_all(self.engine)
+
+        self.connection = self.engine.connect()
+        self.connection.exec_driver_sql("PRAGMA journal_mode=OFF")
+        self.connection.exec_driver_sql("PRAGMA synchronous=OFF")
+
+    def insert(self, table, rows):
+        """
+        @param rows iterable of maps. All maps should have the same keys
+
+        @return number of inserted rows
+        """
+        defaults = self.get_defaults(table)
+
+        count = 0
+        batch = []
+
+        for row in rows:
+            # executemany does not apply defaults for None values
+            for name, default in defaults.items():
+                if row.get(name) is None:
+                    row[name] = default
+
+            batch.append(row)
+
+            if len(batch) >= SqlBulkWriter.BATCH_SIZE:
+                count += self.insert_batch(table, batch)
+                batch = []
+
+        count += self.insert_batch(table, batch)
+
+        self.connection.commit()
+        return count
+
+    def get_defaults(self, table):
+        """
+        Returns defaults of columns, which do not accept NULL
+        """
+        defaults = {}
+
+        for column in table.__table__.columns:
+            if column.nullable or column.default is None:
+                continue
+            if column.default.is_scalar:
+                defaults[column.name] = column.default.arg
+
+        return defaults
+
+    def insert_batch(self, table, batch):
+        if not batch:
+            return 0
+
+        self.connection.execute(insert(table), batch)
+        return len(batch)
+
+    def finish(self):
+        for table, columns in SqlBulkWriter.INDICES:
+            table_name = table.__tablename__
+            index_name = "ix_{}_{}".format(table_name, "_".join(columns))
+
+            self.connection.exec_driver_sql(
+                "CREATE INDEX IF NOT EXISTS {} ON {} ({})".format(
+                    index_name, table_name, ", ".join(columns)
+                )
+            )
+
+        self.connection.commit()
+
+        self.connection.exec_driver_sql("PRAGMA journal_mode=DELETE")
+        self.connection.exec_driver_sql("PRAGMA synchronous=FULL")
+
+    def close(self):
+        if self.connection:
+            self.connection.close()
+            self.connection = None
+
+        if self.engine:
+            self.engine.dispose()